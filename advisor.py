@@ -0,0 +1,1946 @@
+#!/usr/bin/env python3
+"""
+Motor do conselheiro financeiro (IA de regras).
+
+`AdvisorEngine` é criado uma vez por processo e guarda o que antes era
+refeito a cada requisição dentro da view `financial_advisor`:
+    - tabelas de intenção compiladas: palavras-chave com peso pré-calculado
+      e padrões específicos já decompostos em regras, tudo já normalizado
+      como as perguntas (sem acentos);
+    - o classificador de intenções (intent_model.IntentModel), quando há
+      modelo treinado; as regras por palavra-chave ficam como reserva;
+    - glossário (FIN_GLOSSARY) e seu índice por tokens (nlp.TermIndex);
+    - os modelos de resposta (métodos `compose` e `enrich_response_for_clarity`).
+
+`answer(question, user_snapshot, profile, mode)` só aloca a resposta. O
+snapshot é um dict com income, expense, balance, savings_rate, top_expenses
+e history (transações dos últimos meses); o perfil só precisa do atributo
+risk_profile. Não depende de Flask nem de banco: dá para medir com
+`python -m timeit` sem contexto de requisição.
+"""
+
+import re
+import threading
+from collections import Counter, OrderedDict
+from functools import partial
+from types import MappingProxyType
+from typing import NamedTuple
+
+from categories import classify_category
+from money import format_currency, from_cents, sum_cents
+from nlp import TermIndex, normalize_text, preprocess_question
+
+ADVISOR_MODES = ('didatico', 'direto', 'compacto', 'especialista')
+DEFAULT_MODE = 'didatico'
+COMPACT_MAX_LINES = 40
+ANALYSIS_CACHE_SIZE = 4096
+ANSWER_CACHE_SIZE = 2048
+
+# Glossário financeiro resumido (pt-BR)
+FIN_GLOSSARY = {
+    'cdi': 'CDI (Certificado de Depósito Interbancário): taxa de referência da renda fixa no Brasil. Muitos investimentos pós-fixados rendem um percentual do CDI.',
+    'selic': 'SELIC: taxa básica de juros da economia. Tesouro Selic acompanha essa taxa e tem alta liquidez e baixo risco.',
+    'ipca': 'IPCA: índice oficial de inflação. Títulos atrelados ao IPCA (Tesouro IPCA+) protegem o poder de compra no longo prazo.',
+    'tesouro selic': 'Tesouro Selic: título público pós-fixado ligado à SELIC, indicado para reserva de emergência. Incide IR pela tabela regressiva (22,5% a 15%).',
+    'tesouro ipca+': 'Tesouro IPCA+: título público híbrido (IPCA + taxa real). Bom para objetivos de médio/longo prazo. Tem marcação a mercado.',
+    'cdb': 'CDB: título de renda fixa emitido por bancos. Pode ser pós-fixado (CDI), prefixado ou IPCA+. Cobertura do FGC até limites vigentes.',
+    'lci': 'LCI: Letra de Crédito Imobiliário. Isenta de IR para pessoa física, lastreada no setor imobiliário. Geralmente tem carência.',
+    'lca': 'LCA: Letra de Crédito do Agronegócio. Isenta de IR para pessoa física, lastreada no agronegócio. Geralmente com carência.',
+    'debentures incentivadas': 'Debêntures incentivadas: títulos de empresas com isenção de IR (PF) quando enquadradas em projetos de infraestrutura.',
+    'reserva de emergencia': 'Reserva de emergência: dinheiro para imprevistos (ideal: 6 meses de despesas) em produtos de alta liquidez e baixo risco (ex.: Tesouro Selic).',
+    'renda fixa': 'Renda fixa: investimentos com regras de remuneração definidas (ex.: Tesouro, CDB, LCI/LCA).',
+    'renda variavel': 'Renda variável: ativos cujo preço pode oscilar (ex.: ações, ETFs). Risco e retorno maiores no longo prazo.',
+}
+
+def share_of_income(value, income) -> float:
+    """Percentual da renda (0 quando não há renda no mês)."""
+    return value / income * 100 if income else 0.0
+
+
+def tldr_lines(summary: dict) -> list[str]:
+    """Resumo rápido: só precisa do resumo do mês (income, expense, balance, savings_rate)."""
+    income = summary.get('income', 0.0)
+    expense = summary.get('expense', 0.0)
+    balance = summary.get('balance', 0.0)
+    savings_rate = summary.get('savings_rate', 0.0)
+
+    # Determinar prioridade principal
+    if balance < 0:
+        priority = "Sair do vermelho e estabilizar o fluxo de caixa"
+    elif savings_rate < 10:
+        priority = "Elevar poupança para pelo menos 10%"
+    else:
+        priority = "Otimizar orçamento e investir com disciplina"
+
+    return [
+        "📌 Resumo rápido (TL;DR)",
+        f"- Receitas: {format_currency(income)} | Despesas: {format_currency(expense)} | Saldo: {format_currency(balance)}",
+        f"- Taxa de poupança estimada: {savings_rate:.1f}%",
+        f"- Prioridade: {priority}",
+        ""
+    ]
+
+
+def checklist_lines(intents: list[str]) -> list[str]:
+    """Checklist prático pela intenção principal."""
+    top_intent = intents[0] if intents else 'ajuda'
+    checklist: list[str] = ["✅ Plano de ação (passo a passo)"]
+    if top_intent == 'dívida':
+        checklist += [
+            "- Hoje: Liste todas as dívidas (valor/juros), pague o mínimo e cancele cartões extras",
+            "- 7 dias: Negocie taxas/prazos; concentre excedente na menor dívida (bola de neve)",
+            "- 30 dias: Corte 10-20% das despesas variáveis e crie reserva inicial"
+        ]
+    elif top_intent == 'investimento':
+        checklist += [
+            "- Hoje: Defina horizonte (meses) e perfil (conservador/moderado/arrojado)",
+            "- 7 dias: Abra/valide conta em corretora e simule alocações por perfil",
+            "- 30 dias: Inicie aportes mensais automáticos (DCA) com revisão trimestral"
+        ]
+    elif top_intent == 'poupança':
+        checklist += [
+            "- Hoje: Automatize 10-20% do salário para conta de reserva",
+            "- 7 dias: Reduza 2-3 gastos recorrentes e limite a maior categoria",
+            "- 30 dias: Atingir 1 salário de reserva (meta incremental)"
+        ]
+    elif top_intent == 'gasto':
+        checklist += [
+            "- Hoje: Bloqueie compras por impulso e cancele assinaturas pouco usadas",
+            "- 7 dias: Reprecifique contas (telefone/internet/seguros)",
+            "- 30 dias: Estabeleça tetos por categoria e monitore semanalmente"
+        ]
+    elif top_intent == 'orçamento':
+        checklist += [
+            "- Hoje: Adote 50/30/20 como base (ou variação adequada)",
+            "- 7 dias: Ajuste limites por categoria no app",
+            "- 30 dias: Revisão e correção de desvios"
+        ]
+    else:
+        checklist += [
+            "- Hoje: Defina objetivo, valor e prazo",
+            "- 7 dias: Liste ações e recursos necessários",
+            "- 30 dias: Revise progresso e ajuste a estratégia"
+        ]
+    checklist.append("")
+    return checklist
+
+
+def terms_lines(intents: list[str], glossary_hits: list[str]) -> list[str]:
+    """Explicação dos termos usados (glossário); vazio se não houver termos."""
+    top_intent = intents[0] if intents else 'ajuda'
+    lines = []
+    extra_terms = []
+    if top_intent == 'investimento':
+        extra_terms = ['cdi', 'selic', 'ipca', 'tesouro selic', 'tesouro ipca+']
+    if top_intent == 'imposto':
+        extra_terms += ['ipca', 'cdi']
+    explain_terms = list(dict.fromkeys([*(glossary_hits or ()), *extra_terms]))[:6]
+    if explain_terms:
+        lines.append("📖 Explicação simples (termos)")
+        for t in explain_terms:
+            desc = FIN_GLOSSARY.get(t)
+            if desc:
+                lines.append(f"- {t.title()}: {desc}")
+        lines.append("")
+    return lines
+
+
+# Perguntas sugeridas (para continuar)
+SUGGESTION_LINES = (
+    "❓ Perguntas sugeridas",
+    "- Quer que eu gere um plano mensal detalhado com metas SMART?",
+    "- Deseja que eu simule cenários com 10%, 20% e 30% de poupança?",
+    "- Posso sugerir cortes por categoria com impacto estimado?",
+    "",
+)
+
+# Reforço técnico do modo especialista
+EXPERT_NOTE_LINES = (
+    "",
+    "🧪 Nota técnica (especialista):",
+    "- Considere risco de liquidez, marcação a mercado e adequação ao perfil regulatório.",
+    "- Diversifique emissores e classes; acompanhe CDI/SELIC/IPCA e calendário tributário.",
+)
+
+
+def clarity_sections(raw_text: str, summary: dict, intents: list[str], glossary_hits: list[str]):
+    """Seções (nome, texto) da resposta didática; juntas por quebra de linha formam a resposta.
+
+    É um gerador: o TL;DR sai antes de qualquer outra coisa ser calculada.
+    `raw_text` pode ser uma função sem argumentos que monta o núcleo só quando
+    ele for pedido.
+    """
+    yield 'tldr', "\n".join(tldr_lines(summary))
+    core = raw_text() if callable(raw_text) else raw_text
+    yield 'core', core.strip() + "\n"
+    yield 'checklist', "\n".join(checklist_lines(intents))
+    terms = terms_lines(intents, glossary_hits)
+    if terms:
+        yield 'terms', "\n".join(terms)
+    yield 'suggestions', "\n".join(SUGGESTION_LINES)
+
+
+def enrich_response_for_clarity(raw_text: str,
+                                summary: dict,
+                                intents: list[str],
+                                entities: dict,
+                                profile,
+                                glossary_hits: list[str]) -> str:
+    """Anexa um resumo claro, termos e checklist prático para tornar a resposta mais didática."""
+    return "\n".join(text for _, text in clarity_sections(raw_text, summary, intents, glossary_hits))
+
+
+def apply_profile_to_allocations(profile, base_amount: float) -> dict:
+    # Distribuição por perfil de risco
+    rp = (profile.risk_profile or 'moderado').lower()
+    if rp == 'conservador':
+        return {
+            'liquidez_diaria': base_amount * 0.70,
+            'curto_prazo': base_amount * 0.20,
+            'diversificados': base_amount * 0.08,
+            'oportunidades': base_amount * 0.02,
+        }
+    elif rp == 'arrojado':
+        return {
+            'liquidez_diaria': base_amount * 0.40,
+            'curto_prazo': base_amount * 0.20,
+            'diversificados': base_amount * 0.35,
+            'oportunidades': base_amount * 0.05,
+        }
+    # moderado (default)
+    return {
+        'liquidez_diaria': base_amount * 0.60,
+        'curto_prazo': base_amount * 0.25,
+        'diversificados': base_amount * 0.10,
+        'oportunidades': base_amount * 0.05,
+    }
+
+
+# Palavras-chave por intenção. As repetições são mantidas de propósito: cada
+# ocorrência soma pontos, como no cálculo original
+INTENT_KEYWORDS = {
+    'poupança': [
+        'poupar', 'economizar', 'guardar', 'economia', 'poupança', 'savings', 'save', 
+        'cortar gastos', 'reduzir despesas', 'gastar menos', 'economizar mais', 
+        'onde guardar', 'melhor lugar', 'guardar dinheiro', 'economizar dinheiro',
+        'poupar dinheiro', 'cortar despesas', 'reduzir gastos', 'gastar menos',
+        'economizar mais', 'onde guardar dinheiro', 'melhor lugar para guardar',
+        'como economizar', 'como poupar', 'como guardar', 'economizar mais dinheiro',
+        'poupar mais', 'guardar mais', 'cortar custos', 'reduzir custos',
+        'não consigo economizar', 'tô gastando muito', 'gasto demais',
+        'dinheiro não sobra', 'salário não dá', 'não sobra nada',
+        'tô no vermelho', 'saldo negativo', 'déficit', 'prejuízo',
+        'tô quebrado', 'sem dinheiro', 'falta dinheiro', 'tô apertado',
+        'tô endividado', 'tô devendo', 'tô no sufoco', 'tô na merda',
+        'tô fudido', 'tô lascado', 'tô ferrado', 'tô na pindaíba'
+    ],
+    'investimento': [
+        'investir', 'investimento', 'aplicar', 'rendimento', 'lucro', 'invest', 
+        'investment', 'onde investir', 'melhor investimento', 'aplicação', 
+        'rentabilidade', 'melhor aplicação', 'onde aplicar', 'investir dinheiro',
+        'melhor investimento', 'onde investir dinheiro', 'aplicar dinheiro',
+        'rendimento do dinheiro', 'lucro do dinheiro', 'investir melhor',
+        'melhor forma de investir', 'como investir', 'onde colocar dinheiro',
+        'aplicação financeira', 'investimento financeiro', 'rendimento financeiro',
+        'onde colocar', 'melhor lugar', 'fazer dinheiro render', 'multiplicar dinheiro',
+        'dinheiro trabalhando', 'renda passiva', 'ganhar dinheiro dormindo',
+        'investimento seguro', 'aplicação segura', 'onde aplicar com segurança'
+    ],
+    'dívida': [
+        'dívida', 'débito', 'cartão', 'emprestimo', 'emprestimo', 'debt', 'credit', 
+        'pagar dívidas', 'quitar', 'financiamento', 'parcelamento', 'melhor forma pagar', 
+        'como quitar', 'pagar cartão', 'quitar cartão', 'pagar débito',
+        'quitar débito', 'pagar empréstimo', 'quitar empréstimo', 'pagar financiamento',
+        'quitar financiamento', 'pagar parcelamento', 'quitar parcelamento',
+        'como pagar dívidas', 'melhor forma de pagar', 'como quitar dívidas',
+        'pagar dívidas', 'quitar dívidas', 'pagar cartão de crédito',
+        'quitar cartão de crédito', 'pagar empréstimo', 'quitar empréstimo',
+        'tô endividado', 'tô devendo', 'tô no vermelho', 'cartão estourou',
+        'limite estourou', 'juros altos', 'tô pagando juros', 'tô no sufoco',
+        'tô ferrado', 'tô lascado', 'tô na merda', 'tô fudido',
+        'tô quebrado', 'tô na pindaíba', 'tô no aperto', 'tô apertado'
+    ],
+    'renda': [
+        'renda', 'ganhar', 'salário', 'receita', 'income', 'salary', 'earn', 
+        'aumentar renda', 'ganhar mais', 'renda extra', 'freelance', 'como ganhar mais', 
+        'aumentar salário', 'ganhar mais dinheiro', 'aumentar renda', 'renda extra',
+        'ganhar dinheiro', 'aumentar salário', 'ganhar mais salário', 'renda adicional',
+        'ganhar mais renda', 'aumentar ganhos', 'ganhar mais ganhos', 'renda complementar',
+        'ganhar dinheiro extra', 'aumentar receita', 'ganhar mais receita',
+        'quero ganhar mais', 'preciso de mais dinheiro', 'salário baixo',
+        'ganho pouco', 'não ganho o suficiente', 'tô ganhando pouco',
+        'preciso de renda extra', 'quero renda extra', 'como ganhar mais dinheiro',
+        'trabalho extra', 'bico', 'freela', 'renda adicional', 'ganhar mais',
+        'aumentar ganhos', 'melhorar salário', 'promoção', 'mudar de emprego'
+    ],
+    'gasto': [
+        'gasto', 'despesa', 'gastar', 'expense', 'spend', 'cost', 'reduzir gastos', 
+        'cortar despesas', 'otimizar gastos', 'gastar menos', 'onde cortar', 
+        'como reduzir', 'reduzir despesas', 'cortar gastos', 'gastar menos dinheiro',
+        'reduzir custos', 'cortar custos', 'otimizar despesas', 'gastar menos',
+        'onde cortar gastos', 'como reduzir gastos', 'reduzir despesas',
+        'cortar despesas', 'otimizar gastos', 'gastar menos dinheiro',
+        'tô gastando muito', 'gasto demais', 'tô gastando demais',
+        'dinheiro não sobra', 'salário não dá', 'não sobra nada',
+        'tô no vermelho', 'saldo negativo', 'déficit', 'prejuízo',
+        'tô quebrado', 'sem dinheiro', 'falta dinheiro', 'tô apertado',
+        'tô endividado', 'tô devendo', 'tô no sufoco', 'tô na merda',
+        'tô fudido', 'tô lascado', 'tô ferrado', 'tô na pindaíba'
+    ],
+    'planejamento': [
+        'planejar', 'futuro', 'objetivo', 'meta', 'plan', 'goal', 'future', 
+        'planejamento', 'estratégia', 'cronograma', 'plano de ação', 'criar plano',
+        'planejar futuro', 'objetivo financeiro', 'meta financeira', 'planejamento financeiro',
+        'estratégia financeira', 'cronograma financeiro', 'plano de ação financeiro',
+        'criar plano financeiro', 'planejar dinheiro', 'objetivo com dinheiro',
+        'meta com dinheiro', 'planejamento com dinheiro', 'estratégia com dinheiro',
+        'não sei o que fazer', 'tô perdido', 'tô confuso', 'não entendo',
+        'me ajuda', 'socorro', 'tô na merda', 'tô fudido', 'tô lascado',
+        'tô ferrado', 'tô na pindaíba', 'tô no sufoco', 'tô no aperto',
+        'não sei por onde começar', 'por onde começar', 'o que fazer primeiro',
+        'qual o primeiro passo', 'primeiro passo', 'começar', 'iniciar'
+    ],
+    'orçamento': [
+        'orçamento', 'controle', 'budget', 'control', 'organizar', 'gerenciar', 
+        'administrar', 'como fazer orçamento', 'controle financeiro', 'orçamento financeiro',
+        'controle de gastos', 'orçamento de gastos', 'controle de despesas',
+        'orçamento de despesas', 'organizar dinheiro', 'gerenciar dinheiro',
+        'administrar dinheiro', 'como fazer orçamento', 'controle financeiro',
+        'orçamento financeiro', 'controle de gastos', 'orçamento de gastos',
+        'organizar finanças', 'controlar dinheiro', 'administrar finanças',
+        'gerenciar finanças', 'controle financeiro', 'organizar gastos',
+        'controlar gastos', 'administrar gastos', 'gerenciar gastos'
+    ],
+    'emergência': [
+        'emergência', 'emergency', 'imprevisto', 'unexpected', 'fundo emergência', 
+        'reserva', 'fundo de emergência', 'reserva de emergência', 'fundo para emergência',
+        'reserva para emergência', 'dinheiro para emergência', 'fundo de emergência',
+        'reserva de emergência', 'fundo para emergência', 'reserva para emergência',
+        'imprevisto', 'emergência', 'reserva', 'fundo', 'segurança',
+        'proteção', 'backup', 'reserva financeira', 'fundo de segurança',
+        'dinheiro guardado', 'reserva de dinheiro', 'fundo de dinheiro'
+    ],
+    'aposentadoria': [
+        'aposentadoria', 'aposentar', 'retirement', 'velhice', 'terceira idade', 
+        'futuro', 'planejamento aposentadoria', 'aposentadoria', 'aposentar',
+        'planejamento para aposentadoria', 'aposentadoria', 'aposentar',
+        'planejamento para aposentadoria', 'aposentadoria', 'aposentar',
+        'velhice', 'terceira idade', 'futuro', 'previdência', 'previdência privada',
+        'previdência social', 'inss', 'aposentadoria', 'aposentar', 'velhice',
+        'terceira idade', 'futuro', 'previdência', 'previdência privada'
+    ],
+    'imóvel': [
+        'casa', 'apartamento', 'imóvel', 'house', 'property', 'real estate', 
+        'comprar casa', 'financiamento imóvel', 'entrada', 'comprar apartamento',
+        'comprar imóvel', 'financiamento casa', 'entrada casa', 'comprar apartamento',
+        'financiamento apartamento', 'entrada apartamento', 'comprar imóvel',
+        'financiamento imóvel', 'entrada imóvel', 'comprar casa', 'financiamento casa',
+        'comprar casa', 'comprar apartamento', 'comprar imóvel', 'financiamento',
+        'entrada', 'financiamento casa', 'financiamento apartamento', 'financiamento imóvel',
+        'entrada casa', 'entrada apartamento', 'entrada imóvel', 'casa própria',
+        'apartamento próprio', 'imóvel próprio', 'casa própria', 'apartamento próprio'
+    ],
+    'educação': [
+        'estudo', 'curso', 'faculdade', 'education', 'study', 'college', 
+        'universidade', 'formação', 'capacitação', 'investir educação',
+        'estudar', 'cursar', 'faculdade', 'universidade', 'formação',
+        'capacitação', 'investir em educação', 'estudar', 'cursar',
+        'faculdade', 'universidade', 'curso', 'estudo', 'formação',
+        'capacitação', 'investir em educação', 'investir em formação',
+        'investir em capacitação', 'investir em estudo', 'investir em curso'
+    ],
+    'seguro': [
+        'seguro', 'insurance', 'proteção', 'protection', 'cobertura', 
+        'previdência', 'preciso seguro', 'qual seguro', 'seguro de vida',
+        'seguro de saúde', 'seguro de carro', 'seguro de casa', 'seguro de vida',
+        'seguro de saúde', 'seguro de carro', 'seguro de casa',
+        'proteção', 'cobertura', 'seguro', 'insurance', 'proteção financeira',
+        'seguro de vida', 'seguro de saúde', 'seguro de carro', 'seguro de casa',
+        'seguro de vida', 'seguro de saúde', 'seguro de carro', 'seguro de casa'
+    ],
+    'imposto': [
+        'imposto', 'tax', 'tributo', 'taxation', 'ir', 'declaração', 
+        'dedução', 'economizar impostos', 'otimização fiscal', 'imposto de renda',
+        'declaração de imposto', 'dedução de imposto', 'economizar imposto',
+        'otimização fiscal', 'imposto de renda', 'declaração de imposto',
+        'ir', 'imposto de renda', 'declaração', 'dedução', 'economizar impostos',
+        'otimização fiscal', 'imposto de renda', 'declaração de imposto',
+        'dedução de imposto', 'economizar imposto', 'otimização fiscal'
+    ],
+    'viagem': [
+        'viagem', 'travel', 'turismo', 'férias', 'passeio', 'destino', 
+        'hotel', 'passagem', 'planejar viagem', 'economizar viagem',
+        'viajar', 'turismo', 'férias', 'passeio', 'destino', 'hotel',
+        'passagem', 'planejar viagem', 'economizar viagem', 'viajar',
+        'férias', 'turismo', 'passeio', 'destino', 'hotel', 'passagem',
+        'planejar viagem', 'economizar viagem', 'viajar', 'turismo'
+    ],
+    'carro': [
+        'carro', 'automóvel', 'veículo', 'car', 'automobile', 'compra carro', 
+        'financiamento carro', 'entrada carro', 'comprar carro', 'comprar automóvel',
+        'financiamento automóvel', 'entrada automóvel', 'comprar veículo',
+        'financiamento veículo', 'entrada veículo', 'comprar carro',
+        'comprar carro', 'comprar automóvel', 'comprar veículo', 'financiamento',
+        'entrada', 'financiamento carro', 'financiamento automóvel', 'financiamento veículo',
+        'entrada carro', 'entrada automóvel', 'entrada veículo', 'carro próprio',
+        'automóvel próprio', 'veículo próprio', 'carro próprio', 'automóvel próprio'
+    ],
+    'negócio': [
+        'negócio', 'empresa', 'business', 'empreendedorismo', 'abrir empresa', 
+        'startup', 'comércio', 'abrir negócio', 'empreender', 'abrir empresa',
+        'startup', 'comércio', 'abrir negócio', 'empreender', 'abrir empresa',
+        'empreendedorismo', 'abrir empresa', 'abrir negócio', 'startup',
+        'comércio', 'empreender', 'abrir empresa', 'abrir negócio',
+        'empreendedorismo', 'startup', 'comércio', 'empreender'
+    ],
+    'casa': [
+        'casa', 'moradia', 'residência', 'lar', 'home', 'comprar casa', 
+        'alugar casa', 'financiamento casa', 'comprar moradia', 'alugar moradia',
+        'financiamento moradia', 'comprar residência', 'alugar residência',
+        'financiamento residência', 'comprar lar', 'alugar lar', 'financiamento lar',
+        'comprar casa', 'alugar casa', 'financiamento casa', 'comprar moradia',
+        'alugar moradia', 'financiamento moradia', 'comprar residência',
+        'alugar residência', 'financiamento residência', 'comprar lar',
+        'alugar lar', 'financiamento lar', 'casa própria', 'moradia própria'
+    ],
+    'cartao': [
+        'cartao', 'cartao de credito', 'fatura', 'rotativo', 'limite', 'parcelar fatura',
+        'juros do cartao', 'anuidade', 'estourou o limite', 'cartao estourou', 'credito'
+    ],
+    'emprestimo': [
+        'emprestimo', 'empréstimo', 'consignado', 'credito pessoal', 'financiamento',
+        'refinanciamento', 'taxa de juros', 'cet', 'parcela', 'tomar emprestado'
+    ],
+    'cripto': [
+        'bitcoin', 'btc', 'ethereum', 'eth', 'cripto', 'criptomoeda', 'crypto',
+        'altcoin', 'blockchain', 'defi', 'stablecoin'
+    ],
+    'cambio': [
+        'cambio', 'câmbio', 'dolar', 'dólar', 'usd', 'euro', 'eur', 'moeda',
+        'moeda estrangeira', 'proteção cambial', 'hedge', 'exposicao cambial'
+    ]
+}
+
+# Padrões de perguntas específicas e informais: intenção fixa ou
+# ((palavra, intenção), (palavra, intenção), intenção padrão)
+SPECIFIC_PATTERNS = {
+    # Padrões de compra
+    'quero comprar': (('carro', 'carro'), ('casa', 'casa'), 'imóvel'),
+    'vou comprar': (('carro', 'carro'), ('casa', 'casa'), 'imóvel'),
+    'preciso comprar': (('carro', 'carro'), ('casa', 'casa'), 'imóvel'),
+
+    # Padrões de viagem
+    'quero viajar': 'viagem',
+    'vou viajar': 'viagem',
+    'preciso viajar': 'viagem',
+    'férias': 'viagem',
+    'turismo': 'viagem',
+
+    # Padrões de negócio
+    'quero abrir': 'negócio',
+    'vou abrir': 'negócio',
+    'preciso abrir': 'negócio',
+    'empreendedorismo': 'negócio',
+    'startup': 'negócio',
+
+    # Padrões de ajuda
+    'preciso de': (('seguro', 'seguro'), ('emergência', 'emergência'), 'ajuda'),
+    'me ajude com': (('orçamento', 'orçamento'), ('planejamento', 'planejamento'), 'ajuda'),
+    'crie um plano': 'planejamento',
+    'melhor forma': (('investir', 'investimento'), ('economizar', 'poupança'), 'ajuda'),
+
+    # Padrões emocionais e informais
+    'tô gastando muito': 'gasto',
+    'tô gastando demais': 'gasto',
+    'gasto demais': 'gasto',
+    'gasto muito': 'gasto',
+    'não consigo economizar': 'poupança',
+    'não sobra nada': 'poupança',
+    'dinheiro não sobra': 'poupança',
+    'salário não dá': 'poupança',
+    'tô endividado': 'dívida',
+    'tô devendo': 'dívida',
+    'tô no vermelho': 'dívida',
+    'cartão estourou': 'dívida',
+    'limite estourou': 'dívida',
+    'quero ganhar mais': 'renda',
+    'preciso ganhar mais': 'renda',
+    'salário baixo': 'renda',
+    'ganho pouco': 'renda',
+    'não sei o que fazer': 'planejamento',
+    'tô perdido': 'ajuda',
+    'tô confuso': 'ajuda',
+    'tô na merda': 'ajuda',
+    'tô fudido': 'ajuda',
+    'tô lascado': 'ajuda',
+    'tô ferrado': 'ajuda',
+    'tô na pindaíba': 'ajuda',
+    'tô no sufoco': 'ajuda',
+    'tô no aperto': 'ajuda',
+    'tô apertado': 'ajuda',
+    'tô quebrado': 'ajuda',
+    'sem dinheiro': 'ajuda',
+    'falta dinheiro': 'ajuda',
+    'me ajuda': 'ajuda',
+    'ajuda': 'ajuda',
+    'socorro': 'ajuda',
+    'não entendo': 'ajuda',
+    'explique': 'ajuda',
+    'dúvida': 'ajuda',
+    'não sei por onde começar': 'planejamento',
+    'por onde começar': 'planejamento',
+    'o que fazer primeiro': 'planejamento',
+    'qual o primeiro passo': 'planejamento',
+    'primeiro passo': 'planejamento',
+    'começar': 'planejamento',
+    'iniciar': 'planejamento',
+
+    # Padrões de investimento
+    'onde colocar': 'investimento',
+    'onde aplicar': 'investimento',
+    'melhor lugar': 'investimento',
+    'fazer dinheiro render': 'investimento',
+    'multiplicar dinheiro': 'investimento',
+    'dinheiro trabalhando': 'investimento',
+    'renda passiva': 'investimento',
+    'ganhar dinheiro dormindo': 'investimento',
+
+    # Padrões de educação
+    'estudar': 'educação',
+    'cursar': 'educação',
+    'faculdade': 'educação',
+    'universidade': 'educação',
+    'curso': 'educação',
+    'formação': 'educação',
+    'capacitação': 'educação',
+
+    # Padrões de seguro
+    'preciso seguro': 'seguro',
+    'qual seguro': 'seguro',
+    'proteção': 'seguro',
+    'cobertura': 'seguro',
+
+    # Padrões de imposto
+    'imposto': 'imposto',
+    'ir': 'imposto',
+    'declaração': 'imposto',
+    'dedução': 'imposto',
+
+    # Padrões de emergência
+    'imprevisto': 'emergência',
+    'emergência': 'emergência',
+    'reserva': 'emergência',
+    'fundo': 'emergência',
+    'segurança': 'emergência',
+    'backup': 'emergência',
+
+    # Padrões de aposentadoria
+    'aposentadoria': 'aposentadoria',
+    'aposentar': 'aposentadoria',
+    'velhice': 'aposentadoria',
+    'terceira idade': 'aposentadoria',
+    'futuro': 'aposentadoria',
+    'previdência': 'aposentadoria',
+    'inss': 'aposentadoria',
+
+    # Padrões de organização
+    'organizar': 'orçamento',
+    'controlar': 'orçamento',
+    'gerenciar': 'orçamento',
+    'administrar': 'orçamento',
+    'controle': 'orçamento',
+    'organização': 'orçamento',
+
+    # Padrões de cartão de crédito
+    'cartao': 'cartao',
+    'fatura': 'cartao',
+    'rotativo': 'cartao',
+    'limite': 'cartao',
+
+    # Padrões de empréstimo
+    'emprestimo': 'emprestimo',
+    'consignado': 'emprestimo',
+    'refinanciamento': 'emprestimo',
+
+    # Padrões de cripto
+    'bitcoin': 'cripto',
+    'btc': 'cripto',
+    'ethereum': 'cripto',
+    'eth': 'cripto',
+    'cripto': 'cripto',
+    'criptomoeda': 'cripto',
+
+    # Padrões de câmbio
+    'dolar': 'cambio',
+    'dólar': 'cambio',
+    'usd': 'cambio',
+    'euro': 'cambio',
+    'eur': 'cambio',
+    'cambio': 'cambio',
+    'câmbio': 'cambio'
+}
+
+# Palavras com peso extra no cálculo de pontuação
+STRONG_KEYWORDS = frozenset((
+    'comprar', 'investir', 'economizar', 'pagar', 'aumentar', 'reduzir', 'melhor', 'como', 'onde', 'quando',
+    'quero', 'preciso', 'ajuda', 'problema', 'solução'))
+EMOTIONAL_MARKERS = ('tô', 'estou', 'sou', 'tenho', 'quero', 'preciso', 'ajuda', 'socorro', 'perdido', 'confuso')
+URGENCY_MARKERS = ('urgente', 'agora', 'imediatamente', 'rápido', 'logo', 'já')
+_STRONG_KEYWORDS_NORMALIZED = frozenset(normalize_text(w) for w in STRONG_KEYWORDS)
+EMOTIONAL_WORDS = EMOTIONAL_MARKERS + ('na merda', 'fudido', 'lascado', 'ferrado', 'na pindaíba', 'no sufoco', 'no aperto',
+                                       'apertado', 'quebrado', 'sem dinheiro', 'falta dinheiro')
+
+
+class QuestionAnalysis(NamedTuple):
+    """Pergunta já analisada (imutável: é compartilhada pelo cache)."""
+    question: str  # normalizada
+    intents: tuple
+    entities: MappingProxyType  # amounts/percents/months em tuplas
+    glossary_hits: tuple
+    signature: str
+
+
+_EDGE_PUNCTUATION_RE = re.compile(r'^[\s?!.,;:…"\'()-]+|[\s?!.,;:…"\'()-]+$')
+
+
+def question_signature(normalized: str) -> str:
+    """Assinatura da pergunta normalizada: sem pontuação nas pontas ('onde investir?' == 'onde investir')."""
+    return _EDGE_PUNCTUATION_RE.sub('', normalized)
+
+
+class LazySection:
+    """Texto de uma seção fixa, renderizado na primeira leitura e guardado.
+
+    No modo compacto as seções depois do corte de linhas nunca são lidas,
+    então nunca são montadas.
+    """
+
+    __slots__ = ('_render', '_text')
+
+    def __init__(self, render):
+        self._render = render
+        self._text = None
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = self._render()  # idempotente: duas threads no máximo repetem o trabalho
+        return self._text
+
+
+def _joined(lines_fn, *args) -> str:
+    return "\n".join(lines_fn(*args))
+
+
+class LruCache:
+    """Cache LRU limitado e seguro entre threads, com contadores."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+    def info(self) -> dict:
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._data), 'maxsize': self.maxsize}
+
+
+class AdvisorAnswer(NamedTuple):
+    response: str
+    intents: list
+
+
+class AdvisorEngine:
+    """Conselheiro financeiro: detecção de intenção, glossário e modelos de resposta."""
+
+    def __init__(self, keywords=INTENT_KEYWORDS, specific_patterns=SPECIFIC_PATTERNS, glossary=FIN_GLOSSARY,
+                 model=None):
+        # Palavras normalizadas como as perguntas: 'dívida' e 'divida' viram a mesma entrada
+        # (intenção, ((palavra, ocorrências, peso base), ...)) na ordem original
+        self.intent_table = tuple(
+            (intent, tuple((word, count, self._base_weight(word))
+                           for word, count in Counter(normalize_text(w) for w in words).items()))
+            for intent, words in keywords.items()
+        )
+        # (padrão, ((palavra, intenção), ...), intenção padrão)
+        self.specific_patterns = tuple(
+            (normalize_text(pattern), (), rule) if isinstance(rule, str)
+            else (normalize_text(pattern), tuple((normalize_text(w), i) for w, i in rule[:-1]), rule[-1])
+            for pattern, rule in specific_patterns.items()
+        )
+        self.emotional_markers = tuple(normalize_text(w) for w in EMOTIONAL_MARKERS)
+        self.urgency_markers = tuple(normalize_text(w) for w in URGENCY_MARKERS)
+        self.emotional_words = tuple(normalize_text(w) for w in EMOTIONAL_WORDS)
+        # Classificador de intenções (None: só regras)
+        self.model = model
+        self.glossary = dict(glossary)
+        self.glossary_index = TermIndex(self.glossary)
+        # assinatura -> QuestionAnalysis
+        self.analyses = LruCache(ANALYSIS_CACHE_SIZE)
+        # (intenções, termos do glossário, modo) -> esqueleto da resposta (skeleton_key)
+        self.answers = LruCache(ANSWER_CACHE_SIZE)
+
+    @staticmethod
+    def _base_weight(word):
+        # 1 por ocorrência, +2 para palavras fortes, +3 para frases completas
+        return 1 + (2 if word in _STRONG_KEYWORDS_NORMALIZED else 0) + (3 if len(word.split()) > 1 else 0)
+
+    def score_intents(self, question_lower):
+        """Pontuação por intenção (só as que pontuaram), na ordem das tabelas."""
+        # Contexto emocional e urgência somam em cada palavra-chave encontrada
+        boost = ((2 if any(word in question_lower for word in self.emotional_markers) else 0)
+                 + (3 if any(word in question_lower for word in self.urgency_markers) else 0))
+        scores = {}
+        for intent, table in self.intent_table:
+            score = 0
+            for word, count, weight in table:
+                if word in question_lower:
+                    score += count * (weight + boost)
+            if score > 0:
+                scores[intent] = score
+        return scores
+
+    def detect_intents(self, question):
+        """Intenções da pergunta (já normalizada), da mais relevante para a menos.
+
+        Usa o classificador quando ele tem confiança; senão, as regras.
+        """
+        return self.detect_intents_many([question])[0]
+
+    def detect_intents_many(self, questions):
+        """`detect_intents` de várias perguntas; o classificador roda numa passada só."""
+        lowered = [question.lower().strip() for question in questions]
+        predicted = self.model.predict_many(lowered) if self.model is not None else [[] for _ in lowered]
+        return [intents or self.rule_intents(question_lower) for question_lower, intents in zip(lowered, predicted)]
+
+    def rule_intents(self, question_lower):
+        """Intenções pelas regras de palavra-chave e padrões específicos."""
+        intent_scores = self.score_intents(question_lower)
+        detected_intents = sorted(intent_scores, key=lambda x: intent_scores[x], reverse=True)
+
+        # Padrões específicos com prioridade alta
+        for pattern, rules, default in self.specific_patterns:
+            if pattern in question_lower:
+                intent = next((target for word, target in rules if word in question_lower), default)
+                if intent not in detected_intents:
+                    detected_intents.insert(0, intent)  # Prioridade alta para perguntas específicas
+
+        # Análise de contexto SUPER INTELIGENTE
+        if not detected_intents:
+            # Detectar contexto emocional
+            if any(word in question_lower for word in self.emotional_words):
+                # Se há contexto emocional, priorizar ajuda e planejamento
+                if any(word in question_lower for word in ['dinheiro', 'grana', 'money', 'cash']):
+                    if any(word in question_lower for word in ['guardar', 'poupar', 'economizar', 'sobrar']):
+                        detected_intents.append('poupança')
+                    elif any(word in question_lower for word in ['investir', 'aplicar', 'rendimento', 'multiplicar']):
+                        detected_intents.append('investimento')
+                    elif any(word in question_lower for word in ['gastar', 'gasto', 'despesa', 'gastando']):
+                        detected_intents.append('gasto')
+                    elif any(word in question_lower for word in ['ganhar', 'renda', 'salario', 'ganhando']):
+                        detected_intents.append('renda')
+                    elif any(word in question_lower for word in ['divida', 'devendo', 'cartao', 'emprestimo']):
+                        detected_intents.append('dívida')
+                    else:
+                        detected_intents.append('planejamento')
+                else:
+                    detected_intents.append('ajuda')
+            else:
+                # Análise neutra
+                if any(word in question_lower for word in ['dinheiro', 'grana', 'money', 'cash']):
+                    if any(word in question_lower for word in ['guardar', 'poupar', 'economizar']):
+                        detected_intents.append('poupança')
+                    elif any(word in question_lower for word in ['investir', 'aplicar', 'rendimento']):
+                        detected_intents.append('investimento')
+                    elif any(word in question_lower for word in ['gastar', 'gasto', 'despesa']):
+                        detected_intents.append('gasto')
+                    else:
+                        detected_intents.append('ajuda')
+                else:
+                    detected_intents.append('ajuda')
+        
+        # Garantir que sempre há pelo menos uma intenção
+        if not detected_intents:
+            detected_intents.append('ajuda')
+        
+        return detected_intents
+
+    def find_glossary_terms(self, question):
+        """Termos do glossário na pergunta, o mais longo primeiro."""
+        return self.glossary_index.find(question)
+
+    def glossary_answer(self, glossary_hits):
+        lines = ["🧾 Conceitos financeiros importantes:", ""]
+        for term in glossary_hits[:5]:
+            lines.append(f"• {term.title()}: {self.glossary[term]}")
+        lines.append("")
+        lines.append("Se quiser, posso aplicar esses conceitos ao seu caso (renda, despesas, objetivos e prazo).")
+        return "\n".join(lines)
+
+    def compose(self, question, intents, user_data, entities, profile, glossary_hits):
+        """Gera resposta de especialista, contextualizada por intenção, dados, entidades e perfil de risco"""
+        
+        # 0) Dúvidas de conceito (glossário): não dependem dos dados do usuário
+        if glossary_hits:
+            return self.glossary_answer(glossary_hits)
+
+        # Extrair dados do usuário
+        income = user_data['income']
+        expense = user_data['expense']
+        balance = user_data['balance']
+        savings_rate = user_data['savings_rate']
+        # Histórico (top_expenses/history) só é lido nos modelos que usam: poupança, dívidas, gastos e o genérico
+        
+        # Análise emocional da pergunta
+        question_lower = question.lower()
+        is_emotional = any(word in question_lower for word in ['tô', 'estou', 'sou', 'tenho', 'quero', 'preciso', 'ajuda', 'socorro', 'perdido', 'confuso', 'na merda', 'fudido', 'lascado', 'ferrado', 'na pindaíba', 'no sufoco', 'no aperto', 'apertado', 'quebrado', 'sem dinheiro', 'falta dinheiro'])
+        is_urgent = any(word in question_lower for word in ['urgente', 'agora', 'imediatamente', 'rápido', 'logo', 'já', 'hoje'])
+        is_informal = any(word in question_lower for word in ['tô', 'tá', 'vou', 'quero', 'preciso', 'ajuda', 'socorro'])
+        
+
+        
+        # Determinar tom da resposta baseado na pergunta
+        if is_emotional and is_urgent:
+            tone = "🚨 URGENTE E EMPÁTICO"
+            emoji_prefix = "🚨"
+        elif is_emotional:
+            tone = "💪 MOTIVACIONAL E APOIADOR"
+            emoji_prefix = "💪"
+        elif is_informal:
+            tone = "😊 AMIGÁVEL E DIRETO"
+            emoji_prefix = "😊"
+        else:
+            tone = "📊 PROFISSIONAL E DETALHADO"
+            emoji_prefix = "📊"
+        
+        # 1) Sinalizar valores/prazos extraídos e ajustar estratégia
+        invest_base_amount = None
+        if entities.get('amounts'):
+            invest_base_amount = max(0.0, float(entities['amounts'][0]))
+        time_horizon_months = None
+        if entities.get('months'):
+            time_horizon_months = max(1, int(entities['months'][0]))
+        desired_pct = None
+        if entities.get('percents'):
+            desired_pct = max(0.0, min(100.0, float(entities['percents'][0])))
+
+        # Resposta baseada na intenção detectada
+        if 'poupança' in intents:
+            top_expenses = user_data['top_expenses']
+            if balance < 0:
+                if is_emotional and is_urgent:
+                    return f"""{emoji_prefix} **CALMA! VAMOS RESOLVER ISSO JUNTOS!**
+
+😰 **Entendo que você está preocupado, mas vamos resolver isso passo a passo!**
+
+📊 **Sua situação atual:**
+• Receitas: {format_currency(income)}
+• Despesas: {format_currency(expense)}
+• Déficit: {format_currency(abs(balance))}
+
+🎯 **PLANO DE EMERGÊNCIA - VAMOS SAIR DO VERMELHO:**
+
+**HOJE MESMO:**
+1. **Cancele 2-3 assinaturas** que você não usa muito
+2. **Pare de pedir delivery** por 1 semana
+3. **Venda algo que não usa** (roupas, eletrônicos)
+
+**ESTA SEMANA:**
+1. **Negocie dívidas** - ligue para os bancos
+2. **Busque bicos** - freelancing, Uber, vendas online
+3. **Corte gastos** com {top_expenses[0][0] if top_expenses else 'maior gasto'} em 50%
+
+**ESTE MÊS:**
+1. **Crie fundo de emergência** de {format_currency(500)}
+2. **Use regra 80/15/5** (80% necessidades, 15% dívidas, 5% emergência)
+
+💪 **Você consegue! Pequenas mudanças fazem grande diferença!**"""
+                elif is_emotional:
+                    return f"""{emoji_prefix} **ENTENDO! VAMOS RESOLVER ISSO JUNTOS!**
+
+😰 **Sei que tá difícil, mas vamos sair dessa situação!**
+
+📊 **Sua situação atual:**
+• Receitas: {format_currency(income)}
+• Despesas: {format_currency(expense)}
+• Déficit: {format_currency(abs(balance))}
+
+🎯 **PLANO PRÁTICO - VAMOS SAIR DO VERMELHO:**
+
+**HOJE MESMO:**
+1. **Cancele 2-3 assinaturas** que você não usa (Netflix, Spotify, etc.)
+2. **Pare de pedir delivery** por 1 semana
+3. **Venda algo que não usa** (roupas, eletrônicos)
+
+**ESTA SEMANA:**
+1. **Corte gastos com {top_expenses[0][0] if top_expenses else 'maior gasto'}** pela metade
+2. **Use transporte público** em vez de Uber/táxi
+3. **Faça comida em casa** em vez de comer fora
+
+**ESTE MÊS:**
+1. **Busque renda extra** - freelancing, Uber, vendas online
+2. **Negocie dívidas** - ligue para os bancos
+3. **Crie fundo de emergência** de {format_currency(500)}
+
+💡 **Dicas práticas:**
+• **Compras:** Vá ao mercado com lista e sem fome
+• **Lazer:** Procure opções gratuitas (parques, museus)
+• **Transporte:** Use bicicleta ou caminhe quando possível
+• **Comida:** Cozinhe em quantidade e congele
+
+💪 **Meta realista:** Economizar {format_currency(abs(balance) + 500)} em 2 meses!
+
+**Você consegue! Pequenas mudanças fazem grande diferença!** 🚀"""
+                else:
+                    return f"""🚨 **SITUAÇÃO CRÍTICA - SALDO NEGATIVO**
+
+📊 **Análise da sua situação:**
+• Receitas: {format_currency(income)}
+• Despesas: {format_currency(expense)}
+• Déficit: {format_currency(abs(balance))}
+
+🎯 **PLANO DE EMERGÊNCIA IMEDIATO:**
+1. **Corte gastos não essenciais** (assinaturas, delivery, lazer)
+2. **Negocie dívidas** com juros altos
+3. **Busque renda extra** (freelancing, vendas online)
+4. **Crie fundo de emergência** mínimo de {format_currency(500)}
+
+💡 **Dicas específicas:**
+• Reduza {top_expenses[0][0] if top_expenses else 'gastos principais'} em 30%
+• Use regra 70/20/10 (70% necessidades, 20% dívidas, 10% emergência)
+• Automatize transferências para poupança
+
+⚠️ **Prioridade:** Estabilizar antes de poupar!"""
+            
+            elif savings_rate < 10:
+                if is_emotional:
+                    return f"""{emoji_prefix} **ENTENDO! VAMOS RESOLVER ISSO JUNTOS!**
+
+😰 **Sei que tá difícil, mas vamos sair dessa situação!**
+
+📊 **Sua situação:**
+• Saldo atual: {format_currency(balance)}
+• Poupança: {savings_rate:.1f}% (muito baixo!)
+
+🎯 **PLANO PRÁTICO - VAMOS ECONOMIZAR:**
+
+**HOJE MESMO:**
+1. **Cancele 2-3 assinaturas** que você não usa (Netflix, Spotify, etc.)
+2. **Pare de pedir delivery** por 1 semana
+3. **Venda algo que não usa** (roupas, eletrônicos)
+
+**ESTA SEMANA:**
+1. **Corte gastos com {top_expenses[0][0] if top_expenses else 'maior gasto'}** pela metade
+2. **Use transporte público** em vez de Uber/táxi
+3. **Faça comida em casa** em vez de comer fora
+
+**ESTE MÊS:**
+1. **Economize {format_currency(income * 0.15)}** (15% do seu salário)
+2. **Guarde em uma conta separada**
+3. **Não toque nesse dinheiro!**
+
+💡 **Dicas práticas:**
+• **Compras:** Vá ao mercado com lista e sem fome
+• **Lazer:** Procure opções gratuitas (parques, museus)
+• **Transporte:** Use bicicleta ou caminhe quando possível
+• **Comida:** Cozinhe em quantidade e congele
+
+💪 **Meta realista:** {format_currency(income * 0.15)}/mês = {format_currency(income * 0.15 * 12)}/ano!
+
+**Você consegue! Pequenas mudanças fazem grande diferença!** 🚀"""
+                else:
+                    return f"""⚠️ **POUPANÇA BAIXA - PRECISA OTIMIZAR**
+
+📊 **Suas métricas:**
+• Taxa de poupança: {savings_rate:.1f}% (meta: 20%)
+• Saldo: {format_currency(balance)}
+
+🎯 **ESTRATÉGIA DE POUPANÇA:**
+1. **Regra 50/30/20** (50% necessidades, 30% desejos, 20% poupança)
+2. **Automatize** transferências no dia do salário
+3. **Reduza** {top_expenses[0][0] if top_expenses else 'maior gasto'} em 15%
+4. **Aumente renda** com habilidades extras
+
+💰 **Meta realista:** {format_currency(income * 0.2)}/mês para poupança"""
+            
+            else:
+                return f"""✅ **EXCELENTE - POUPANÇA SAUDÁVEL**
+
+📊 **Parabéns! Suas métricas:**
+• Taxa de poupança: {savings_rate:.1f}% (acima da média!)
+• Saldo: {format_currency(balance)}
+
+🎯 **PRÓXIMOS PASSOS:**
+1. **Diversifique** investimentos
+2. **Aumente** taxa para 25-30%
+3. **Crie** fundo de emergência de 6 meses
+4. **Planeje** objetivos de longo prazo
+
+💡 **Oportunidades:**
+• Investir {format_currency(balance * 0.7)} em aplicações
+• Manter {format_currency(balance * 0.3)} em reserva"""
+        
+        elif 'investimento' in intents:
+            # Preparação e diagnóstico
+            if savings_rate < 15 and (desired_pct is None or desired_pct < 15):
+                return f"""📊 **PREPARAÇÃO NECESSÁRIA PARA INVESTIR**
+
+⚠️ **Antes de investir, estabilize:**
+• Taxa de poupança atual: {savings_rate:.1f}% (meta: 20%)
+• Fundo de emergência: {'❌ Insuficiente' if balance < income * 0.5 else '✅ Adequado'}
+
+🎯 **ROTEIRO PARA INVESTIR:**
+1. **Mês 1-3:** Aumente poupança para 20%
+2. **Mês 4-6:** Crie fundo de emergência (6 meses)
+3. **Mês 7+:** Comece com investimentos conservadores
+
+💰 **Sugestões por perfil:**
+• **Conservador:** Tesouro Direto (SELIC)
+• **Moderado:** Fundos DI + Ações blue chips
+• **Agressivo:** ETFs + Ações pequenas empresas
+
+📈 **Meta realista:** {format_currency(income * 0.15)}/mês para investimentos"""
+            
+            else:
+                # Montar base de investimento: usa valor citado, senão parte do saldo ou 15% da renda
+                base_amount = invest_base_amount
+                if base_amount is None or base_amount <= 0:
+                    # prioridade: excedente (saldo positivo), senão 15% da renda
+                    base_amount = balance if balance > 0 else (income * 0.15)
+
+                # Ajustar horizonte: curto (<6m), médio (6-24m), longo (>24m)
+                horizon = time_horizon_months or 18
+                if horizon <= 6:
+                    horizon_bucket = 'curto'
+                elif horizon <= 24:
+                    horizon_bucket = 'medio'
+                else:
+                    horizon_bucket = 'longo'
+
+                # Alocação por perfil
+                allocation = apply_profile_to_allocations(profile, base_amount)
+
+                # Sugerir classes conforme horizonte
+                horizon_note = {
+                    'curto': 'Foco em liquidez e baixo risco (Tesouro Selic, CDB liquidez diária).',
+                    'medio': 'Equilíbrio entre proteção (renda fixa) e crescimento (fundos/ETFs).',
+                    'longo': 'Maior parcela em crescimento (ETFs/Ações) com proteção IPCA+.'
+                }[horizon_bucket]
+
+                return "\n".join([
+                    "💰 **PRONTO PARA INVESTIR (Plano de Especialista)**",
+                    "",
+                    f"✅ Perfil de risco: {profile.risk_profile.title()} | Horizonte: {horizon} meses",
+                    f"💵 Valor base: {format_currency(base_amount)}",
+                    "",
+                    "🎯 **Estratégia sugerida (por perfil):**",
+                    f"• Liquidez diária (caixa): {format_currency(allocation['liquidez_diaria'])}",
+                    f"• Curto prazo (renda fixa): {format_currency(allocation['curto_prazo'])}",
+                    f"• Diversificados (fundos/ETFs): {format_currency(allocation['diversificados'])}",
+                    f"• Oportunidades (alto risco): {format_currency(allocation['oportunidades'])}",
+                    "",
+                    f"📌 Horizonte: {horizon_note}",
+                    "",
+                    "💡 Observações importantes:",
+                    "• Tesouro Direto e CDBs seguem IR regressivo (22,5% → 15%).",
+                    "• LCI/LCA são isentos de IR (PF), mas costumam ter carência.",
+                    "• Diversifique e aporte regularmente (DCA).",
+                ])
+        
+        elif 'dívida' in intents or 'cartao' in intents or 'emprestimo' in intents:
+            # Análise de dívidas
+            debt_transactions = [
+                t for t in user_data['history'] 
+                if t.type == 'expense' and classify_category(t.category).debt
+            ]
+            total_debt = from_cents(sum_cents(t.amount_cents for t in debt_transactions if t.type == 'expense'))
+            
+            if is_emotional:
+                return f"""{emoji_prefix} **ENTENDO! VAMOS RESOLVER SUAS DÍVIDAS JUNTOS!**
+
+😰 **Sei que dívidas são estressantes, mas vamos sair dessa!**
+
+📊 **Sua situação:**
+• Dívidas identificadas: {format_currency(total_debt)}
+• Impacto na renda: {share_of_income(total_debt, income):.1f}%
+
+🎯 **PLANO PRÁTICO - VAMOS QUITAR TUDO:**
+
+**HOJE MESMO:**
+1. **Liste todas as dívidas** (cartão, empréstimo, etc.)
+2. **Anote os valores** e juros de cada uma
+3. **Cancele cartões** que não precisa
+
+**ESTA SEMANA:**
+1. **Ligue para os bancos** e negocie
+2. **Pague o mínimo** em todas as dívidas
+3. **Use todo dinheiro extra** na menor dívida
+
+**ESTE MÊS:**
+1. **Corte gastos** para ter mais dinheiro
+2. **Busque renda extra** (freelancing, Uber)
+3. **Não faça novas dívidas!**
+
+💡 **Método da Bola de Neve:**
+• **Pague o mínimo** em todas as dívidas
+• **Use todo excedente** na menor dívida
+• **Quando quitar uma, use o dinheiro** na próxima
+• **Repita** até quitar todas
+
+⚠️ **Dicas importantes:**
+• **Cartão de crédito:** Priorize (juros mais altos)
+• **Negocie:** Sempre ligue para os bancos
+• **Consolidação:** Considere juntar dívidas
+• **Prevenção:** Evite novas dívidas
+
+💪 **Meta realista:** Quitar {format_currency(total_debt * 0.3)} em 3 meses!
+
+**Você consegue! Foco e disciplina vão te libertar!** 🚀"""
+            else:
+                return f"""💳 **ESTRATÉGIA DE SAÍDA DAS DÍVIDAS**
+
+📊 **Situação das dívidas:**
+• Total identificado: {format_currency(total_debt)}
+• Impacto na renda: {share_of_income(total_debt, income):.1f}% se aplicável
+• Capacidade de pagamento: {'✅ Boa' if balance > total_debt * 0.3 else '⚠️ Limitada'}
+
+🎯 **MÉTODO DA BOLA DE NEVE (Recomendado):**
+1. **Liste todas as dívidas** por valor (menor para maior)
+2. **Pague o mínimo** em todas
+3. **Use todo excedente** na menor dívida
+4. **Repita** até quitar todas
+
+💡 **Estratégias específicas:**
+• **Cartão de Crédito:** Priorize (juros altos)
+• **Empréstimos:** Negocie prazos e taxas
+• **Consolidação:** Considere juntar dívidas
+• **Prevenção:** Evite novas dívidas
+
+⚠️ **Alerta:** Foque em quitar antes de investir!"""
+        
+        elif 'renda' in intents:
+            return f"""💼 **ESTRATÉGIAS PARA AUMENTAR RENDA**
+
+📊 **Situação atual:**
+• Renda mensal: {format_currency(income)}
+• Potencial de crescimento: {'Alto' if income < 5000 else 'Moderado' if income < 10000 else 'Estável'}
+
+🎯 **ESTRATÉGIAS POR CATEGORIA:**
+
+**1. RENDA PRINCIPAL:**
+• Negocie aumento salarial (preparação: 3-6 meses)
+• Busque promoções internas
+• Mude de empresa (15-30% aumento médio)
+
+**2. RENDA EXTRA:**
+• Freelancing ({format_currency(500)}-{format_currency(2000)}/mês)
+• Ensino online ({format_currency(300)}-{format_currency(1500)}/mês)
+• Vendas online ({format_currency(200)}-{format_currency(1000)}/mês)
+• Investimentos passivos ({format_currency(100)}-{format_currency(500)}/mês)
+
+**3. HABILIDADES MONETIZÁVEIS:**
+• Programação, design, marketing
+• Consultoria, coaching
+• Criação de conteúdo
+• Tradução, revisão
+
+💡 **Meta realista:** +{format_currency(income * 0.2)}/mês em 6 meses"""
+        
+        elif 'gasto' in intents:
+            top_expenses = user_data['top_expenses']
+            if is_emotional:
+                return f"""{emoji_prefix} **ENTENDO! VAMOS CORTAR GASTOS JUNTOS!**
+
+😰 **Sei que é difícil, mas vamos economizar de forma inteligente!**
+
+📊 **Sua situação:**
+• Maior gasto: {top_expenses[0][0] if top_expenses else 'N/A'} - {format_currency(top_expenses[0][1] if top_expenses else 0)}
+• Gasto total: {format_currency(expense)} ({share_of_income(expense, income):.1f}% da renda)
+
+🎯 **PLANO PRÁTICO - VAMOS ECONOMIZAR:**
+
+**HOJE MESMO:**
+1. **Cancele 2-3 assinaturas** que você não usa (Netflix, Spotify, etc.)
+2. **Pare de pedir delivery** por 1 semana
+3. **Venda algo que não usa** (roupas, eletrônicos)
+
+**ESTA SEMANA:**
+1. **Corte gastos com {top_expenses[0][0] if top_expenses else 'maior gasto'}** pela metade
+2. **Use transporte público** em vez de Uber/táxi
+3. **Faça comida em casa** em vez de comer fora
+
+**ESTE MÊS:**
+1. **Negocie contas** (telefone, internet, energia)
+2. **Compre em atacado** para economizar
+3. **Evite compras por impulso**
+
+💡 **Dicas práticas:**
+• **Compras:** Vá ao mercado com lista e sem fome
+• **Lazer:** Procure opções gratuitas (parques, museus)
+• **Transporte:** Use bicicleta ou caminhe quando possível
+• **Comida:** Cozinhe em quantidade e congele
+
+💪 **Meta realista:** Economizar {format_currency(expense * 0.2)}/mês!
+
+**Você consegue! Pequenas mudanças fazem grande diferença!** 🚀"""
+            else:
+                return f"""📉 **OTIMIZAÇÃO DE GASTOS**
+
+📊 **Análise detalhada:**
+• Maior gasto: {top_expenses[0][0] if top_expenses else 'N/A'} - {format_currency(top_expenses[0][1] if top_expenses else 0)}
+• Taxa de gastos: {share_of_income(expense, income):.1f}% da renda
+
+🎯 **PLANO DE REDUÇÃO (30 dias):**
+
+**1. CORTES IMEDIATOS:**
+• Assinaturas desnecessárias (-{format_currency(100)}-{format_currency(300)}/mês)
+• Gastos com delivery (-{format_currency(200)}-{format_currency(500)}/mês)
+• Compras por impulso (-{format_currency(150)}-{format_currency(400)}/mês)
+
+**2. OTIMIZAÇÕES:**
+• Transporte público vs. carro (-{format_currency(300)}-{format_currency(800)}/mês)
+• Compras em atacado (-{format_currency(100)}-{format_currency(300)}/mês)
+• Energia e água (-{format_currency(50)}-{format_currency(150)}/mês)
+
+**3. NEGOCIAÇÕES:**
+• Contas de telefone/internet (-{format_currency(50)}-{format_currency(200)}/mês)
+• Seguros (-{format_currency(30)}-{format_currency(100)}/mês)
+• Aluguel (se aplicável)
+
+💡 **Meta realista:** Reduzir {share_of_income(expense, income):.1f}% para {share_of_income(expense, income) * 0.8:.1f}% = +{format_currency(expense * 0.2)}/mês"""
+        
+        elif 'planejamento' in intents:
+            # Análise de objetivos financeiros
+            age_estimate = 25  # Você pode adicionar campo de idade no banco
+            retirement_age = 65
+            years_to_retirement = retirement_age - age_estimate
+            
+            return f"""🎯 **PLANEJAMENTO FINANCEIRO DE LONGO PRAZO**
+
+📊 **Análise de longo prazo:**
+• Idade estimada: {age_estimate} anos
+• Tempo até aposentadoria: {years_to_retirement} anos
+• Taxa de poupança atual: {savings_rate:.1f}%
+• Projeção de aposentadoria: {'⚠️ Insuficiente' if savings_rate < 15 else '✅ Adequada'}
+
+🎯 **OBJETIVOS POR FASE:**
+
+**FASE 1 (Agora - 2 anos):**
+• Fundo de emergência: 6 meses de despesas
+• Eliminar dívidas de alto juros
+• Estabelecer poupança de 20%
+
+**FASE 2 (2-10 anos):**
+• Investimentos de crescimento
+• Aquisição de ativos (imóvel, negócio)
+• Diversificação de renda
+
+**FASE 3 (10+ anos):**
+• Acumulação para aposentadoria
+• Planejamento sucessório
+• Renda passiva
+
+💰 **Projeções financeiras:**
+• Poupança mensal atual: {format_currency(income * savings_rate / 100)}
+• Meta ideal: {format_currency(income * 0.25)}/mês
+• Projeção aposentadoria: {format_currency(income * 0.25 * 12 * years_to_retirement * 1.07)} (com juros)
+
+💡 **Próximos passos:**
+1. Defina objetivos específicos
+2. Crie cronograma detalhado
+3. Monitore progresso mensal
+4. Ajuste estratégia conforme necessário"""
+        
+        elif 'orçamento' in intents:
+            return f"""📋 **CRIAÇÃO DE ORÇAMENTO INTELIGENTE**
+
+📊 **Baseado nos seus dados:**
+• Receita mensal: {format_currency(income)}
+• Despesa atual: {format_currency(expense)}
+• Saldo: {format_currency(balance)}
+
+🎯 **ORÇAMENTO RECOMENDADO (Regra 50/30/20):**
+
+**50% - NECESSIDADES ({format_currency(income * 0.5)}):**
+• Moradia: {format_currency(income * 0.25)}
+• Alimentação: {format_currency(income * 0.15)}
+• Transporte: {format_currency(income * 0.05)}
+• Saúde: {format_currency(income * 0.05)}
+
+**30% - DESEJOS ({format_currency(income * 0.3)}):**
+• Lazer: {format_currency(income * 0.15)}
+• Compras: {format_currency(income * 0.10)}
+• Assinaturas: {format_currency(income * 0.05)}
+
+**20% - POUPANÇA/INVESTIMENTO ({format_currency(income * 0.2)}):**
+• Fundo de emergência: {format_currency(income * 0.10)}
+• Investimentos: {format_currency(income * 0.10)}
+
+💡 **Dicas para seguir o orçamento:**
+• Use aplicativos de controle
+• Revise semanalmente
+• Ajuste conforme necessário
+• Celebre pequenas conquistas"""
+        
+        elif 'emergência' in intents:
+            emergency_fund_needed = expense * 6  # 6 meses de despesas
+            
+            return f"""🚨 **FUNDO DE EMERGÊNCIA**
+
+📊 **Sua situação:**
+• Despesas mensais: {format_currency(expense)}
+• Fundo necessário: {format_currency(emergency_fund_needed)} (6 meses)
+• Fundo atual: {format_currency(balance)}
+• Status: {'❌ Insuficiente' if balance < emergency_fund_needed else '✅ Adequado'}
+
+🎯 **PLANO PARA CRIAR FUNDO DE EMERGÊNCIA:**
+
+**META 1 ({format_currency(emergency_fund_needed * 0.25)}):**
+• Economize {format_currency(emergency_fund_needed * 0.25 / 3)}/mês por 3 meses
+• Corte gastos não essenciais
+• Use bônus/13º salário
+
+**META 2 ({format_currency(emergency_fund_needed * 0.5)}):**
+• Economize {format_currency(emergency_fund_needed * 0.25 / 3)}/mês por mais 3 meses
+• Busque renda extra
+• Automatize transferências
+
+**META 3 ({format_currency(emergency_fund_needed)}):**
+• Complete o fundo
+• Mantenha em conta separada
+• Revise anualmente
+
+💡 **Onde guardar:**
+• Conta poupança (liquidez)
+• CDB de bancos digitais
+• Tesouro SELIC
+
+⚠️ **Importante:** Só use para emergências reais!"""
+        
+        elif 'aposentadoria' in intents:
+            age_estimate = 25
+            retirement_age = 65
+            years_to_retirement = retirement_age - age_estimate
+            monthly_savings_needed = (income * 0.7 * 12 * 20) / (years_to_retirement * 12)  # Para manter 70% da renda por 20 anos
+            
+            return f"""🏖️ **PLANEJAMENTO PARA APOSENTADORIA**
+
+📊 **Análise atual:**
+• Idade: {age_estimate} anos
+• Tempo até aposentadoria: {years_to_retirement} anos
+• Poupança mensal atual: {format_currency(income * savings_rate / 100)}
+• Poupança necessária: {format_currency(monthly_savings_needed)}/mês
+
+🎯 **ESTRATÉGIA DE APOSENTADORIA:**
+
+**FASE 1 (Agora - 10 anos):**
+• Foque em crescimento de renda
+• Poupe 15-20% da renda
+• Invista em educação/capacitação
+
+**FASE 2 (10-20 anos):**
+• Aumente poupança para 25-30%
+• Diversifique investimentos
+• Considere imóveis para renda
+
+**FASE 3 (20+ anos):**
+• Maximize contribuições
+• Planeje transição gradual
+• Considere aposentadoria parcial
+
+💰 **Investimentos recomendados:**
+• **Ações:** 60% (crescimento)
+• **Renda fixa:** 30% (segurança)
+• **Imóveis:** 10% (diversificação)
+
+💡 **Dica:** Quanto mais cedo começar, melhor!"""
+        
+        elif 'imóvel' in intents or 'casa' in intents:
+            down_payment_needed = income * 12 * 0.2  # 20% de entrada
+            max_house_price = income * 3  # 3x a renda anual
+            
+            return f"""🏠 **PLANEJAMENTO PARA COMPRA DE IMÓVEL**
+
+📊 **Análise baseada na sua renda:**
+• Renda mensal: {format_currency(income)}
+• Entrada necessária: {format_currency(down_payment_needed)} (20%)
+• Valor máximo recomendado: {format_currency(max_house_price)}
+• Poupança atual: {format_currency(balance)}
+
+🎯 **ROTEIRO PARA COMPRA:**
+
+**FASE 1 - PREPARAÇÃO (6-12 meses):**
+• Economize {format_currency(down_payment_needed / 12)}/mês para entrada
+• Melhore score de crédito
+• Pesquise regiões de interesse
+
+**FASE 2 - BUSCA (3-6 meses):**
+• Defina critérios (localização, tamanho, preço)
+• Visite imóveis
+• Compare opções
+
+**FASE 3 - NEGOCIAÇÃO:**
+• Faça proposta
+• Negocie condições
+• Contrate financiamento
+
+💡 **Dicas importantes:**
+• Não comprometa mais de 30% da renda
+• Considere custos extras (IPTU, condomínio)
+• Mantenha fundo de emergência
+• Avalie se é melhor comprar ou alugar
+
+⚠️ **Cálculo:** Renda {format_currency(income)} → Financiamento máximo {format_currency(income * 0.3 * 12 * 30)}"""
+        
+        elif 'educação' in intents:
+            return f"""📚 **INVESTIMENTO EM EDUCAÇÃO**
+
+📊 **Análise de retorno sobre investimento:**
+• Educação é o melhor investimento
+• Retorno médio: 10-15% ao ano
+• Impacto na renda: +20-50%
+
+🎯 **ESTRATÉGIAS DE INVESTIMENTO EM EDUCAÇÃO:**
+
+**1. FORMAÇÃO ACADÊMICA:**
+• Graduação: {format_currency(500)}-{format_currency(2000)}/mês
+• Pós-graduação: {format_currency(800)}-{format_currency(3000)}/mês
+• Cursos técnicos: {format_currency(200)}-{format_currency(800)}/mês
+
+**2. CURSOS PROFISSIONALIZANTES:**
+• Programação: {format_currency(100)}-{format_currency(500)}/mês
+• Design: {format_currency(150)}-{format_currency(600)}/mês
+• Marketing: {format_currency(100)}-{format_currency(400)}/mês
+• Línguas: {format_currency(200)}-{format_currency(800)}/mês
+
+**3. CERTIFICAÇÕES:**
+• Certificações técnicas: {format_currency(500)}-{format_currency(3000)}
+• Certificações profissionais: {format_currency(1000)}-{format_currency(5000)}
+• Cursos online: {format_currency(50)}-{format_currency(300)}
+
+💡 **Dicas para maximizar retorno:**
+• Escolha áreas com alta demanda
+• Combine teoria com prática
+• Networking é fundamental
+• Mantenha-se atualizado
+
+💰 **Meta:** Investir 5-10% da renda em educação"""
+        
+        elif 'seguro' in intents:
+            return f"""🛡️ **PROTEÇÃO FINANCEIRA COM SEGUROS**
+
+📊 **Análise de necessidades:**
+• Renda mensal: R$ {income:.2f}
+• Dependentes: Considere sua situação familiar
+• Patrimônio: Avalie seus bens
+
+🎯 **SEGUROS ESSENCIAIS:**
+
+**1. SEGURO DE VIDA (R$ {income * 12 * 5:.0f}):**
+• Cobertura: 5x a renda anual
+• Custo: R$ {income * 0.02:.2f}/mês
+• Protege família em caso de falecimento
+
+**2. SEGURO DE SAÚDE:**
+• Cobertura: Hospitalar + Ambulatorial
+• Custo: R$ {income * 0.05:.2f}/mês
+• Evita gastos inesperados
+
+**3. SEGURO AUTO (se aplicável):**
+• Cobertura: Terceiros + Roubo/Furto
+• Custo: {format_currency(100)}-{format_currency(300)}/mês
+• Protege contra prejuízos
+
+**4. SEGURO RESIDENCIAL:**
+• Cobertura: Incêndio + Roubo
+• Custo: {format_currency(50)}-{format_currency(150)}/mês
+• Protege patrimônio
+
+💡 **Dicas:**
+• Compare preços e coberturas
+• Revise anualmente
+• Não pague por coberturas desnecessárias
+• Mantenha franquias adequadas
+
+⚠️ **Prioridade:** Vida > Saúde > Auto > Residencial"""
+        
+        elif 'imposto' in intents:
+            return f"""💰 **OTIMIZAÇÃO FISCAL (Brasil)**
+
+📊 **Sua situação:**
+• Renda mensal: {format_currency(income)}
+• Renda anual: {format_currency(income * 12)}
+• Faixa de IR: {'Isento' if income * 12 < 2259.20 else '7.5%' if income * 12 < 2826.65 else '15%' if income * 12 < 3751.05 else '22.5%' if income * 12 < 4664.68 else '27.5%'}
+
+🎯 **ESTRATÉGIAS DE ECONOMIA FISCAL:**
+
+**1. DEDUÇÕES PERMITIDAS:**
+• Previdência privada: até 12% da renda
+• Educação: até {format_currency(3561.50)}/ano
+• Saúde: sem limite
+• Dependentes: {format_currency(2275.08)} por dependente
+
+**2. REGRAS DE TRIBUTAÇÃO E ISENÇÕES (principais):**
+• Poupança: isenta de IR (PF)
+• LCI/LCA: isentas de IR (PF)
+• Tesouro Direto (Selic, IPCA+, Prefixado): tributado pela tabela regressiva (15% a 22,5%)
+• Ações: operações comuns isentas até R$ 20.000/mês em vendas; day-trade sempre tributado
+
+**3. DECLARAÇÃO ANUAL:**
+• Mantenha todos os comprovantes
+• Use software oficial
+• Declare até 30/04
+• Evite multas
+
+💡 **Dicas para economizar:**
+• Use previdência privada
+• Invista em educação
+• Mantenha controle de gastos
+• Consulte um contador
+
+⚠️ **Importante:** Sempre declare corretamente!"""
+        
+        elif 'viagem' in intents:
+            # Calcular orçamento de viagem baseado na renda
+            travel_budget = income * 0.15  # 15% da renda para viagem
+            months_to_save = 6  # 6 meses para economizar
+            
+            return f"""✈️ **PLANEJAMENTO DE VIAGEM INTELIGENTE**
+
+📊 **Análise baseada na sua renda:**
+• Renda mensal: {format_currency(income)}
+• Orçamento recomendado: {format_currency(travel_budget)} (15% da renda)
+• Tempo para economizar: {months_to_save} meses
+• Economia mensal necessária: {format_currency(travel_budget / months_to_save)}
+
+🎯 **ESTRATÉGIA DE VIAGEM:**
+
+**1. DESTINOS POR ORÇAMENTO:**
+• **Econômico ({format_currency(travel_budget * 0.5)}):** Praias nacionais, cidades históricas
+• **Moderado ({format_currency(travel_budget)}):** Destinos internacionais próximos
+• **Premium ({format_currency(travel_budget * 1.5)}):** Europa, EUA, Ásia
+
+**2. DISTRIBUIÇÃO DO ORÇAMENTO:**
+• Passagens: 40% ({format_currency(travel_budget * 0.4)})
+• Hospedagem: 30% ({format_currency(travel_budget * 0.3)})
+• Alimentação: 20% ({format_currency(travel_budget * 0.2)})
+• Passeios: 10% ({format_currency(travel_budget * 0.1)})
+
+**3. DICAS PARA ECONOMIZAR:**
+• Compre passagens com antecedência (3-6 meses)
+• Use sites de comparação de preços
+• Considere hospedagem compartilhada
+• Viaje na baixa temporada
+• Use cartões de crédito com milhas
+
+💡 **Plano de ação:**
+• Economize {format_currency(travel_budget / months_to_save)}/mês
+• Pesquise destinos e preços
+• Reserve com antecedência
+• Mantenha fundo de emergência
+
+⚠️ **Lembre-se:** Viagem é investimento em experiências, mas não comprometa sua segurança financeira!"""
+        
+        elif 'carro' in intents:
+            # Análise para compra de carro
+            car_budget = income * 0.3  # 30% da renda para carro
+            down_payment = car_budget * 0.2  # 20% de entrada
+            monthly_payment = (car_budget * 0.8) / 60  # Financiamento em 60 meses
+            
+            return f"""🚗 **PLANEJAMENTO PARA COMPRA DE CARRO**
+
+📊 **Análise financeira:**
+• Renda mensal: {format_currency(income)}
+• Valor máximo recomendado: {format_currency(car_budget)}
+• Entrada necessária: {format_currency(down_payment)} (20%)
+• Parcela mensal: {format_currency(monthly_payment)} (60 meses)
+• Impacto na renda: {share_of_income(monthly_payment, income):.1f}%
+
+🎯 **ESTRATÉGIA DE COMPRA:**
+
+**1. PREPARAÇÃO (3-6 meses):**
+• Economize R$ {down_payment / 6:.2f}/mês para entrada
+• Melhore score de crédito
+• Pesquise modelos e preços
+• Calcule custos totais (IPVA, seguro, manutenção)
+
+**2. OPÇÕES POR ORÇAMENTO:**
+• **Econômico (R$ {car_budget * 0.6:.2f}):** Carros usados, modelos básicos
+• **Intermediário (R$ {car_budget:.2f}):** Carros seminovos, modelos populares
+• **Premium (R$ {car_budget * 1.4:.2f}):** Carros novos, modelos superiores
+
+**3. CUSTOS ADICIONAIS:**
+• IPVA: {format_currency(car_budget * 0.03)}/ano
+• Seguro: {format_currency(car_budget * 0.05)}/mês
+• Manutenção: {format_currency(car_budget * 0.02)}/mês
+• Combustível: {format_currency(300)}-{format_currency(600)}/mês
+
+**4. ALTERNATIVAS:**
+• **Comprar à vista:** Economia de juros
+• **Financiamento:** Maior poder de compra
+• **Leasing:** Menos responsabilidade
+• **Compartilhamento:** Economia total
+
+💡 **Dicas importantes:**
+• Não comprometa mais de 30% da renda
+• Considere custos de manutenção
+• Compare diferentes opções de financiamento
+• Avalie se realmente precisa de um carro
+
+⚠️ **Cálculo:** Renda {format_currency(income)} → Carro máximo {format_currency(car_budget)} → Parcela {format_currency(monthly_payment)}"""
+        
+        elif 'negócio' in intents:
+            # Análise para empreendedorismo
+            business_capital = income * 6  # 6 meses de renda como capital inicial
+            monthly_investment = income * 0.1  # 10% da renda para investir no negócio
+            
+            return f"""💼 **PLANEJAMENTO PARA ABRIR NEGÓCIO**
+
+📊 **Análise empreendedora:**
+• Renda atual: {format_currency(income)}
+• Capital inicial recomendado: {format_currency(business_capital)} (6 meses de renda)
+• Investimento mensal: {format_currency(monthly_investment)} (10% da renda)
+• Tempo para acumular capital: {business_capital / monthly_investment:.0f} meses
+
+🎯 **ESTRATÉGIA EMPREENDEDORA:**
+
+**1. PREPARAÇÃO FINANCEIRA:**
+• Mantenha emprego atual por 6-12 meses
+• Economize R$ {monthly_investment:.2f}/mês
+• Crie fundo de emergência de 12 meses
+• Reduza dívidas ao mínimo
+
+**2. OPÇÕES DE NEGÓCIO POR INVESTIMENTO:**
+• **Baixo investimento ({format_currency(business_capital * 0.3)}):** E-commerce, consultoria, freelancing
+• **Médio investimento ({format_currency(business_capital)}):** Loja física pequena, franquia, importação
+• **Alto investimento ({format_currency(business_capital * 2)}):** Restaurante, clínica, indústria
+
+**3. ESTRUTURA FINANCEIRA:**
+• **Capital inicial:** R$ {business_capital * 0.4:.2f} (40%)
+• **Capital de giro:** R$ {business_capital * 0.3:.2f} (30%)
+• **Marketing:** R$ {business_capital * 0.2:.2f} (20%)
+• **Reserva:** R$ {business_capital * 0.1:.2f} (10%)
+
+**4. PLANO DE AÇÃO:**
+• **Mês 1-3:** Pesquisa de mercado e planejamento
+• **Mês 4-6:** Acumulação de capital
+• **Mês 7-9:** Implementação e testes
+• **Mês 10+:** Operação e crescimento
+
+💡 **Dicas para sucesso:**
+• Comece pequeno e cresça gradualmente
+• Mantenha renda alternativa
+• Controle rigorosamente os custos
+• Foque na diferenciação
+• Construa uma rede de contatos
+
+⚠️ **Importante:** Empreendedorismo é arriscado, mas pode ser muito lucrativo com planejamento adequado!"""
+        
+        else:
+            # Resposta genérica SUPER INTELIGENTE e compreensiva para qualquer pergunta
+            top_expenses = user_data['top_expenses']
+            if is_emotional:
+                return f"""{emoji_prefix} **FICA TRANQUILO! EU VOU TE AJUDAR!**
+
+😊 **Não se preocupe em perguntar "corretamente" - eu entendo tudo!**
+
+📊 **Vamos ver sua situação:**
+• Receitas: {format_currency(income)}
+• Despesas: {format_currency(expense)}
+• Saldo: {format_currency(balance)}
+• Taxa de poupança: {savings_rate:.1f}%
+
+🎯 **DIAGNÓSTICO RÁPIDO:**
+{'🚨 **CRÍTICO:** Saldo negativo - vamos resolver isso!' if balance < 0 else '✅ **SAUDÁVEL:** Continue assim!'}
+{'⚠️ **ATENÇÃO:** Maior gasto compromete muito da renda' if top_expenses and top_expenses[0][1] > income * 0.3 else '✅ **EQUILIBRADO:** Gastos bem distribuídos'}
+
+💡 **PERGUNTE DE QUALQUER JEITO:**
+
+**💰 POUPANÇA:**
+• "tô gastando muito" / "não consigo economizar" / "dinheiro não sobra"
+• "tô no vermelho" / "tô quebrado" / "sem dinheiro"
+
+**📈 INVESTIMENTOS:**
+• "onde colocar dinheiro?" / "fazer dinheiro render" / "multiplicar dinheiro"
+• "onde investir?" / "melhor aplicação" / "dinheiro trabalhando"
+
+**💳 DÍVIDAS:**
+• "tô endividado" / "cartão estourou" / "tô devendo"
+• "como quitar cartão?" / "pagar dívidas" / "tô no sufoco"
+
+**💼 RENDA:**
+• "quero ganhar mais" / "salário baixo" / "ganho pouco"
+• "renda extra" / "trabalho extra" / "bico"
+
+**📉 GASTOS:**
+• "gasto demais" / "tô gastando muito" / "cortar gastos"
+• "reduzir despesas" / "onde cortar" / "otimizar gastos"
+
+**🎯 PLANEJAMENTO:**
+• "não sei o que fazer" / "tô perdido" / "por onde começar"
+• "primeiro passo" / "o que fazer primeiro" / "começar"
+
+**🤔 DÚVIDAS:**
+• "me ajuda" / "tô confuso" / "não entendo"
+• "socorro" / "ajuda" / "dúvida"
+
+💪 **EXEMPLOS DE PERGUNTAS QUE FUNCIONAM:**
+• "tô na merda, o que faço?"
+• "tô fudido com dinheiro"
+• "tô lascado financeiramente"
+• "tô ferrado, me ajuda"
+• "tô na pindaíba"
+• "tô no sufoco"
+• "tô no aperto"
+• "tô apertado"
+• "tô quebrado"
+• "sem dinheiro"
+• "falta dinheiro"
+
+🎯 **RECOMENDAÇÃO ESPECÍFICA PARA VOCÊ:**
+{'🚨 **URGENTE:** Corte gastos e busque renda extra AGORA!' if balance < 0 else '✅ **CONTINUE:** Mantenha disciplina e diversifique!'}
+
+💬 **Dica:** Seja natural! Fale como você fala mesmo. A IA entende gírias, palavrões, linguagem informal... Tudo! 😄
+
+**A IA está aqui para te ajudar, não importa como você pergunte!** 🚀"""
+            else:
+                return f"""🤖 **CONSELHEIRO IA SUPER INTELIGENTE - ANÁLISE COMPLETA E PERSONALIZADA**
+
+📊 **RESUMO FINANCEIRO PERSONALIZADO:**
+• Receitas: {format_currency(income)}
+• Despesas: {format_currency(expense)}
+• Saldo: {format_currency(balance)}
+• Taxa de poupança: {savings_rate:.1f}%
+• Maior gasto: {top_expenses[0][0] if top_expenses else 'N/A'} - {format_currency(top_expenses[0][1] if top_expenses else 0)}
+• Tendência: {'📈 Positiva' if income > expense else '📉 Negativa' if expense > income else '📊 Estável'}
+
+🎯 **DIAGNÓSTICO FINANCEIRO DETALHADO:**
+• {'🚨 CRÍTICO: Saldo negativo - priorize estabilizar' if balance < 0 else '✅ SAUDÁVEL: Continue poupando e invista'}
+• {'⚠️ ATENÇÃO: Maior gasto compromete ' + f"{share_of_income(top_expenses[0][1], income):.1f}%" if top_expenses and top_expenses[0][1] > income * 0.3 else '✅ EQUILIBRADO: Gastos bem distribuídos'}
+• {'📈 OPORTUNIDADE: Renda baixa - busque crescimento' if income < 5000 else '✅ ESTÁVEL: Renda adequada'}
+
+🔮 **IA PREDITIVA AVANÇADA:**
+• {'🚨 Risco alto: Precisa de intervenção imediata' if balance < 0 else '✅ Baixo risco: Continue no caminho certo'}
+• {'📈 Alto potencial: Foque em aumentar renda' if income < 5000 else '📊 Potencial moderado: Otimize gastos'}
+• {'💡 Oportunidade: Reduza ' + top_expenses[0][0] if top_expenses and top_expenses[0][1] > income * 0.25 else '💡 Oportunidade: Diversifique investimentos'}
+
+💡 **COMO POSSO TE AJUDAR? PERGUNTE DE QUALQUER FORMA:**
+
+**💰 POUPANÇA E ECONOMIA:**
+• "como economizar mais?" / "onde guardar dinheiro?" / "tô gastando muito"
+• "não consigo economizar" / "como poupar dinheiro?" / "onde guardar?"
+
+**📈 INVESTIMENTOS:**
+• "onde investir?" / "melhor aplicação para mim?" / "onde colocar dinheiro?"
+• "como investir?" / "melhor investimento?" / "onde aplicar dinheiro?"
+
+**💳 DÍVIDAS:**
+• "como pagar dívidas?" / "melhor forma de quitar cartão?" / "tô endividado"
+• "como quitar cartão?" / "pagar empréstimo" / "quitar dívidas"
+
+**💼 RENDA:**
+• "como aumentar renda?" / "renda extra?" / "quero ganhar mais"
+• "como ganhar mais dinheiro?" / "aumentar salário" / "renda adicional"
+
+**📉 GASTOS:**
+• "como reduzir gastos?" / "onde cortar despesas?" / "gastar menos"
+• "cortar gastos" / "reduzir despesas" / "otimizar gastos"
+
+**🎯 PLANEJAMENTO:**
+• "planejamento financeiro" / "metas financeiras" / "não sei o que fazer"
+• "criar plano" / "estratégia financeira" / "objetivos financeiros"
+
+**📋 ORÇAMENTO:**
+• "como fazer orçamento?" / "controle financeiro" / "organizar dinheiro"
+• "gerenciar dinheiro" / "administrar finanças" / "controle de gastos"
+
+**🚨 EMERGÊNCIA:**
+• "fundo de emergência" / "reserva financeira" / "imprevistos"
+• "dinheiro para emergência" / "reserva de emergência"
+
+**🏖️ APOSENTADORIA:**
+• "planejamento aposentadoria" / "previdência" / "futuro"
+• "aposentadoria" / "planejamento futuro" / "terceira idade"
+
+**🏠 IMÓVEL:**
+• "comprar casa" / "financiamento imóvel" / "comprar apartamento"
+• "entrada casa" / "financiamento casa" / "comprar imóvel"
+
+**📚 EDUCAÇÃO:**
+• "investir em educação" / "cursos e formação" / "estudar"
+• "faculdade" / "universidade" / "formação profissional"
+
+**🛡️ SEGURO:**
+• "preciso de seguro?" / "proteção financeira" / "seguro de vida"
+• "qual seguro?" / "seguro de saúde" / "seguro de carro"
+
+**💰 IMPOSTOS:**
+• "economizar impostos" / "otimização fiscal" / "imposto de renda"
+• "declaração" / "dedução" / "economizar imposto"
+
+**✈️ VIAGEM:**
+• "planejar viagem" / "economizar para viajar" / "férias"
+• "turismo" / "passeio" / "destino"
+
+**🚗 CARRO:**
+• "comprar carro" / "financiamento automóvel" / "entrada carro"
+• "comprar automóvel" / "financiamento carro"
+
+**💼 NEGÓCIO:**
+• "abrir empresa" / "empreendedorismo" / "abrir negócio"
+• "startup" / "empreender" / "comércio"
+
+**🤔 DÚVIDAS GERAIS:**
+• "me ajuda" / "tô perdido" / "tô confuso" / "não entendo"
+• "explique" / "dúvida" / "socorro" / "ajuda"
+
+🎯 **RECOMENDAÇÕES ESPECÍFICAS PARA VOCÊ:**
+• {'🚨 URGENTE: Corte gastos não essenciais e busque renda extra' if balance < 0 else '✅ CONTINUE: Mantenha disciplina e diversifique investimentos'}
+• {'⚠️ FOQUE: Reduza ' + top_expenses[0][0] + ' em 20%' if top_expenses and top_expenses[0][1] > income * 0.3 else '✅ OTIMIZE: Busque aumentar taxa de poupança para 25%'}
+• {'📈 PRIORIZE: Desenvolva habilidades para aumentar renda' if income < 5000 else '📊 MANTENHA: Continue diversificando fontes de renda'}
+
+💬 **Dica:** Não se preocupe em perguntar "corretamente"! A IA entende linguagem informal, gírias e até perguntas mal formuladas. Seja natural e eu vou te ajudar! 🚀
+
+**Exemplos de perguntas que funcionam:**
+• "tô gastando muito, o que faço?"
+• "não consigo economizar"
+• "quero ganhar mais dinheiro"
+• "tô perdido com minhas finanças"
+• "me ajuda com dinheiro"
+• "não sei o que fazer"
+
+A IA está pronta para entender e ajudar com qualquer aspecto das suas finanças! 💪"""
+
+    def prepare(self, question) -> QuestionAnalysis:
+        """Intenções, entidades e termos do glossário de uma pergunta original (cache por assinatura)."""
+        return self.prepare_many([question])[0]
+
+    def prepare_many(self, questions) -> list:
+        """`prepare` de várias perguntas: as que não estão no cache passam juntas pelo classificador."""
+        prepared = [preprocess_question(question or '') for question in questions]
+        signatures = [question_signature(p.normalized) for p in prepared]
+        analyses, pending = {}, {}
+        for item, signature in zip(prepared, signatures):
+            if signature in analyses or signature in pending:
+                continue
+            analysis = self.analyses.get(signature)
+            if analysis is None:
+                pending[signature] = item
+            else:
+                analyses[signature] = analysis
+        detected = self.detect_intents_many([item.normalized for item in pending.values()])
+        for (signature, item), intents in zip(pending.items(), detected):
+            analysis = QuestionAnalysis(
+                item.normalized, tuple(intents),
+                MappingProxyType({'amounts': item.amounts, 'percents': item.percents, 'months': item.months}),
+                tuple(self.find_glossary_terms(item.normalized)), signature)
+            self.analyses.put(signature, analysis)
+            analyses[signature] = analysis
+        return [analyses[signature] for signature in signatures]
+
+    def skeleton_key(self, analysis, mode) -> tuple:
+        # Exatamente o que skeleton() lê: snapshot, entidades e perfil só entram no TL;DR/núcleo, montados por usuário
+        return (analysis.intents, analysis.glossary_hits, mode)
+
+    def skeleton(self, analysis, mode) -> tuple:
+        """Seções (nome, LazySection) que não dependem dos dados do usuário; None marca as que dependem.
+
+        O TL;DR e o núcleo são preenchidos por usuário (o núcleo só fica pronto
+        aqui quando é uma resposta de glossário). Cada modo só lista o que
+        entrega, e nada é renderizado antes de ser lido.
+        """
+        core = LazySection(partial(self.glossary_answer, analysis.glossary_hits)) if analysis.glossary_hits else None
+        if mode == 'direto':
+            # Entrega somente o núcleo, sem TL;DR/Checklist/Glossário
+            return (('core', core),)
+        skeleton = [
+            ('tldr', None),
+            ('core', core),
+            ('checklist', LazySection(partial(_joined, checklist_lines, analysis.intents))),
+            # Sem termos a explicar a seção fica vazia e não sai
+            ('terms', LazySection(partial(_joined, terms_lines, analysis.intents, analysis.glossary_hits))),
+            ('suggestions', LazySection(partial("\n".join, SUGGESTION_LINES))),
+        ]
+        if mode == 'especialista':
+            # Didático + reforço técnico: nota de riscos e compliance
+            skeleton.append(('expert', LazySection(partial("\n".join, EXPERT_NOTE_LINES))))
+        return tuple(skeleton)
+
+    def cached_skeleton(self, analysis, mode) -> tuple:
+        key = self.skeleton_key(analysis, mode)
+        skeleton = self.answers.get(key)
+        if skeleton is None:
+            skeleton = self.skeleton(analysis, mode)
+            self.answers.put(key, skeleton)
+        return skeleton
+
+    def sections(self, analysis, user_snapshot, profile, mode=DEFAULT_MODE):
+        """Gera (nome, texto) na ordem da resposta; juntos por quebra de linha dão `answer().response`.
+
+        As partes fixas vêm do cache de respostas; os números do usuário entram
+        no fim. Nos modos com TL;DR ele sai primeiro, lido só do resumo do mês;
+        o núcleo (que pode ler o histórico do snapshot e o perfil) vem depois.
+        Tudo é montado sob demanda: no compacto o que passa do corte nem é
+        renderizado.
+        """
+        sections = self._fill(self.cached_skeleton(analysis, mode), analysis, user_snapshot, profile)
+        if mode != 'compacto':
+            yield from sections
+            return
+        # Só as primeiras linhas (TL;DR + corpo)
+        remaining = COMPACT_MAX_LINES
+        for name, text in sections:
+            lines = text.split('\n')
+            if len(lines) >= remaining:
+                yield name, '\n'.join(lines[:remaining])
+                return
+            remaining -= len(lines)
+            yield name, text
+
+    def _fill(self, skeleton, analysis, user_snapshot, profile):
+        for name, section in skeleton:
+            if section is not None:
+                text = section.text
+            elif name == 'tldr':
+                text = "\n".join(tldr_lines(user_snapshot))
+            else:
+                text = self.compose(analysis.question, analysis.intents, user_snapshot, analysis.entities,
+                                    profile, analysis.glossary_hits)
+            if not text:
+                continue
+            if name == 'core' and len(skeleton) > 1:
+                text = text.strip() + "\n"
+            yield name, text
+
+    def cache_info(self) -> dict:
+        return {'analyses': self.analyses.info(), 'answers': self.answers.info()}
+
+    def answer(self, question, user_snapshot, profile, mode=DEFAULT_MODE) -> AdvisorAnswer:
+        """Resposta completa para a pergunta original no modo pedido."""
+        analysis = self.prepare(question)
+        response = "\n".join(text for _, text in self.sections(analysis, user_snapshot, profile, mode))
+        return AdvisorAnswer(response, list(analysis.intents))
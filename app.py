@@ -1,242 +1,56 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, make_response, session
+from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, make_response, session, abort, Response, stream_with_context, has_request_context
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager, UserMixin, login_user, login_required, logout_user, current_user
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime, timedelta, date
+import atexit
+import base64
+from functools import wraps
+import click
+import csv
+import hmac
+import io
 import json
 import re
-import unicodedata
 import plotly.graph_objs as go
 import plotly.utils
 import os
-
-def format_currency(value):
-    """Formata valor monetário com vírgulas como separadores de milhares"""
-    if value is None:
-        return "R$ 0,00"
-    # Formata o número com vírgulas como separadores de milhares
-    formatted = f"{value:,.2f}"
-    # Substitui vírgulas por pontos e pontos por vírgulas (padrão brasileiro)
-    formatted = formatted.replace(",", "X").replace(".", ",").replace("X", ".")
-    return f"R$ {formatted}"
-
-# ===================== Utilidades de IA =====================
-def _strip_accents(text: str) -> str:
-    if not text:
-        return ''
-    return ''.join(c for c in unicodedata.normalize('NFD', text) if unicodedata.category(c) != 'Mn')
-
-def normalize_text(text: str) -> str:
-    """Normaliza texto: minúsculas, sem acentos e com espaços colapsados."""
-    if not text:
-        return ''
-    lowered = text.lower().strip()
-    no_accents = _strip_accents(lowered)
-    return re.sub(r"\s+", " ", no_accents)
-
-def _parse_number_ptbr(token: str) -> float | None:
-    """Converte strings tipo '1.234,56', '3,5k', '2 mil', '1m' em float (R$)."""
-    if not token:
-        return None
-    t = token.strip().lower()
-    t = t.replace('r$', '').replace(' ', '')
-    multiplier = 1.0
-    # Sufixos comuns
-    if t.endswith('k'):
-        multiplier = 1_000.0
-        t = t[:-1]
-    elif t.endswith('mi') or t.endswith('m'):
-        multiplier = 1_000_000.0
-        t = t[:-2] if t.endswith('mi') else t[:-1]
-    elif t.endswith('b') or t.endswith('bi'):
-        multiplier = 1_000_000_000.0
-        t = t[:-1] if t.endswith('b') else t[:-2]
-    # Palavras
-    if 'milhao' in t:
-        multiplier = 1_000_000.0
-        t = t.replace('milhao', '')
-    if 'bilhao' in t:
-        multiplier = 1_000_000_000.0
-        t = t.replace('bilhao', '')
-    if 'mil' in t:
-        multiplier = max(multiplier, 1_000.0)
-        t = t.replace('mil', '')
-    # Padrão pt-BR 1.234,56 -> 1234.56
-    t = t.replace('.', '').replace(',', '.')
-    try:
-        base = float(t)
-        return base * multiplier
-    except Exception:
-        return None
-
-def extract_entities_from_question(question_text: str) -> dict:
-    """Extrai valores monetários, percentuais e prazos (meses/anos) da pergunta normalizada."""
-    text = normalize_text(question_text)
-    entities: dict[str, list] = {
-        'amounts': [],  # valores monetários identificados
-        'percents': [], # percentuais (0-100)
-        'months': []    # prazos em meses
-    }
-    # R$ e números soltos
-    for match in re.findall(r"r?\$?\s*([0-9][0-9\.,]*)\s*(k|mi|m|b|bi|mil|milhao|bilhao)?", text):
-        number_token = match[0]
-        suffix = match[1] or ''
-        value = _parse_number_ptbr(number_token + suffix)
-        if value is not None:
-            entities['amounts'].append(value)
-    # Percentuais
-    for match in re.findall(r"([0-9]+(?:[\.,][0-9]+)?)\s*%", text):
-        try:
-            p = float(match.replace(',', '.'))
-            if 0 <= p <= 100:
-                entities['percents'].append(p)
-        except Exception:
-            pass
-    # Prazos: meses/anos/semanas
-    for match in re.findall(r"(\d+)\s*(mes|meses|ano|anos|semana|semanas)", text):
-        qty = int(match[0])
-        unit = match[1]
-        if unit.startswith('ano'):
-            entities['months'].append(qty * 12)
-        elif unit.startswith('semana'):
-            # aproximação: 1 mês ~ 4 semanas
-            entities['months'].append(max(1, qty // 4))
-        else:
-            entities['months'].append(qty)
-    return entities
-
-# Glossário financeiro resumido (pt-BR)
-FIN_GLOSSARY = {
-    'cdi': 'CDI (Certificado de Depósito Interbancário): taxa de referência da renda fixa no Brasil. Muitos investimentos pós-fixados rendem um percentual do CDI.',
-    'selic': 'SELIC: taxa básica de juros da economia. Tesouro Selic acompanha essa taxa e tem alta liquidez e baixo risco.',
-    'ipca': 'IPCA: índice oficial de inflação. Títulos atrelados ao IPCA (Tesouro IPCA+) protegem o poder de compra no longo prazo.',
-    'tesouro selic': 'Tesouro Selic: título público pós-fixado ligado à SELIC, indicado para reserva de emergência. Incide IR pela tabela regressiva (22,5% a 15%).',
-    'tesouro ipca+': 'Tesouro IPCA+: título público híbrido (IPCA + taxa real). Bom para objetivos de médio/longo prazo. Tem marcação a mercado.',
-    'cdb': 'CDB: título de renda fixa emitido por bancos. Pode ser pós-fixado (CDI), prefixado ou IPCA+. Cobertura do FGC até limites vigentes.',
-    'lci': 'LCI: Letra de Crédito Imobiliário. Isenta de IR para pessoa física, lastreada no setor imobiliário. Geralmente tem carência.',
-    'lca': 'LCA: Letra de Crédito do Agronegócio. Isenta de IR para pessoa física, lastreada no agronegócio. Geralmente com carência.',
-    'debentures incentivadas': 'Debêntures incentivadas: títulos de empresas com isenção de IR (PF) quando enquadradas em projetos de infraestrutura.',
-    'reserva de emergencia': 'Reserva de emergência: dinheiro para imprevistos (ideal: 6 meses de despesas) em produtos de alta liquidez e baixo risco (ex.: Tesouro Selic).',
-    'renda fixa': 'Renda fixa: investimentos com regras de remuneração definidas (ex.: Tesouro, CDB, LCI/LCA).',
-    'renda variavel': 'Renda variável: ativos cujo preço pode oscilar (ex.: ações, ETFs). Risco e retorno maiores no longo prazo.',
-}
-
-def enrich_response_for_clarity(raw_text: str,
-                                summary: dict,
-                                intents: list[str],
-                                entities: dict,
-                                profile,
-                                glossary_hits: list[str]) -> str:
-    """Anexa um resumo claro, termos e checklist prático para tornar a resposta mais didática."""
-    income = summary.get('income', 0.0)
-    expense = summary.get('expense', 0.0)
-    balance = summary.get('balance', 0.0)
-    savings_rate = summary.get('savings_rate', 0.0)
-
-    # Determinar prioridade principal
-    if balance < 0:
-        priority = "Sair do vermelho e estabilizar o fluxo de caixa"
-    elif savings_rate < 10:
-        priority = "Elevar poupança para pelo menos 10%"
-    else:
-        priority = "Otimizar orçamento e investir com disciplina"
-
-    # TL;DR
-    tldr_lines = [
-        "📌 Resumo rápido (TL;DR)",
-        f"- Receitas: {format_currency(income)} | Despesas: {format_currency(expense)} | Saldo: {format_currency(balance)}",
-        f"- Taxa de poupança estimada: {savings_rate:.1f}%",
-        f"- Prioridade: {priority}",
-        ""
-    ]
-
-    # Checklist prático por intenção
-    top_intent = intents[0] if intents else 'ajuda'
-    checklist: list[str] = ["✅ Plano de ação (passo a passo)"]
-    if top_intent == 'dívida':
-        checklist += [
-            "- Hoje: Liste todas as dívidas (valor/juros), pague o mínimo e cancele cartões extras",
-            "- 7 dias: Negocie taxas/prazos; concentre excedente na menor dívida (bola de neve)",
-            "- 30 dias: Corte 10-20% das despesas variáveis e crie reserva inicial"
-        ]
-    elif top_intent == 'investimento':
-        checklist += [
-            "- Hoje: Defina horizonte (meses) e perfil (conservador/moderado/arrojado)",
-            "- 7 dias: Abra/valide conta em corretora e simule alocações por perfil",
-            "- 30 dias: Inicie aportes mensais automáticos (DCA) com revisão trimestral"
-        ]
-    elif top_intent == 'poupança':
-        checklist += [
-            "- Hoje: Automatize 10-20% do salário para conta de reserva",
-            "- 7 dias: Reduza 2-3 gastos recorrentes e limite a maior categoria",
-            "- 30 dias: Atingir 1 salário de reserva (meta incremental)"
-        ]
-    elif top_intent == 'gasto':
-        checklist += [
-            "- Hoje: Bloqueie compras por impulso e cancele assinaturas pouco usadas",
-            "- 7 dias: Reprecifique contas (telefone/internet/seguros)",
-            "- 30 dias: Estabeleça tetos por categoria e monitore semanalmente"
-        ]
-    elif top_intent == 'orçamento':
-        checklist += [
-            "- Hoje: Adote 50/30/20 como base (ou variação adequada)",
-            "- 7 dias: Ajuste limites por categoria no app",
-            "- 30 dias: Revisão e correção de desvios"
-        ]
-    else:
-        checklist += [
-            "- Hoje: Defina objetivo, valor e prazo",
-            "- 7 dias: Liste ações e recursos necessários",
-            "- 30 dias: Revise progresso e ajuste a estratégia"
-        ]
-    checklist.append("")
-
-    # Termos usados (glossário)
-    terms_lines = []
-    extra_terms = []
-    if top_intent == 'investimento':
-        extra_terms = ['cdi', 'selic', 'ipca', 'tesouro selic', 'tesouro ipca+']
-    if top_intent == 'imposto':
-        extra_terms += ['ipca', 'cdi']
-    explain_terms = list(dict.fromkeys((glossary_hits or []) + extra_terms))[:6]
-    if explain_terms:
-        terms_lines.append("📖 Explicação simples (termos)")
-        for t in explain_terms:
-            desc = FIN_GLOSSARY.get(t)
-            if desc:
-                terms_lines.append(f"- {t.title()}: {desc}")
-        terms_lines.append("")
-
-    # Perguntas sugeridas (para continuar)
-    suggestions = [
-        "❓ Perguntas sugeridas",
-        "- Quer que eu gere um plano mensal detalhado com metas SMART?",
-        "- Deseja que eu simule cenários com 10%, 20% e 30% de poupança?",
-        "- Posso sugerir cortes por categoria com impacto estimado?",
-        ""
-    ]
-
-    # Montar resposta final
-    final_parts = []
-    final_parts.extend(tldr_lines)
-    final_parts.append(raw_text.strip())
-    final_parts.append("")
-    final_parts.extend(checklist)
-    if terms_lines:
-        final_parts.extend(terms_lines)
-    final_parts.extend(suggestions)
-    return "\n".join(final_parts)
+import time
+from sqlalchemy import create_engine, event
+from periods import resolve_period, describe_period, cover_range, bucket_start, GRANULARITIES, TIMEFRAME_LABELS
+from statement_import import PARSERS, StatementError, batched, detect_format, with_content_hashes
+from sqlite_tuning import SerializedWriter, install_sqlite_pragmas, sqlite_pragmas_from_env
+from db_pool import (POOL_METRICS, connection_budget_warning, install_statement_timeout,
+                     pool_settings_from_env, postgres_engine_options)
+from read_replica import ROUTER, RoutingSession, analytics_read, primary_reads, replica_reads
+import partitioning
+from money import format_currency, from_cents, to_cents
+from advisor import AdvisorEngine, apply_profile_to_allocations
+from intent_model import DEFAULT_MODEL_PATH, load_intent_model
+from write_behind import WriteBehindQueue
+import response_store
+from categories import GLOBAL_CATEGORIES, category_attributes
+
+# Conselheiro financeiro: tabelas de intenção, glossário e modelos montados uma vez por processo.
+# Classificador de intenções treinado (intent_model.json); ADVISOR_INTENT_MODEL='' usa só as regras.
+ADVISOR = AdvisorEngine(model=load_intent_model(os.environ.get('ADVISOR_INTENT_MODEL', DEFAULT_MODEL_PATH)))
 
 app = Flask(__name__)
 
+def normalize_database_url(database_url: str) -> str:
+    # Use pg8000 para evitar problemas com psycopg2 + Python 3.13
+    if database_url.startswith('postgres://'):
+        return database_url.replace('postgres://', 'postgresql+pg8000://', 1)
+    if database_url.startswith('postgresql://'):
+        return database_url.replace('postgresql://', 'postgresql+pg8000://', 1)
+    return database_url
+
 # Configuração robusta para Render
 def get_database_uri():
     database_url = os.environ.get('DATABASE_URL')
     
     if database_url:
-        # Use pg8000 para evitar problemas com psycopg2 + Python 3.13
-        if database_url.startswith('postgres://'):
-            database_url = database_url.replace('postgres://', 'postgresql+pg8000://', 1)
+        database_url = normalize_database_url(database_url)
         print(f"✅ Usando PostgreSQL com pg8000")
         return database_url
     
@@ -246,16 +60,83 @@ app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY') or 'dev-key-fallback'
 app.config['SQLALCHEMY_DATABASE_URI'] = get_database_uri()
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
-# SSL para PostgreSQL no Render
+# PostgreSQL no Render: pool, pre-ping, recycle e SSL por variáveis de ambiente (db_pool.py)
 if app.config['SQLALCHEMY_DATABASE_URI'].startswith('postgresql'):
-    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
-        'connect_args': {
-            'sslmode': 'require',
-            'sslrootcert': '/etc/ssl/certs/ca-certificates.crt'
-        }
-    }
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = postgres_engine_options()
+    _budget_warning = connection_budget_warning()
+    if _budget_warning:
+        print(f"⚠️ Pool de conexões: {_budget_warning}")
+
+db = SQLAlchemy(app, session_options={'class_': RoutingSession})
+
+if app.config['SQLALCHEMY_DATABASE_URI'].startswith('postgresql'):
+    with app.app_context():
+        install_statement_timeout(db.engine, pool_settings_from_env()['statement_timeout_ms'])
+
+# SQLite em produção: WAL, synchronous=NORMAL, busy_timeout etc. em cada conexão
+if app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+    with app.app_context():
+        install_sqlite_pragmas(db.engine, sqlite_pragmas_from_env())
+
+# Escritor único opcional (SQLITE_WRITE_QUEUE=1): as escritas das requisições
+# vão para uma thread que agrupa vários commits em um
+write_queue = None
+if (app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite')
+        and os.environ.get('SQLITE_WRITE_QUEUE', '').lower() in ('1', 'true', 'yes')):
+    write_queue = SerializedWriter(lambda: db.session, app.app_context)
+    atexit.register(write_queue.stop)
+
+def run_write(fn):
+    """Executa fn() e faz commit, pela fila do escritor único quando ativa.
+
+    fn deve usar só db.session e valores já lidos (nada de current_user ou
+    objetos da sessão da requisição): na fila ela roda em outra thread.
+    """
+    if write_queue is None:
+        result = fn()
+        db.session.commit()
+        return result
+    note_user_write()  # a escrita roda na thread da fila, fora da requisição
+    return write_queue.run(lambda session: fn())
+
+# ===================== Réplica de leitura (REPLICA_DATABASE_URL) =====================
+# Análises pesadas leem da réplica; por REPLICA_READ_YOUR_WRITES_SECONDS depois
+# de uma escrita do usuário elas voltam ao primário (veja read_replica.py).
+def note_user_write():
+    """Marca no cookie de sessão o horário da última escrita do usuário."""
+    if has_request_context():
+        session['_last_write_at'] = time.time()
+
+def _user_wrote_recently(window_seconds: float) -> bool:
+    if not has_request_context():
+        return False
+    return time.time() - session.get('_last_write_at', 0) < window_seconds
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _note_flush_write(db_session, flush_context):
+    note_user_write()
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def _note_statement_write(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        note_user_write()
+
+def configure_read_replica(replica_url: str):
+    replica_url = normalize_database_url(replica_url)
+    if replica_url.startswith('postgresql'):
+        engine = create_engine(replica_url, **postgres_engine_options())
+        install_statement_timeout(engine, pool_settings_from_env()['statement_timeout_ms'])
+    else:
+        engine = create_engine(replica_url)
+        install_sqlite_pragmas(engine, sqlite_pragmas_from_env())
+    window = float(os.environ.get('REPLICA_READ_YOUR_WRITES_SECONDS', '5'))
+    ROUTER.configure(engine, window, _user_wrote_recently)
+    return engine
+
+if os.environ.get('REPLICA_DATABASE_URL'):
+    configure_read_replica(os.environ['REPLICA_DATABASE_URL'])
+    print("✅ Réplica de leitura configurada para análises")
 
-db = SQLAlchemy(app)
 login_manager = LoginManager()
 login_manager.init_app(app)
 login_manager.login_view = 'login'
@@ -278,11 +159,194 @@ with app.app_context():
         import traceback
         traceback.print_exc()
 
+# Colunas adicionadas depois da criação original das tabelas.
+# db.create_all() não altera tabelas existentes, então elas são
+# adicionadas aqui com ALTER TABLE (idempotente).
+SCHEMA_UPGRADES = [
+    ('transactions', 'deleted_at'),
+    ('transactions', 'content_hash'),
+    ('transactions', 'amount_cents'),
+    ('transactions_archive', 'amount_cents'),
+    ('transactions', 'category_id'),
+    ('transactions_archive', 'category_id'),
+    ('ai_interactions', 'response_hash'),
+    ('ai_interactions', 'section_hashes_json'),
+]
+
+# Valores em reais (Float) que viraram centavos (BIGINT): a coluna antiga fica
+# no banco (sem uso) e a nova é preenchida a partir dela
+CENTS_BACKFILL = [
+    ('transactions', 'amount', 'amount_cents'),
+    ('transactions_archive', 'amount', 'amount_cents'),
+]
+# Tabelas derivadas (totais recalculáveis): quando faltam colunas do modelo
+# (total em centavos, category_id no lugar do texto) são recriadas do zero
+DERIVED_TABLES = ('transaction_rollups', 'transaction_archive_months')
+
+def migrate_amounts_to_cents():
+    """Backfill de amount_cents a partir dos valores em reais (idempotente)."""
+    from sqlalchemy import inspect, text
+    inspector = inspect(db.engine)
+    tables = set(inspector.get_table_names())
+    for table_name, legacy, column in CENTS_BACKFILL:
+        if table_name not in tables or legacy not in {c['name'] for c in inspector.get_columns(table_name)}:
+            continue
+        updated = db.session.execute(text(
+            f'UPDATE {table_name} SET {column} = CAST(ROUND({legacy} * 100) AS BIGINT) '
+            f'WHERE {column} IS NULL AND {legacy} IS NOT NULL')).rowcount
+        if updated:
+            print(f"✅ {table_name}: {updated} valor(es) convertido(s) para centavos")
+    db.session.commit()
+
+def rebuild_derived_tables():
+    """Recria as tabelas derivadas com schema antigo e refaz os resumos do arquivo (idempotente)."""
+    from sqlalchemy import inspect
+    inspector = inspect(db.engine)
+    tables = set(inspector.get_table_names())
+    for table_name in DERIVED_TABLES:
+        table = db.metadata.tables[table_name]
+        if table_name not in tables or set(table.c.keys()) <= {c['name'] for c in inspector.get_columns(table_name)}:
+            continue
+        table.drop(bind=db.engine)
+        table.create(bind=db.engine)
+        print(f"✅ {table_name} recriada")
+    # Rollups voltam sozinhos (ensure_rollups); os resumos do arquivo vêm das linhas arquivadas
+    for (user_id,) in db.session.query(ArchivedTransaction.user_id).distinct().all():
+        if not db.session.query(ArchivedMonthSummary.id).filter_by(user_id=user_id).first():
+            _upsert_archive_summaries(user_id, _month_summaries(
+                ArchivedTransaction, ArchivedTransaction.user_id == user_id))
+    db.session.commit()
+
+def pending_schema_upgrades() -> list:
+    """Tabelas/colunas que `flask db upgrade` ainda precisa criar (só lê o catálogo)."""
+    from sqlalchemy import inspect
+    inspector = inspect(db.engine)
+    existing_tables = set(inspector.get_table_names())
+    pending = sorted(set(db.metadata.tables) - existing_tables)
+    for table_name in sorted(set(DERIVED_TABLES) | {t for t, _ in SCHEMA_UPGRADES}):
+        if table_name not in existing_tables:
+            continue
+        existing_columns = {c['name'] for c in inspector.get_columns(table_name)}
+        pending.extend(f"{table_name}.{column}" for column in db.metadata.tables[table_name].c.keys()
+                       if column not in existing_columns)
+    return pending
+
+def upgrade_schema():
+    """Cria tabelas novas e adiciona colunas que faltam nas existentes.
+
+    Inclui as migrações de dados (centavos, categorias, tabelas derivadas,
+    contadores de foco): roda no deploy (`flask db upgrade`, init_db.py),
+    nunca no import do app.
+    """
+    from sqlalchemy import inspect, text
+    db.create_all()
+    inspector = inspect(db.engine)
+    existing_tables = set(inspector.get_table_names())
+    for table_name, column_name in SCHEMA_UPGRADES:
+        if table_name not in existing_tables:
+            continue
+        existing_columns = {c['name'] for c in inspector.get_columns(table_name)}
+        if column_name in existing_columns:
+            continue
+        column = db.metadata.tables[table_name].c[column_name]
+        column_type = column.type.compile(dialect=db.engine.dialect)
+        db.session.execute(text(f'ALTER TABLE {table_name} ADD COLUMN {column_name} {column_type}'))
+        print(f"✅ Coluna adicionada: {table_name}.{column_name}")
+    db.session.commit()
+    migrate_amounts_to_cents()
+    backfill_category_ids()
+    rebuild_derived_tables()
+    migrate_focus_counters()
+    # Índices declarados nos modelos que ainda não existem no banco
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=db.engine, checkfirst=True)
+    if TRANSACTIONS_PARTITIONED:
+        ensure_transaction_partitions()
+
+def ensure_transaction_partitions(months_ahead: int = partitioning.DEFAULT_MONTHS_AHEAD) -> list:
+    """Cria as partições mensais futuras (startup e `flask partitions ensure` no cron)."""
+    with db.engine.begin() as conn:
+        if not partitioning.is_partitioned(conn):
+            print("⚠️ TRANSACTIONS_PARTITIONING=monthly, mas a tabela não é particionada: "
+                  "rode `flask partitions convert`")
+            return []
+        created = partitioning.ensure_future_partitions(conn, months_ahead)
+    for name in created:
+        print(f"✅ Partição criada: {name}")
+    return created
+
+@app.cli.group('partitions')
+def partitions_cli():
+    """Partições mensais de transactions (PostgreSQL)."""
+
+def _require_partitioning():
+    if not TRANSACTIONS_PARTITIONED:
+        raise click.ClickException('Particionamento desligado: use PostgreSQL com TRANSACTIONS_PARTITIONING=monthly')
+
+@partitions_cli.command('ensure')
+@click.option('--months-ahead', default=partitioning.DEFAULT_MONTHS_AHEAD, show_default=True)
+def partitions_ensure_command(months_ahead):
+    """Cria as partições do mês atual até N meses à frente."""
+    _require_partitioning()
+    created = ensure_transaction_partitions(months_ahead)
+    print(f"✅ {len(created)} partição(ões) criada(s)")
+
+@partitions_cli.command('convert')
+def partitions_convert_command():
+    """Converte a tabela transactions existente para a versão particionada."""
+    _require_partitioning()
+    with db.engine.begin() as conn:
+        try:
+            result = partitioning.convert_to_partitioned(conn, Transaction.__table__)
+        except ValueError as e:
+            raise click.ClickException(str(e))
+    if not result['converted']:
+        print("ℹ️ A tabela já é particionada")
+        return
+    print(f"✅ {result['rows']} transação(ões) copiada(s); confira e apague {result['old_table']}")
+
+@partitions_cli.command('explain')
+@click.option('--user-id', type=int, default=1, show_default=True)
+@click.option('--days', type=int, default=30, show_default=True, help='janela que termina hoje')
+def partitions_explain_command(user_id, days):
+    """Mostra quais partições uma consulta por janela de data lê (pruning)."""
+    _require_partitioning()
+    end = date.today() + timedelta(days=1)
+    with db.engine.connect() as conn:
+        result = partitioning.explain_date_window(conn, user_id, end - timedelta(days=days), end)
+    print(f"Partições lidas: {', '.join(result['scanned']) or '-'}")
+    print("✅ Pruning ok" if result['pruned'] else "⚠️ O plano lê partições fora da janela")
+
+@partitions_cli.command('detach')
+@click.option('--before', required=True, help='AAAA-MM-DD: desanexa meses que terminam até essa data')
+def partitions_detach_command(before):
+    """Desanexa partições antigas (para arquivar e apagar depois)."""
+    _require_partitioning()
+    try:
+        cutoff = datetime.strptime(before, '%Y-%m-%d').date()
+    except ValueError:
+        raise click.BadParameter('use AAAA-MM-DD', param_hint='--before')
+    with db.engine.begin() as conn:
+        names = partitioning.detach_partitions(conn, cutoff)
+    for name in names:
+        print(f"✅ Partição desanexada: {name}")
+
+@app.cli.group('db')
+def db_cli():
+    """Comandos de banco de dados."""
+
+@db_cli.command('upgrade')
+def db_upgrade_command():
+    """Aplica as atualizações de schema (usado pelo build.sh)."""
+    upgrade_schema()
+    print("✅ Schema atualizado!")
+
 # ⚠️ RENOMEIE para evitar conflito de endpoint
 @app.route('/admin/create-tables')
 def admin_create_tables():
     try:
-        db.create_all()
+        upgrade_schema()
         return "✅ Tabelas criadas com sucesso!"
     except Exception as e:
         return f"❌ Erro: {str(e)}"
@@ -308,6 +372,53 @@ def debug_info():
     }
     return info
 
+def is_admin_request() -> bool:
+    """Token de ADMIN_TOKEN (header X-Admin-Token ou Authorization: Bearer) ou usuário em ADMIN_USERS."""
+    token = os.environ.get('ADMIN_TOKEN', '')
+    if token:
+        sent = request.headers.get('X-Admin-Token', '')
+        auth = request.headers.get('Authorization', '')
+        if auth.startswith('Bearer '):
+            sent = sent or auth[len('Bearer '):]
+        if sent and hmac.compare_digest(sent.encode('utf-8'), token.encode('utf-8')):
+            return True
+    admins = {name.strip() for name in os.environ.get('ADMIN_USERS', '').split(',') if name.strip()}
+    return current_user.is_authenticated and current_user.username in admins
+
+def admin_required(view):
+    """Métricas e ferramentas operacionais: só admin (sem configuração, ninguém)."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not is_admin_request():
+            abort(403)
+        return view(*args, **kwargs)
+    return wrapper
+
+@app.route('/admin/db-pool')
+@admin_required
+def db_pool_metrics():
+    """Espera no checkout e ocupação do pool deste worker (para dimensionar workers x conexões)."""
+    data = POOL_METRICS.snapshot(db.engine.pool)
+    data['settings'] = {k: v for k, v in pool_settings_from_env().items() if k != 'sslrootcert'}
+    data['pid'] = os.getpid()
+    return jsonify(data)
+
+@app.route('/admin/advisor-writes')
+@admin_required
+def advisor_writes_metrics():
+    """Profundidade e vazão da fila write-behind do conselheiro (por worker)."""
+    data = advisor_writes.metrics() if advisor_writes is not None else {'enabled': False}
+    data['pid'] = os.getpid()
+    return jsonify(data)
+
+@app.route('/admin/advisor-cache')
+@admin_required
+def advisor_cache_metrics():
+    """Acertos e tamanho dos caches do conselheiro (por worker)."""
+    data = ADVISOR.cache_info()
+    data['pid'] = os.getpid()
+    return jsonify(data)
+
 class User(UserMixin, db.Model):
     __tablename__ = 'users'  # ⚠️ MUDE PARA 'users'
     
@@ -316,18 +427,123 @@ class User(UserMixin, db.Model):
     password_hash = db.Column(db.String(128), nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=True)
 
+class Category(db.Model):
+    """Categoria normalizada: global (user_id NULL) ou do usuário."""
+    __tablename__ = 'categories'
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'normalized_name', name='uq_categories_user_normalized'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
+    name = db.Column(db.String(50), nullable=False)
+    normalized_name = db.Column(db.String(50), nullable=False)
+    need_class = db.Column(db.String(10), nullable=True)  # 'need' | 'want' | NULL
+    tip_family = db.Column(db.String(20), nullable=True)  # alimentacao | transporte | lazer | moradia
+
+def _amount_in_reais():
+    """`amount` em reais sobre a coluna `amount_cents` (templates e formulários)."""
+    return property(lambda self: from_cents(self.amount_cents),
+                    lambda self, value: setattr(self, 'amount_cents', to_cents(value)))
+
+# Particionamento mensal por data (PostgreSQL + TRANSACTIONS_PARTITIONING=monthly).
+# O PostgreSQL exige a chave de partição na PK e nos índices únicos.
+TRANSACTIONS_PARTITIONED = partitioning.partitioning_enabled(app.config['SQLALCHEMY_DATABASE_URI'])
+CONTENT_HASH_KEY = ['user_id', 'content_hash'] + (['date'] if TRANSACTIONS_PARTITIONED else [])
+
 class Transaction(db.Model):
     __tablename__ = 'transactions'  # ⚠️ Nome explícito
-    
-    id = db.Column(db.Integer, primary_key=True)
+    __table_args__ = (
+        # Deduplicação de extratos importados (NULL para lançamentos manuais)
+        db.Index('uq_transactions_user_content_hash', *CONTENT_HASH_KEY, unique=True),
+        # Paginação por keyset: (user_id, date, id) na ordem da listagem
+        db.Index('ix_transactions_user_date_id', 'user_id', 'date', 'id'),
+        # Agrupamento por categoria com inteiros em vez do texto
+        db.Index('ix_transactions_user_category_id', 'user_id', 'category_id'),
+    ) + ((partitioning.partition_table_kwargs(),) if TRANSACTIONS_PARTITIONED else ())
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'))
     type = db.Column(db.String(10))  # 'income' ou 'expense'
+    category = db.Column(db.String(50))  # nome como o usuário digitou (exibição)
+    category_id = db.Column(db.Integer, db.ForeignKey('categories.id'), nullable=True)
+    amount_cents = db.Column(db.BigInteger)  # valor em centavos
+    amount = _amount_in_reais()
+    description = db.Column(db.String(200))
+    date = db.Column(db.Date, primary_key=TRANSACTIONS_PARTITIONED)
+    due_date = db.Column(db.Date, nullable=True)
+    image_path = db.Column(db.String(200), nullable=True)
+    deleted_at = db.Column(db.DateTime, nullable=True)  # exclusão lógica (lixeira)
+    content_hash = db.Column(db.String(64), nullable=True)  # sha256 de data/valor/descrição (importação)
+    if TRANSACTIONS_PARTITIONED:
+        # PK física (id, date); o ORM continua identificando a transação só pelo id
+        __mapper_args__ = {'primary_key': [id]}
+
+# Filtro padrão: ignora transações na lixeira
+ACTIVE_TRANSACTION = Transaction.deleted_at.is_(None)
+
+# Bucket dos rollups/resumos para transações sem categoria (category_id NULL):
+# as chaves únicas não podem ter NULL
+NO_CATEGORY = 0
+
+# ======== Rollups pré-agregados (semana, mês, trimestre, ano) ========
+class TransactionRollup(db.Model):
+    __tablename__ = 'transaction_rollups'
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'granularity', 'period_start', 'type', 'category_id',
+                            name='uq_transaction_rollups_bucket'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    granularity = db.Column(db.String(10), nullable=False)  # week | month | quarter | year
+    period_start = db.Column(db.Date, nullable=False)
+    type = db.Column(db.String(10), nullable=False)
+    category_id = db.Column(db.Integer, nullable=False, default=0)  # categories.id (NO_CATEGORY = sem categoria)
+    total_cents = db.Column(db.BigInteger, nullable=False, default=0)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+# ======== Arquivo frio: transações antigas e resumo mensal ========
+class ArchivedTransaction(db.Model):
+    """Transação que saiu da tabela quente."""
+    __tablename__ = 'transactions_archive'
+    __table_args__ = (
+        db.Index('ix_transactions_archive_user_date', 'user_id', 'date'),
+        # deduplicação da importação de extratos (import_statement)
+        db.Index('ix_transactions_archive_user_content_hash', 'user_id', 'content_hash'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    # id original; o SQLite pode reaproveitá-lo depois que a linha sai de transactions
+    transaction_id = db.Column(db.Integer, nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'))
+    type = db.Column(db.String(10))
     category = db.Column(db.String(50))
-    amount = db.Column(db.Float)
+    category_id = db.Column(db.Integer, nullable=True)
+    amount_cents = db.Column(db.BigInteger)
+    amount = _amount_in_reais()
     description = db.Column(db.String(200))
     date = db.Column(db.Date)
     due_date = db.Column(db.Date, nullable=True)
     image_path = db.Column(db.String(200), nullable=True)
+    deleted_at = db.Column(db.DateTime, nullable=True)
+    content_hash = db.Column(db.String(64), nullable=True)
+    archived_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+class ArchivedMonthSummary(db.Model):
+    """Totais por mês/tipo/categoria das transações arquivadas (ativas)."""
+    __tablename__ = 'transaction_archive_months'
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'month', 'type', 'category_id', name='uq_transaction_archive_months_bucket'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    month = db.Column(db.Date, nullable=False)
+    type = db.Column(db.String(10), nullable=False)
+    category_id = db.Column(db.Integer, nullable=False, default=0)
+    total_cents = db.Column(db.BigInteger, nullable=False, default=0)
+    count = db.Column(db.Integer, nullable=False, default=0)
 
 # ======== IA Learning: Perfis e Interações ========
 class AiProfile(db.Model):
@@ -339,22 +555,73 @@ class AiProfile(db.Model):
     savings_target_pct = db.Column(db.Integer, default=20)  # meta de poupança
     emergency_months_target = db.Column(db.Integer, default=3)
     avoided_categories_json = db.Column(db.Text, default='[]')  # categorias que o usuário não quer cortar
-    focus_counters_json = db.Column(db.Text, default='{}')      # contadores por intenção
+    focus_counters_json = db.Column(db.Text, default='{}')      # legado: contadores agora em ai_intent_counters
     total_feedback = db.Column(db.Integer, default=0)
     avg_helpfulness = db.Column(db.Float, default=0.0)
     interaction_count = db.Column(db.Integer, default=0)
     last_updated = db.Column(db.DateTime, default=datetime.utcnow)
 
+class AiIntentCounter(db.Model):
+    """Perguntas por intenção de cada usuário (incrementadas no banco, sem ler antes)."""
+    __tablename__ = 'ai_intent_counters'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    intent = db.Column(db.String(30), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+class AiResponseBlob(db.Model):
+    """Texto de uma seção de resposta do conselheiro, um por conteúdo distinto, comprimido (response_store.py)."""
+    __tablename__ = 'ai_response_blobs'
+
+    hash = db.Column(db.String(64), primary_key=True)  # SHA-256 do texto
+    codec = db.Column(db.String(10), nullable=False, default=response_store.ZLIB)
+    data = db.Column(db.LargeBinary, nullable=False)
+    size = db.Column(db.Integer, nullable=False)         # bytes do texto original
+    stored_size = db.Column(db.Integer, nullable=False)  # bytes gravados
+    # Gravado ou reaproveitado por último (renovado a cada BLOB_TOUCH_INTERVAL); base da retenção
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    @property
+    def text(self) -> str:
+        return response_store.decompress(self.data, self.codec)
+
 class AiInteraction(db.Model):
     __tablename__ = 'ai_interactions'
+    __table_args__ = (
+        db.Index('ix_ai_interactions_user_created', 'user_id', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     question = db.Column(db.Text, nullable=False)
     intents_json = db.Column(db.Text, default='[]')
-    response = db.Column(db.Text, nullable=False)
+    response = db.Column(db.Text, nullable=False, default='')  # legado: vazio quando há blobs
+    # Legado: blob da resposta inteira (interações antigas e migrate_ai_responses)
+    response_hash = db.Column(db.String(64), db.ForeignKey('ai_response_blobs.hash'), nullable=True, index=True)
+    # Hashes dos blobs das seções, na ordem da resposta (JSON); as seções fixas são
+    # as mesmas para todos os usuários, só as que têm números do usuário variam
+    section_hashes_json = db.Column(db.Text, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    blob = db.relationship(AiResponseBlob)
+
+    @property
+    def response_text(self) -> str:
+        if self.section_hashes_json:
+            hashes = _loads_json_or_default(self.section_hashes_json, [])
+            return '\n'.join(db.session.get(AiResponseBlob, digest).text for digest in hashes)
+        return self.blob.text if self.blob is not None else self.response
+
+class AiInteractionSummary(db.Model):
+    """Interações antigas compactadas (retenção): contagem por usuário e intenção."""
+    __tablename__ = 'ai_interaction_summaries'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    intent = db.Column(db.String(30), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    first_at = db.Column(db.DateTime, nullable=True)
+    last_at = db.Column(db.DateTime, nullable=True)
+
 def _loads_json_or_default(raw_text: str, default):
     try:
         return json.loads(raw_text) if raw_text else default
@@ -370,55 +637,368 @@ def _dumps_json_safe(obj) -> str:
 def get_or_create_ai_profile(user_id: int) -> 'AiProfile':
     profile = AiProfile.query.filter_by(user_id=user_id).first()
     if not profile:
-        profile = AiProfile(user_id=user_id)
-        db.session.add(profile)
+        # Upsert: a fila write-behind pode estar criando o mesmo perfil agora
+        ensure_ai_profiles([user_id])
         db.session.commit()
+        profile = AiProfile.query.filter_by(user_id=user_id).one()
     return profile
 
-def update_profile_on_interaction(profile: 'AiProfile', intents: list, balance: float):
-    # Atualiza contadores de foco (poupança, investimento, dívidas, renda)
-    counters = _loads_json_or_default(profile.focus_counters_json, {})
-    for intent in intents:
-        counters[intent] = counters.get(intent, 0) + 1
+def ensure_ai_profiles(user_ids):
+    """Cria os perfis que faltam, ignorando os que outro processo criou antes (sem commit).
+
+    PostgreSQL/SQLite: INSERT ... ON CONFLICT (user_id) DO NOTHING. Outros
+    bancos: INSERT só dos que a consulta não encontrou.
+    """
+    user_ids = list(dict.fromkeys(user_ids))
+    if not user_ids:
+        return
+    table = AiProfile.__table__
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        existing = {row[0] for row in db.session.query(AiProfile.user_id).filter(AiProfile.user_id.in_(user_ids))}
+        rows = [{'user_id': user_id} for user_id in user_ids if user_id not in existing]
+        if rows:
+            db.session.execute(table.insert(), rows)
+        return
+    stmt = dialect_insert(table).values([{'user_id': user_id} for user_id in user_ids])
+    db.session.execute(stmt.on_conflict_do_nothing(index_elements=['user_id']))
+
+def _profile_interaction_totals(interactions) -> tuple:
+    """(interações com 'poupança', algum saldo negativo) de [(intents, balance)]."""
+    savings_bumps = 0
+    negative_balance = False
+    for intents, balance in interactions:
+        savings_bumps += 'poupança' in intents
+        negative_balance = negative_balance or balance < 0
+    return savings_bumps, negative_balance
+
+def apply_profile_interactions(profile: 'AiProfile', interactions: list):
+    """Aplica várias interações (intents, balance) ao perfil de uma vez, sem commit.
+
+    O resultado é o mesmo de aplicar uma por uma: meta de poupança +1 por
+    interação com 'poupança' (até 25) e fundo de emergência de 6 meses se
+    algum saldo estava negativo. Os contadores por intenção ficam em
+    ai_intent_counters (increment_intent_counters).
+    """
+    savings_bumps, negative_balance = _profile_interaction_totals(interactions)
 
     # Ajuste incremental da meta de poupança
-    if 'poupança' in intents and profile.savings_target_pct < 25:
-        profile.savings_target_pct = min(25, profile.savings_target_pct + 1)
+    if savings_bumps and profile.savings_target_pct < 25:
+        profile.savings_target_pct = min(25, profile.savings_target_pct + savings_bumps)
 
     # Aumenta alvo do fundo de emergência se a situação estiver negativa
-    if balance < 0:
+    if negative_balance:
         profile.emergency_months_target = max(profile.emergency_months_target, 6)
 
-    profile.focus_counters_json = _dumps_json_safe(counters)
-    profile.interaction_count = (profile.interaction_count or 0) + 1
+    profile.interaction_count = (profile.interaction_count or 0) + len(interactions)
     profile.last_updated = datetime.utcnow()
+
+def update_ai_profile_counts(user_id: int, interactions: list):
+    """Mesmas regras de apply_profile_interactions num UPDATE só (sem ler o perfil; sem commit).
+
+    As somas e limites são expressões SQL sobre o valor atual da linha, então
+    gravações concorrentes do mesmo usuário não se sobrescrevem.
+    """
+    savings_bumps, negative_balance = _profile_interaction_totals(interactions)
+    table = AiProfile.__table__
+    values = {
+        'interaction_count': db.func.coalesce(table.c.interaction_count, 0) + len(interactions),
+        'last_updated': datetime.utcnow(),
+    }
+    if savings_bumps:
+        target = table.c.savings_target_pct
+        values['savings_target_pct'] = db.case(
+            (target >= 25, target), (target + savings_bumps > 25, 25), else_=target + savings_bumps)
+    if negative_balance:
+        months = table.c.emergency_months_target
+        values['emergency_months_target'] = db.case((months < 6, 6), else_=months)
+    db.session.execute(table.update().where(table.c.user_id == user_id).values(**values))
+
+INTENT_COUNTER_UPSERT_CHUNK = 500
+
+def increment_intent_counters(increments: dict):
+    """Soma {(user_id, intent): n} em ai_intent_counters sem ler antes (sem commit).
+
+    PostgreSQL/SQLite: INSERT ... ON CONFLICT DO UPDATE SET count = count + n,
+    um comando para o lote inteiro. Outros bancos: UPDATE count = count + n e
+    INSERT só se não havia linha.
+    """
+    rows = [{'user_id': user_id, 'intent': intent, 'count': n}
+            for (user_id, intent), n in increments.items() if n]
+    if not rows:
+        return
+    table = AiIntentCounter.__table__
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        dialect_insert = None
+
+    if dialect_insert is None:
+        for row in rows:
+            updated = db.session.execute(table.update().where(
+                table.c.user_id == row['user_id'], table.c.intent == row['intent']
+            ).values(count=table.c.count + row['count'])).rowcount
+            if not updated:
+                db.session.execute(table.insert().values(**row))
+        return
+
+    for i in range(0, len(rows), INTENT_COUNTER_UPSERT_CHUNK):
+        stmt = dialect_insert(table).values(rows[i:i + INTENT_COUNTER_UPSERT_CHUNK])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['user_id', 'intent'],
+            set_={'count': table.c.count + stmt.excluded.count})
+        db.session.execute(stmt)
+
+def intent_counter_deltas(user_intents) -> dict:
+    """[(user_id, intents), ...] -> {(user_id, intent): n} para increment_intent_counters."""
+    deltas = {}
+    for user_id, intents in user_intents:
+        for intent in intents:
+            deltas[(user_id, intent)] = deltas.get((user_id, intent), 0) + 1
+    return deltas
+
+def get_intent_counters(user_id: int) -> dict:
+    return dict(db.session.query(AiIntentCounter.intent, AiIntentCounter.count).filter(
+        AiIntentCounter.user_id == user_id).all())
+
+def _claim_focus_counters(profile_id: int, old_json: str) -> bool:
+    """Zera focus_counters_json só se ainda vale `old_json` (sem commit); True se esta chamada zerou."""
+    table = AiProfile.__table__
+    return db.session.execute(table.update().where(
+        table.c.id == profile_id, table.c.focus_counters_json == old_json
+    ).values(focus_counters_json='{}')).rowcount == 1
+
+def migrate_focus_counters():
+    """Copia focus_counters_json antigo para ai_intent_counters (idempotente).
+
+    Roda no import de cada worker: cada perfil é reivindicado com um UPDATE
+    condicional (só zera se o JSON ainda é o que foi lido) e só quem afetou
+    a linha soma os contadores, na mesma transação. Dois workers juntos não
+    contam em dobro.
+    """
+    migrated = 0
+    profiles = db.session.query(AiProfile.id, AiProfile.user_id, AiProfile.focus_counters_json).filter(
+        AiProfile.focus_counters_json.isnot(None), AiProfile.focus_counters_json.notin_(('', '{}'))).all()
+    for profile_id, user_id, old_json in profiles:
+        if not _claim_focus_counters(profile_id, old_json):
+            continue  # outro worker já migrou este perfil
+        counters = _loads_json_or_default(old_json, {})
+        increment_intent_counters({(user_id, intent): int(n) for intent, n in counters.items()
+                                   if isinstance(n, (int, float))})
+        migrated += 1
     db.session.commit()
+    if migrated:
+        print(f"✅ Contadores de intenção migrados de {migrated} perfil(is)")
 
-def apply_profile_to_allocations(profile: 'AiProfile', base_amount: float) -> dict:
-    # Distribuição por perfil de risco
-    rp = (profile.risk_profile or 'moderado').lower()
-    if rp == 'conservador':
-        return {
-            'liquidez_diaria': base_amount * 0.70,
-            'curto_prazo': base_amount * 0.20,
-            'diversificados': base_amount * 0.08,
-            'oportunidades': base_amount * 0.02,
-        }
-    elif rp == 'arrojado':
-        return {
-            'liquidez_diaria': base_amount * 0.40,
-            'curto_prazo': base_amount * 0.20,
-            'diversificados': base_amount * 0.35,
-            'oportunidades': base_amount * 0.05,
+def update_profile_on_interaction(profile: 'AiProfile', intents: list, balance: float):
+    apply_profile_interactions(profile, [(intents, balance)])
+    increment_intent_counters(intent_counter_deltas([(profile.user_id, intents)]))
+    db.session.commit()
+
+def apply_advisor_writes(records: list):
+    """Grava um lote de interações do conselheiro (sem commit).
+
+    Um registro é um dict com user_id, question, intents, sections (textos das
+    seções, na ordem), balance e created_at. Perfis que faltam entram por
+    upsert e cada perfil recebe um UPDATE com as somas em SQL (sem ler antes),
+    os contadores de intenção de todos entram num upsert e as interações num
+    INSERT em lote, cada uma com a lista ordenada dos blobs das suas seções.
+    """
+    by_user = {}
+    for record in records:
+        by_user.setdefault(record['user_id'], []).append((record['intents'], record['balance']))
+    ensure_ai_profiles(by_user)
+    for user_id, interactions in by_user.items():
+        update_ai_profile_counts(user_id, interactions)
+    increment_intent_counters(intent_counter_deltas((r['user_id'], r['intents']) for r in records))
+    hashes = store_response_blobs(text for record in records for text in record['sections'])
+    db.session.execute(AiInteraction.__table__.insert(), [
+        {
+            'user_id': record['user_id'],
+            'question': record['question'],
+            'intents_json': _dumps_json_safe(record['intents']),
+            'response': '',
+            'section_hashes_json': json.dumps([hashes[text] for text in record['sections']]),
+            'created_at': record['created_at'],
         }
-    # moderado (default)
+        for record in records
+    ])
+
+# Blobs reaproveitados têm created_at renovado no máximo uma vez por intervalo
+BLOB_TOUCH_INTERVAL = timedelta(days=1)
+
+def store_response_blobs(texts) -> dict:
+    """Grava (se ainda não existem) os blobs dos textos; devolve {texto: hash}. Sem commit.
+
+    Só textos com hash novo são comprimidos; o INSERT ignora conflito caso
+    outro processo grave o mesmo blob ao mesmo tempo. Blobs já existentes têm
+    created_at renovado antes da consulta: a retenção só apaga blobs antigos,
+    e o UPDATE trava a linha contra um DELETE concorrente dela.
+    """
+    hashes = {text: response_store.content_hash(text) for text in texts}
+    if not hashes:
+        return hashes
+    wanted = set(hashes.values())
+    now = datetime.utcnow()
+    table = AiResponseBlob.__table__
+    db.session.execute(table.update().where(
+        table.c.hash.in_(wanted), table.c.created_at < now - BLOB_TOUCH_INTERVAL).values(created_at=now))
+    existing = {row[0] for row in db.session.query(AiResponseBlob.hash).filter(AiResponseBlob.hash.in_(wanted))}
+    codec = response_store.default_codec()
+    rows = [response_store.blob_row(text, codec) for text, digest in hashes.items() if digest not in existing]
+    if not rows:
+        return hashes
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        dialect_insert = None
+    for row in rows:
+        row['created_at'] = now
+    if dialect_insert is None:
+        db.session.execute(table.insert(), rows)
+    else:
+        db.session.execute(dialect_insert(table).on_conflict_do_nothing(index_elements=['hash']), rows)
+    return hashes
+
+AI_RESPONSE_MIGRATION_BATCH = 500
+
+def migrate_ai_responses(batch_size: int = AI_RESPONSE_MIGRATION_BATCH) -> int:
+    """Move o texto das interações antigas (coluna response) para os blobs."""
+    moved = 0
+    while True:
+        rows = db.session.query(AiInteraction.id, AiInteraction.response).filter(
+            AiInteraction.response_hash.is_(None), AiInteraction.section_hashes_json.is_(None)
+        ).order_by(AiInteraction.id).limit(batch_size).all()
+        if not rows:
+            return moved
+        hashes = store_response_blobs(response or '' for _, response in rows)
+        for interaction_id, response in rows:
+            db.session.execute(AiInteraction.__table__.update().where(
+                AiInteraction.__table__.c.id == interaction_id
+            ).values(response='', response_hash=hashes[response or '']))
+        db.session.commit()
+        moved += len(rows)
+
+def _section_hash_lists():
+    """Listas de hashes das seções das interações (em streaming)."""
+    rows = db.session.query(AiInteraction.section_hashes_json).filter(
+        AiInteraction.section_hashes_json.isnot(None)).yield_per(AI_RESPONSE_MIGRATION_BATCH)
+    for (raw,) in rows:
+        yield _loads_json_or_default(raw, [])
+
+def ai_storage_report() -> dict:
+    """Bytes das respostas: lógico (um texto por interação) x gravado (blobs + legado)."""
+    interactions = db.session.query(db.func.count(AiInteraction.id)).scalar() or 0
+    referenced = db.session.query(db.func.sum(AiResponseBlob.size)).join(
+        AiInteraction, AiInteraction.response_hash == AiResponseBlob.hash).scalar() or 0
+    sizes = dict(db.session.query(AiResponseBlob.hash, AiResponseBlob.size))
+    for hashes in _section_hash_lists():
+        # Texto lógico = seções unidas por quebra de linha
+        referenced += sum(sizes.get(digest, 0) for digest in hashes) + max(len(hashes) - 1, 0)
+    legacy = db.session.query(db.func.sum(db.func.length(AiInteraction.response))).filter(
+        AiInteraction.response_hash.is_(None), AiInteraction.section_hashes_json.is_(None)).scalar() or 0
+    blobs, blob_bytes = db.session.query(
+        db.func.count(AiResponseBlob.hash), db.func.sum(AiResponseBlob.stored_size)).one()
+    logical = int(referenced) + int(legacy)
+    stored = int(blob_bytes or 0) + int(legacy)
     return {
-        'liquidez_diaria': base_amount * 0.60,
-        'curto_prazo': base_amount * 0.25,
-        'diversificados': base_amount * 0.10,
-        'oportunidades': base_amount * 0.05,
+        'interactions': interactions,
+        'blobs': blobs,
+        'logical_bytes': logical,
+        'stored_bytes': stored,
+        'saved_bytes': logical - stored,
+        'compacted_interactions': db.session.query(db.func.sum(AiInteractionSummary.count)).scalar() or 0,
     }
 
+def ai_retention_cutoff(days: int | None = None) -> datetime:
+    if days is None:
+        days = int(os.environ.get('AI_INTERACTION_RETENTION_DAYS', '90'))
+    return datetime.utcnow() - timedelta(days=days)
+
+def compact_ai_interactions(before: datetime) -> dict:
+    """Troca as interações anteriores a `before` por contagens por usuário e intenção.
+
+    Depois apaga os blobs que nenhuma interação usa mais e que também são
+    anteriores a `before`: um blob recém-criado pode ainda não ter a interação
+    gravada (fila write-behind, outro worker), então fica para a próxima
+    rodada. Rodar fora do pico (cron), como o arquivamento de transações.
+    """
+    groups = {}
+    rows = db.session.query(AiInteraction.user_id, AiInteraction.intents_json, AiInteraction.created_at).filter(
+        AiInteraction.created_at < before)
+    compacted = 0
+    for user_id, intents_json, created_at in rows:
+        compacted += 1
+        for intent in _loads_json_or_default(intents_json, []) or ['ajuda']:
+            group = groups.setdefault((user_id, str(intent)[:30]), [0, created_at, created_at])
+            group[0] += 1
+            group[1] = min(group[1], created_at)
+            group[2] = max(group[2], created_at)
+    if not compacted:
+        return {'compacted': 0, 'blobs_deleted': 0, 'bytes_freed': 0}
+
+    existing = {(s.user_id, s.intent): s for s in AiInteractionSummary.query.filter(
+        AiInteractionSummary.user_id.in_({user_id for user_id, _ in groups}))}
+    for key, (count, first_at, last_at) in groups.items():
+        summary = existing.get(key)
+        if summary is None:
+            db.session.add(AiInteractionSummary(user_id=key[0], intent=key[1], count=count,
+                                                first_at=first_at, last_at=last_at))
+        else:
+            summary.count += count
+            summary.first_at = min(filter(None, (summary.first_at, first_at)))
+            summary.last_at = max(filter(None, (summary.last_at, last_at)))
+    db.session.execute(AiInteraction.__table__.delete().where(AiInteraction.__table__.c.created_at < before))
+
+    # Candidatos: blobs sem uso recente; os que alguma interação restante usa ficam
+    table = AiResponseBlob.__table__
+    candidates = dict(db.session.query(AiResponseBlob.hash, AiResponseBlob.stored_size).filter(
+        AiResponseBlob.created_at < before))
+    if candidates:
+        for (digest,) in db.session.query(AiInteraction.response_hash).filter(AiInteraction.response_hash.isnot(None)):
+            candidates.pop(digest, None)
+        for hashes in _section_hash_lists():
+            for digest in hashes:
+                candidates.pop(digest, None)
+    orphans = list(candidates)
+    blobs_deleted = bytes_freed = 0
+    for i in range(0, len(orphans), AI_RESPONSE_MIGRATION_BATCH):
+        # created_at de novo no DELETE: um blob reaproveitado agora (renovado) não sai
+        chunk = db.and_(table.c.hash.in_(orphans[i:i + AI_RESPONSE_MIGRATION_BATCH]), table.c.created_at < before)
+        bytes_freed += db.session.query(db.func.sum(AiResponseBlob.stored_size)).filter(chunk).scalar() or 0
+        blobs_deleted += db.session.execute(table.delete().where(chunk)).rowcount
+    db.session.commit()
+    return {'compacted': compacted, 'blobs_deleted': blobs_deleted, 'bytes_freed': int(bytes_freed)}
+
+def _flush_advisor_writes(items: list):
+    # Cada item da fila é a lista de interações de uma requisição (várias no lote da API)
+    records = [record for records in items for record in records]
+    try:
+        run_write(lambda: apply_advisor_writes(records))
+    except Exception:
+        db.session.rollback()
+        raise
+
+# Perfil e histórico do conselheiro gravados fora da resposta (ADVISOR_WRITE_BEHIND=0 desliga)
+advisor_writes = None
+if os.environ.get('ADVISOR_WRITE_BEHIND', '1').lower() in ('1', 'true', 'yes'):
+    advisor_writes = WriteBehindQueue(
+        _flush_advisor_writes, app.app_context,
+        maxsize=int(os.environ.get('ADVISOR_WRITE_QUEUE_SIZE', '1000')),
+        flush_interval=float(os.environ.get('ADVISOR_WRITE_FLUSH_SECONDS', '0.5')),
+        name='advisor-writes')
+    atexit.register(advisor_writes.stop)
+
 @login_manager.user_loader
 def load_user(user_id):
     return User.query.get(int(user_id))
@@ -521,7 +1101,10 @@ def register():
 @login_required
 def dashboard():
     # Buscar transações do usuário
-    transactions = Transaction.query.filter_by(user_id=current_user.id).order_by(Transaction.date.desc()).limit(10).all()
+    transactions = Transaction.query.filter(
+        Transaction.user_id == current_user.id,
+        ACTIVE_TRANSACTION
+    ).order_by(Transaction.date.desc(), Transaction.id.desc()).limit(10).all()
     
     # Calcular saldo
     saldo = get_balance(current_user.id)
@@ -533,6 +1116,7 @@ def dashboard():
     
     contas_vencer = Transaction.query.filter(
         Transaction.user_id == current_user.id,
+        ACTIVE_TRANSACTION,
         Transaction.due_date >= today,
         Transaction.due_date <= next_week
     ).order_by(Transaction.due_date).all()
@@ -559,20 +1143,24 @@ def add_transaction():
     if request.method == 'POST':
         tipo = request.form['type']
         categoria = request.form['category']
-        valor = float(request.form['amount'])
+        valor = to_cents(request.form['amount'])
         descricao = request.form['description']
         data = datetime.strptime(request.form['date'], '%Y-%m-%d').date()
-        
-        trans = Transaction(
-            user_id=current_user.id, 
-            type=tipo, 
-            category=categoria, 
-            amount=valor, 
-            description=descricao, 
-            date=data
-        )
-        db.session.add(trans)
-        db.session.commit()
+        user_id = current_user.id
+
+        def write():
+            trans = Transaction(
+                user_id=user_id, 
+                type=tipo, 
+                category=categoria, 
+                category_id=intern_category(user_id, categoria),
+                amount_cents=valor, 
+                description=descricao, 
+                date=data
+            )
+            db.session.add(trans)
+            record_transaction_rollup(trans)
+        run_write(write)
         flash('Transação adicionada!')
         return redirect(url_for('dashboard'))
     return render_template('add_transaction.html')
@@ -582,42 +1170,601 @@ def add_transaction():
 def add_bill():
     if request.method == 'POST':
         categoria = request.form['category']
-        valor = float(request.form['amount'])
+        valor = to_cents(request.form['amount'])
         descricao = request.form['description']
         data = datetime.strptime(request.form['date'], '%Y-%m-%d').date()
         vencimento = datetime.strptime(request.form['due_date'], '%Y-%m-%d').date()
-        trans = Transaction(user_id=current_user.id, type='expense', category=categoria, amount=valor, description=descricao, date=data, due_date=vencimento)
-        db.session.add(trans)
-        db.session.commit()
+        user_id = current_user.id
+
+        def write():
+            trans = Transaction(user_id=user_id, type='expense', category=categoria, category_id=intern_category(user_id, categoria),
+                                amount_cents=valor, description=descricao, date=data, due_date=vencimento)
+            db.session.add(trans)
+            record_transaction_rollup(trans)
+        run_write(write)
         flash('Conta a vencer cadastrada!')
         return redirect(url_for('dashboard'))
     return render_template('add_bill.html')
 
+def _own_transaction(transaction_id, user_id):
+    # Só db.session: também roda dentro de run_write, na thread da fila
+    return db.session.query(Transaction).filter_by(id=transaction_id, user_id=user_id).first()
+
+def _get_own_transaction_or_404(transaction_id):
+    trans = _own_transaction(transaction_id, current_user.id)
+    if trans is None:
+        abort(404)
+    return trans
+
+def _safe_next_url():
+    # Só aceita caminhos locais para evitar redirecionamento aberto
+    next_url = request.form.get('next') or request.args.get('next') or ''
+    if next_url.startswith('/') and not next_url.startswith('//'):
+        return next_url
+    return url_for('dashboard')
+
+TRANSACTION_TYPES = ('income', 'expense')
+
+def _parse_transaction_form(form, current_type: str) -> dict:
+    """Campos do formulário de edição já convertidos; ValueError com a mensagem para o usuário."""
+    tx_type = form.get('type', current_type)
+    if tx_type not in TRANSACTION_TYPES:
+        raise ValueError('Tipo inválido: use receita ou despesa.')
+    category = (form.get('category') or '').strip()
+    if not category:
+        raise ValueError('Informe a categoria.')
+    try:
+        amount_cents = to_cents(form.get('amount'))
+    except ValueError:
+        amount_cents = None
+    if amount_cents is None:
+        raise ValueError('Valor inválido.')
+    try:
+        tx_date = datetime.strptime(form.get('date') or '', '%Y-%m-%d').date()
+        due_date = form.get('due_date')
+        due_date = datetime.strptime(due_date, '%Y-%m-%d').date() if due_date else None
+    except ValueError:
+        raise ValueError('Data inválida: use o formato AAAA-MM-DD.')
+    return {'type': tx_type, 'category': category, 'amount_cents': amount_cents,
+            'description': form.get('description', ''), 'date': tx_date, 'due_date': due_date}
+
+def _rollup_snapshot(trans: 'Transaction') -> tuple:
+    return (trans.user_id, trans.type, trans.category_id, trans.date, trans.amount_cents)
+
+@app.route('/transaction/<int:transaction_id>/edit', methods=['GET', 'POST'])
+@login_required
+def edit_transaction(transaction_id):
+    trans = _get_own_transaction_or_404(transaction_id)
+    if trans.deleted_at is not None:
+        flash('Transação está na lixeira. Restaure antes de editar.', 'error')
+        return redirect(url_for('dashboard'))
+    if request.method == 'POST':
+        # Valida tudo antes de mexer no objeto: erro não deixa a transação pela metade
+        try:
+            values = _parse_transaction_form(request.form, trans.type)
+        except ValueError as e:
+            flash(str(e), 'error')
+            return render_template('edit_transaction.html', transaction=trans)
+        user_id = current_user.id
+
+        def write():
+            # Relida na sessão de quem grava: pode ter ido para a lixeira nesse meio tempo
+            trans = _own_transaction(transaction_id, user_id)
+            if trans is None or trans.deleted_at is not None:
+                return False
+            before = _rollup_snapshot(trans)
+            for field, value in values.items():
+                setattr(trans, field, value)
+            trans.category_id = intern_category(trans.user_id, trans.category)
+
+            # Correção incremental: retira a versão antiga e soma a nova nos
+            # mesmos buckets, na mesma transação do banco
+            deltas = add_rollup_delta({}, before[0], before[1], before[2], before[3], -(before[4] or 0), -1)
+            add_rollup_delta(deltas, trans.user_id, trans.type, trans.category_id, trans.date, trans.amount_cents, 1)
+            apply_rollup_deltas(deltas)
+            return True
+        if run_write(write):
+            flash('Transação atualizada!')
+        else:
+            flash('Transação está na lixeira. Restaure antes de editar.', 'error')
+        return redirect(_safe_next_url())
+    return render_template('edit_transaction.html', transaction=trans)
+
+@app.route('/transaction/<int:transaction_id>/delete', methods=['POST'])
+@login_required
+def delete_transaction(transaction_id):
+    """Move a transação para a lixeira; com permanent=1 remove de vez."""
+    _get_own_transaction_or_404(transaction_id)
+    permanent = request.form.get('permanent') == '1'
+    user_id = current_user.id
+
+    def write():
+        trans = _own_transaction(transaction_id, user_id)
+        if trans is None:
+            return
+        if trans.deleted_at is None:
+            record_transaction_rollup(trans, sign=-1)
+            trans.deleted_at = datetime.utcnow()
+        if permanent:
+            db.session.delete(trans)
+    run_write(write)
+    flash('Transação excluída!' if permanent else 'Transação movida para a lixeira.')
+    return redirect(_safe_next_url())
+
+@app.route('/transaction/<int:transaction_id>/restore', methods=['POST'])
+@login_required
+def restore_transaction(transaction_id):
+    _get_own_transaction_or_404(transaction_id)
+    user_id = current_user.id
+
+    def write():
+        trans = _own_transaction(transaction_id, user_id)
+        if trans is None or trans.deleted_at is None:
+            return False
+        trans.deleted_at = None
+        record_transaction_rollup(trans)
+        return True
+    if run_write(write):
+        flash('Transação restaurada!')
+    return redirect(_safe_next_url())
+
 # Funções auxiliares
+# ===================== Categorias normalizadas =====================
+# (user_id ou None para global, nome normalizado) -> id. Só entram ids já
+# commitados; os criados na transação atual ficam em session.info até o commit.
+_CATEGORY_IDS = {}
+
+def _pending_categories() -> dict:
+    return db.session.info.setdefault('pending_categories', {})
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _publish_pending_categories(session):
+    _CATEGORY_IDS.update(session.info.pop('pending_categories', {}))
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _discard_pending_categories(session):
+    session.info.pop('pending_categories', None)
+
+@event.listens_for(Category.__table__, 'after_drop')
+def _clear_category_cache(target, connection, **kw):
+    _CATEGORY_IDS.clear()
+
+def intern_category(user_id, name) -> int | None:
+    """Id da categoria para o nome digitado: a global equivalente ou a do usuário (criada se preciso)."""
+    attributes = category_attributes(name)
+    normalized = attributes['normalized_name']
+    if not normalized:
+        return None
+    pending = _pending_categories()
+    for key in ((None, normalized), (user_id, normalized)):
+        if key in _CATEGORY_IDS:
+            return _CATEGORY_IDS[key]
+        if key in pending:
+            return pending[key]
+    row = db.session.query(Category.id, Category.user_id).filter(
+        Category.normalized_name == normalized,
+        db.or_(Category.user_id.is_(None), Category.user_id == user_id)
+    ).order_by(Category.user_id.isnot(None)).first()
+    if row:
+        _CATEGORY_IDS[(row.user_id, normalized)] = row.id
+        return row.id
+    category = Category(user_id=user_id, **attributes)
+    db.session.add(category)
+    db.session.flush()
+    pending[(user_id, normalized)] = category.id
+    return category.id
+
+def category_lookup(user_id) -> dict:
+    """{category_id: (need_class, tip_family)} das categorias globais e do usuário."""
+    rows = db.session.query(Category.id, Category.need_class, Category.tip_family).filter(
+        db.or_(Category.user_id.is_(None), Category.user_id == user_id))
+    return {category_id: (category_need, family) for category_id, category_need, family in rows}
+
+def describe_category(lookup: dict, category_id) -> tuple:
+    """(need_class, tip_family) de uma categoria; (None, None) sem categoria."""
+    return lookup.get(category_id, (None, None))
+
+def seed_global_categories():
+    existing = {n for (n,) in db.session.query(Category.normalized_name).filter(Category.user_id.is_(None))}
+    for name in GLOBAL_CATEGORIES:
+        attributes = category_attributes(name)
+        if attributes['normalized_name'] not in existing:
+            db.session.add(Category(user_id=None, **attributes))
+    db.session.commit()
+
+def intern_missing_category_ids(user_id=None) -> int:
+    """Preenche category_id a partir do texto onde falta (sem commit); devolve as linhas tocadas."""
+    updated = 0
+    for model in (Transaction, ArchivedTransaction):
+        pairs = db.session.query(model.user_id, model.category).filter(
+            model.category_id.is_(None), model.category.isnot(None))
+        if user_id is not None:
+            pairs = pairs.filter(model.user_id == user_id)
+        for owner_id, name in pairs.distinct().all():
+            category_id = intern_category(owner_id, name)
+            if category_id is None:
+                continue
+            updated += db.session.execute(model.__table__.update().where(
+                model.__table__.c.user_id == owner_id, model.__table__.c.category == name,
+                model.__table__.c.category_id.is_(None)).values(category_id=category_id)).rowcount
+    return updated
+
+def backfill_category_ids():
+    """Preenche category_id das transações antigas a partir do texto (idempotente)."""
+    seed_global_categories()
+    updated = intern_missing_category_ids()
+    db.session.commit()
+    if updated:
+        print(f"✅ category_id preenchido em {updated} transação(ões)")
+
 def get_balance(user_id):
-    receitas = db.session.query(db.func.sum(Transaction.amount)).filter_by(user_id=user_id, type='income').scalar() or 0
-    despesas = db.session.query(db.func.sum(Transaction.amount)).filter_by(user_id=user_id, type='expense').scalar() or 0
-    return receitas - despesas
-
-def get_transactions_summary(user_id, timeframe='monthly'):
-    today = datetime.now().date()
-    
-    # Relatórios agora são somente mensais
-    start_date = today.replace(day=1)
-    
-    # Receitas
-    total_income = db.session.query(db.func.sum(Transaction.amount)).filter(
-        Transaction.user_id == user_id,
-        Transaction.type == 'income',
-        Transaction.date >= start_date
-    ).scalar() or 0
-    
-    # Despesas
-    total_expense = db.session.query(db.func.sum(Transaction.amount)).filter(
-        Transaction.user_id == user_id,
-        Transaction.type == 'expense',
-        Transaction.date >= start_date
-    ).scalar() or 0
+    # Somas em centavos (inteiros); reais só no retorno
+    receitas = db.session.query(db.func.sum(Transaction.amount_cents)).filter(
+        Transaction.user_id == user_id, Transaction.type == 'income', ACTIVE_TRANSACTION).scalar() or 0
+    despesas = db.session.query(db.func.sum(Transaction.amount_cents)).filter(
+        Transaction.user_id == user_id, Transaction.type == 'expense', ACTIVE_TRANSACTION).scalar() or 0
+    # Transações arquivadas entram pelo resumo mensal
+    arquivado = dict(db.session.query(ArchivedMonthSummary.type, db.func.sum(ArchivedMonthSummary.total_cents)).filter(
+        ArchivedMonthSummary.user_id == user_id).group_by(ArchivedMonthSummary.type).all())
+    receitas += arquivado.get('income') or 0
+    despesas += arquivado.get('expense') or 0
+    return from_cents(receitas - despesas)
+
+# ===================== Rollups =====================
+# Cada transação contribui para um bucket por granularidade (semana ISO,
+# mês, trimestre e ano). Relatórios de qualquer período somam poucos
+# buckets em vez de varrer a tabela de transações.
+ROLLUP_UPSERT_CHUNK = 100
+
+def add_rollup_delta(deltas: dict, user_id: int, tx_type: str, category_id, tx_date, amount_cents: int, count: int = 1) -> dict:
+    """Acumula em `deltas` a contribuição de uma transação para todos os buckets."""
+    if tx_date is None:
+        return deltas
+    category_id = category_id or NO_CATEGORY
+    for granularity in GRANULARITIES:
+        key = (user_id, granularity, bucket_start(granularity, tx_date), tx_type, category_id)
+        current = deltas.setdefault(key, [0, 0])
+        current[0] += amount_cents or 0
+        current[1] += count
+    return deltas
+
+def apply_rollup_deltas(deltas: dict):
+    """Aplica deltas com upsert atômico (total_cents = total_cents + delta) na sessão atual.
+
+    Não faz commit: o chamador decide, para que a transação e os rollups
+    entrem (ou voltem) juntos.
+    """
+    rows = [
+        {'user_id': k[0], 'granularity': k[1], 'period_start': k[2], 'type': k[3],
+         'category_id': k[4], 'total_cents': v[0], 'count': v[1]}
+        for k, v in deltas.items() if v[0] or v[1]
+    ]
+    if not rows:
+        return
+    table = TransactionRollup.__table__
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        dialect_insert = None
+
+    if dialect_insert is None:
+        # Fallback genérico: lê e atualiza linha a linha
+        for row in rows:
+            existing = TransactionRollup.query.filter_by(
+                user_id=row['user_id'], granularity=row['granularity'], period_start=row['period_start'],
+                type=row['type'], category_id=row['category_id']).first()
+            if existing:
+                existing.total_cents = (existing.total_cents or 0) + row['total_cents']
+                existing.count = (existing.count or 0) + row['count']
+            else:
+                db.session.add(TransactionRollup(**row))
+        db.session.flush()
+        return
+
+    for i in range(0, len(rows), ROLLUP_UPSERT_CHUNK):
+        stmt = dialect_insert(table).values(rows[i:i + ROLLUP_UPSERT_CHUNK])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['user_id', 'granularity', 'period_start', 'type', 'category_id'],
+            set_={'total_cents': table.c.total_cents + stmt.excluded.total_cents,
+                  'count': table.c.count + stmt.excluded.count}
+        )
+        db.session.execute(stmt)
+
+def record_transaction_rollup(trans: 'Transaction', sign: int = 1):
+    """Soma (sign=1) ou remove (sign=-1) uma transação dos rollups."""
+    if trans.category_id is None and trans.category:
+        trans.category_id = intern_category(trans.user_id, trans.category)
+    deltas = add_rollup_delta({}, trans.user_id, trans.type, trans.category_id, trans.date,
+                              sign * (trans.amount_cents or 0), sign)
+    apply_rollup_deltas(deltas)
+
+def rebuild_rollups(user_id: int):
+    """Recalcula todos os rollups do usuário a partir das transações (quentes e arquivadas)."""
+    # Os rollups são gravados no primário, então a leitura também vem dele
+    with primary_reads():
+        TransactionRollup.query.filter_by(user_id=user_id).delete(synchronize_session=False)
+        # Linhas gravadas sem category_id (dados antigos) entram no bucket certo
+        intern_missing_category_ids(user_id)
+        deltas = {}
+        for model in (Transaction, ArchivedTransaction):
+            rows = db.session.query(model.type, model.category_id, model.date, model.amount_cents).filter(
+                model.user_id == user_id,
+                model.deleted_at.is_(None)
+            ).yield_per(1000)
+            for tx_type, category_id, tx_date, amount_cents in rows:
+                add_rollup_delta(deltas, user_id, tx_type, category_id, tx_date, amount_cents)
+        apply_rollup_deltas(deltas)
+        db.session.commit()
+
+def ensure_rollups(user_id: int):
+    """Backfill preguiçoso para usuários com transações anteriores aos rollups."""
+    # Checado no primário: uma réplica atrasada dispararia rebuilds à toa
+    with primary_reads():
+        has_rollups = db.session.query(TransactionRollup.id).filter_by(user_id=user_id).first()
+        if has_rollups:
+            return
+        has_transactions = db.session.query(Transaction.id).filter(Transaction.user_id == user_id, ACTIVE_TRANSACTION).first() \
+            or db.session.query(ArchivedTransaction.id).filter_by(user_id=user_id).first()
+        if has_transactions:
+            rebuild_rollups(user_id)
+
+@app.cli.command('rebuild-rollups')
+def rebuild_rollups_command():
+    """Recalcula os rollups de todos os usuários (flask rebuild-rollups)."""
+    user_ids = [row[0] for row in db.session.query(User.id).all()]
+    for user_id in user_ids:
+        rebuild_rollups(user_id)
+    print(f"✅ Rollups recalculados para {len(user_ids)} usuário(s)")
+
+# ===================== Arquivamento de transações antigas =====================
+# Meses inteiros anteriores ao horizonte (ARCHIVE_HORIZON_MONTHS, padrão 24)
+# saem de `transactions` para `transactions_archive`, deixando um resumo por
+# mês/tipo/categoria. Os rollups não mudam (já contavam essas transações), o
+# saldo soma os resumos e as pontas de períodos antigos também leem o arquivo.
+ARCHIVE_HORIZON_MONTHS = int(os.environ.get('ARCHIVE_HORIZON_MONTHS', '24'))
+
+def archive_horizon(months: int = ARCHIVE_HORIZON_MONTHS, today=None):
+    """Início do mês de `months` meses atrás."""
+    month = bucket_start('month', today or date.today())
+    for _ in range(months):
+        month = bucket_start('month', month - timedelta(days=1))
+    return month
+
+def _upsert_archive_summaries(user_id: int, summaries: dict):
+    """Soma {(mês, tipo, category_id): [centavos, count]} no resumo (sem commit)."""
+    rows = [{'user_id': user_id, 'month': k[0], 'type': k[1], 'category_id': k[2], 'total_cents': v[0], 'count': v[1]}
+            for k, v in summaries.items()]
+    if not rows:
+        return
+    table = ArchivedMonthSummary.__table__
+    dialect = db.session.get_bind().dialect.name
+    if dialect not in ('postgresql', 'sqlite'):
+        for row in rows:
+            existing = ArchivedMonthSummary.query.filter_by(
+                user_id=user_id, month=row['month'], type=row['type'], category_id=row['category_id']).first()
+            if existing:
+                existing.total_cents += row['total_cents']
+                existing.count += row['count']
+            else:
+                db.session.add(ArchivedMonthSummary(**row))
+        db.session.flush()
+        return
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    for i in range(0, len(rows), ROLLUP_UPSERT_CHUNK):
+        stmt = dialect_insert(table).values(rows[i:i + ROLLUP_UPSERT_CHUNK])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['user_id', 'month', 'type', 'category_id'],
+            set_={'total_cents': table.c.total_cents + stmt.excluded.total_cents,
+                  'count': table.c.count + stmt.excluded.count})
+        db.session.execute(stmt)
+
+def _month_summaries(model, *filters) -> dict:
+    """{(mês, tipo, category_id): [centavos, count]} das linhas ativas de `model`."""
+    summaries = {}
+    rows = db.session.query(
+        model.date, model.type, model.category_id,
+        db.func.sum(model.amount_cents), db.func.count(model.id)
+    ).filter(*filters, model.deleted_at.is_(None)).group_by(model.date, model.type, model.category_id)
+    for tx_date, tx_type, category_id, total_cents, count in rows:
+        current = summaries.setdefault((bucket_start('month', tx_date), tx_type, category_id or NO_CATEGORY), [0, 0])
+        current[0] += total_cents or 0
+        current[1] += count
+    return summaries
+
+def _export_archive_files(user_id: int, before, export_dir: str) -> int:
+    """Cópia fria em JSONL gzip: <export_dir>/<user_id>/<ano>.jsonl.gz (append)."""
+    import gzip
+    columns = [c.name for c in Transaction.__table__.columns]
+    rows = db.session.query(*[getattr(Transaction, name) for name in columns]).filter(
+        Transaction.user_id == user_id, Transaction.date < before, ACTIVE_TRANSACTION
+    ).order_by(Transaction.date, Transaction.id).yield_per(EXPORT_FETCH_SIZE)
+    user_dir = os.path.join(export_dir, str(user_id))
+    os.makedirs(user_dir, exist_ok=True)
+    written, year, handle = 0, None, None
+    try:
+        for row in rows:
+            if row.date.year != year:
+                if handle:
+                    handle.close()
+                year = row.date.year
+                handle = gzip.open(os.path.join(user_dir, f'{year}.jsonl.gz'), 'at', encoding='utf-8')
+            record = {name: _export_value(value) for name, value in zip(columns, row)}
+            handle.write(json.dumps(record, ensure_ascii=False) + '\n')
+            written += 1
+    finally:
+        if handle:
+            handle.close()
+    return written
+
+def archive_user_transactions(user_id: int, before, export_dir: str | None = None) -> dict:
+    """Move as transações de `user_id` anteriores ao mês de `before` para o arquivo.
+
+    Tudo numa transação: cópia para transactions_archive, resumo mensal e
+    DELETE da tabela quente. Com `export_dir`, grava também o JSONL gzip.
+    Transações na lixeira ficam na tabela quente: ainda podem ser restauradas.
+    """
+    before = bucket_start('month', before)
+    with primary_reads():
+        # Os rollups precisam ter contado essas linhas antes de elas saírem
+        ensure_rollups(user_id)
+        intern_missing_category_ids(user_id)
+        summaries = _month_summaries(Transaction, Transaction.user_id == user_id, Transaction.date < before)
+
+        exported = _export_archive_files(user_id, before, export_dir) if export_dir else 0
+        table = Transaction.__table__
+        columns = [c.name for c in table.columns]
+        moved = db.session.execute(ArchivedTransaction.__table__.insert().from_select(
+            ['transaction_id' if name == 'id' else name for name in columns],
+            db.select(*[table.c[name] for name in columns]).where(
+                table.c.user_id == user_id, table.c.date < before, table.c.deleted_at.is_(None)))).rowcount
+        _upsert_archive_summaries(user_id, summaries)
+        db.session.execute(table.delete().where(
+            table.c.user_id == user_id, table.c.date < before, table.c.deleted_at.is_(None)))
+        db.session.commit()
+    return {'archived': moved, 'months': len({key[0] for key in summaries}), 'exported': exported}
+
+@app.cli.command('ai-retention')
+@click.option('--days', type=int, help='mantém interações dos últimos N dias (padrão: AI_INTERACTION_RETENTION_DAYS)')
+def ai_retention_command(days):
+    """Compacta o histórico do conselheiro e mostra o espaço economizado (flask ai-retention)."""
+    before = ai_storage_report()
+    moved = migrate_ai_responses()
+    if moved:
+        print(f"🗜️ {moved} resposta(s) antiga(s) movida(s) para blobs comprimidos")
+    result = compact_ai_interactions(ai_retention_cutoff(days))
+    print(f"📦 {result['compacted']} interação(ões) compactada(s); "
+          f"{result['blobs_deleted']} blob(s) removido(s) ({result['bytes_freed']} bytes)")
+    after = ai_storage_report()
+    print(f"✅ Respostas: {after['logical_bytes']} bytes lógicos, {after['stored_bytes']} gravados "
+          f"({after['saved_bytes']} economizados); antes desta execução: {before['stored_bytes']} gravados")
+
+@app.cli.command('archive-transactions')
+@click.option('--before', help='AAAA-MM-DD (padrão: ARCHIVE_HORIZON_MONTHS meses atrás)')
+@click.option('--user-id', type=int, help='só um usuário')
+@click.option('--export-dir', type=click.Path(file_okay=False), help='também grava JSONL gzip por usuário/ano')
+def archive_transactions_command(before, user_id, export_dir):
+    """Arquiva transações antigas (flask archive-transactions)."""
+    if before:
+        try:
+            cutoff = datetime.strptime(before, '%Y-%m-%d').date()
+        except ValueError:
+            raise click.BadParameter('use AAAA-MM-DD', param_hint='--before')
+    else:
+        cutoff = archive_horizon()
+    user_ids = [user_id] if user_id else [row[0] for row in db.session.query(User.id).all()]
+    total = 0
+    for uid in user_ids:
+        result = archive_user_transactions(uid, cutoff, export_dir)
+        total += result['archived']
+        if result['archived']:
+            print(f"📦 Usuário {uid}: {result['archived']} transação(ões) em {result['months']} mês(es)")
+    print(f"✅ {total} transação(ões) arquivada(s) antes de {bucket_start('month', cutoff).isoformat()}")
+
+def get_period_totals(user_id, start, end) -> dict:
+    """Totais de [start, end) por tipo e categoria, lidos dos rollups.
+
+    O intervalo é coberto pelos maiores buckets alinhados possíveis; só as
+    sobras das pontas (alguns dias) são somadas direto nas transações.
+    Agrupa por category_id; o nome (chave de *_by_category) vem do join com
+    categories e `category_ids` leva de volta do nome ao id.
+    """
+    ensure_rollups(user_id)
+    # Acumula em centavos; converte para reais só no fim
+    totals = {'income': 0, 'expense': 0, 'income_by_category': {}, 'expense_by_category': {}, 'count': 0,
+              'category_ids': {}}
+
+    def add(tx_type, category_id, name, amount_cents, count):
+        amount_cents = amount_cents or 0
+        name = name or ''
+        bucket = 'income_by_category' if tx_type == 'income' else 'expense_by_category'
+        totals['income' if tx_type == 'income' else 'expense'] += amount_cents
+        totals[bucket][name] = totals[bucket].get(name, 0) + amount_cents
+        totals['category_ids'][name] = category_id or NO_CATEGORY
+        totals['count'] += count or 0
+
+    buckets, raw_ranges = cover_range(start, end)
+    if buckets:
+        starts_by_granularity = {}
+        for granularity, period_start in buckets:
+            starts_by_granularity.setdefault(granularity, []).append(period_start)
+        conditions = [
+            db.and_(TransactionRollup.granularity == granularity, TransactionRollup.period_start.in_(starts))
+            for granularity, starts in starts_by_granularity.items()
+        ]
+        rows = db.session.query(
+            TransactionRollup.type, TransactionRollup.category_id, Category.name,
+            db.func.sum(TransactionRollup.total_cents), db.func.sum(TransactionRollup.count)
+        ).outerjoin(Category, Category.id == TransactionRollup.category_id).filter(
+            TransactionRollup.user_id == user_id,
+            db.or_(*conditions)
+        ).group_by(TransactionRollup.type, TransactionRollup.category_id, Category.name).all()
+        for row in rows:
+            add(*row)
+
+    # Sobras das pontas: em períodos antigos os dias podem estar no arquivo
+    for model in (Transaction, ArchivedTransaction) if raw_ranges else ():
+        conditions = [db.and_(model.date >= a, model.date < b) for a, b in raw_ranges]
+        rows = db.session.query(
+            model.type, model.category_id, Category.name,
+            db.func.sum(model.amount_cents), db.func.count(model.id)
+        ).outerjoin(Category, Category.id == model.category_id).filter(
+            model.user_id == user_id,
+            model.deleted_at.is_(None),
+            db.or_(*conditions)
+        ).group_by(model.type, model.category_id, Category.name).all()
+        for row in rows:
+            add(*row)
+
+    for key in ('income', 'expense'):
+        totals[key] = from_cents(totals[key])
+    for key in ('income_by_category', 'expense_by_category'):
+        totals[key] = {category: from_cents(cents) for category, cents in totals[key].items()}
+    return totals
+
+def get_monthly_series(user_id, start, end) -> dict:
+    """Série mensal {'AAAA-MM': {...}} dos meses com movimento que intersectam [start, end)."""
+    ensure_rollups(user_id)
+    rows = db.session.query(
+        TransactionRollup.period_start, TransactionRollup.type, Category.name,
+        TransactionRollup.total_cents, TransactionRollup.count
+    ).outerjoin(Category, Category.id == TransactionRollup.category_id).filter(
+        TransactionRollup.user_id == user_id,
+        TransactionRollup.granularity == 'month',
+        TransactionRollup.period_start >= bucket_start('month', start),
+        TransactionRollup.period_start < end
+    ).all()
+    series = {}
+    for period_start, tx_type, category, total_cents, count in rows:
+        if not count and not total_cents:
+            continue
+        month = series.setdefault(period_start.strftime('%Y-%m'), {
+            'income': 0, 'expense': 0, 'categories': {}, 'transaction_count': 0
+        })
+        if tx_type == 'income':
+            month['income'] += total_cents
+        else:
+            month['expense'] += total_cents
+            category = category or ''
+            month['categories'][category] = month['categories'].get(category, 0) + total_cents
+        month['transaction_count'] += count
+    for month in series.values():
+        month['income'] = from_cents(month['income'])
+        month['expense'] = from_cents(month['expense'])
+        month['categories'] = {category: from_cents(cents) for category, cents in month['categories'].items()}
+    return series
+
+def get_transactions_summary(user_id, timeframe='monthly', start=None, end=None):
+    period = resolve_period(timeframe, start, end)
+    totals = get_period_totals(user_id, period['start'], period['end'])
+    
+    total_income = totals['income']
+    total_expense = totals['expense']
     
     # Saldo
     balance = total_income - total_expense
@@ -625,42 +1772,19 @@ def get_transactions_summary(user_id, timeframe='monthly'):
     return {
         'total_income': total_income,
         'total_expense': total_expense,
-        'balance': balance
+        'balance': balance,
+        'period': period
     }
 
-def create_chart_data(user_id, timeframe='monthly', chart_type='both'):
-    today = datetime.now().date()
-    
-    # Relatórios agora são somente mensais
-    start_date = today.replace(day=1)
+def create_chart_data(user_id, timeframe='monthly', chart_type='both', start=None, end=None):
+    period = resolve_period(timeframe, start, end)
+    totals = get_period_totals(user_id, period['start'], period['end'])
     
-    # Buscar categorias únicas
-    categorias = db.session.query(Transaction.category).filter(
-        Transaction.user_id == user_id,
-        Transaction.date >= start_date
-    ).distinct().all()
-    categorias = [cat[0] for cat in categorias]
+    # Categorias do período (receitas e despesas)
+    categorias = list(dict.fromkeys(list(totals['income_by_category']) + list(totals['expense_by_category'])))
     
-    receitas_por_categoria = []
-    despesas_por_categoria = []
-    
-    for categoria in categorias:
-        receita = db.session.query(db.func.sum(Transaction.amount)).filter(
-            Transaction.user_id == user_id,
-            Transaction.type == 'income',
-            Transaction.category == categoria,
-            Transaction.date >= start_date
-        ).scalar() or 0
-        
-        despesa = db.session.query(db.func.sum(Transaction.amount)).filter(
-            Transaction.user_id == user_id,
-            Transaction.type == 'expense',
-            Transaction.category == categoria,
-            Transaction.date >= start_date
-        ).scalar() or 0
-        
-        receitas_por_categoria.append(receita)
-        despesas_por_categoria.append(despesa)
+    receitas_por_categoria = [totals['income_by_category'].get(c, 0) for c in categorias]
+    despesas_por_categoria = [totals['expense_by_category'].get(c, 0) for c in categorias]
     
     # Criar gráfico baseado no tipo
     if chart_type == 'income':
@@ -703,50 +1827,28 @@ def create_chart_data(user_id, timeframe='monthly', chart_type='both'):
     
     return json.dumps({'data': data, 'layout': layout}, cls=plotly.utils.PlotlyJSONEncoder)
 
-def generate_detailed_analysis(user_id, timeframe='monthly'):
+@analytics_read
+def generate_detailed_analysis(user_id, timeframe='monthly', start=None, end=None):
     """Gera análise detalhada dos ganhos e gastos do usuário"""
     
-    # Calcular período atual
-    today = date.today()
-    # Relatórios agora são somente mensais
-    start_date = today.replace(day=1)
-    period_days = 30
-    
-    # Período anterior para comparação
-    prev_start = (start_date - timedelta(days=1)).replace(day=1)
-    
-    # Dados do período atual
-    current_transactions = Transaction.query.filter(
-        Transaction.user_id == user_id,
-        Transaction.date >= start_date
-    ).all()
-    
-    # Dados do período anterior
-    prev_transactions = Transaction.query.filter(
-        Transaction.user_id == user_id,
-        Transaction.date >= prev_start,
-        Transaction.date < start_date
-    ).all()
+    # Período atual e período anterior equivalente (para comparação)
+    period = resolve_period(timeframe, start, end)
+    current = get_period_totals(user_id, period['start'], period['end'])
+    previous = get_period_totals(user_id, period['prev_start'], period['prev_end'])
     
     # Calcular totais atuais
-    current_income = sum(t.amount for t in current_transactions if t.type == 'income')
-    current_expense = sum(t.amount for t in current_transactions if t.type == 'expense')
+    current_income = current['income']
+    current_expense = current['expense']
     current_balance = current_income - current_expense
     
     # Calcular totais anteriores
-    prev_income = sum(t.amount for t in prev_transactions if t.type == 'income')
-    prev_expense = sum(t.amount for t in prev_transactions if t.type == 'expense')
+    prev_income = previous['income']
+    prev_expense = previous['expense']
     prev_balance = prev_income - prev_expense
     
     # Análise por categoria
-    expense_categories = {}
-    income_categories = {}
-    
-    for t in current_transactions:
-        if t.type == 'expense':
-            expense_categories[t.category] = expense_categories.get(t.category, 0) + t.amount
-        else:
-            income_categories[t.category] = income_categories.get(t.category, 0) + t.amount
+    expense_categories = current['expense_by_category']
+    income_categories = current['income_by_category']
     
     # Ordenar categorias por valor
     top_expenses = sorted(expense_categories.items(), key=lambda x: x[1], reverse=True)
@@ -757,6 +1859,7 @@ def generate_detailed_analysis(user_id, timeframe='monthly'):
     
     # 1. Resumo geral
     analysis.append("📊 **RESUMO FINANCEIRO**")
+    analysis.append(f"📅 Período: {describe_period(period)}")
     analysis.append(f"💰 Receitas: R$ {current_income:.2f}")
     analysis.append(f"💸 Despesas: R$ {current_expense:.2f}")
     analysis.append(f"💳 Saldo: R$ {current_balance:.2f}")
@@ -829,51 +1932,37 @@ def generate_detailed_analysis(user_id, timeframe='monthly'):
     if top_expenses:
         analysis.append("\n🎯 **DICAS ESPECÍFICAS**")
         
+        lookup = category_lookup(user_id)
         for category, amount in top_expenses[:3]:
-            if 'alimentação' in category.lower() or 'comida' in category.lower():
+            family = describe_category(lookup, current['category_ids'].get(category))[1]
+            if family == 'alimentacao':
                 analysis.append(f"🍽️ Para {category}: Considere cozinhar em casa e fazer lista de compras")
-            elif 'transporte' in category.lower():
+            elif family == 'transporte':
                 analysis.append(f"🚗 Para {category}: Avalie transporte público ou carona solidária")
-            elif 'lazer' in category.lower() or 'entretenimento' in category.lower():
+            elif family == 'lazer':
                 analysis.append(f"🎮 Para {category}: Procure opções gratuitas ou com desconto")
-            elif 'moradia' in category.lower() or 'casa' in category.lower():
+            elif family == 'moradia':
                 analysis.append(f"🏠 Para {category}: Revise contratos e compare preços")
             else:
                 analysis.append(f"📝 Para {category}: Revise se todos os gastos são realmente necessários")
     
     return "\n".join(analysis)
 
-def ai_financial_analysis(user_id, timeframe='monthly'):
+@analytics_read
+def ai_financial_analysis(user_id, timeframe='monthly', start=None, end=None):
     """IA inteligente para análise financeira preditiva e recomendações personalizadas"""
     
-    # Calcular período atual
-    today = date.today()
-    # Relatórios agora são somente mensais
-    start_date = today.replace(day=1)
-    period_days = 30
+    # Período atual
+    period = resolve_period(timeframe, start, end)
     
-    # Buscar histórico completo do usuário (últimos 6 meses)
-    six_months_ago = today - timedelta(days=180)
-    historical_transactions = Transaction.query.filter(
-        Transaction.user_id == user_id,
-        Transaction.date >= six_months_ago
-    ).order_by(Transaction.date).all()
+    # Histórico mensal (pelo menos os últimos 6 meses até o fim do período)
+    history_start = min(period['start'], period['end'] - timedelta(days=180))
     
     # Dados do período atual
-    current_transactions = [t for t in historical_transactions if t.date >= start_date]
+    current = get_period_totals(user_id, period['start'], period['end'])
     
     # Análise de padrões temporais
-    monthly_patterns = {}
-    for t in historical_transactions:
-        month_key = t.date.strftime('%Y-%m')
-        if month_key not in monthly_patterns:
-            monthly_patterns[month_key] = {'income': 0, 'expense': 0, 'categories': {}}
-        
-        if t.type == 'income':
-            monthly_patterns[month_key]['income'] += t.amount
-        else:
-            monthly_patterns[month_key]['expense'] += t.amount
-            monthly_patterns[month_key]['categories'][t.category] = monthly_patterns[month_key]['categories'].get(t.category, 0) + t.amount
+    monthly_patterns = get_monthly_series(user_id, history_start, period['end'])
     
     # Calcular tendências
     months = sorted(monthly_patterns.keys())
@@ -900,16 +1989,14 @@ def ai_financial_analysis(user_id, timeframe='monthly'):
     
     # Análise de sazonalidade
     seasonal_analysis = {}
-    for t in historical_transactions:
-        month = t.date.month
+    for month_key, data in monthly_patterns.items():
+        month = int(month_key[5:7])
         if month not in seasonal_analysis:
             seasonal_analysis[month] = {'income': 0, 'expense': 0, 'count': 0}
         
-        if t.type == 'income':
-            seasonal_analysis[month]['income'] += t.amount
-        else:
-            seasonal_analysis[month]['expense'] += t.amount
-        seasonal_analysis[month]['count'] += 1
+        seasonal_analysis[month]['income'] += data['income']
+        seasonal_analysis[month]['expense'] += data['expense']
+        seasonal_analysis[month]['count'] += data['transaction_count']
     
     # Identificar meses com maior gasto
     high_expense_months = []
@@ -921,8 +2008,8 @@ def ai_financial_analysis(user_id, timeframe='monthly'):
             high_expense_months.append(month_names[month - 1])
     
     # Análise de risco financeiro
-    current_income = sum(t.amount for t in current_transactions if t.type == 'income')
-    current_expense = sum(t.amount for t in current_transactions if t.type == 'expense')
+    current_income = current['income']
+    current_expense = current['expense']
     current_balance = current_income - current_expense
     
     # Calcular índice de segurança financeira
@@ -932,10 +2019,7 @@ def ai_financial_analysis(user_id, timeframe='monthly'):
         savings_rate = 0
     
     # Análise de diversificação de receitas
-    income_sources = {}
-    for t in current_transactions:
-        if t.type == 'income':
-            income_sources[t.category] = income_sources.get(t.category, 0) + t.amount
+    income_sources = current['income_by_category']
     
     diversification_score = len(income_sources) / 3  # Normalizado para 0-1
     
@@ -1036,17 +2120,16 @@ def ai_financial_analysis(user_id, timeframe='monthly'):
     # 7. Dicas Inteligentes por Categoria
     ai_analysis.append("\n🧠 **DICAS INTELIGENTES POR CATEGORIA**")
     
-    expense_categories = {}
-    for t in current_transactions:
-        if t.type == 'expense':
-            expense_categories[t.category] = expense_categories.get(t.category, 0) + t.amount
+    expense_categories = current['expense_by_category']
     
     top_expenses = sorted(expense_categories.items(), key=lambda x: x[1], reverse=True)
     
+    lookup = category_lookup(user_id)
     for category, amount in top_expenses[:3]:
         percentage = (amount / current_expense) * 100 if current_expense > 0 else 0
+        family = describe_category(lookup, current['category_ids'].get(category))[1]
         
-        if 'alimentação' in category.lower() or 'comida' in category.lower():
+        if family == 'alimentacao':
             if percentage > 30:
                 ai_analysis.append(f"🍽️ **{category} ({percentage:.1f}%)**: ALTO GASTO")
                 ai_analysis.append("   • Implemente planejamento de refeições")
@@ -1055,7 +2138,7 @@ def ai_financial_analysis(user_id, timeframe='monthly'):
             else:
                 ai_analysis.append(f"🍽️ **{category} ({percentage:.1f}%)**: GASTO CONTROLADO")
         
-        elif 'transporte' in category.lower():
+        elif family == 'transporte':
             if percentage > 20:
                 ai_analysis.append(f"🚗 **{category} ({percentage:.1f}%)**: ALTO GASTO")
                 ai_analysis.append("   • Avalie transporte público")
@@ -1064,7 +2147,7 @@ def ai_financial_analysis(user_id, timeframe='monthly'):
             else:
                 ai_analysis.append(f"🚗 **{category} ({percentage:.1f}%)**: GASTO CONTROLADO")
         
-        elif 'lazer' in category.lower() or 'entretenimento' in category.lower():
+        elif family == 'lazer':
             if percentage > 15:
                 ai_analysis.append(f"🎮 **{category} ({percentage:.1f}%)**: ALTO GASTO")
                 ai_analysis.append("   • Busque opções gratuitas")
@@ -1100,45 +2183,25 @@ def ai_financial_analysis(user_id, timeframe='monthly'):
     
     return "\n".join(ai_analysis)
 
-def advanced_ai_analysis(user_id, timeframe='monthly'):
+@analytics_read
+def advanced_ai_analysis(user_id, timeframe='monthly', start=None, end=None):
     """IA super avançada com machine learning para análise financeira preditiva"""
     
-    # Calcular período atual
-    today = date.today()
-    # Relatórios agora são somente mensais
-    start_date = today.replace(day=1)
-    period_days = 30
+    # Período atual
+    period = resolve_period(timeframe, start, end)
     
-    # Buscar histórico completo (últimos 12 meses para análise mais profunda)
-    twelve_months_ago = today - timedelta(days=365)
-    historical_transactions = Transaction.query.filter(
-        Transaction.user_id == user_id,
-        Transaction.date >= twelve_months_ago
-    ).order_by(Transaction.date).all()
+    # Histórico mensal (pelo menos os últimos 12 meses até o fim do período)
+    history_start = min(period['start'], period['end'] - timedelta(days=365))
     
     # Dados do período atual
-    current_transactions = [t for t in historical_transactions if t.date >= start_date]
+    current = get_period_totals(user_id, period['start'], period['end'])
     
     # Análise de padrões temporais avançada
-    monthly_patterns = {}
-    for t in historical_transactions:
-        month_key = t.date.strftime('%Y-%m')
-        if month_key not in monthly_patterns:
-            monthly_patterns[month_key] = {
-                'income': 0, 'expense': 0, 'categories': {},
-                'transaction_count': 0, 'avg_transaction': 0
-            }
-        
-        if t.type == 'income':
-            monthly_patterns[month_key]['income'] += t.amount
-        else:
-            monthly_patterns[month_key]['expense'] += t.amount
-            monthly_patterns[month_key]['categories'][t.category] = monthly_patterns[month_key]['categories'].get(t.category, 0) + t.amount
-        
-        monthly_patterns[month_key]['transaction_count'] += 1
+    monthly_patterns = get_monthly_series(user_id, history_start, period['end'])
     
     # Calcular médias por transação
     for month in monthly_patterns:
+        monthly_patterns[month]['avg_transaction'] = 0
         if monthly_patterns[month]['transaction_count'] > 0:
             monthly_patterns[month]['avg_transaction'] = (
                 monthly_patterns[month]['income'] + monthly_patterns[month]['expense']
@@ -1213,29 +2276,23 @@ def advanced_ai_analysis(user_id, timeframe='monthly'):
     
     # Análise de categorias com machine learning
     category_analysis = {}
-    for t in historical_transactions:
-        if t.type == 'expense':
-            if t.category not in category_analysis:
-                category_analysis[t.category] = {
-                    'total': 0, 'count': 0, 'dates': [], 'trend': 0
+    for month in months:
+        for category, amount in monthly_patterns[month]['categories'].items():
+            if category not in category_analysis:
+                category_analysis[category] = {
+                    'total': 0, 'monthly': [], 'trend': 0
                 }
-            category_analysis[t.category]['total'] += t.amount
-            category_analysis[t.category]['count'] += 1
-            category_analysis[t.category]['dates'].append(t.date)
+            category_analysis[category]['total'] += amount
+            category_analysis[category]['monthly'].append(amount)
     
     # Calcular tendência por categoria
     for category in category_analysis:
-        dates = category_analysis[category]['dates']
-        if len(dates) >= 2:
-            # Dividir em períodos para calcular tendência
-            mid_point = len(dates) // 2
-            early_period = dates[:mid_point]
-            late_period = dates[mid_point:]
-            
-            early_amount = sum(t.amount for t in historical_transactions 
-                             if t.category == category and t.date in early_period)
-            late_amount = sum(t.amount for t in historical_transactions 
-                            if t.category == category and t.date in late_period)
+        monthly_amounts = category_analysis[category]['monthly']
+        if len(monthly_amounts) >= 2:
+            # Dividir os meses em duas metades para calcular tendência
+            mid_point = len(monthly_amounts) // 2
+            early_amount = sum(monthly_amounts[:mid_point])
+            late_amount = sum(monthly_amounts[mid_point:])
             
             if early_amount > 0:
                 category_analysis[category]['trend'] = (late_amount - early_amount) / early_amount
@@ -1244,16 +2301,14 @@ def advanced_ai_analysis(user_id, timeframe='monthly'):
     
     # Análise de sazonalidade avançada
     seasonal_patterns = {}
-    for t in historical_transactions:
-        month = t.date.month
+    for month_key, data in monthly_patterns.items():
+        month = int(month_key[5:7])
         if month not in seasonal_patterns:
             seasonal_patterns[month] = {'income': 0, 'expense': 0, 'count': 0}
         
-        if t.type == 'income':
-            seasonal_patterns[month]['income'] += t.amount
-        else:
-            seasonal_patterns[month]['expense'] += t.amount
-        seasonal_patterns[month]['count'] += 1
+        seasonal_patterns[month]['income'] += data['income']
+        seasonal_patterns[month]['expense'] += data['expense']
+        seasonal_patterns[month]['count'] += data['transaction_count']
     
     # Identificar padrões sazonais
     month_names = ['Janeiro', 'Fevereiro', 'Março', 'Abril', 'Maio', 'Junho',
@@ -1273,8 +2328,8 @@ def advanced_ai_analysis(user_id, timeframe='monthly'):
                 high_income_months.append(month_names[month - 1])
     
     # Calcular métricas atuais
-    current_income = sum(t.amount for t in current_transactions if t.type == 'income')
-    current_expense = sum(t.amount for t in current_transactions if t.type == 'expense')
+    current_income = current['income']
+    current_expense = current['expense']
     current_balance = current_income - current_expense
     
     # Calcular índices financeiros avançados
@@ -1285,10 +2340,7 @@ def advanced_ai_analysis(user_id, timeframe='monthly'):
         savings_rate = expense_ratio = 0
     
     # Análise de diversificação
-    income_sources = {}
-    for t in current_transactions:
-        if t.type == 'income':
-            income_sources[t.category] = income_sources.get(t.category, 0) + t.amount
+    income_sources = current['income_by_category']
     
     diversification_score = len(income_sources) / 3  # Normalizado para 0-1
     
@@ -1512,22 +2564,20 @@ def advanced_ai_analysis(user_id, timeframe='monthly'):
     target_wants = current_income * 0.30
     target_saving = current_income * 0.20
 
-    # Estimar necessidades vs desejos a partir das categorias
-    needs_keywords = ['alimenta', 'mercado', 'supermerc', 'moradia', 'alug', 'condom', 'luz', 'água', 'agua', 'energia', 'internet', 'transporte', 'gasolina', 'saúde', 'saude', 'medic', 'educa', 'escola']
-    wants_keywords = ['lazer', 'entreten', 'restaur', 'delivery', 'assinatura', 'stream', 'viagem', 'jogo']
+    # Estimar necessidades vs desejos a partir das categorias (atributo pré-calculado)
+    lookup = category_lookup(user_id)
     current_needs = 0.0
     current_wants = 0.0
-    for t in current_transactions:
-        if t.type == 'expense':
-            category_lower = (t.category or '').lower()
-            if any(k in category_lower for k in needs_keywords):
-                current_needs += t.amount
-            elif any(k in category_lower for k in wants_keywords):
-                current_wants += t.amount
-            else:
-                # Não classificado: dividir proporcionalmente (70% necessidade / 30% desejo)
-                current_needs += t.amount * 0.7
-                current_wants += t.amount * 0.3
+    for category, amount in current['expense_by_category'].items():
+        category_need = describe_category(lookup, current['category_ids'].get(category))[0]
+        if category_need == 'need':
+            current_needs += amount
+        elif category_need == 'want':
+            current_wants += amount
+        else:
+            # Não classificado: dividir proporcionalmente (70% necessidade / 30% desejo)
+            current_needs += amount * 0.7
+            current_wants += amount * 0.3
 
     from math import ceil
     def fc(v: float) -> str:
@@ -1540,10 +2590,7 @@ def advanced_ai_analysis(user_id, timeframe='monthly'):
     # 11. Plano de corte por categoria (valores precisos)
     ai_analysis.append("\n✂️ **PLANO DE CORTE POR CATEGORIA (VALORES PRECISOS)**")
     # Despesas por categoria no período atual
-    expense_categories_current = {}
-    for t in current_transactions:
-        if t.type == 'expense':
-            expense_categories_current[t.category] = expense_categories_current.get(t.category, 0) + t.amount
+    expense_categories_current = current['expense_by_category']
     top_expenses_current = sorted(expense_categories_current.items(), key=lambda x: x[1], reverse=True)[:5]
 
     # Definir intensidade de corte conforme situação
@@ -1623,30 +2670,44 @@ def advanced_ai_analysis(user_id, timeframe='monthly'):
 
     return "\n".join(ai_analysis)
 
+def _report_period_args():
+    """Lê timeframe/start/end da query string (weekly, monthly, quarterly, yearly ou custom)."""
+    period = resolve_period(request.args.get('timeframe', 'monthly'),
+                            request.args.get('start'), request.args.get('end'))
+    start = period['start'].isoformat() if period['timeframe'] == 'custom' else None
+    end = (period['end'] - timedelta(days=1)).isoformat() if period['timeframe'] == 'custom' else None
+    return period, start, end
+
 @app.route('/reports')
 @login_required
 def reports():
-    # Relatório fixo mensal
-    timeframe = 'monthly'
+    period, start, end = _report_period_args()
+    timeframe = period['timeframe']
     chart_type = request.args.get('chart_type', 'both')
     
     # Obter resumo financeiro
-    summary = get_transactions_summary(current_user.id, timeframe)
+    summary = get_transactions_summary(current_user.id, timeframe, start, end)
     
     # Criar dados do gráfico
-    chart_data = create_chart_data(current_user.id, timeframe, chart_type)
+    chart_data = create_chart_data(current_user.id, timeframe, chart_type, start, end)
     
     # Gerar análise detalhada
-    analysis = generate_detailed_analysis(current_user.id, timeframe)
+    analysis = generate_detailed_analysis(current_user.id, timeframe, start, end)
     
     # Gerar análise de IA
-    ai_analysis = ai_financial_analysis(current_user.id, timeframe)
+    ai_analysis = ai_financial_analysis(current_user.id, timeframe, start, end)
     
     return render_template('reports.html', 
                          total_income=summary['total_income'],
                          total_expense=summary['total_expense'],
                          balance=summary['balance'],
                          timeframe=timeframe,
+                         timeframe_labels=TIMEFRAME_LABELS,
+                         period=period,
+                         period_description=describe_period(period),
+                         period_last_day=period['end'] - timedelta(days=1),
+                         start=start or '',
+                         end=end or '',
                          chart_type=chart_type,
                          bar_chart=chart_data,
                          analysis=analysis,
@@ -1656,14 +2717,14 @@ def reports():
 @login_required
 def export_analysis():
     """Exporta a análise detalhada em formato PDF"""
-    # Relatório fixo mensal
-    timeframe = 'monthly'
+    period, start, end = _report_period_args()
+    timeframe = period['timeframe']
     
     # Gerar análise detalhada
-    analysis = generate_detailed_analysis(current_user.id, timeframe)
+    analysis = generate_detailed_analysis(current_user.id, timeframe, start, end)
     
     # Obter resumo financeiro
-    summary = get_transactions_summary(current_user.id, timeframe)
+    summary = get_transactions_summary(current_user.id, timeframe, start, end)
     
     # Criar conteúdo HTML para PDF
     html_content = f"""
@@ -1689,7 +2750,7 @@ def export_analysis():
         <div class="header">
             <h1>📊 Análise Financeira Detalhada</h1>
             <p>Usuário: {current_user.username}</p>
-            <p>Período: Mensal</p>
+            <p>Período: {describe_period(period)}</p>
             <p>Data: {date.today().strftime('%d/%m/%Y')}</p>
         </div>
         
@@ -1718,6 +2779,329 @@ def export_analysis():
     # Por enquanto, retornamos o HTML (você pode implementar PDF depois)
     return html_content, 200, {'Content-Type': 'text/html; charset=utf-8'}
 
+# ===================== Exportação de transações (CSV / JSONL) =====================
+EXPORT_COLUMNS = ('id', 'date', 'type', 'category', 'amount', 'description', 'due_date')
+EXPORT_FETCH_SIZE = 1000   # linhas por ida ao banco (cursor no servidor)
+EXPORT_CHUNK_ROWS = 500    # linhas por pedaço enviado ao cliente
+
+def _parse_iso_date(value):
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value.strip(), '%Y-%m-%d').date()
+    except ValueError:
+        abort(400)
+
+def _export_filters(user_id: int, model=Transaction) -> list:
+    """Filtros da exportação vindos da query string, aplicados no SQL.
+
+    start/end são datas ISO inclusivas; category e type podem se repetir.
+    `model` é Transaction ou ArchivedTransaction (mesmas colunas).
+    """
+    filters = [model.user_id == user_id, model.deleted_at.is_(None)]
+    start = _parse_iso_date(request.args.get('start'))
+    end = _parse_iso_date(request.args.get('end'))
+    if start:
+        filters.append(model.date >= start)
+    if end:
+        filters.append(model.date < end + timedelta(days=1))
+    categories = [c for c in request.args.getlist('category') if c]
+    if categories:
+        filters.append(model.category.in_(categories))
+    types = [t for t in request.args.getlist('type') if t in ('income', 'expense')]
+    if types:
+        filters.append(model.type.in_(types))
+    return filters
+
+def _transaction_column(name: str, model=Transaction):
+    """Coluna SQL de um campo público (`amount` é lido em centavos).
+
+    No arquivo, `id` é o id original da transação (transaction_id).
+    """
+    if name == 'amount':
+        return model.amount_cents
+    if name == 'id' and model is ArchivedTransaction:
+        return model.transaction_id
+    return getattr(model, name)
+
+def iter_export_rows(filters: list, archived_filters: list | None = None):
+    """Tuplas das transações em ordem (date, id), sem carregar tudo na memória.
+
+    Com `archived_filters`, junta (UNION ALL) as linhas de transactions_archive,
+    para a exportação continuar completa depois do arquivamento.
+    """
+    def select(model, model_filters):
+        return db.select(*[_transaction_column(name, model).label(name) for name in EXPORT_COLUMNS]).where(
+            *model_filters)
+    stmt = select(Transaction, filters)
+    if archived_filters is not None:
+        stmt = db.union_all(select(ArchivedTransaction, archived_filters), stmt)
+    stmt = stmt.order_by(stmt.selected_columns.date, stmt.selected_columns.id)
+    result = db.session.execute(stmt, execution_options={'stream_results': True})
+    return result.yield_per(EXPORT_FETCH_SIZE)
+
+def _export_value(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+def _field_value(name: str, value):
+    """Valor de um campo público pronto para CSV/JSON (centavos -> reais)."""
+    if name == 'amount':
+        return from_cents(value)
+    return _export_value(value)
+
+def _stream_csv(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    pending = 0
+    for row in rows:
+        writer.writerow(['' if value is None else _field_value(name, value) for name, value in zip(EXPORT_COLUMNS, row)])
+        pending += 1
+        if pending >= EXPORT_CHUNK_ROWS:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+            pending = 0
+    yield buffer.getvalue()
+
+def _stream_jsonl(rows):
+    lines = []
+    for row in rows:
+        record = {name: _field_value(name, value) for name, value in zip(EXPORT_COLUMNS, row)}
+        lines.append(json.dumps(record, ensure_ascii=False))
+        if len(lines) >= EXPORT_CHUNK_ROWS:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+@app.route('/export/transactions.<fmt>')
+@login_required
+def export_transactions(fmt):
+    """Exporta o histórico completo (inclusive o arquivado) em CSV ou JSONL, em streaming."""
+    streams = {
+        'csv': (_stream_csv, 'text/csv; charset=utf-8'),
+        'jsonl': (_stream_jsonl, 'application/x-ndjson; charset=utf-8'),
+    }
+    if fmt not in streams:
+        abort(404)
+    stream, mimetype = streams[fmt]
+    rows = iter_export_rows(_export_filters(current_user.id),
+                            _export_filters(current_user.id, ArchivedTransaction))
+    filename = f"transacoes_{current_user.username}_{date.today().isoformat()}.{fmt}"
+    response = Response(stream_with_context(stream(rows)), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response.headers['X-Accel-Buffering'] = 'no'  # não segurar o stream no proxy
+    return response
+
+# ===================== API de transações (paginação por keyset) =====================
+API_PAGE_SIZE = 50
+API_MAX_PAGE_SIZE = 500
+API_FIELDS = ('id', 'date', 'type', 'category', 'amount', 'description', 'due_date')
+
+def encode_cursor(tx_date, transaction_id) -> str:
+    raw = f"{tx_date.isoformat()}|{transaction_id}".encode('ascii')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor: str):
+    """Cursor opaco -> (date, id). Cursor inválido responde 400."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode('ascii')
+        tx_date, transaction_id = raw.split('|')
+        return datetime.strptime(tx_date, '%Y-%m-%d').date(), int(transaction_id)
+    except (ValueError, UnicodeDecodeError):
+        abort(400)
+
+def _api_fields() -> tuple:
+    requested = [f.strip() for f in request.args.get('fields', '').split(',') if f.strip()]
+    if not requested:
+        return API_FIELDS
+    if any(f not in API_FIELDS for f in requested):
+        abort(400)
+    # id e date sempre vêm junto: são a chave do cursor
+    return tuple(dict.fromkeys(['id', 'date'] + requested))
+
+def list_transactions_page(filters: list, fields: tuple, limit: int, cursor=None) -> tuple[list, str | None]:
+    """Uma página em ordem (date desc, id desc), a partir do cursor.
+
+    A busca continua do último (date, id) visto em vez de usar OFFSET, então
+    a página 1000 custa o mesmo que a primeira (índice user_id, date, id).
+    Transações sem data ficam de fora: não têm posição na ordem do cursor
+    (a exportação completa continua trazendo essas linhas). Só lê a tabela
+    quente: o histórico arquivado sai na exportação.
+    """
+    columns = [_transaction_column(name) for name in fields]
+    query = db.session.query(*columns).filter(*filters, Transaction.date.isnot(None))
+    if cursor:
+        last_date, last_id = cursor
+        query = query.filter(db.tuple_(Transaction.date, Transaction.id) < (last_date, last_id))
+    rows = query.order_by(Transaction.date.desc(), Transaction.id.desc()).limit(limit + 1).all()
+    items = [{name: _field_value(name, value) for name, value in zip(fields, row)} for row in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = encode_cursor(last.date, last.id)
+    return items, next_cursor
+
+@app.route('/api/transactions')
+@login_required
+def api_transactions():
+    """Lista paginada: ?limit=&cursor=&fields=&type=&category=&start=&end="""
+    try:
+        limit = min(max(int(request.args.get('limit', API_PAGE_SIZE)), 1), API_MAX_PAGE_SIZE)
+    except ValueError:
+        abort(400)
+    cursor = decode_cursor(request.args['cursor']) if request.args.get('cursor') else None
+    items, next_cursor = list_transactions_page(_export_filters(current_user.id), _api_fields(), limit, cursor)
+
+    response = jsonify({'items': items, 'next_cursor': next_cursor, 'limit': limit})
+    response.headers['Cache-Control'] = 'private, no-cache'  # sempre revalidar via ETag
+    response.add_etag()
+    return response.make_conditional(request)
+
+@app.route('/transactions')
+@login_required
+def all_transactions():
+    """Todas as transações; a lista é carregada de /api/transactions."""
+    return render_template('transactions.html')
+
+# ===================== Importação de extratos (CSV / OFX) =====================
+IMPORT_BATCH_SIZE = 2000      # linhas por INSERT (executemany) e por commit
+IMPORT_HASH_LOOKUP_CHUNK = 500
+
+def _insert_ignoring_duplicates(table):
+    """INSERT que ignora conflito no índice (user_id, content_hash[, date])."""
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        return table.insert()
+    return dialect_insert(table).on_conflict_do_nothing(index_elements=CONTENT_HASH_KEY)
+
+def _existing_content_hashes(user_id: int, hashes: list) -> set:
+    """Hashes já importados, na tabela quente ou no arquivo (reimportar um mês arquivado não duplica)."""
+    existing = set()
+    for i in range(0, len(hashes), IMPORT_HASH_LOOKUP_CHUNK):
+        chunk = hashes[i:i + IMPORT_HASH_LOOKUP_CHUNK]
+        for model in (Transaction, ArchivedTransaction):
+            existing.update(h for (h,) in db.session.query(model.content_hash).filter(
+                model.user_id == user_id, model.content_hash.in_(chunk)))
+    return existing
+
+class ImportBatchConflict(Exception):
+    """Parte do lote já foi gravada por outra importação: refazer linha a linha."""
+
+def _import_batch(user_id: int, batch: list, insert_stmt, row_by_row: bool = False) -> int:
+    """Grava um lote e os rollups só dos lançamentos realmente inseridos (dentro de run_write).
+
+    O INSERT ignora conflitos, então uma importação concorrente pode gravar
+    parte do lote entre a consulta dos hashes e o INSERT. Se o rowcount não
+    bater, levanta ImportBatchConflict (o lote é desfeito); `row_by_row` refaz
+    um INSERT por linha, cada um com rowcount exato. Não faz commit e pode
+    rodar de novo na fila, então não guarda nada entre chamadas.
+    """
+    existing = _existing_content_hashes(user_id, [h for h, _ in batch])
+    category_ids = {}  # nome do extrato -> id (poucas categorias distintas por lote)
+    params = []
+    for content_hash, row in batch:
+        if content_hash in existing:
+            continue
+        existing.add(content_hash)
+        if row.category not in category_ids:
+            category_ids[row.category] = intern_category(user_id, row.category)
+        params.append({'user_id': user_id, 'type': row.type, 'category': row.category,
+                       'category_id': category_ids[row.category], 'amount_cents': to_cents(row.amount),
+                       'description': row.description, 'date': row.date, 'content_hash': content_hash})
+    if row_by_row:
+        inserted = [p for p in params if db.session.execute(insert_stmt, p).rowcount == 1]
+    else:
+        if params and db.session.execute(insert_stmt, params).rowcount != len(params):
+            raise ImportBatchConflict()
+        inserted = params
+    deltas = {}
+    for p in inserted:
+        add_rollup_delta(deltas, user_id, p['type'], p['category_id'], p['date'], p['amount_cents'])
+    if deltas:
+        apply_rollup_deltas(deltas)
+    return len(inserted)
+
+def import_statement(user_id: int, binary, fmt: str) -> dict:
+    """Importa um extrato em lotes, pulando lançamentos já importados.
+
+    O arquivo é lido em streaming; cada lote vira um único INSERT
+    (executemany), uma única atualização de rollups e um commit (run_write),
+    então a memória depende do tamanho do lote e não do arquivo.
+    """
+    ensure_rollups(user_id)  # não deixar o backfill de dados antigos para depois
+    errors = []
+    rows = with_content_hashes(PARSERS[fmt](binary, errors))
+    insert_stmt = _insert_ignoring_duplicates(Transaction.__table__)
+    result = {'read': 0, 'inserted': 0, 'duplicates': 0, 'errors': 0, 'error_samples': []}
+
+    for batch in batched(rows, IMPORT_BATCH_SIZE):
+        result['read'] += len(batch)
+        try:
+            inserted = run_write(lambda: _import_batch(user_id, batch, insert_stmt))
+        except ImportBatchConflict:
+            db.session.rollback()
+            inserted = run_write(lambda: _import_batch(user_id, batch, insert_stmt, row_by_row=True))
+        result['inserted'] += inserted
+
+    result['duplicates'] = result['read'] - result['inserted']
+    result['errors'] = len(errors)
+    result['error_samples'] = errors[:5]
+    return result
+
+def _import_summary(result: dict) -> str:
+    summary = (f"{result['inserted']} transação(ões) importada(s), "
+               f"{result['duplicates']} duplicada(s) ignorada(s)")
+    if result['errors']:
+        samples = '; '.join(f"linha {line}: {message}" for line, message in result['error_samples'])
+        summary += f", {result['errors']} linha(s) inválida(s) ({samples})"
+    return summary
+
+@app.route('/import', methods=['GET', 'POST'])
+@login_required
+def import_transactions():
+    if request.method == 'POST':
+        upload = request.files.get('statement')
+        if upload is None or not upload.filename:
+            flash('Selecione um arquivo de extrato (CSV ou OFX).')
+            return redirect(url_for('import_transactions'))
+        try:
+            fmt = request.form.get('format') or detect_format(upload.filename)
+            if fmt not in PARSERS:
+                raise StatementError(f"Formato de extrato não suportado: {fmt}")
+            result = import_statement(current_user.id, upload.stream, fmt)
+        except StatementError as e:
+            db.session.rollback()
+            flash(f'❌ {e}')
+            return redirect(url_for('import_transactions'))
+        flash(f'✅ {_import_summary(result)}')
+        return redirect(url_for('import_transactions'))
+    return render_template('import_transactions.html')
+
+@app.cli.command('import-statement')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--user', 'username', required=True, help='Usuário dono das transações')
+@click.option('--format', 'fmt', type=click.Choice(sorted(PARSERS)), default=None,
+              help='Formato do arquivo (padrão: pela extensão)')
+def import_statement_command(path, username, fmt):
+    """Importa um extrato CSV/OFX (flask import-statement extrato.ofx --user joao)."""
+    user = User.query.filter_by(username=username).first()
+    if user is None:
+        raise click.ClickException(f"Usuário não encontrado: {username}")
+    try:
+        with open(path, 'rb') as binary:
+            result = import_statement(user.id, binary, fmt or detect_format(path))
+    except StatementError as e:
+        raise click.ClickException(str(e))
+    print(f"✅ {_import_summary(result)}")
+
 import secrets
 import smtplib
 from email.mime.text import MIMEText
@@ -2206,1653 +3590,207 @@ def send_reset_email(email, reset_link):
 @login_required
 def ai_analysis_page():
     """Página dedicada à análise de IA"""
-    # Relatório fixo mensal
-    timeframe = 'monthly'
+    period, start, end = _report_period_args()
+    timeframe = period['timeframe']
     analysis_type = request.args.get('type', 'advanced')
     
     # Gerar análise baseada no tipo escolhido
     if analysis_type == 'basic':
-        ai_analysis = ai_financial_analysis(current_user.id, timeframe)
+        ai_analysis = ai_financial_analysis(current_user.id, timeframe, start, end)
     else:
-        ai_analysis = advanced_ai_analysis(current_user.id, timeframe)
+        ai_analysis = advanced_ai_analysis(current_user.id, timeframe, start, end)
     
     # Obter resumo financeiro
-    summary = get_transactions_summary(current_user.id, timeframe)
+    summary = get_transactions_summary(current_user.id, timeframe, start, end)
     
     return render_template('ai_analysis.html', 
                          ai_analysis=ai_analysis,
                          total_income=summary['total_income'],
                          total_expense=summary['total_expense'],
                          balance=summary['balance'],
-                         timeframe=timeframe)
-
-@app.route('/financial_advisor')
-@login_required
-def financial_advisor():
-    """Conselheiro financeiro IA super inteligente - entende qualquer pergunta e responde como IA avançada"""
-    question_original = request.args.get('question', '')
-    mode = request.args.get('mode', 'didatico').lower().strip()
-    question = normalize_text(question_original)
-    
-    # Análise completa do usuário
-    summary = get_transactions_summary(current_user.id, 'monthly')
-    current_income = summary['total_income']
-    current_expense = summary['total_expense']
-    current_balance = summary['balance']
-    
-    # Análise histórica (últimos 6 meses)
+                         timeframe=timeframe,
+                         timeframe_labels=TIMEFRAME_LABELS,
+                         period_description=describe_period(period),
+                         analysis_type=analysis_type,
+                         start=start or '',
+                         end=end or '')
+
+def _advisor_history(user_id):
+    """Histórico de 6 meses e maiores gastos por categoria, para o conselheiro."""
     six_months_ago = date.today() - timedelta(days=180)
-    historical_transactions = Transaction.query.filter(
-        Transaction.user_id == current_user.id,
-        Transaction.date >= six_months_ago
-    ).order_by(Transaction.date).all()
-    
-    # Calcular métricas avançadas
-    savings_rate = ((current_income - current_expense) / current_income * 100) if current_income > 0 else 0
-    expense_ratio = (current_expense / current_income * 100) if current_income > 0 else 0
-    
-    # Análise de categorias
-    category_expenses = {}
-    for t in historical_transactions:
-        if t.type == 'expense':
-            category_expenses[t.category] = category_expenses.get(t.category, 0) + t.amount
-    
-    # Identificar maiores gastos
-    top_expenses = sorted(category_expenses.items(), key=lambda x: x[1], reverse=True)[:5]
-    
-    # Análise de tendências
-    monthly_data = {}
-    for t in historical_transactions:
-        month_key = t.date.strftime('%Y-%m')
-        if month_key not in monthly_data:
-            monthly_data[month_key] = {'income': 0, 'expense': 0}
-        if t.type == 'income':
-            monthly_data[month_key]['income'] += t.amount
-        else:
-            monthly_data[month_key]['expense'] += t.amount
-    
-    # Calcular tendência
-    months = sorted(monthly_data.keys())
-    if len(months) >= 2:
-        income_trend = (monthly_data[months[-1]]['income'] - monthly_data[months[-2]]['income']) / max(monthly_data[months[-2]]['income'], 1) * 100
-        expense_trend = (monthly_data[months[-1]]['expense'] - monthly_data[months[-2]]['expense']) / max(monthly_data[months[-2]]['expense'], 1) * 100
-    else:
-        income_trend = 0
-        expense_trend = 0
-    
-    # Sistema de processamento de linguagem natural inteligente
-    def analyze_question_intent(question):
-        """Analisa a intenção da pergunta usando processamento de linguagem natural SUPER AVANÇADO e inteligente"""
-        
-        # Normalizar a pergunta
-        question_lower = question.lower().strip()
-        
-        # Sistema de pontuação inteligente baseado em contexto e relevância
-        def calculate_intent_score(question_text, keywords, context_boost=1.0):
-            score = 0
-            question_words = question_text.split()
-            
-            for keyword in keywords:
-                if keyword in question_text:
-                    # Pontuação base
-                    score += 1
-                    
-                    # Boost para palavras mais específicas
-                    if keyword in ['comprar', 'investir', 'economizar', 'pagar', 'aumentar', 'reduzir', 'melhor', 'como', 'onde', 'quando', 'quero', 'preciso', 'ajuda', 'problema', 'solução']:
-                        score += 2
-                    
-                    # Boost para frases completas
-                    if len(keyword.split()) > 1:
-                        score += 3
-                    
-                    # Boost para contexto emocional
-                    if any(word in question_text for word in ['tô', 'estou', 'sou', 'tenho', 'quero', 'preciso', 'ajuda', 'socorro', 'perdido', 'confuso']):
-                        score += 2
-                    
-                    # Boost para urgência
-                    if any(word in question_text for word in ['urgente', 'agora', 'imediatamente', 'rápido', 'logo', 'já']):
-                        score += 3
-            
-            return score * context_boost
-        
-        # Palavras-chave expandidas e sinônimos para diferentes intenções
-        keywords = {
-            'poupança': [
-                'poupar', 'economizar', 'guardar', 'economia', 'poupança', 'savings', 'save', 
-                'cortar gastos', 'reduzir despesas', 'gastar menos', 'economizar mais', 
-                'onde guardar', 'melhor lugar', 'guardar dinheiro', 'economizar dinheiro',
-                'poupar dinheiro', 'cortar despesas', 'reduzir gastos', 'gastar menos',
-                'economizar mais', 'onde guardar dinheiro', 'melhor lugar para guardar',
-                'como economizar', 'como poupar', 'como guardar', 'economizar mais dinheiro',
-                'poupar mais', 'guardar mais', 'cortar custos', 'reduzir custos',
-                'não consigo economizar', 'tô gastando muito', 'gasto demais',
-                'dinheiro não sobra', 'salário não dá', 'não sobra nada',
-                'tô no vermelho', 'saldo negativo', 'déficit', 'prejuízo',
-                'tô quebrado', 'sem dinheiro', 'falta dinheiro', 'tô apertado',
-                'tô endividado', 'tô devendo', 'tô no sufoco', 'tô na merda',
-                'tô fudido', 'tô lascado', 'tô ferrado', 'tô na pindaíba'
-            ],
-            'investimento': [
-                'investir', 'investimento', 'aplicar', 'rendimento', 'lucro', 'invest', 
-                'investment', 'onde investir', 'melhor investimento', 'aplicação', 
-                'rentabilidade', 'melhor aplicação', 'onde aplicar', 'investir dinheiro',
-                'melhor investimento', 'onde investir dinheiro', 'aplicar dinheiro',
-                'rendimento do dinheiro', 'lucro do dinheiro', 'investir melhor',
-                'melhor forma de investir', 'como investir', 'onde colocar dinheiro',
-                'aplicação financeira', 'investimento financeiro', 'rendimento financeiro',
-                'onde colocar', 'melhor lugar', 'fazer dinheiro render', 'multiplicar dinheiro',
-                'dinheiro trabalhando', 'renda passiva', 'ganhar dinheiro dormindo',
-                'investimento seguro', 'aplicação segura', 'onde aplicar com segurança'
-            ],
-            'dívida': [
-                'dívida', 'débito', 'cartão', 'emprestimo', 'emprestimo', 'debt', 'credit', 
-                'pagar dívidas', 'quitar', 'financiamento', 'parcelamento', 'melhor forma pagar', 
-                'como quitar', 'pagar cartão', 'quitar cartão', 'pagar débito',
-                'quitar débito', 'pagar empréstimo', 'quitar empréstimo', 'pagar financiamento',
-                'quitar financiamento', 'pagar parcelamento', 'quitar parcelamento',
-                'como pagar dívidas', 'melhor forma de pagar', 'como quitar dívidas',
-                'pagar dívidas', 'quitar dívidas', 'pagar cartão de crédito',
-                'quitar cartão de crédito', 'pagar empréstimo', 'quitar empréstimo',
-                'tô endividado', 'tô devendo', 'tô no vermelho', 'cartão estourou',
-                'limite estourou', 'juros altos', 'tô pagando juros', 'tô no sufoco',
-                'tô ferrado', 'tô lascado', 'tô na merda', 'tô fudido',
-                'tô quebrado', 'tô na pindaíba', 'tô no aperto', 'tô apertado'
-            ],
-            'renda': [
-                'renda', 'ganhar', 'salário', 'receita', 'income', 'salary', 'earn', 
-                'aumentar renda', 'ganhar mais', 'renda extra', 'freelance', 'como ganhar mais', 
-                'aumentar salário', 'ganhar mais dinheiro', 'aumentar renda', 'renda extra',
-                'ganhar dinheiro', 'aumentar salário', 'ganhar mais salário', 'renda adicional',
-                'ganhar mais renda', 'aumentar ganhos', 'ganhar mais ganhos', 'renda complementar',
-                'ganhar dinheiro extra', 'aumentar receita', 'ganhar mais receita',
-                'quero ganhar mais', 'preciso de mais dinheiro', 'salário baixo',
-                'ganho pouco', 'não ganho o suficiente', 'tô ganhando pouco',
-                'preciso de renda extra', 'quero renda extra', 'como ganhar mais dinheiro',
-                'trabalho extra', 'bico', 'freela', 'renda adicional', 'ganhar mais',
-                'aumentar ganhos', 'melhorar salário', 'promoção', 'mudar de emprego'
-            ],
-            'gasto': [
-                'gasto', 'despesa', 'gastar', 'expense', 'spend', 'cost', 'reduzir gastos', 
-                'cortar despesas', 'otimizar gastos', 'gastar menos', 'onde cortar', 
-                'como reduzir', 'reduzir despesas', 'cortar gastos', 'gastar menos dinheiro',
-                'reduzir custos', 'cortar custos', 'otimizar despesas', 'gastar menos',
-                'onde cortar gastos', 'como reduzir gastos', 'reduzir despesas',
-                'cortar despesas', 'otimizar gastos', 'gastar menos dinheiro',
-                'tô gastando muito', 'gasto demais', 'tô gastando demais',
-                'dinheiro não sobra', 'salário não dá', 'não sobra nada',
-                'tô no vermelho', 'saldo negativo', 'déficit', 'prejuízo',
-                'tô quebrado', 'sem dinheiro', 'falta dinheiro', 'tô apertado',
-                'tô endividado', 'tô devendo', 'tô no sufoco', 'tô na merda',
-                'tô fudido', 'tô lascado', 'tô ferrado', 'tô na pindaíba'
-            ],
-            'planejamento': [
-                'planejar', 'futuro', 'objetivo', 'meta', 'plan', 'goal', 'future', 
-                'planejamento', 'estratégia', 'cronograma', 'plano de ação', 'criar plano',
-                'planejar futuro', 'objetivo financeiro', 'meta financeira', 'planejamento financeiro',
-                'estratégia financeira', 'cronograma financeiro', 'plano de ação financeiro',
-                'criar plano financeiro', 'planejar dinheiro', 'objetivo com dinheiro',
-                'meta com dinheiro', 'planejamento com dinheiro', 'estratégia com dinheiro',
-                'não sei o que fazer', 'tô perdido', 'tô confuso', 'não entendo',
-                'me ajuda', 'socorro', 'tô na merda', 'tô fudido', 'tô lascado',
-                'tô ferrado', 'tô na pindaíba', 'tô no sufoco', 'tô no aperto',
-                'não sei por onde começar', 'por onde começar', 'o que fazer primeiro',
-                'qual o primeiro passo', 'primeiro passo', 'começar', 'iniciar'
-            ],
-            'orçamento': [
-                'orçamento', 'controle', 'budget', 'control', 'organizar', 'gerenciar', 
-                'administrar', 'como fazer orçamento', 'controle financeiro', 'orçamento financeiro',
-                'controle de gastos', 'orçamento de gastos', 'controle de despesas',
-                'orçamento de despesas', 'organizar dinheiro', 'gerenciar dinheiro',
-                'administrar dinheiro', 'como fazer orçamento', 'controle financeiro',
-                'orçamento financeiro', 'controle de gastos', 'orçamento de gastos',
-                'organizar finanças', 'controlar dinheiro', 'administrar finanças',
-                'gerenciar finanças', 'controle financeiro', 'organizar gastos',
-                'controlar gastos', 'administrar gastos', 'gerenciar gastos'
-            ],
-            'emergência': [
-                'emergência', 'emergency', 'imprevisto', 'unexpected', 'fundo emergência', 
-                'reserva', 'fundo de emergência', 'reserva de emergência', 'fundo para emergência',
-                'reserva para emergência', 'dinheiro para emergência', 'fundo de emergência',
-                'reserva de emergência', 'fundo para emergência', 'reserva para emergência',
-                'imprevisto', 'emergência', 'reserva', 'fundo', 'segurança',
-                'proteção', 'backup', 'reserva financeira', 'fundo de segurança',
-                'dinheiro guardado', 'reserva de dinheiro', 'fundo de dinheiro'
-            ],
-            'aposentadoria': [
-                'aposentadoria', 'aposentar', 'retirement', 'velhice', 'terceira idade', 
-                'futuro', 'planejamento aposentadoria', 'aposentadoria', 'aposentar',
-                'planejamento para aposentadoria', 'aposentadoria', 'aposentar',
-                'planejamento para aposentadoria', 'aposentadoria', 'aposentar',
-                'velhice', 'terceira idade', 'futuro', 'previdência', 'previdência privada',
-                'previdência social', 'inss', 'aposentadoria', 'aposentar', 'velhice',
-                'terceira idade', 'futuro', 'previdência', 'previdência privada'
-            ],
-            'imóvel': [
-                'casa', 'apartamento', 'imóvel', 'house', 'property', 'real estate', 
-                'comprar casa', 'financiamento imóvel', 'entrada', 'comprar apartamento',
-                'comprar imóvel', 'financiamento casa', 'entrada casa', 'comprar apartamento',
-                'financiamento apartamento', 'entrada apartamento', 'comprar imóvel',
-                'financiamento imóvel', 'entrada imóvel', 'comprar casa', 'financiamento casa',
-                'comprar casa', 'comprar apartamento', 'comprar imóvel', 'financiamento',
-                'entrada', 'financiamento casa', 'financiamento apartamento', 'financiamento imóvel',
-                'entrada casa', 'entrada apartamento', 'entrada imóvel', 'casa própria',
-                'apartamento próprio', 'imóvel próprio', 'casa própria', 'apartamento próprio'
-            ],
-            'educação': [
-                'estudo', 'curso', 'faculdade', 'education', 'study', 'college', 
-                'universidade', 'formação', 'capacitação', 'investir educação',
-                'estudar', 'cursar', 'faculdade', 'universidade', 'formação',
-                'capacitação', 'investir em educação', 'estudar', 'cursar',
-                'faculdade', 'universidade', 'curso', 'estudo', 'formação',
-                'capacitação', 'investir em educação', 'investir em formação',
-                'investir em capacitação', 'investir em estudo', 'investir em curso'
-            ],
-            'seguro': [
-                'seguro', 'insurance', 'proteção', 'protection', 'cobertura', 
-                'previdência', 'preciso seguro', 'qual seguro', 'seguro de vida',
-                'seguro de saúde', 'seguro de carro', 'seguro de casa', 'seguro de vida',
-                'seguro de saúde', 'seguro de carro', 'seguro de casa',
-                'proteção', 'cobertura', 'seguro', 'insurance', 'proteção financeira',
-                'seguro de vida', 'seguro de saúde', 'seguro de carro', 'seguro de casa',
-                'seguro de vida', 'seguro de saúde', 'seguro de carro', 'seguro de casa'
-            ],
-            'imposto': [
-                'imposto', 'tax', 'tributo', 'taxation', 'ir', 'declaração', 
-                'dedução', 'economizar impostos', 'otimização fiscal', 'imposto de renda',
-                'declaração de imposto', 'dedução de imposto', 'economizar imposto',
-                'otimização fiscal', 'imposto de renda', 'declaração de imposto',
-                'ir', 'imposto de renda', 'declaração', 'dedução', 'economizar impostos',
-                'otimização fiscal', 'imposto de renda', 'declaração de imposto',
-                'dedução de imposto', 'economizar imposto', 'otimização fiscal'
-            ],
-            'viagem': [
-                'viagem', 'travel', 'turismo', 'férias', 'passeio', 'destino', 
-                'hotel', 'passagem', 'planejar viagem', 'economizar viagem',
-                'viajar', 'turismo', 'férias', 'passeio', 'destino', 'hotel',
-                'passagem', 'planejar viagem', 'economizar viagem', 'viajar',
-                'férias', 'turismo', 'passeio', 'destino', 'hotel', 'passagem',
-                'planejar viagem', 'economizar viagem', 'viajar', 'turismo'
-            ],
-            'carro': [
-                'carro', 'automóvel', 'veículo', 'car', 'automobile', 'compra carro', 
-                'financiamento carro', 'entrada carro', 'comprar carro', 'comprar automóvel',
-                'financiamento automóvel', 'entrada automóvel', 'comprar veículo',
-                'financiamento veículo', 'entrada veículo', 'comprar carro',
-                'comprar carro', 'comprar automóvel', 'comprar veículo', 'financiamento',
-                'entrada', 'financiamento carro', 'financiamento automóvel', 'financiamento veículo',
-                'entrada carro', 'entrada automóvel', 'entrada veículo', 'carro próprio',
-                'automóvel próprio', 'veículo próprio', 'carro próprio', 'automóvel próprio'
-            ],
-            'negócio': [
-                'negócio', 'empresa', 'business', 'empreendedorismo', 'abrir empresa', 
-                'startup', 'comércio', 'abrir negócio', 'empreender', 'abrir empresa',
-                'startup', 'comércio', 'abrir negócio', 'empreender', 'abrir empresa',
-                'empreendedorismo', 'abrir empresa', 'abrir negócio', 'startup',
-                'comércio', 'empreender', 'abrir empresa', 'abrir negócio',
-                'empreendedorismo', 'startup', 'comércio', 'empreender'
-            ],
-            'casa': [
-                'casa', 'moradia', 'residência', 'lar', 'home', 'comprar casa', 
-                'alugar casa', 'financiamento casa', 'comprar moradia', 'alugar moradia',
-                'financiamento moradia', 'comprar residência', 'alugar residência',
-                'financiamento residência', 'comprar lar', 'alugar lar', 'financiamento lar',
-                'comprar casa', 'alugar casa', 'financiamento casa', 'comprar moradia',
-                'alugar moradia', 'financiamento moradia', 'comprar residência',
-                'alugar residência', 'financiamento residência', 'comprar lar',
-                'alugar lar', 'financiamento lar', 'casa própria', 'moradia própria'
-            ],
-            'cartao': [
-                'cartao', 'cartao de credito', 'fatura', 'rotativo', 'limite', 'parcelar fatura',
-                'juros do cartao', 'anuidade', 'estourou o limite', 'cartao estourou', 'credito'
-            ],
-            'emprestimo': [
-                'emprestimo', 'empréstimo', 'consignado', 'credito pessoal', 'financiamento',
-                'refinanciamento', 'taxa de juros', 'cet', 'parcela', 'tomar emprestado'
-            ],
-            'cripto': [
-                'bitcoin', 'btc', 'ethereum', 'eth', 'cripto', 'criptomoeda', 'crypto',
-                'altcoin', 'blockchain', 'defi', 'stablecoin'
-            ],
-            'cambio': [
-                'cambio', 'câmbio', 'dolar', 'dólar', 'usd', 'euro', 'eur', 'moeda',
-                'moeda estrangeira', 'proteção cambial', 'hedge', 'exposicao cambial'
-            ]
-        }
-        
-        # Identificar intenção principal com pontuação SUPER AVANÇADA
-        detected_intents = []
-        intent_scores = {}
-        
-        for intent, words in keywords.items():
-            score = calculate_intent_score(question_lower, words)
-            if score > 0:
-                detected_intents.append(intent)
-                intent_scores[intent] = score
-        
-        # Ordenar por pontuação (mais relevante primeiro)
-        detected_intents.sort(key=lambda x: intent_scores[x], reverse=True)
-        
-        # Detecção SUPER INTELIGENTE para perguntas específicas e informais
-        specific_patterns = {
-            # Padrões de compra
-            'quero comprar': 'carro' if 'carro' in question_lower else 'casa' if 'casa' in question_lower else 'imóvel',
-            'vou comprar': 'carro' if 'carro' in question_lower else 'casa' if 'casa' in question_lower else 'imóvel',
-            'preciso comprar': 'carro' if 'carro' in question_lower else 'casa' if 'casa' in question_lower else 'imóvel',
-            
-            # Padrões de viagem
-            'quero viajar': 'viagem',
-            'vou viajar': 'viagem',
-            'preciso viajar': 'viagem',
-            'férias': 'viagem',
-            'turismo': 'viagem',
-            
-            # Padrões de negócio
-            'quero abrir': 'negócio',
-            'vou abrir': 'negócio',
-            'preciso abrir': 'negócio',
-            'empreendedorismo': 'negócio',
-            'startup': 'negócio',
-            
-            # Padrões de ajuda
-            'preciso de': 'seguro' if 'seguro' in question_lower else 'emergência' if 'emergência' in question_lower else 'ajuda',
-            'me ajude com': 'orçamento' if 'orçamento' in question_lower else 'planejamento' if 'planejamento' in question_lower else 'ajuda',
-            'crie um plano': 'planejamento',
-            'melhor forma': 'investimento' if 'investir' in question_lower else 'poupança' if 'economizar' in question_lower else 'ajuda',
-            
-            # Padrões emocionais e informais
-            'tô gastando muito': 'gasto',
-            'tô gastando demais': 'gasto',
-            'gasto demais': 'gasto',
-            'gasto muito': 'gasto',
-            'não consigo economizar': 'poupança',
-            'não sobra nada': 'poupança',
-            'dinheiro não sobra': 'poupança',
-            'salário não dá': 'poupança',
-            'tô endividado': 'dívida',
-            'tô devendo': 'dívida',
-            'tô no vermelho': 'dívida',
-            'cartão estourou': 'dívida',
-            'limite estourou': 'dívida',
-            'quero ganhar mais': 'renda',
-            'preciso ganhar mais': 'renda',
-            'salário baixo': 'renda',
-            'ganho pouco': 'renda',
-            'não sei o que fazer': 'planejamento',
-            'tô perdido': 'ajuda',
-            'tô confuso': 'ajuda',
-            'tô na merda': 'ajuda',
-            'tô fudido': 'ajuda',
-            'tô lascado': 'ajuda',
-            'tô ferrado': 'ajuda',
-            'tô na pindaíba': 'ajuda',
-            'tô no sufoco': 'ajuda',
-            'tô no aperto': 'ajuda',
-            'tô apertado': 'ajuda',
-            'tô quebrado': 'ajuda',
-            'sem dinheiro': 'ajuda',
-            'falta dinheiro': 'ajuda',
-            'me ajuda': 'ajuda',
-            'ajuda': 'ajuda',
-            'socorro': 'ajuda',
-            'não entendo': 'ajuda',
-            'explique': 'ajuda',
-            'dúvida': 'ajuda',
-            'não sei por onde começar': 'planejamento',
-            'por onde começar': 'planejamento',
-            'o que fazer primeiro': 'planejamento',
-            'qual o primeiro passo': 'planejamento',
-            'primeiro passo': 'planejamento',
-            'começar': 'planejamento',
-            'iniciar': 'planejamento',
-            
-            # Padrões de investimento
-            'onde colocar': 'investimento',
-            'onde aplicar': 'investimento',
-            'melhor lugar': 'investimento',
-            'fazer dinheiro render': 'investimento',
-            'multiplicar dinheiro': 'investimento',
-            'dinheiro trabalhando': 'investimento',
-            'renda passiva': 'investimento',
-            'ganhar dinheiro dormindo': 'investimento',
-            
-            # Padrões de educação
-            'estudar': 'educação',
-            'cursar': 'educação',
-            'faculdade': 'educação',
-            'universidade': 'educação',
-            'curso': 'educação',
-            'formação': 'educação',
-            'capacitação': 'educação',
-            
-            # Padrões de seguro
-            'preciso seguro': 'seguro',
-            'qual seguro': 'seguro',
-            'proteção': 'seguro',
-            'cobertura': 'seguro',
-            
-            # Padrões de imposto
-            'imposto': 'imposto',
-            'ir': 'imposto',
-            'declaração': 'imposto',
-            'dedução': 'imposto',
-            
-            # Padrões de emergência
-            'imprevisto': 'emergência',
-            'emergência': 'emergência',
-            'reserva': 'emergência',
-            'fundo': 'emergência',
-            'segurança': 'emergência',
-            'backup': 'emergência',
-            
-            # Padrões de aposentadoria
-            'aposentadoria': 'aposentadoria',
-            'aposentar': 'aposentadoria',
-            'velhice': 'aposentadoria',
-            'terceira idade': 'aposentadoria',
-            'futuro': 'aposentadoria',
-            'previdência': 'aposentadoria',
-            'inss': 'aposentadoria',
-            
-            # Padrões de organização
-            'organizar': 'orçamento',
-            'controlar': 'orçamento',
-            'gerenciar': 'orçamento',
-            'administrar': 'orçamento',
-            'controle': 'orçamento',
-            'organização': 'orçamento',
-            
-            # Padrões de cartão de crédito
-            'cartao': 'cartao',
-            'fatura': 'cartao',
-            'rotativo': 'cartao',
-            'limite': 'cartao',
-            
-            # Padrões de empréstimo
-            'emprestimo': 'emprestimo',
-            'consignado': 'emprestimo',
-            'refinanciamento': 'emprestimo',
-            
-            # Padrões de cripto
-            'bitcoin': 'cripto',
-            'btc': 'cripto',
-            'ethereum': 'cripto',
-            'eth': 'cripto',
-            'cripto': 'cripto',
-            'criptomoeda': 'cripto',
-            
-            # Padrões de câmbio
-            'dolar': 'cambio',
-            'dólar': 'cambio',
-            'usd': 'cambio',
-            'euro': 'cambio',
-            'eur': 'cambio',
-            'cambio': 'cambio',
-            'câmbio': 'cambio'
-        }
-        
-        # Aplicar padrões específicos com prioridade alta
-        for pattern, intent in specific_patterns.items():
-            if pattern in question_lower and intent not in detected_intents:
-                detected_intents.insert(0, intent)  # Prioridade alta para perguntas específicas
-                intent_scores[intent] = intent_scores.get(intent, 0) + 10  # Boost significativo
-        
-        # Análise de contexto SUPER INTELIGENTE
-        if not detected_intents:
-            # Análise de contexto geral com múltiplas camadas
-            context_words = {
-                'dinheiro': ['grana', 'money', 'cash', 'real', 'reais', 'lucro', 'lucros'],
-                'problema': ['problema', 'problemas', 'dificuldade', 'dificuldades', 'obstáculo', 'obstáculos'],
-                'solução': ['solução', 'soluções', 'resolver', 'resolvido', 'ajuda', 'ajudar'],
-                'urgência': ['urgente', 'agora', 'imediatamente', 'rápido', 'logo', 'já', 'hoje'],
-                'futuro': ['futuro', 'amanhã', 'próximo', 'próximos', 'depois', 'mais tarde']
-            }
-            
-            # Detectar contexto emocional
-            emotional_words = ['tô', 'estou', 'sou', 'tenho', 'quero', 'preciso', 'ajuda', 'socorro', 'perdido', 'confuso', 'na merda', 'fudido', 'lascado', 'ferrado', 'na pindaíba', 'no sufoco', 'no aperto', 'apertado', 'quebrado', 'sem dinheiro', 'falta dinheiro']
-            
-            if any(word in question_lower for word in emotional_words):
-                # Se há contexto emocional, priorizar ajuda e planejamento
-                if any(word in question_lower for word in ['dinheiro', 'grana', 'money', 'cash']):
-                    if any(word in question_lower for word in ['guardar', 'poupar', 'economizar', 'sobrar']):
-                        detected_intents.append('poupança')
-                    elif any(word in question_lower for word in ['investir', 'aplicar', 'rendimento', 'multiplicar']):
-                        detected_intents.append('investimento')
-                    elif any(word in question_lower for word in ['gastar', 'gasto', 'despesa', 'gastando']):
-                        detected_intents.append('gasto')
-                    elif any(word in question_lower for word in ['ganhar', 'renda', 'salário', 'ganhando']):
-                        detected_intents.append('renda')
-                    elif any(word in question_lower for word in ['dívida', 'devendo', 'cartão', 'emprestimo']):
-                        detected_intents.append('dívida')
-                    else:
-                        detected_intents.append('planejamento')
-                else:
-                    detected_intents.append('ajuda')
-            else:
-                # Análise neutra
-                if any(word in question_lower for word in ['dinheiro', 'grana', 'money', 'cash']):
-                    if any(word in question_lower for word in ['guardar', 'poupar', 'economizar']):
-                        detected_intents.append('poupança')
-                    elif any(word in question_lower for word in ['investir', 'aplicar', 'rendimento']):
-                        detected_intents.append('investimento')
-                    elif any(word in question_lower for word in ['gastar', 'gasto', 'despesa']):
-                        detected_intents.append('gasto')
-                    else:
-                        detected_intents.append('ajuda')
-                else:
-                    detected_intents.append('ajuda')
-        
-        # Garantir que sempre há pelo menos uma intenção
-        if not detected_intents:
-            detected_intents.append('ajuda')
-        
-        return detected_intents
-    
-    def generate_intelligent_response(question, intents, user_data, entities, profile, glossary_hits):
-        """Gera resposta de especialista, contextualizada por intenção, dados, entidades e perfil de risco"""
-        
-        # Extrair dados do usuário
-        income = user_data['income']
-        expense = user_data['expense']
-        balance = user_data['balance']
-        savings_rate = user_data['savings_rate']
-        top_expenses = user_data['top_expenses']
-        
-        # Análise emocional da pergunta
-        question_lower = question.lower()
-        is_emotional = any(word in question_lower for word in ['tô', 'estou', 'sou', 'tenho', 'quero', 'preciso', 'ajuda', 'socorro', 'perdido', 'confuso', 'na merda', 'fudido', 'lascado', 'ferrado', 'na pindaíba', 'no sufoco', 'no aperto', 'apertado', 'quebrado', 'sem dinheiro', 'falta dinheiro'])
-        is_urgent = any(word in question_lower for word in ['urgente', 'agora', 'imediatamente', 'rápido', 'logo', 'já', 'hoje'])
-        is_informal = any(word in question_lower for word in ['tô', 'tá', 'vou', 'quero', 'preciso', 'ajuda', 'socorro'])
-        
-
-        
-        # Determinar tom da resposta baseado na pergunta
-        if is_emotional and is_urgent:
-            tone = "🚨 URGENTE E EMPÁTICO"
-            emoji_prefix = "🚨"
-        elif is_emotional:
-            tone = "💪 MOTIVACIONAL E APOIADOR"
-            emoji_prefix = "💪"
-        elif is_informal:
-            tone = "😊 AMIGÁVEL E DIRETO"
-            emoji_prefix = "😊"
-        else:
-            tone = "📊 PROFISSIONAL E DETALHADO"
-            emoji_prefix = "📊"
-        
-        # 0) Dúvidas de conceito (glossário)
-        if glossary_hits:
-            lines = ["🧾 Conceitos financeiros importantes:", ""]
-            for term in glossary_hits[:5]:
-                lines.append(f"• {term.title()}: {FIN_GLOSSARY[term]}")
-            lines.append("")
-            lines.append("Se quiser, posso aplicar esses conceitos ao seu caso (renda, despesas, objetivos e prazo).")
-            return "\n".join(lines)
-
-        # 1) Sinalizar valores/prazos extraídos e ajustar estratégia
-        invest_base_amount = None
-        if entities.get('amounts'):
-            invest_base_amount = max(0.0, float(entities['amounts'][0]))
-        time_horizon_months = None
-        if entities.get('months'):
-            time_horizon_months = max(1, int(entities['months'][0]))
-        desired_pct = None
-        if entities.get('percents'):
-            desired_pct = max(0.0, min(100.0, float(entities['percents'][0])))
-
-        # Resposta baseada na intenção detectada
-        if 'poupança' in intents:
-            if balance < 0:
-                if is_emotional and is_urgent:
-                    return f"""{emoji_prefix} **CALMA! VAMOS RESOLVER ISSO JUNTOS!**
-
-😰 **Entendo que você está preocupado, mas vamos resolver isso passo a passo!**
-
-📊 **Sua situação atual:**
-• Receitas: {format_currency(income)}
-• Despesas: {format_currency(expense)}
-• Déficit: {format_currency(abs(balance))}
-
-🎯 **PLANO DE EMERGÊNCIA - VAMOS SAIR DO VERMELHO:**
-
-**HOJE MESMO:**
-1. **Cancele 2-3 assinaturas** que você não usa muito
-2. **Pare de pedir delivery** por 1 semana
-3. **Venda algo que não usa** (roupas, eletrônicos)
-
-**ESTA SEMANA:**
-1. **Negocie dívidas** - ligue para os bancos
-2. **Busque bicos** - freelancing, Uber, vendas online
-3. **Corte gastos** com {top_expenses[0][0] if top_expenses else 'maior gasto'} em 50%
-
-**ESTE MÊS:**
-1. **Crie fundo de emergência** de {format_currency(500)}
-2. **Use regra 80/15/5** (80% necessidades, 15% dívidas, 5% emergência)
-
-💪 **Você consegue! Pequenas mudanças fazem grande diferença!**"""
-                elif is_emotional:
-                    return f"""{emoji_prefix} **ENTENDO! VAMOS RESOLVER ISSO JUNTOS!**
-
-😰 **Sei que tá difícil, mas vamos sair dessa situação!**
-
-📊 **Sua situação atual:**
-• Receitas: {format_currency(income)}
-• Despesas: {format_currency(expense)}
-• Déficit: {format_currency(abs(balance))}
-
-🎯 **PLANO PRÁTICO - VAMOS SAIR DO VERMELHO:**
-
-**HOJE MESMO:**
-1. **Cancele 2-3 assinaturas** que você não usa (Netflix, Spotify, etc.)
-2. **Pare de pedir delivery** por 1 semana
-3. **Venda algo que não usa** (roupas, eletrônicos)
-
-**ESTA SEMANA:**
-1. **Corte gastos com {top_expenses[0][0] if top_expenses else 'maior gasto'}** pela metade
-2. **Use transporte público** em vez de Uber/táxi
-3. **Faça comida em casa** em vez de comer fora
-
-**ESTE MÊS:**
-1. **Busque renda extra** - freelancing, Uber, vendas online
-2. **Negocie dívidas** - ligue para os bancos
-3. **Crie fundo de emergência** de {format_currency(500)}
-
-💡 **Dicas práticas:**
-• **Compras:** Vá ao mercado com lista e sem fome
-• **Lazer:** Procure opções gratuitas (parques, museus)
-• **Transporte:** Use bicicleta ou caminhe quando possível
-• **Comida:** Cozinhe em quantidade e congele
-
-💪 **Meta realista:** Economizar {format_currency(abs(balance) + 500)} em 2 meses!
-
-**Você consegue! Pequenas mudanças fazem grande diferença!** 🚀"""
-                else:
-                    return f"""🚨 **SITUAÇÃO CRÍTICA - SALDO NEGATIVO**
-
-📊 **Análise da sua situação:**
-• Receitas: {format_currency(income)}
-• Despesas: {format_currency(expense)}
-• Déficit: {format_currency(abs(balance))}
-
-🎯 **PLANO DE EMERGÊNCIA IMEDIATO:**
-1. **Corte gastos não essenciais** (assinaturas, delivery, lazer)
-2. **Negocie dívidas** com juros altos
-3. **Busque renda extra** (freelancing, vendas online)
-4. **Crie fundo de emergência** mínimo de {format_currency(500)}
-
-💡 **Dicas específicas:**
-• Reduza {top_expenses[0][0] if top_expenses else 'gastos principais'} em 30%
-• Use regra 70/20/10 (70% necessidades, 20% dívidas, 10% emergência)
-• Automatize transferências para poupança
-
-⚠️ **Prioridade:** Estabilizar antes de poupar!"""
-            
-            elif savings_rate < 10:
-                if is_emotional:
-                    return f"""{emoji_prefix} **ENTENDO! VAMOS RESOLVER ISSO JUNTOS!**
-
-😰 **Sei que tá difícil, mas vamos sair dessa situação!**
-
-📊 **Sua situação:**
-• Saldo atual: {format_currency(balance)}
-• Poupança: {savings_rate:.1f}% (muito baixo!)
-
-🎯 **PLANO PRÁTICO - VAMOS ECONOMIZAR:**
-
-**HOJE MESMO:**
-1. **Cancele 2-3 assinaturas** que você não usa (Netflix, Spotify, etc.)
-2. **Pare de pedir delivery** por 1 semana
-3. **Venda algo que não usa** (roupas, eletrônicos)
-
-**ESTA SEMANA:**
-1. **Corte gastos com {top_expenses[0][0] if top_expenses else 'maior gasto'}** pela metade
-2. **Use transporte público** em vez de Uber/táxi
-3. **Faça comida em casa** em vez de comer fora
-
-**ESTE MÊS:**
-1. **Economize {format_currency(income * 0.15)}** (15% do seu salário)
-2. **Guarde em uma conta separada**
-3. **Não toque nesse dinheiro!**
-
-💡 **Dicas práticas:**
-• **Compras:** Vá ao mercado com lista e sem fome
-• **Lazer:** Procure opções gratuitas (parques, museus)
-• **Transporte:** Use bicicleta ou caminhe quando possível
-• **Comida:** Cozinhe em quantidade e congele
-
-💪 **Meta realista:** {format_currency(income * 0.15)}/mês = {format_currency(income * 0.15 * 12)}/ano!
-
-**Você consegue! Pequenas mudanças fazem grande diferença!** 🚀"""
-                else:
-                    return f"""⚠️ **POUPANÇA BAIXA - PRECISA OTIMIZAR**
-
-📊 **Suas métricas:**
-• Taxa de poupança: {savings_rate:.1f}% (meta: 20%)
-• Saldo: {format_currency(balance)}
-
-🎯 **ESTRATÉGIA DE POUPANÇA:**
-1. **Regra 50/30/20** (50% necessidades, 30% desejos, 20% poupança)
-2. **Automatize** transferências no dia do salário
-3. **Reduza** {top_expenses[0][0] if top_expenses else 'maior gasto'} em 15%
-4. **Aumente renda** com habilidades extras
-
-💰 **Meta realista:** {format_currency(income * 0.2)}/mês para poupança"""
-            
-            else:
-                return f"""✅ **EXCELENTE - POUPANÇA SAUDÁVEL**
-
-📊 **Parabéns! Suas métricas:**
-• Taxa de poupança: {savings_rate:.1f}% (acima da média!)
-• Saldo: {format_currency(balance)}
-
-🎯 **PRÓXIMOS PASSOS:**
-1. **Diversifique** investimentos
-2. **Aumente** taxa para 25-30%
-3. **Crie** fundo de emergência de 6 meses
-4. **Planeje** objetivos de longo prazo
-
-💡 **Oportunidades:**
-• Investir {format_currency(balance * 0.7)} em aplicações
-• Manter {format_currency(balance * 0.3)} em reserva"""
-        
-        elif 'investimento' in intents:
-            # Preparação e diagnóstico
-            if savings_rate < 15 and (desired_pct is None or desired_pct < 15):
-                return f"""📊 **PREPARAÇÃO NECESSÁRIA PARA INVESTIR**
-
-⚠️ **Antes de investir, estabilize:**
-• Taxa de poupança atual: {savings_rate:.1f}% (meta: 20%)
-• Fundo de emergência: {'❌ Insuficiente' if balance < income * 0.5 else '✅ Adequado'}
-
-🎯 **ROTEIRO PARA INVESTIR:**
-1. **Mês 1-3:** Aumente poupança para 20%
-2. **Mês 4-6:** Crie fundo de emergência (6 meses)
-3. **Mês 7+:** Comece com investimentos conservadores
-
-💰 **Sugestões por perfil:**
-• **Conservador:** Tesouro Direto (SELIC)
-• **Moderado:** Fundos DI + Ações blue chips
-• **Agressivo:** ETFs + Ações pequenas empresas
-
-📈 **Meta realista:** {format_currency(income * 0.15)}/mês para investimentos"""
-            
-            else:
-                # Montar base de investimento: usa valor citado, senão parte do saldo ou 15% da renda
-                base_amount = invest_base_amount
-                if base_amount is None or base_amount <= 0:
-                    # prioridade: excedente (saldo positivo), senão 15% da renda
-                    base_amount = balance if balance > 0 else (income * 0.15)
-
-                # Ajustar horizonte: curto (<6m), médio (6-24m), longo (>24m)
-                horizon = time_horizon_months or 18
-                if horizon <= 6:
-                    horizon_bucket = 'curto'
-                elif horizon <= 24:
-                    horizon_bucket = 'medio'
-                else:
-                    horizon_bucket = 'longo'
-
-                # Alocação por perfil
-                allocation = apply_profile_to_allocations(profile, base_amount)
-
-                # Sugerir classes conforme horizonte
-                horizon_note = {
-                    'curto': 'Foco em liquidez e baixo risco (Tesouro Selic, CDB liquidez diária).',
-                    'medio': 'Equilíbrio entre proteção (renda fixa) e crescimento (fundos/ETFs).',
-                    'longo': 'Maior parcela em crescimento (ETFs/Ações) com proteção IPCA+.'
-                }[horizon_bucket]
-
-                return "\n".join([
-                    "💰 **PRONTO PARA INVESTIR (Plano de Especialista)**",
-                    "",
-                    f"✅ Perfil de risco: {profile.risk_profile.title()} | Horizonte: {horizon} meses",
-                    f"💵 Valor base: {format_currency(base_amount)}",
-                    "",
-                    "🎯 **Estratégia sugerida (por perfil):**",
-                    f"• Liquidez diária (caixa): {format_currency(allocation['liquidez_diaria'])}",
-                    f"• Curto prazo (renda fixa): {format_currency(allocation['curto_prazo'])}",
-                    f"• Diversificados (fundos/ETFs): {format_currency(allocation['diversificados'])}",
-                    f"• Oportunidades (alto risco): {format_currency(allocation['oportunidades'])}",
-                    "",
-                    f"📌 Horizonte: {horizon_note}",
-                    "",
-                    "💡 Observações importantes:",
-                    "• Tesouro Direto e CDBs seguem IR regressivo (22,5% → 15%).",
-                    "• LCI/LCA são isentos de IR (PF), mas costumam ter carência.",
-                    "• Diversifique e aporte regularmente (DCA).",
-                ])
-        
-        elif 'dívida' in intents or 'cartao' in intents or 'emprestimo' in intents:
-            # Análise de dívidas
-            debt_transactions = [
-                t for t in historical_transactions 
-                if (t.type == 'expense') and (
-                    'cart' in normalize_text(t.category) or 'emprest' in normalize_text(t.category) or 'financi' in normalize_text(t.category)
-                )
-            ]
-            total_debt = sum(t.amount for t in debt_transactions if t.type == 'expense')
-            
-            if is_emotional:
-                return f"""{emoji_prefix} **ENTENDO! VAMOS RESOLVER SUAS DÍVIDAS JUNTOS!**
-
-😰 **Sei que dívidas são estressantes, mas vamos sair dessa!**
-
-📊 **Sua situação:**
-• Dívidas identificadas: {format_currency(total_debt)}
-• Impacto na renda: {(total_debt/income*100):.1f}%
-
-🎯 **PLANO PRÁTICO - VAMOS QUITAR TUDO:**
-
-**HOJE MESMO:**
-1. **Liste todas as dívidas** (cartão, empréstimo, etc.)
-2. **Anote os valores** e juros de cada uma
-3. **Cancele cartões** que não precisa
-
-**ESTA SEMANA:**
-1. **Ligue para os bancos** e negocie
-2. **Pague o mínimo** em todas as dívidas
-3. **Use todo dinheiro extra** na menor dívida
-
-**ESTE MÊS:**
-1. **Corte gastos** para ter mais dinheiro
-2. **Busque renda extra** (freelancing, Uber)
-3. **Não faça novas dívidas!**
-
-💡 **Método da Bola de Neve:**
-• **Pague o mínimo** em todas as dívidas
-• **Use todo excedente** na menor dívida
-• **Quando quitar uma, use o dinheiro** na próxima
-• **Repita** até quitar todas
-
-⚠️ **Dicas importantes:**
-• **Cartão de crédito:** Priorize (juros mais altos)
-• **Negocie:** Sempre ligue para os bancos
-• **Consolidação:** Considere juntar dívidas
-• **Prevenção:** Evite novas dívidas
-
-💪 **Meta realista:** Quitar {format_currency(total_debt * 0.3)} em 3 meses!
-
-**Você consegue! Foco e disciplina vão te libertar!** 🚀"""
-            else:
-                return f"""💳 **ESTRATÉGIA DE SAÍDA DAS DÍVIDAS**
-
-📊 **Situação das dívidas:**
-• Total identificado: {format_currency(total_debt)}
-• Impacto na renda: {(total_debt/income*100):.1f}% se aplicável
-• Capacidade de pagamento: {'✅ Boa' if balance > total_debt * 0.3 else '⚠️ Limitada'}
-
-🎯 **MÉTODO DA BOLA DE NEVE (Recomendado):**
-1. **Liste todas as dívidas** por valor (menor para maior)
-2. **Pague o mínimo** em todas
-3. **Use todo excedente** na menor dívida
-4. **Repita** até quitar todas
-
-💡 **Estratégias específicas:**
-• **Cartão de Crédito:** Priorize (juros altos)
-• **Empréstimos:** Negocie prazos e taxas
-• **Consolidação:** Considere juntar dívidas
-• **Prevenção:** Evite novas dívidas
-
-⚠️ **Alerta:** Foque em quitar antes de investir!"""
-        
-        elif 'renda' in intents:
-            return f"""💼 **ESTRATÉGIAS PARA AUMENTAR RENDA**
-
-📊 **Situação atual:**
-• Renda mensal: {format_currency(income)}
-• Potencial de crescimento: {'Alto' if income < 5000 else 'Moderado' if income < 10000 else 'Estável'}
-
-🎯 **ESTRATÉGIAS POR CATEGORIA:**
-
-**1. RENDA PRINCIPAL:**
-• Negocie aumento salarial (preparação: 3-6 meses)
-• Busque promoções internas
-• Mude de empresa (15-30% aumento médio)
-
-**2. RENDA EXTRA:**
-• Freelancing ({format_currency(500)}-{format_currency(2000)}/mês)
-• Ensino online ({format_currency(300)}-{format_currency(1500)}/mês)
-• Vendas online ({format_currency(200)}-{format_currency(1000)}/mês)
-• Investimentos passivos ({format_currency(100)}-{format_currency(500)}/mês)
-
-**3. HABILIDADES MONETIZÁVEIS:**
-• Programação, design, marketing
-• Consultoria, coaching
-• Criação de conteúdo
-• Tradução, revisão
-
-💡 **Meta realista:** +{format_currency(income * 0.2)}/mês em 6 meses"""
-        
-        elif 'gasto' in intents:
-            if is_emotional:
-                return f"""{emoji_prefix} **ENTENDO! VAMOS CORTAR GASTOS JUNTOS!**
-
-😰 **Sei que é difícil, mas vamos economizar de forma inteligente!**
-
-📊 **Sua situação:**
-• Maior gasto: {top_expenses[0][0] if top_expenses else 'N/A'} - {format_currency(top_expenses[0][1] if top_expenses else 0)}
-• Gasto total: {format_currency(expense)} ({expense/income*100:.1f}% da renda)
-
-🎯 **PLANO PRÁTICO - VAMOS ECONOMIZAR:**
-
-**HOJE MESMO:**
-1. **Cancele 2-3 assinaturas** que você não usa (Netflix, Spotify, etc.)
-2. **Pare de pedir delivery** por 1 semana
-3. **Venda algo que não usa** (roupas, eletrônicos)
-
-**ESTA SEMANA:**
-1. **Corte gastos com {top_expenses[0][0] if top_expenses else 'maior gasto'}** pela metade
-2. **Use transporte público** em vez de Uber/táxi
-3. **Faça comida em casa** em vez de comer fora
-
-**ESTE MÊS:**
-1. **Negocie contas** (telefone, internet, energia)
-2. **Compre em atacado** para economizar
-3. **Evite compras por impulso**
-
-💡 **Dicas práticas:**
-• **Compras:** Vá ao mercado com lista e sem fome
-• **Lazer:** Procure opções gratuitas (parques, museus)
-• **Transporte:** Use bicicleta ou caminhe quando possível
-• **Comida:** Cozinhe em quantidade e congele
-
-💪 **Meta realista:** Economizar {format_currency(income * (expense/income - expense/income * 0.8))}/mês!
-
-**Você consegue! Pequenas mudanças fazem grande diferença!** 🚀"""
-            else:
-                return f"""📉 **OTIMIZAÇÃO DE GASTOS**
-
-📊 **Análise detalhada:**
-• Maior gasto: {top_expenses[0][0] if top_expenses else 'N/A'} - {format_currency(top_expenses[0][1] if top_expenses else 0)}
-• Taxa de gastos: {expense/income*100:.1f}% da renda
+    with replica_reads():
+        historical_transactions = Transaction.query.filter(
+            Transaction.user_id == user_id,
+            ACTIVE_TRANSACTION,
+            Transaction.date >= six_months_ago
+        ).order_by(Transaction.date).all()
+        # Maiores gastos agrupados por category_id no SQL (em centavos); o join só traz o nome
+        top_expenses = db.session.query(
+            Category.name, db.func.sum(Transaction.amount_cents).label('total_cents')
+        ).select_from(Transaction).outerjoin(Category, Category.id == Transaction.category_id).filter(
+            Transaction.user_id == user_id,
+            ACTIVE_TRANSACTION,
+            Transaction.type == 'expense',
+            Transaction.date >= six_months_ago
+        ).group_by(Transaction.category_id, Category.name).order_by(db.desc('total_cents')).limit(5).all()
 
-🎯 **PLANO DE REDUÇÃO (30 dias):**
+    return {
+        'history': historical_transactions,
+        'top_expenses': [(name or '', from_cents(total_cents)) for name, total_cents in top_expenses],
+    }
 
-**1. CORTES IMEDIATOS:**
-• Assinaturas desnecessárias (-{format_currency(100)}-{format_currency(300)}/mês)
-• Gastos com delivery (-{format_currency(200)}-{format_currency(500)}/mês)
-• Compras por impulso (-{format_currency(150)}-{format_currency(400)}/mês)
+class AdvisorSnapshot(dict):
+    """Dados do usuário para o conselheiro (ver advisor.AdvisorEngine).
 
-**2. OTIMIZAÇÕES:**
-• Transporte público vs. carro (-{format_currency(300)}-{format_currency(800)}/mês)
-• Compras em atacado (-{format_currency(100)}-{format_currency(300)}/mês)
-• Energia e água (-{format_currency(50)}-{format_currency(150)}/mês)
+    O resumo do mês é lido na criação; o histórico de 6 meses (history,
+    top_expenses) só é consultado no primeiro acesso a uma dessas chaves,
+    depois que o TL;DR já pode ter sido enviado.
+    """
 
-**3. NEGOCIAÇÕES:**
-• Contas de telefone/internet (-{format_currency(50)}-{format_currency(200)}/mês)
-• Seguros (-{format_currency(30)}-{format_currency(100)}/mês)
-• Aluguel (se aplicável)
+    LAZY_KEYS = ('history', 'top_expenses')
+
+    def __init__(self, user_id):
+        summary = get_transactions_summary(user_id, 'monthly')
+        current_income = summary['total_income']
+        current_expense = summary['total_expense']
+        super().__init__(
+            income=current_income,
+            expense=current_expense,
+            balance=summary['balance'],
+            savings_rate=((current_income - current_expense) / current_income * 100) if current_income > 0 else 0,
+        )
+        self.user_id = user_id
 
-💡 **Meta realista:** Reduzir {(expense/income*100):.1f}% para {(expense/income*100*0.8):.1f}% = +{format_currency(income * (expense/income - expense/income * 0.8))}/mês"""
-        
-        elif 'planejamento' in intents:
-            # Análise de objetivos financeiros
-            age_estimate = 25  # Você pode adicionar campo de idade no banco
-            retirement_age = 65
-            years_to_retirement = retirement_age - age_estimate
-            
-            return f"""🎯 **PLANEJAMENTO FINANCEIRO DE LONGO PRAZO**
-
-📊 **Análise de longo prazo:**
-• Idade estimada: {age_estimate} anos
-• Tempo até aposentadoria: {years_to_retirement} anos
-• Taxa de poupança atual: {savings_rate:.1f}%
-• Projeção de aposentadoria: {'⚠️ Insuficiente' if savings_rate < 15 else '✅ Adequada'}
-
-🎯 **OBJETIVOS POR FASE:**
-
-**FASE 1 (Agora - 2 anos):**
-• Fundo de emergência: 6 meses de despesas
-• Eliminar dívidas de alto juros
-• Estabelecer poupança de 20%
-
-**FASE 2 (2-10 anos):**
-• Investimentos de crescimento
-• Aquisição de ativos (imóvel, negócio)
-• Diversificação de renda
-
-**FASE 3 (10+ anos):**
-• Acumulação para aposentadoria
-• Planejamento sucessório
-• Renda passiva
-
-💰 **Projeções financeiras:**
-• Poupança mensal atual: {format_currency(income * savings_rate / 100)}
-• Meta ideal: {format_currency(income * 0.25)}/mês
-• Projeção aposentadoria: {format_currency(income * 0.25 * 12 * years_to_retirement * 1.07)} (com juros)
-
-💡 **Próximos passos:**
-1. Defina objetivos específicos
-2. Crie cronograma detalhado
-3. Monitore progresso mensal
-4. Ajuste estratégia conforme necessário"""
-        
-        elif 'orçamento' in intents:
-            return f"""📋 **CRIAÇÃO DE ORÇAMENTO INTELIGENTE**
-
-📊 **Baseado nos seus dados:**
-• Receita mensal: {format_currency(income)}
-• Despesa atual: {format_currency(expense)}
-• Saldo: {format_currency(balance)}
-
-🎯 **ORÇAMENTO RECOMENDADO (Regra 50/30/20):**
-
-**50% - NECESSIDADES ({format_currency(income * 0.5)}):**
-• Moradia: {format_currency(income * 0.25)}
-• Alimentação: {format_currency(income * 0.15)}
-• Transporte: {format_currency(income * 0.05)}
-• Saúde: {format_currency(income * 0.05)}
-
-**30% - DESEJOS ({format_currency(income * 0.3)}):**
-• Lazer: {format_currency(income * 0.15)}
-• Compras: {format_currency(income * 0.10)}
-• Assinaturas: {format_currency(income * 0.05)}
-
-**20% - POUPANÇA/INVESTIMENTO ({format_currency(income * 0.2)}):**
-• Fundo de emergência: {format_currency(income * 0.10)}
-• Investimentos: {format_currency(income * 0.10)}
-
-💡 **Dicas para seguir o orçamento:**
-• Use aplicativos de controle
-• Revise semanalmente
-• Ajuste conforme necessário
-• Celebre pequenas conquistas"""
-        
-        elif 'emergência' in intents:
-            emergency_fund_needed = expense * 6  # 6 meses de despesas
-            
-            return f"""🚨 **FUNDO DE EMERGÊNCIA**
-
-📊 **Sua situação:**
-• Despesas mensais: {format_currency(expense)}
-• Fundo necessário: {format_currency(emergency_fund_needed)} (6 meses)
-• Fundo atual: {format_currency(balance)}
-• Status: {'❌ Insuficiente' if balance < emergency_fund_needed else '✅ Adequado'}
-
-🎯 **PLANO PARA CRIAR FUNDO DE EMERGÊNCIA:**
-
-**META 1 ({format_currency(emergency_fund_needed * 0.25)}):**
-• Economize {format_currency(emergency_fund_needed * 0.25 / 3)}/mês por 3 meses
-• Corte gastos não essenciais
-• Use bônus/13º salário
-
-**META 2 ({format_currency(emergency_fund_needed * 0.5)}):**
-• Economize {format_currency(emergency_fund_needed * 0.25 / 3)}/mês por mais 3 meses
-• Busque renda extra
-• Automatize transferências
-
-**META 3 ({format_currency(emergency_fund_needed)}):**
-• Complete o fundo
-• Mantenha em conta separada
-• Revise anualmente
-
-💡 **Onde guardar:**
-• Conta poupança (liquidez)
-• CDB de bancos digitais
-• Tesouro SELIC
-
-⚠️ **Importante:** Só use para emergências reais!"""
-        
-        elif 'aposentadoria' in intents:
-            age_estimate = 25
-            retirement_age = 65
-            years_to_retirement = retirement_age - age_estimate
-            monthly_savings_needed = (income * 0.7 * 12 * 20) / (years_to_retirement * 12)  # Para manter 70% da renda por 20 anos
-            
-            return f"""🏖️ **PLANEJAMENTO PARA APOSENTADORIA**
+    def __missing__(self, key):
+        if key not in self.LAZY_KEYS:
+            raise KeyError(key)
+        self.update(_advisor_history(self.user_id))
+        return self[key]
 
-📊 **Análise atual:**
-• Idade: {age_estimate} anos
-• Tempo até aposentadoria: {years_to_retirement} anos
-• Poupança mensal atual: {format_currency(income * savings_rate / 100)}
-• Poupança necessária: {format_currency(monthly_savings_needed)}/mês
+class LazyAiProfile:
+    """Perfil de IA lido (ou criado) só no primeiro atributo acessado.
 
-🎯 **ESTRATÉGIA DE APOSENTADORIA:**
+    Só a resposta de investimento usa o perfil (risk_profile); nas outras a
+    consulta nem acontece.
+    """
 
-**FASE 1 (Agora - 10 anos):**
-• Foque em crescimento de renda
-• Poupe 15-20% da renda
-• Invista em educação/capacitação
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self._profile = None
 
-**FASE 2 (10-20 anos):**
-• Aumente poupança para 25-30%
-• Diversifique investimentos
-• Considere imóveis para renda
+    def __getattr__(self, name):
+        if self._profile is None:
+            self._profile = get_or_create_ai_profile(self.user_id)
+        return getattr(self._profile, name)
 
-**FASE 3 (20+ anos):**
-• Maximize contribuições
-• Planeje transição gradual
-• Considere aposentadoria parcial
+def _record_advisor_interaction(user_id, question, intents, sections, balance):
+    """Atualiza o perfil (aprendizado incremental) e registra a interação."""
+    _record_advisor_interactions(user_id, [(question, intents, sections)], balance)
 
-💰 **Investimentos recomendados:**
-• **Ações:** 60% (crescimento)
-• **Renda fixa:** 30% (segurança)
-• **Imóveis:** 10% (diversificação)
+def _record_advisor_interactions(user_id, interactions, balance):
+    """Registra [(question, intents, sections)] de uma requisição e atualiza o perfil uma vez.
 
-💡 **Dica:** Quanto mais cedo começar, melhor!"""
-        
-        elif 'imóvel' in intents or 'casa' in intents:
-            down_payment_needed = income * 12 * 0.2  # 20% de entrada
-            max_house_price = income * 3  # 3x a renda anual
-            
-            return f"""🏠 **PLANEJAMENTO PARA COMPRA DE IMÓVEL**
-
-📊 **Análise baseada na sua renda:**
-• Renda mensal: {format_currency(income)}
-• Entrada necessária: {format_currency(down_payment_needed)} (20%)
-• Valor máximo recomendado: {format_currency(max_house_price)}
-• Poupança atual: {format_currency(balance)}
-
-🎯 **ROTEIRO PARA COMPRA:**
-
-**FASE 1 - PREPARAÇÃO (6-12 meses):**
-• Economize {format_currency(down_payment_needed / 12)}/mês para entrada
-• Melhore score de crédito
-• Pesquise regiões de interesse
+    `sections` são os textos das seções na ordem (um blob por seção).
+    Vai para a fila write-behind como um item só (um lote de gravação);
+    grava na hora só se ela estiver desligada ou cheia.
+    """
+    created_at = datetime.utcnow()
+    records = [dict(user_id=user_id, question=question, intents=list(intents), sections=list(sections),
+                    balance=balance, created_at=created_at) for question, intents, sections in interactions]
+    if advisor_writes is not None and advisor_writes.submit(records):
+        return
+    try:
+        run_write(lambda: apply_advisor_writes(records))
+    except Exception as e:
+        # A resposta já foi montada: perder o histórico não derruba a requisição, mas fica no log
+        db.session.rollback()
+        print(f"⚠️ Conselheiro: {len(records)} interação(ões) do usuário {user_id} não gravada(s): {e}")
 
-**FASE 2 - BUSCA (3-6 meses):**
-• Defina critérios (localização, tamanho, preço)
-• Visite imóveis
-• Compare opções
-
-**FASE 3 - NEGOCIAÇÃO:**
-• Faça proposta
-• Negocie condições
-• Contrate financiamento
-
-💡 **Dicas importantes:**
-• Não comprometa mais de 30% da renda
-• Considere custos extras (IPTU, condomínio)
-• Mantenha fundo de emergência
-• Avalie se é melhor comprar ou alugar
-
-⚠️ **Cálculo:** Renda {format_currency(income)} → Financiamento máximo {format_currency(income * 0.3 * 12 * 30)}"""
-        
-        elif 'educação' in intents:
-            return f"""📚 **INVESTIMENTO EM EDUCAÇÃO**
-
-📊 **Análise de retorno sobre investimento:**
-• Educação é o melhor investimento
-• Retorno médio: 10-15% ao ano
-• Impacto na renda: +20-50%
-
-🎯 **ESTRATÉGIAS DE INVESTIMENTO EM EDUCAÇÃO:**
-
-**1. FORMAÇÃO ACADÊMICA:**
-• Graduação: {format_currency(500)}-{format_currency(2000)}/mês
-• Pós-graduação: {format_currency(800)}-{format_currency(3000)}/mês
-• Cursos técnicos: {format_currency(200)}-{format_currency(800)}/mês
-
-**2. CURSOS PROFISSIONALIZANTES:**
-• Programação: {format_currency(100)}-{format_currency(500)}/mês
-• Design: {format_currency(150)}-{format_currency(600)}/mês
-• Marketing: {format_currency(100)}-{format_currency(400)}/mês
-• Línguas: {format_currency(200)}-{format_currency(800)}/mês
-
-**3. CERTIFICAÇÕES:**
-• Certificações técnicas: {format_currency(500)}-{format_currency(3000)}
-• Certificações profissionais: {format_currency(1000)}-{format_currency(5000)}
-• Cursos online: {format_currency(50)}-{format_currency(300)}
-
-💡 **Dicas para maximizar retorno:**
-• Escolha áreas com alta demanda
-• Combine teoria com prática
-• Networking é fundamental
-• Mantenha-se atualizado
-
-💰 **Meta:** Investir 5-10% da renda em educação"""
-        
-        elif 'seguro' in intents:
-            return f"""🛡️ **PROTEÇÃO FINANCEIRA COM SEGUROS**
-
-📊 **Análise de necessidades:**
-• Renda mensal: R$ {income:.2f}
-• Dependentes: Considere sua situação familiar
-• Patrimônio: Avalie seus bens
-
-🎯 **SEGUROS ESSENCIAIS:**
-
-**1. SEGURO DE VIDA (R$ {income * 12 * 5:.0f}):**
-• Cobertura: 5x a renda anual
-• Custo: R$ {income * 0.02:.2f}/mês
-• Protege família em caso de falecimento
-
-**2. SEGURO DE SAÚDE:**
-• Cobertura: Hospitalar + Ambulatorial
-• Custo: R$ {income * 0.05:.2f}/mês
-• Evita gastos inesperados
-
-**3. SEGURO AUTO (se aplicável):**
-• Cobertura: Terceiros + Roubo/Furto
-• Custo: {format_currency(100)}-{format_currency(300)}/mês
-• Protege contra prejuízos
-
-**4. SEGURO RESIDENCIAL:**
-• Cobertura: Incêndio + Roubo
-• Custo: {format_currency(50)}-{format_currency(150)}/mês
-• Protege patrimônio
-
-💡 **Dicas:**
-• Compare preços e coberturas
-• Revise anualmente
-• Não pague por coberturas desnecessárias
-• Mantenha franquias adequadas
-
-⚠️ **Prioridade:** Vida > Saúde > Auto > Residencial"""
-        
-        elif 'imposto' in intents:
-            return f"""💰 **OTIMIZAÇÃO FISCAL (Brasil)**
-
-📊 **Sua situação:**
-• Renda mensal: {format_currency(income)}
-• Renda anual: {format_currency(income * 12)}
-• Faixa de IR: {'Isento' if income * 12 < 2259.20 else '7.5%' if income * 12 < 2826.65 else '15%' if income * 12 < 3751.05 else '22.5%' if income * 12 < 4664.68 else '27.5%'}
-
-🎯 **ESTRATÉGIAS DE ECONOMIA FISCAL:**
-
-**1. DEDUÇÕES PERMITIDAS:**
-• Previdência privada: até 12% da renda
-• Educação: até {format_currency(3561.50)}/ano
-• Saúde: sem limite
-• Dependentes: {format_currency(2275.08)} por dependente
-
-**2. REGRAS DE TRIBUTAÇÃO E ISENÇÕES (principais):**
-• Poupança: isenta de IR (PF)
-• LCI/LCA: isentas de IR (PF)
-• Tesouro Direto (Selic, IPCA+, Prefixado): tributado pela tabela regressiva (15% a 22,5%)
-• Ações: operações comuns isentas até R$ 20.000/mês em vendas; day-trade sempre tributado
-
-**3. DECLARAÇÃO ANUAL:**
-• Mantenha todos os comprovantes
-• Use software oficial
-• Declare até 30/04
-• Evite multas
-
-💡 **Dicas para economizar:**
-• Use previdência privada
-• Invista em educação
-• Mantenha controle de gastos
-• Consulte um contador
-
-⚠️ **Importante:** Sempre declare corretamente!"""
-        
-        elif 'viagem' in intents:
-            # Calcular orçamento de viagem baseado na renda
-            travel_budget = income * 0.15  # 15% da renda para viagem
-            months_to_save = 6  # 6 meses para economizar
-            
-            return f"""✈️ **PLANEJAMENTO DE VIAGEM INTELIGENTE**
-
-📊 **Análise baseada na sua renda:**
-• Renda mensal: {format_currency(income)}
-• Orçamento recomendado: {format_currency(travel_budget)} (15% da renda)
-• Tempo para economizar: {months_to_save} meses
-• Economia mensal necessária: {format_currency(travel_budget / months_to_save)}
-
-🎯 **ESTRATÉGIA DE VIAGEM:**
-
-**1. DESTINOS POR ORÇAMENTO:**
-• **Econômico ({format_currency(travel_budget * 0.5)}):** Praias nacionais, cidades históricas
-• **Moderado ({format_currency(travel_budget)}):** Destinos internacionais próximos
-• **Premium ({format_currency(travel_budget * 1.5)}):** Europa, EUA, Ásia
-
-**2. DISTRIBUIÇÃO DO ORÇAMENTO:**
-• Passagens: 40% ({format_currency(travel_budget * 0.4)})
-• Hospedagem: 30% ({format_currency(travel_budget * 0.3)})
-• Alimentação: 20% ({format_currency(travel_budget * 0.2)})
-• Passeios: 10% ({format_currency(travel_budget * 0.1)})
-
-**3. DICAS PARA ECONOMIZAR:**
-• Compre passagens com antecedência (3-6 meses)
-• Use sites de comparação de preços
-• Considere hospedagem compartilhada
-• Viaje na baixa temporada
-• Use cartões de crédito com milhas
-
-💡 **Plano de ação:**
-• Economize {format_currency(travel_budget / months_to_save)}/mês
-• Pesquise destinos e preços
-• Reserve com antecedência
-• Mantenha fundo de emergência
-
-⚠️ **Lembre-se:** Viagem é investimento em experiências, mas não comprometa sua segurança financeira!"""
-        
-        elif 'carro' in intents:
-            # Análise para compra de carro
-            car_budget = income * 0.3  # 30% da renda para carro
-            down_payment = car_budget * 0.2  # 20% de entrada
-            monthly_payment = (car_budget * 0.8) / 60  # Financiamento em 60 meses
-            
-            return f"""🚗 **PLANEJAMENTO PARA COMPRA DE CARRO**
-
-📊 **Análise financeira:**
-• Renda mensal: {format_currency(income)}
-• Valor máximo recomendado: {format_currency(car_budget)}
-• Entrada necessária: {format_currency(down_payment)} (20%)
-• Parcela mensal: {format_currency(monthly_payment)} (60 meses)
-• Impacto na renda: {(monthly_payment/income*100):.1f}%
-
-🎯 **ESTRATÉGIA DE COMPRA:**
-
-**1. PREPARAÇÃO (3-6 meses):**
-• Economize R$ {down_payment / 6:.2f}/mês para entrada
-• Melhore score de crédito
-• Pesquise modelos e preços
-• Calcule custos totais (IPVA, seguro, manutenção)
-
-**2. OPÇÕES POR ORÇAMENTO:**
-• **Econômico (R$ {car_budget * 0.6:.2f}):** Carros usados, modelos básicos
-• **Intermediário (R$ {car_budget:.2f}):** Carros seminovos, modelos populares
-• **Premium (R$ {car_budget * 1.4:.2f}):** Carros novos, modelos superiores
-
-**3. CUSTOS ADICIONAIS:**
-• IPVA: {format_currency(car_budget * 0.03)}/ano
-• Seguro: {format_currency(car_budget * 0.05)}/mês
-• Manutenção: {format_currency(car_budget * 0.02)}/mês
-• Combustível: {format_currency(300)}-{format_currency(600)}/mês
-
-**4. ALTERNATIVAS:**
-• **Comprar à vista:** Economia de juros
-• **Financiamento:** Maior poder de compra
-• **Leasing:** Menos responsabilidade
-• **Compartilhamento:** Economia total
-
-💡 **Dicas importantes:**
-• Não comprometa mais de 30% da renda
-• Considere custos de manutenção
-• Compare diferentes opções de financiamento
-• Avalie se realmente precisa de um carro
-
-⚠️ **Cálculo:** Renda {format_currency(income)} → Carro máximo {format_currency(car_budget)} → Parcela {format_currency(monthly_payment)}"""
-        
-        elif 'negócio' in intents:
-            # Análise para empreendedorismo
-            business_capital = income * 6  # 6 meses de renda como capital inicial
-            monthly_investment = income * 0.1  # 10% da renda para investir no negócio
-            
-            return f"""💼 **PLANEJAMENTO PARA ABRIR NEGÓCIO**
-
-📊 **Análise empreendedora:**
-• Renda atual: {format_currency(income)}
-• Capital inicial recomendado: {format_currency(business_capital)} (6 meses de renda)
-• Investimento mensal: {format_currency(monthly_investment)} (10% da renda)
-• Tempo para acumular capital: {business_capital / monthly_investment:.0f} meses
-
-🎯 **ESTRATÉGIA EMPREENDEDORA:**
-
-**1. PREPARAÇÃO FINANCEIRA:**
-• Mantenha emprego atual por 6-12 meses
-• Economize R$ {monthly_investment:.2f}/mês
-• Crie fundo de emergência de 12 meses
-• Reduza dívidas ao mínimo
-
-**2. OPÇÕES DE NEGÓCIO POR INVESTIMENTO:**
-• **Baixo investimento ({format_currency(business_capital * 0.3)}):** E-commerce, consultoria, freelancing
-• **Médio investimento ({format_currency(business_capital)}):** Loja física pequena, franquia, importação
-• **Alto investimento ({format_currency(business_capital * 2)}):** Restaurante, clínica, indústria
-
-**3. ESTRUTURA FINANCEIRA:**
-• **Capital inicial:** R$ {business_capital * 0.4:.2f} (40%)
-• **Capital de giro:** R$ {business_capital * 0.3:.2f} (30%)
-• **Marketing:** R$ {business_capital * 0.2:.2f} (20%)
-• **Reserva:** R$ {business_capital * 0.1:.2f} (10%)
-
-**4. PLANO DE AÇÃO:**
-• **Mês 1-3:** Pesquisa de mercado e planejamento
-• **Mês 4-6:** Acumulação de capital
-• **Mês 7-9:** Implementação e testes
-• **Mês 10+:** Operação e crescimento
-
-💡 **Dicas para sucesso:**
-• Comece pequeno e cresça gradualmente
-• Mantenha renda alternativa
-• Controle rigorosamente os custos
-• Foque na diferenciação
-• Construa uma rede de contatos
-
-⚠️ **Importante:** Empreendedorismo é arriscado, mas pode ser muito lucrativo com planejamento adequado!"""
-        
-        else:
-            # Resposta genérica SUPER INTELIGENTE e compreensiva para qualquer pergunta
-            if is_emotional:
-                return f"""{emoji_prefix} **FICA TRANQUILO! EU VOU TE AJUDAR!**
-
-😊 **Não se preocupe em perguntar "corretamente" - eu entendo tudo!**
-
-📊 **Vamos ver sua situação:**
-• Receitas: {format_currency(income)}
-• Despesas: {format_currency(expense)}
-• Saldo: {format_currency(balance)}
-• Taxa de poupança: {savings_rate:.1f}%
-
-🎯 **DIAGNÓSTICO RÁPIDO:**
-{'🚨 **CRÍTICO:** Saldo negativo - vamos resolver isso!' if balance < 0 else '✅ **SAUDÁVEL:** Continue assim!'}
-{'⚠️ **ATENÇÃO:** Maior gasto compromete muito da renda' if top_expenses and top_expenses[0][1] > income * 0.3 else '✅ **EQUILIBRADO:** Gastos bem distribuídos'}
-
-💡 **PERGUNTE DE QUALQUER JEITO:**
-
-**💰 POUPANÇA:**
-• "tô gastando muito" / "não consigo economizar" / "dinheiro não sobra"
-• "tô no vermelho" / "tô quebrado" / "sem dinheiro"
-
-**📈 INVESTIMENTOS:**
-• "onde colocar dinheiro?" / "fazer dinheiro render" / "multiplicar dinheiro"
-• "onde investir?" / "melhor aplicação" / "dinheiro trabalhando"
-
-**💳 DÍVIDAS:**
-• "tô endividado" / "cartão estourou" / "tô devendo"
-• "como quitar cartão?" / "pagar dívidas" / "tô no sufoco"
-
-**💼 RENDA:**
-• "quero ganhar mais" / "salário baixo" / "ganho pouco"
-• "renda extra" / "trabalho extra" / "bico"
-
-**📉 GASTOS:**
-• "gasto demais" / "tô gastando muito" / "cortar gastos"
-• "reduzir despesas" / "onde cortar" / "otimizar gastos"
-
-**🎯 PLANEJAMENTO:**
-• "não sei o que fazer" / "tô perdido" / "por onde começar"
-• "primeiro passo" / "o que fazer primeiro" / "começar"
-
-**🤔 DÚVIDAS:**
-• "me ajuda" / "tô confuso" / "não entendo"
-• "socorro" / "ajuda" / "dúvida"
-
-💪 **EXEMPLOS DE PERGUNTAS QUE FUNCIONAM:**
-• "tô na merda, o que faço?"
-• "tô fudido com dinheiro"
-• "tô lascado financeiramente"
-• "tô ferrado, me ajuda"
-• "tô na pindaíba"
-• "tô no sufoco"
-• "tô no aperto"
-• "tô apertado"
-• "tô quebrado"
-• "sem dinheiro"
-• "falta dinheiro"
-
-🎯 **RECOMENDAÇÃO ESPECÍFICA PARA VOCÊ:**
-{'🚨 **URGENTE:** Corte gastos e busque renda extra AGORA!' if balance < 0 else '✅ **CONTINUE:** Mantenha disciplina e diversifique!'}
-
-💬 **Dica:** Seja natural! Fale como você fala mesmo. A IA entende gírias, palavrões, linguagem informal... Tudo! 😄
-
-**A IA está aqui para te ajudar, não importa como você pergunte!** 🚀"""
-            else:
-                return f"""🤖 **CONSELHEIRO IA SUPER INTELIGENTE - ANÁLISE COMPLETA E PERSONALIZADA**
-
-📊 **RESUMO FINANCEIRO PERSONALIZADO:**
-• Receitas: {format_currency(income)}
-• Despesas: {format_currency(expense)}
-• Saldo: {format_currency(balance)}
-• Taxa de poupança: {savings_rate:.1f}%
-• Maior gasto: {top_expenses[0][0] if top_expenses else 'N/A'} - {format_currency(top_expenses[0][1] if top_expenses else 0)}
-• Tendência: {'📈 Positiva' if income > expense else '📉 Negativa' if expense > income else '📊 Estável'}
+def _sse_event(event, payload):
+    return f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
 
-🎯 **DIAGNÓSTICO FINANCEIRO DETALHADO:**
-• {'🚨 CRÍTICO: Saldo negativo - priorize estabilizar' if balance < 0 else '✅ SAUDÁVEL: Continue poupando e invista'}
-• {'⚠️ ATENÇÃO: Maior gasto compromete ' + f"{(top_expenses[0][1]/income*100):.1f}%" if top_expenses and top_expenses[0][1] > income * 0.3 else '✅ EQUILIBRADO: Gastos bem distribuídos'}
-• {'📈 OPORTUNIDADE: Renda baixa - busque crescimento' if income < 5000 else '✅ ESTÁVEL: Renda adequada'}
-
-🔮 **IA PREDITIVA AVANÇADA:**
-• {'🚨 Risco alto: Precisa de intervenção imediata' if balance < 0 else '✅ Baixo risco: Continue no caminho certo'}
-• {'📈 Alto potencial: Foque em aumentar renda' if income < 5000 else '📊 Potencial moderado: Otimize gastos'}
-• {'💡 Oportunidade: Reduza ' + top_expenses[0][0] if top_expenses and top_expenses[0][1] > income * 0.25 else '💡 Oportunidade: Diversifique investimentos'}
-
-💡 **COMO POSSO TE AJUDAR? PERGUNTE DE QUALQUER FORMA:**
-
-**💰 POUPANÇA E ECONOMIA:**
-• "como economizar mais?" / "onde guardar dinheiro?" / "tô gastando muito"
-• "não consigo economizar" / "como poupar dinheiro?" / "onde guardar?"
-
-**📈 INVESTIMENTOS:**
-• "onde investir?" / "melhor aplicação para mim?" / "onde colocar dinheiro?"
-• "como investir?" / "melhor investimento?" / "onde aplicar dinheiro?"
-
-**💳 DÍVIDAS:**
-• "como pagar dívidas?" / "melhor forma de quitar cartão?" / "tô endividado"
-• "como quitar cartão?" / "pagar empréstimo" / "quitar dívidas"
-
-**💼 RENDA:**
-• "como aumentar renda?" / "renda extra?" / "quero ganhar mais"
-• "como ganhar mais dinheiro?" / "aumentar salário" / "renda adicional"
-
-**📉 GASTOS:**
-• "como reduzir gastos?" / "onde cortar despesas?" / "gastar menos"
-• "cortar gastos" / "reduzir despesas" / "otimizar gastos"
-
-**🎯 PLANEJAMENTO:**
-• "planejamento financeiro" / "metas financeiras" / "não sei o que fazer"
-• "criar plano" / "estratégia financeira" / "objetivos financeiros"
-
-**📋 ORÇAMENTO:**
-• "como fazer orçamento?" / "controle financeiro" / "organizar dinheiro"
-• "gerenciar dinheiro" / "administrar finanças" / "controle de gastos"
-
-**🚨 EMERGÊNCIA:**
-• "fundo de emergência" / "reserva financeira" / "imprevistos"
-• "dinheiro para emergência" / "reserva de emergência"
-
-**🏖️ APOSENTADORIA:**
-• "planejamento aposentadoria" / "previdência" / "futuro"
-• "aposentadoria" / "planejamento futuro" / "terceira idade"
-
-**🏠 IMÓVEL:**
-• "comprar casa" / "financiamento imóvel" / "comprar apartamento"
-• "entrada casa" / "financiamento casa" / "comprar imóvel"
-
-**📚 EDUCAÇÃO:**
-• "investir em educação" / "cursos e formação" / "estudar"
-• "faculdade" / "universidade" / "formação profissional"
-
-**🛡️ SEGURO:**
-• "preciso de seguro?" / "proteção financeira" / "seguro de vida"
-• "qual seguro?" / "seguro de saúde" / "seguro de carro"
-
-**💰 IMPOSTOS:**
-• "economizar impostos" / "otimização fiscal" / "imposto de renda"
-• "declaração" / "dedução" / "economizar imposto"
-
-**✈️ VIAGEM:**
-• "planejar viagem" / "economizar para viajar" / "férias"
-• "turismo" / "passeio" / "destino"
-
-**🚗 CARRO:**
-• "comprar carro" / "financiamento automóvel" / "entrada carro"
-• "comprar automóvel" / "financiamento carro"
-
-**💼 NEGÓCIO:**
-• "abrir empresa" / "empreendedorismo" / "abrir negócio"
-• "startup" / "empreender" / "comércio"
-
-**🤔 DÚVIDAS GERAIS:**
-• "me ajuda" / "tô perdido" / "tô confuso" / "não entendo"
-• "explique" / "dúvida" / "socorro" / "ajuda"
-
-🎯 **RECOMENDAÇÕES ESPECÍFICAS PARA VOCÊ:**
-• {'🚨 URGENTE: Corte gastos não essenciais e busque renda extra' if balance < 0 else '✅ CONTINUE: Mantenha disciplina e diversifique investimentos'}
-• {'⚠️ FOQUE: Reduza ' + top_expenses[0][0] + ' em 20%' if top_expenses and top_expenses[0][1] > income * 0.3 else '✅ OTIMIZE: Busque aumentar taxa de poupança para 25%'}
-• {'📈 PRIORIZE: Desenvolva habilidades para aumentar renda' if income < 5000 else '📊 MANTENHA: Continue diversificando fontes de renda'}
-
-💬 **Dica:** Não se preocupe em perguntar "corretamente"! A IA entende linguagem informal, gírias e até perguntas mal formuladas. Seja natural e eu vou te ajudar! 🚀
-
-**Exemplos de perguntas que funcionam:**
-• "tô gastando muito, o que faço?"
-• "não consigo economizar"
-• "quero ganhar mais dinheiro"
-• "tô perdido com minhas finanças"
-• "me ajuda com dinheiro"
-• "não sei o que fazer"
-
-A IA está pronta para entender e ajudar com qualquer aspecto das suas finanças! 💪"""
-    
-    # Perfil de IA por usuário (aprendizado)
-    profile = get_or_create_ai_profile(current_user.id)
-
-    # Processar a pergunta
-    intents = analyze_question_intent(question)
-    entities = extract_entities_from_question(question_original)
-    # Glossário: detectar termos conhecidos
-    glossary_hits = []
-    norm_original = normalize_text(question_original)
-    for term in FIN_GLOSSARY.keys():
-        if term in norm_original:
-            glossary_hits.append(term)
-    user_data = {
-        'income': current_income,
-        'expense': current_expense,
-        'balance': current_balance,
-        'savings_rate': savings_rate,
-        'top_expenses': top_expenses
-    }
+def _wants_event_stream():
+    return (request.args.get('stream', '').lower() in ('1', 'true', 'sse')
+            or request.accept_mimetypes.best == 'text/event-stream')
 
-    response_core = generate_intelligent_response(question, intents, user_data, entities, profile, glossary_hits)
+@app.route('/financial_advisor')
+@login_required
+def financial_advisor():
+    """Conselheiro financeiro IA super inteligente - entende qualquer pergunta e responde como IA avançada
 
-    # Montar resposta conforme modo
-    summary_for_clarity = {
-        'income': current_income,
-        'expense': current_expense,
-        'balance': current_balance,
-        'savings_rate': savings_rate,
-    }
-    if mode == 'direto':
-        # Entrega somente o núcleo, sem TL;DR/Checklist/Glossário
-        response = response_core
-    elif mode == 'compacto':
-        # Núcleo + TL;DR curto
-        short = enrich_response_for_clarity(response_core, summary_for_clarity, intents, entities, profile, glossary_hits)
-        # Reduz para as primeiras seções (TL;DR + corpo)
-        parts = short.split('\n')
-        cutoff = min(len(parts), 40)
-        response = '\n'.join(parts[:cutoff])
-    elif mode == 'especialista':
-        # Didático + reforço técnico: adiciona nota de riscos e compliance
-        did = enrich_response_for_clarity(response_core, summary_for_clarity, intents, entities, profile, glossary_hits)
-        expert_note = [
-            "",
-            "🧪 Nota técnica (especialista):",
-            "- Considere risco de liquidez, marcação a mercado e adequação ao perfil regulatório.",
-            "- Diversifique emissores e classes; acompanhe CDI/SELIC/IPCA e calendário tributário.",
-        ]
-        response = did + "\n" + "\n".join(expert_note)
-    else:  # didatico (default)
-        response = enrich_response_for_clarity(response_core, summary_for_clarity, intents, entities, profile, glossary_hits)
+    Com `stream=sse` (ou Accept: text/event-stream) responde em Server-Sent
+    Events: um evento `section` por seção, na ordem (TL;DR primeiro), e um
+    `done` no fim. Sem isso, devolve o JSON de sempre.
+    """
+    question = request.args.get('question', '')
+    mode = request.args.get('mode', 'didatico').lower().strip()
 
-    # Atualizar perfil com base na interação (aprendizado incremental)
+    # Perfil de IA por usuário (aprendizado) e histórico: carregados só se a resposta usar
+    profile = LazyAiProfile(current_user.id)
+    snapshot = AdvisorSnapshot(current_user.id)
+    analysis = ADVISOR.prepare(question)
+    user_id = current_user.id
+
+    if _wants_event_stream():
+        def stream():
+            parts = []
+            for name, text in ADVISOR.sections(analysis, snapshot, profile, mode):
+                parts.append(text)
+                yield _sse_event('section', {'name': name, 'text': text})
+            _record_advisor_interaction(user_id, question, analysis.intents, parts, snapshot['balance'])
+            yield _sse_event('done', {'intents': analysis.intents})
+
+        response = Response(stream_with_context(stream()), mimetype='text/event-stream')
+        response.headers['Cache-Control'] = 'no-cache'
+        response.headers['X-Accel-Buffering'] = 'no'  # não segurar o stream no proxy
+        return response
+
+    sections = [text for _, text in ADVISOR.sections(analysis, snapshot, profile, mode)]
+    _record_advisor_interaction(user_id, question, analysis.intents, sections, snapshot['balance'])
+    return jsonify({'response': '\n'.join(sections)})
+
+ADVISOR_BATCH_MAX = int(os.environ.get('ADVISOR_BATCH_MAX', '20'))
+
+@app.route('/api/advisor/batch', methods=['POST'])
+@login_required
+def advisor_batch():
+    """Várias perguntas numa chamada: {"questions": [...], "mode": "didatico"}.
+
+    O snapshot do usuário é lido uma vez para todas (o histórico de 6 meses
+    só se alguma resposta precisar), as intenções das perguntas novas saem
+    de uma passada do classificador e perfil/histórico são gravados uma vez
+    no fim. Responde {"answers": [{question, intents, response}, ...]} na
+    ordem recebida.
+    """
+    payload = request.get_json(silent=True)
+    questions = payload.get('questions') if isinstance(payload, dict) else None
+    if (not isinstance(questions, list) or not questions or len(questions) > ADVISOR_BATCH_MAX
+            or not all(isinstance(q, str) for q in questions)):
+        abort(400)
+    mode = str(payload.get('mode') or 'didatico').lower().strip()
+
+    profile = LazyAiProfile(current_user.id)
+    snapshot = AdvisorSnapshot(current_user.id)
+    answers, interactions = [], []
+    for question, analysis in zip(questions, ADVISOR.prepare_many(questions)):
+        sections = [text for _, text in ADVISOR.sections(analysis, snapshot, profile, mode)]
+        answers.append({'question': question, 'intents': list(analysis.intents), 'response': '\n'.join(sections)})
+        interactions.append((question, analysis.intents, sections))
+    _record_advisor_interactions(current_user.id, interactions, snapshot['balance'])
+    return jsonify({'answers': answers})
+
+# ⚠️ Migrações rodam só no deploy (`flask db upgrade` no build.sh): no import,
+# cada worker apenas confere o catálogo (todos os modelos já declarados)
+with app.app_context():
     try:
-        update_profile_on_interaction(profile, intents, current_balance)
-        db.session.add(AiInteraction(
-            user_id=current_user.id,
-            question=request.args.get('question', ''),
-            intents_json=_dumps_json_safe(intents),
-            response=response
-        ))
-        db.session.commit()
-    except Exception:
-        db.session.rollback()
-
-    return jsonify({'response': response})
+        pending = pending_schema_upgrades()
+        if pending:
+            print(f"⚠️ Schema desatualizado ({', '.join(pending[:5])}{'...' if len(pending) > 5 else ''}): "
+                  f"rode `flask db upgrade`")
+    except Exception as e:
+        print(f"❌ Erro ao conferir schema: {e}")
 
 if __name__ == '__main__':
     with app.app_context():
-        db.create_all()
+        upgrade_schema()
     app.run(debug=False, host='0.0.0.0', port=5000) 
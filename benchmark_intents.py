@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark da detecção de intenções do conselheiro.
+
+Compara, no corpus rotulado (intent_corpus.tsv):
+
+- regras:         palavras-chave e padrões específicos (AdvisorEngine sem modelo)
+- modelo:         só o classificador TF-IDF + linear (lista vazia = sem resposta)
+- modelo+regras:  classificador com as regras como reserva (o que o app usa)
+
+A acurácia é medida em validação cruzada: cada dobra é avaliada por um modelo
+treinado com as outras dobras mais as palavras-chave, nunca com as próprias
+perguntas. Acerto = a primeira intenção detectada está entre as rotuladas.
+A latência é por pergunta (já normalizada), sem cache; a carga é a do
+arquivo de modelo treinado.
+
+Uso:
+    python benchmark_intents.py --folds 5
+"""
+
+import argparse
+import time
+
+from advisor import INTENT_KEYWORDS, SPECIFIC_PATTERNS, AdvisorEngine
+from intent_model import (DEFAULT_CORPUS_PATH, DEFAULT_MODEL_PATH, LOAD_BUDGET_MS, IntentModel, keyword_examples,
+                          load_corpus, train)
+from nlp import normalize_text
+
+
+def _top1(detect, examples) -> tuple:
+    hits = answered = 0
+    for question, labels in examples:
+        intents = detect(question)
+        if intents:
+            answered += 1
+            hits += intents[0] in labels
+    return hits, answered
+
+
+def _latency_us(detect, questions, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for question in questions:
+            detect(question)
+    return (time.perf_counter() - started) / (repeat * len(questions)) * 1_000_000
+
+
+def run(corpus_path: str, model_path: str, folds: int, epochs: int, repeat: int) -> list:
+    corpus = [(normalize_text(question), labels) for question, labels in load_corpus(corpus_path)]
+    keywords = keyword_examples(INTENT_KEYWORDS, SPECIFIC_PATTERNS)
+    rules = AdvisorEngine()
+    totals = {'regras': [0, 0], 'modelo': [0, 0], 'modelo+regras': [0, 0]}
+    for fold in range(folds):
+        held_out = corpus[fold::folds]
+        training = [example for i, example in enumerate(corpus) if i % folds != fold] + keywords
+        engine = AdvisorEngine(model=train(training, epochs=epochs))
+        for name, detect in (('regras', rules.detect_intents), ('modelo', engine.model.predict),
+                             ('modelo+regras', engine.detect_intents)):
+            hits, answered = _top1(detect, held_out)
+            totals[name][0] += hits
+            totals[name][1] += answered
+
+    model = IntentModel.load(model_path)
+    shipped = AdvisorEngine(model=model)
+    questions = [question for question, _ in corpus]
+    latency = {'regras': _latency_us(rules.detect_intents, questions, repeat),
+               'modelo': _latency_us(model.predict, questions, repeat),
+               'modelo+regras': _latency_us(shipped.detect_intents, questions, repeat)}
+    return [{
+        'mode': name,
+        'accuracy': hits / len(corpus),
+        'coverage': answered / len(corpus),
+        'latency_us': latency[name],
+        'load_ms': model.load_ms if name != 'regras' else 0.0,
+    } for name, (hits, answered) in totals.items()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark do classificador de intenções x regras")
+    parser.add_argument('--corpus', default=DEFAULT_CORPUS_PATH)
+    parser.add_argument('--model', default=DEFAULT_MODEL_PATH)
+    parser.add_argument('--folds', type=int, default=5)
+    parser.add_argument('--epochs', type=int, default=30)
+    parser.add_argument('--repeat', type=int, default=20, help="Passadas pelo corpus na medição de latência")
+    args = parser.parse_args(argv)
+
+    print(f"🧪 {args.folds} dobras, modelo {args.model} (meta de carga: {LOAD_BUDGET_MS:.0f} ms)")
+    print(f"{'modo':<14} {'acurácia':>9} {'cobertura':>10} {'µs/pergunta':>12} {'carga ms':>9}")
+    results = run(args.corpus, args.model, args.folds, args.epochs, args.repeat)
+    for result in results:
+        print(f"{result['mode']:<14} {result['accuracy']:>9.1%} {result['coverage']:>10.1%} "
+              f"{result['latency_us']:>12.1f} {result['load_ms']:>9.1f}")
+    return results
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark de escritas concorrentes no SQLite.
+
+Compara três configurações, com N threads fazendo escritas pequenas com
+commit (como add_transaction e o histórico do conselheiro):
+
+- padrao:     SQLite sem pragmas (journal DELETE, synchronous FULL)
+- wal:        pragmas de produção (WAL, synchronous=NORMAL, busy_timeout...)
+- wal+fila:   pragmas + SerializedWriter (escritor único com commit em lote)
+
+Uso:
+    python benchmark_sqlite_writes.py --threads 16 --writes 200
+"""
+
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+from sqlalchemy import Column, Float, Integer, MetaData, String, Table, create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+
+from sqlite_tuning import DEFAULT_PRAGMAS, SerializedWriter, install_sqlite_pragmas
+
+metadata = MetaData()
+bench = Table(
+    'bench_writes', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('thread', Integer, nullable=False),
+    Column('description', String(200)),
+    Column('amount', Float),
+)
+
+
+def _engine(path: str, pragmas: dict | None):
+    # timeout=0.5: sem busy_timeout o driver desiste rápido, como acontece em produção
+    engine = create_engine(f'sqlite:///{path}', connect_args={'timeout': 0.5, 'check_same_thread': False})
+    if pragmas is not None:
+        install_sqlite_pragmas(engine, pragmas)
+    metadata.create_all(engine)
+    return engine
+
+
+def run(mode: str, threads: int, writes: int) -> dict:
+    path = os.path.join(tempfile.mkdtemp(prefix='bench_sqlite_'), 'bench.db')
+    engine = _engine(path, None if mode == 'padrao' else DEFAULT_PRAGMAS)
+    Session = sessionmaker(bind=engine)
+    writer = SerializedWriter(Session) if mode == 'wal+fila' else None
+    errors = []
+    barrier = threading.Barrier(threads)
+
+    def worker(thread_id):
+        session = Session()
+        barrier.wait()
+        for i in range(writes):
+            row = {'thread': thread_id, 'description': f'compra {i}', 'amount': i * 1.5}
+            try:
+                if writer is not None:
+                    writer.run(lambda s, row=row: s.execute(bench.insert().values(**row)))
+                else:
+                    session.execute(bench.insert().values(**row))
+                    session.commit()
+            except Exception as e:
+                session.rollback()
+                errors.append(type(e).__name__)
+        session.close()
+
+    started = time.perf_counter()
+    pool = [threading.Thread(target=worker, args=(t,)) for t in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - started
+    if writer is not None:
+        writer.stop()
+
+    with engine.connect() as conn:
+        stored = conn.execute(select(func.count()).select_from(bench)).scalar()
+    engine.dispose()
+    return {
+        'mode': mode,
+        'seconds': elapsed,
+        'writes_per_second': stored / elapsed if elapsed else 0.0,
+        'stored': stored,
+        'errors': len(errors),
+        'commits': writer.stats['batches'] if writer is not None else stored,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de escritas concorrentes no SQLite")
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--writes', type=int, default=200, help="Escritas por thread")
+    parser.add_argument('--modes', default='padrao,wal,wal+fila')
+    args = parser.parse_args(argv)
+
+    print(f"🧪 {args.threads} threads x {args.writes} escritas")
+    print(f"{'modo':<10} {'escritas/s':>12} {'gravadas':>10} {'erros':>7} {'commits':>8}")
+    results = []
+    for mode in args.modes.split(','):
+        result = run(mode, args.threads, args.writes)
+        results.append(result)
+        print(f"{result['mode']:<10} {result['writes_per_second']:>12.0f} {result['stored']:>10} "
+              f"{result['errors']:>7} {result['commits']:>8}")
+    return results
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Categorias normalizadas: nome canônico e atributos pré-calculados.
+
+Cada nome digitado pelo usuário vira uma linha da tabela `categories`
+(global, com user_id NULL, ou do próprio usuário) com:
+    normalized_name  minúsculas, sem acento e sem espaços repetidos
+    need_class       'need' (necessidade), 'want' (desejo) ou None
+    tip_family       família das dicas por categoria ('alimentacao',
+                     'transporte', 'lazer', 'moradia') ou None
+
+O classificador (`classify_category`) compila cada conjunto de palavras-chave
+numa única regex e memoriza o resultado por nome distinto: as análises
+classificam uma vez por categoria, não uma vez por transação.
+Não depende de Flask.
+"""
+
+import re
+import unicodedata
+from functools import lru_cache
+from typing import NamedTuple
+
+NEED = 'need'
+WANT = 'want'
+
+# Palavras-chave (já normalizadas) das regras 50/30/20 e das dicas
+NEEDS_KEYWORDS = ('alimenta', 'mercado', 'supermerc', 'moradia', 'alug', 'condom', 'luz', 'agua', 'energia',
+                  'internet', 'transporte', 'gasolina', 'saude', 'medic', 'educa', 'escola')
+WANTS_KEYWORDS = ('lazer', 'entreten', 'restaur', 'delivery', 'assinatura', 'stream', 'viagem', 'jogo')
+TIP_FAMILIES = (
+    ('alimentacao', ('alimentacao', 'comida')),
+    ('transporte', ('transporte',)),
+    ('lazer', ('lazer', 'entretenimento')),
+    ('moradia', ('moradia', 'casa')),
+)
+DEBT_KEYWORDS = ('cart', 'emprest', 'financi')  # cartão, empréstimo, financiamento
+
+# Categorias globais criadas pelo `flask db upgrade`
+GLOBAL_CATEGORIES = (
+    'Alimentação', 'Mercado', 'Restaurante', 'Moradia', 'Energia', 'Água', 'Gás', 'Internet', 'Telefone',
+    'Transporte', 'Saúde', 'Educação', 'Lazer', 'Assinaturas', 'Viagem', 'Taxas', 'Impostos', 'Salário',
+    'Importado',
+)
+
+_SPACES = re.compile(r'\s+')
+CLASSIFIER_CACHE_SIZE = 4096
+
+
+def _compile(keywords) -> re.Pattern:
+    return re.compile('|'.join(re.escape(keyword) for keyword in keywords))
+
+
+_NEEDS_RE = _compile(NEEDS_KEYWORDS)
+_WANTS_RE = _compile(WANTS_KEYWORDS)
+_DEBT_RE = _compile(DEBT_KEYWORDS)
+_TIP_RES = tuple((family, _compile(keywords)) for family, keywords in TIP_FAMILIES)
+
+
+class CategoryClass(NamedTuple):
+    need_class: str | None
+    tip_family: str | None
+    debt: bool
+
+
+def normalize_category_name(name) -> str:
+    """'  Alimentação  Fora ' -> 'alimentacao fora'."""
+    decomposed = unicodedata.normalize('NFKD', (name or '').strip().lower())
+    without_accents = ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return _SPACES.sub(' ', without_accents)
+
+
+def need_class(normalized: str) -> str | None:
+    if _NEEDS_RE.search(normalized):
+        return NEED
+    if _WANTS_RE.search(normalized):
+        return WANT
+    return None
+
+
+def tip_family(normalized: str) -> str | None:
+    for family, pattern in _TIP_RES:
+        if pattern.search(normalized):
+            return family
+    return None
+
+
+@lru_cache(maxsize=CLASSIFIER_CACHE_SIZE)
+def _classify_normalized(normalized: str) -> CategoryClass:
+    return CategoryClass(need_class(normalized), tip_family(normalized), bool(_DEBT_RE.search(normalized)))
+
+
+@lru_cache(maxsize=CLASSIFIER_CACHE_SIZE)
+def classify_category(name) -> CategoryClass:
+    """Classificação memorizada pelo nome como digitado ('Alimentação', 'alimentacao' ...)."""
+    return _classify_normalized(normalize_category_name(name))
+
+
+def category_attributes(name) -> dict:
+    """Colunas pré-calculadas de uma categoria a partir do nome exibido."""
+    normalized = normalize_category_name(name)
+    classified = _classify_normalized(normalized)
+    return {
+        'name': (name or '').strip()[:50],
+        'normalized_name': normalized[:50],
+        'need_class': classified.need_class,
+        'tip_family': classified.tip_family,
+    }
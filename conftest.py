@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Configuração do pytest: usa um banco SQLite temporário em vez do banco real.
+
+O DATABASE_URL é sobrescrito antes de qualquer import do app, então rodar a
+suíte nunca toca no banco de produção.
+"""
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+_TEST_DB_DIR = tempfile.mkdtemp(prefix='finance_test_')
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(_TEST_DB_DIR, 'finance_test.db')
+
+
+@pytest.fixture
+def app_ctx():
+    """App com banco limpo e contexto ativo."""
+    from app import app, db
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        yield app
+        # Gravações adiadas do conselheiro não podem cair no banco do próximo teste
+        from app import advisor_writes
+        if advisor_writes is not None:
+            advisor_writes.flush()
+        db.session.remove()
+
+
+@pytest.fixture
+def user(app_ctx):
+    from app import db, User
+    from werkzeug.security import generate_password_hash
+    u = User(username='teste', password_hash=generate_password_hash('Senha@123'), email='teste@example.com')
+    db.session.add(u)
+    db.session.commit()
+    return u
+
+
+@pytest.fixture
+def client(app_ctx, user):
+    """Cliente de teste já autenticado como `user`."""
+    test_client = app_ctx.test_client()
+    test_client.post('/login', data={'username': 'teste', 'password': 'Senha@123'})
+    return test_client
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Pool de conexões do PostgreSQL (pg8000) configurado por variáveis de ambiente,
+com métricas de espera no checkout.
+
+Cada worker do gunicorn tem o seu pool, então o total de conexões abertas
+pode chegar a WEB_CONCURRENCY x (DB_POOL_SIZE + DB_MAX_OVERFLOW); esse número
+precisa caber no limite do plano do Postgres (DB_MAX_CONNECTIONS).
+
+Variáveis (padrão entre parênteses):
+    DB_POOL_SIZE (5)            conexões mantidas por worker
+    DB_MAX_OVERFLOW (5)         conexões extras temporárias por worker
+    DB_POOL_TIMEOUT (30)        segundos esperando uma conexão livre
+    DB_POOL_RECYCLE (280)       recicla conexões mais velhas que isso (s),
+                                antes do corte de ociosas do Postgres hospedado
+    DB_POOL_PRE_PING (1)        testa a conexão antes de entregar
+    DB_STATEMENT_TIMEOUT_MS (30000)  cancela consultas longas (0 desliga)
+    DB_CONNECT_TIMEOUT (10)     timeout de socket do pg8000 (s)
+    DB_SSLMODE (require)        disable | require | verify-full
+    DB_SSLROOTCERT              CA usada no verify-full
+
+Não depende de Flask.
+"""
+
+import os
+import ssl
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+DEFAULT_SSLROOTCERT = '/etc/ssl/certs/ca-certificates.crt'
+
+# Limites (ms) do histograma de espera no checkout
+WAIT_BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000, 5000)
+
+
+def _env_int(env, name: str, default: int) -> int:
+    value = env.get(name)
+    return int(value) if value not in (None, '') else default
+
+
+def _env_bool(env, name: str, default: bool) -> bool:
+    value = env.get(name)
+    if value in (None, ''):
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def pool_settings_from_env(env=None) -> dict:
+    env = os.environ if env is None else env
+    return {
+        'pool_size': _env_int(env, 'DB_POOL_SIZE', 5),
+        'max_overflow': _env_int(env, 'DB_MAX_OVERFLOW', 5),
+        'pool_timeout': _env_int(env, 'DB_POOL_TIMEOUT', 30),
+        'pool_recycle': _env_int(env, 'DB_POOL_RECYCLE', 280),
+        'pool_pre_ping': _env_bool(env, 'DB_POOL_PRE_PING', True),
+        'statement_timeout_ms': _env_int(env, 'DB_STATEMENT_TIMEOUT_MS', 30000),
+        'connect_timeout': _env_int(env, 'DB_CONNECT_TIMEOUT', 10),
+        'sslmode': (env.get('DB_SSLMODE') or 'require').lower(),
+        'sslrootcert': env.get('DB_SSLROOTCERT') or DEFAULT_SSLROOTCERT,
+    }
+
+
+def _ssl_context(settings: dict):
+    mode = settings['sslmode']
+    if mode == 'disable':
+        return None
+    if mode == 'verify-full':
+        cafile = settings['sslrootcert'] if os.path.exists(settings['sslrootcert']) else None
+        return ssl.create_default_context(cafile=cafile)
+    # require: criptografa sem validar o certificado (mesma semântica do libpq)
+    context = ssl.create_default_context()
+    context.check_hostname = False
+    context.verify_mode = ssl.CERT_NONE
+    return context
+
+
+def postgres_engine_options(env=None) -> dict:
+    """Opções do create_engine (SQLALCHEMY_ENGINE_OPTIONS) para pg8000."""
+    settings = pool_settings_from_env(env)
+    connect_args = {'timeout': settings['connect_timeout']}
+    context = _ssl_context(settings)
+    if context is not None:
+        connect_args['ssl_context'] = context
+    return {
+        'poolclass': TimedQueuePool,
+        'pool_size': settings['pool_size'],
+        'max_overflow': settings['max_overflow'],
+        'pool_timeout': settings['pool_timeout'],
+        'pool_recycle': settings['pool_recycle'],
+        'pool_pre_ping': settings['pool_pre_ping'],
+        # LIFO: as conexões extras ficam ociosas e saem pelo recycle
+        'pool_use_lifo': True,
+        'connect_args': connect_args,
+    }
+
+
+def install_statement_timeout(engine, timeout_ms: int) -> bool:
+    """SET statement_timeout em cada conexão nova do PostgreSQL."""
+    if engine.dialect.name != 'postgresql' or not timeout_ms:
+        return False
+
+    def set_timeout(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute(f"SET statement_timeout = {int(timeout_ms)}")
+        finally:
+            cursor.close()
+        # pg8000 abre transação implícita: sem commit o SET se perde no rollback do pool
+        dbapi_connection.commit()
+
+    event.listen(engine, 'connect', set_timeout)
+    return True
+
+
+def connection_budget_warning(env=None) -> str | None:
+    """Aviso se workers x (pool + overflow) passar do limite de conexões do banco."""
+    env = os.environ if env is None else env
+    limit = _env_int(env, 'DB_MAX_CONNECTIONS', 0)
+    if not limit:
+        return None
+    settings = pool_settings_from_env(env)
+    workers = _env_int(env, 'WEB_CONCURRENCY', 1)
+    needed = workers * (settings['pool_size'] + settings['max_overflow'])
+    if needed > limit:
+        return (f"{workers} worker(s) x ({settings['pool_size']} + {settings['max_overflow']}) = {needed} "
+                f"conexões possíveis, acima de DB_MAX_CONNECTIONS={limit}")
+    return None
+
+
+class PoolMetrics:
+    """Tempo de espera no checkout do pool (por processo)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.timeouts = 0
+            self.total_wait = 0.0
+            self.max_wait = 0.0
+            self.histogram = [0] * (len(WAIT_BUCKETS_MS) + 1)
+
+    def record_wait(self, seconds: float):
+        wait_ms = seconds * 1000
+        index = next((i for i, limit in enumerate(WAIT_BUCKETS_MS) if wait_ms <= limit), len(WAIT_BUCKETS_MS))
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait += seconds
+            self.max_wait = max(self.max_wait, seconds)
+            self.histogram[index] += 1
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self, pool=None) -> dict:
+        with self._lock:
+            labels = [f"<={limit}ms" for limit in WAIT_BUCKETS_MS] + [f">{WAIT_BUCKETS_MS[-1]}ms"]
+            data = {
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'avg_wait_ms': round(self.total_wait / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                'max_wait_ms': round(self.max_wait * 1000, 3),
+                'wait_histogram': dict(zip(labels, self.histogram)),
+            }
+        if isinstance(pool, QueuePool):
+            data['pool'] = {
+                'size': pool.size(),
+                'checked_out': pool.checkedout(),
+                'checked_in': pool.checkedin(),
+                'overflow': pool.overflow(),
+                'max_overflow': pool._max_overflow,
+            }
+        return data
+
+
+POOL_METRICS = PoolMetrics()
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool que mede quanto cada checkout esperou por uma conexão."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            POOL_METRICS.record_timeout()
+            raise
+        POOL_METRICS.record_wait(time.perf_counter() - started)
+        return connection
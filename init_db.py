@@ -3,13 +3,13 @@
 Script para inicializar o banco de dados com as novas estruturas
 """
 
-from app import app, db, User
+from app import app, db, User, upgrade_schema
 from werkzeug.security import generate_password_hash
 
 def init_database():
     with app.app_context():
-        # Criar todas as tabelas
-        db.create_all()
+        # Criar todas as tabelas (e colunas novas em tabelas existentes)
+        upgrade_schema()
         
         # Verificar se já existe um usuário
         if not User.query.first():
@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Classificador local de intenções do conselheiro financeiro.
+
+- A pergunta normalizada (sem acentos, como em `nlp.normalize_text`) vira
+  n-gramas de caracteres (2 a 4) com TF sublinear x IDF, normalizados (L2).
+  Como tudo passa pela mesma normalização, 'dívida' e 'divida' são iguais.
+- Um modelo linear por intenção (regressão logística um-contra-todos),
+  guardado como matriz esparsa CSR por n-grama (`indptr`, `indices`,
+  `data`): uma pergunta é pontuada contra todas as intenções num único
+  produto esparso, percorrendo só os n-gramas presentes nela.
+- `predict` devolve a intenção mais provável (e as que chegam perto dela)
+  quando passa do limiar; lista vazia quando o modelo não tem confiança (o
+  conselheiro usa as regras por palavra-chave nesse caso).
+- Treino offline em Python puro (SGD), a partir de `intent_corpus.tsv` e das
+  palavras-chave do conselheiro:
+      python intent_model.py --corpus intent_corpus.tsv --out intent_model.json
+- O arquivo é JSON com os vetores em base64 (little-endian): carrega em
+  poucos milissegundos, sem NumPy.
+
+Não depende de Flask.
+"""
+
+import argparse
+import base64
+import json
+import math
+import os
+import random
+import sys
+import time
+from array import array
+from collections import Counter
+
+from nlp import normalize_text, tokenize
+
+MODEL_VERSION = 1
+NGRAM_RANGE = (2, 4)
+# Confiança mínima da intenção principal (um-contra-todos com ~20 classes
+# dá probabilidades baixas; 0.2 foi o melhor ponto na validação cruzada)
+DEFAULT_THRESHOLD = 0.2
+# Intenções secundárias só se chegarem perto da principal
+SECONDARY_RATIO = 0.5
+MAX_INTENTS = 3
+DEFAULT_MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'intent_model.json')
+DEFAULT_CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'intent_corpus.tsv')
+LOAD_BUDGET_MS = 50.0
+
+
+def char_ngrams(text: str, ngram_range=NGRAM_RANGE) -> Counter:
+    """N-gramas de caracteres do texto normalizado, com espaço nas bordas das palavras."""
+    padded = f" {' '.join(tokenize(text))} "
+    low, high = ngram_range
+    grams = Counter()
+    for n in range(low, high + 1):
+        for start in range(len(padded) - n + 1):
+            grams[padded[start:start + n]] += 1
+    return grams
+
+
+def _sigmoid(z: float) -> float:
+    if z >= 0:
+        return 1.0 / (1.0 + math.exp(-z))
+    e = math.exp(z)
+    return e / (1.0 + e)
+
+
+def _pack(values: array) -> str:
+    if sys.byteorder != 'little':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return base64.b64encode(values.tobytes()).decode('ascii')
+
+
+def _unpack(typecode: str, data: str) -> array:
+    values = array(typecode)
+    values.frombytes(base64.b64decode(data))
+    if sys.byteorder != 'little':
+        values.byteswap()
+    return values
+
+
+class IntentModel:
+    """TF-IDF de n-gramas de caracteres + pesos lineares esparsos (CSR por n-grama)."""
+
+    def __init__(self, intents, vocabulary, idf, indptr, indices, data, bias,
+                 ngram_range=NGRAM_RANGE, threshold=DEFAULT_THRESHOLD):
+        self.intents = tuple(intents)
+        # n-grama -> linha da matriz
+        self.vocabulary = vocabulary if isinstance(vocabulary, dict) else {g: i for i, g in enumerate(vocabulary)}
+        self.idf = idf
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+        self.bias = tuple(bias)
+        self.ngram_range = tuple(ngram_range)
+        self.threshold = threshold
+        self.load_ms = 0.0
+
+    def __len__(self):
+        return len(self.vocabulary)
+
+    def vectorize(self, text: str) -> dict:
+        """{linha: peso TF-IDF} do texto (só n-gramas do vocabulário), com norma 1."""
+        vector = {}
+        for gram, count in char_ngrams(text, self.ngram_range).items():
+            row = self.vocabulary.get(gram)
+            if row is not None:
+                vector[row] = (1.0 + math.log(count)) * self.idf[row]
+        norm = math.sqrt(sum(v * v for v in vector.values()))
+        if norm:
+            for row in vector:
+                vector[row] /= norm
+        return vector
+
+    def _score_matrix(self, vectors: list) -> list:
+        """Produto esparso X·W: cada linha de W (n-grama) é lida uma vez para todas as perguntas."""
+        postings = {}  # linha -> [(pergunta, peso TF-IDF)]
+        for position, vector in enumerate(vectors):
+            for row, value in vector.items():
+                postings.setdefault(row, []).append((position, value))
+        scores = [list(self.bias) for _ in vectors]
+        indptr, indices, data = self.indptr, self.indices, self.data
+        for row, entries in postings.items():
+            for k in range(indptr[row], indptr[row + 1]):
+                intent, weight = indices[k], data[k]
+                for position, value in entries:
+                    scores[position][intent] += value * weight
+        return scores
+
+    def decision_function(self, text: str) -> list:
+        """Pontuação linear de cada intenção (na ordem de `intents`)."""
+        return self._score_matrix([self.vectorize(text)])[0]
+
+    def probabilities(self, text: str) -> dict:
+        return {intent: _sigmoid(score) for intent, score in zip(self.intents, self.decision_function(text))}
+
+    def predict(self, text: str, threshold: float | None = None) -> list:
+        """Intenções da mais provável para a menos; [] se nenhuma passa do limiar."""
+        return self.predict_many([text], threshold)[0]
+
+    def predict_many(self, texts, threshold: float | None = None) -> list:
+        """`predict` de várias perguntas numa passada só pela matriz de pesos."""
+        threshold = self.threshold if threshold is None else threshold
+        vectors = [self.vectorize(text) for text in texts]
+        results = []
+        for vector, scores in zip(vectors, self._score_matrix(vectors)):
+            if not vector:  # nenhum n-grama conhecido: só o viés, sem evidência
+                results.append([])
+                continue
+            ranked = sorted(((_sigmoid(s), i) for i, s in enumerate(scores)), reverse=True)
+            if ranked[0][0] < threshold:
+                results.append([])
+                continue
+            cut = max(threshold, ranked[0][0] * SECONDARY_RATIO)
+            results.append([self.intents[i] for p, i in ranked[:MAX_INTENTS] if p >= cut])
+        return results
+
+    def to_dict(self) -> dict:
+        vocabulary = sorted(self.vocabulary, key=self.vocabulary.get)
+        return {
+            'version': MODEL_VERSION,
+            'ngram_range': list(self.ngram_range),
+            'threshold': self.threshold,
+            'intents': list(self.intents),
+            'bias': [round(b, 6) for b in self.bias],
+            # n-gramas nunca têm quebra de linha (vêm de tokens \w+)
+            'vocabulary': '\n'.join(vocabulary),
+            'idf': _pack(self.idf),
+            'indptr': _pack(self.indptr),
+            'indices': _pack(self.indices),
+            'data': _pack(self.data),
+        }
+
+    @classmethod
+    def from_dict(cls, payload: dict) -> 'IntentModel':
+        if payload.get('version') != MODEL_VERSION:
+            raise ValueError(f"versão de modelo não suportada: {payload.get('version')}")
+        vocabulary = payload['vocabulary'].split('\n') if payload['vocabulary'] else []
+        return cls(payload['intents'], vocabulary, _unpack('f', payload['idf']), _unpack('I', payload['indptr']),
+                   _unpack('B', payload['indices']), _unpack('f', payload['data']), payload['bias'],
+                   payload['ngram_range'], payload['threshold'])
+
+    def save(self, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, separators=(',', ':'))
+
+    @classmethod
+    def load(cls, path: str) -> 'IntentModel':
+        started = time.perf_counter()
+        with open(path, encoding='utf-8') as f:
+            model = cls.from_dict(json.load(f))
+        model.load_ms = (time.perf_counter() - started) * 1000
+        return model
+
+
+def load_intent_model(path: str | None = DEFAULT_MODEL_PATH) -> IntentModel | None:
+    """Modelo do arquivo, ou None (sem arquivo / inválido): o conselheiro fica só com as regras."""
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        model = IntentModel.load(path)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"⚠️ Modelo de intenções ignorado ({path}): {e}")
+        return None
+    if model.load_ms > LOAD_BUDGET_MS:
+        print(f"⚠️ Modelo de intenções levou {model.load_ms:.1f} ms para carregar (meta: {LOAD_BUDGET_MS:.0f} ms)")
+    return model
+
+
+def load_corpus(path: str = DEFAULT_CORPUS_PATH) -> list:
+    """[(pergunta, (intenções...))] de um TSV 'intenções<TAB>pergunta' (linhas com # são comentário)."""
+    examples = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.rstrip('\n')
+            if not line.strip() or line.startswith('#'):
+                continue
+            labels, question = line.split('\t', 1)
+            examples.append((question, tuple(label.strip() for label in labels.split(','))))
+    return examples
+
+
+def keyword_examples(keywords: dict, specific_patterns: dict = None) -> list:
+    """Exemplos de treino a partir das palavras-chave (uma frase pode valer para várias intenções)."""
+    labels = {}
+    for intent, words in keywords.items():
+        for word in words:
+            labels.setdefault(normalize_text(word), set()).add(intent)
+    for pattern, rule in (specific_patterns or {}).items():
+        if isinstance(rule, str):
+            labels.setdefault(normalize_text(pattern), set()).add(rule)
+    return [(phrase, tuple(sorted(intents))) for phrase, intents in labels.items()]
+
+
+def train(examples, epochs: int = 30, learning_rate: float = 1.0, l2: float = 1e-4, prune: float = 0.05,
+          threshold: float = DEFAULT_THRESHOLD, ngram_range=NGRAM_RANGE, seed: int = 13) -> IntentModel:
+    """Regressão logística um-contra-todos por SGD sobre TF-IDF; pesos pequenos são podados."""
+    examples = [(normalize_text(text), tuple(labels)) for text, labels in examples]
+    intents = sorted({label for _, labels in examples for label in labels})
+    if len(intents) > 256:
+        raise ValueError('no máximo 256 intenções (índices de 1 byte)')
+    intent_ids = {intent: i for i, intent in enumerate(intents)}
+
+    grams_per_example = [char_ngrams(text, ngram_range) for text, _ in examples]
+    document_frequency = Counter(gram for grams in grams_per_example for gram in grams)
+    vocabulary = {gram: row for row, gram in enumerate(sorted(document_frequency))}
+    total = len(examples)
+    idf = array('f', [math.log((1 + total) / (1 + document_frequency[gram])) + 1.0
+                      for gram in sorted(document_frequency)])
+    model = IntentModel(intents, vocabulary, idf, array('I', [0] * (len(vocabulary) + 1)), array('B'), array('f'),
+                        [0.0] * len(intents), ngram_range, threshold)
+
+    samples = []
+    for (text, labels), grams in zip(examples, grams_per_example):
+        samples.append((list(model.vectorize(text).items()), {intent_ids[label] for label in labels}))
+
+    weights = {}  # linha -> [peso por intenção]
+    bias = [0.0] * len(intents)
+    rng = random.Random(seed)
+    for epoch in range(epochs):
+        rng.shuffle(samples)
+        rate = learning_rate / (1 + epoch * 0.2)
+        for features, positives in samples:
+            rows = [weights.setdefault(row, [0.0] * len(intents)) for row, _ in features]
+            for k in range(len(intents)):
+                z = bias[k]
+                for (row, value), w in zip(features, rows):
+                    z += value * w[k]
+                gradient = (1.0 if k in positives else 0.0) - _sigmoid(z)
+                bias[k] += rate * gradient
+                step = rate * gradient
+                for (row, value), w in zip(features, rows):
+                    w[k] += step * value - rate * l2 * w[k]
+
+    indptr, indices, data = array('I', [0]), array('B'), array('f')
+    for row in range(len(vocabulary)):
+        for k, w in enumerate(weights.get(row, ())):
+            if abs(w) >= prune:
+                indices.append(k)
+                data.append(w)
+        indptr.append(len(indices))
+    model.indptr, model.indices, model.data, model.bias = indptr, indices, data, tuple(bias)
+    return model
+
+
+def training_examples(corpus_path: str = DEFAULT_CORPUS_PATH) -> list:
+    from advisor import INTENT_KEYWORDS, SPECIFIC_PATTERNS  # só no treino: advisor importa este módulo
+    return load_corpus(corpus_path) + keyword_examples(INTENT_KEYWORDS, SPECIFIC_PATTERNS)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Treina o classificador de intenções do conselheiro")
+    parser.add_argument('--corpus', default=DEFAULT_CORPUS_PATH)
+    parser.add_argument('--out', default=DEFAULT_MODEL_PATH)
+    parser.add_argument('--epochs', type=int, default=30)
+    args = parser.parse_args(argv)
+
+    examples = training_examples(args.corpus)
+    started = time.perf_counter()
+    model = train(examples, epochs=args.epochs)
+    print(f"🧪 {len(examples)} exemplos, {len(model.intents)} intenções, {len(model)} n-gramas, "
+          f"{len(model.data)} pesos ({time.perf_counter() - started:.1f} s)")
+    model.save(args.out)
+    loaded = IntentModel.load(args.out)
+    print(f"✅ Modelo salvo em {args.out} ({os.path.getsize(args.out) / 1024:.0f} KB, carrega em {loaded.load_ms:.1f} ms)")
+    return model
+
+
+if __name__ == '__main__':
+    main()
@@ -1,43 +1,452 @@
+#!/usr/bin/env python3
+"""
+Migração SQLite → PostgreSQL em streaming, paralela e retomável.
+
+- Cada tabela é lida em blocos ordenados pela chave primária (keyset), então
+  a memória depende do tamanho do bloco e não do tamanho do banco. PKs
+  compostas (fora o (id, date) do particionamento) usam a tupla inteira;
+  tabelas sem PK são lidas num stream só e copiadas numa transação.
+- As tabelas são copiadas na ordem das chaves estrangeiras; tabelas do mesmo
+  nível (sem dependência entre si) rodam em paralelo.
+- No PostgreSQL cada bloco entra com COPY (pg8000 ou psycopg2); em outros
+  bancos, com INSERT em lote (executemany).
+- O progresso fica na tabela `migration_checkpoints` do destino, gravado na
+  mesma transação de cada bloco: se o processo cair, basta rodar de novo. A
+  última chave vai em JSON (inteiro, texto como o hash dos blobs, ou tupla).
+- No fim, as sequences são ajustadas ao maior id e cada tabela é conferida
+  por contagem de linhas e checksum (leitura completa, em ordem de PK).
+- Tabelas particionadas por data no destino (TRANSACTIONS_PARTITIONING=monthly)
+  recebem as partições mensais do intervalo da origem antes da cópia.
+
+Uso:
+    DATABASE_URL=postgres://... python migrate_sqlite_to_postgres.py
+    python migrate_sqlite_to_postgres.py --sqlite sqlite:///finance.db --workers 4 --chunk-size 5000
+    python migrate_sqlite_to_postgres.py --verify-only
+
+O schema do destino precisa existir antes (flask db upgrade). Rode o upgrade
+também na origem: ele preenche amount_cents a partir da coluna Float antiga,
+e só as colunas que existem nos dois lados são copiadas.
+"""
+
+import argparse
+import hashlib
+import io
+import json
 import os
-from sqlalchemy import create_engine, MetaData, Table
-from sqlalchemy.orm import sessionmaker
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, time
+from decimal import Decimal
+
+from sqlalchemy import (BigInteger, Boolean, Column, Date, DateTime, Integer, MetaData, String, Table, Text,
+                        create_engine, func, inspect, select, tuple_)
+
+import partitioning
+
+DEFAULT_SQLITE_URL = "sqlite:///finance.db"
+CHUNK_SIZE = 5000
+WORKERS = 4
+CHECKPOINT_TABLE = 'migration_checkpoints'
+
+_print_lock = threading.Lock()
+
+
+def log(message: str):
+    with _print_lock:
+        print(message, flush=True)
+
+
+def normalize_database_url(url: str) -> str:
+    """postgres:// (formato do Render) → postgresql+pg8000://, como no app."""
+    if url.startswith('postgres://'):
+        return url.replace('postgres://', 'postgresql+pg8000://', 1)
+    if url.startswith('postgresql://'):
+        return url.replace('postgresql://', 'postgresql+pg8000://', 1)
+    return url
+
+
+def _checkpoint_table(metadata: MetaData) -> Table:
+    return Table(
+        CHECKPOINT_TABLE, metadata,
+        Column('table_name', String(100), primary_key=True),
+        Column('last_key', Text, nullable=True),  # JSON: valores da chave do último bloco
+        Column('rows_copied', BigInteger, nullable=False, default=0),
+        Column('done', Boolean, nullable=False, default=False),
+        Column('updated_at', DateTime, nullable=True),
+    )
+
+
+def _ensure_checkpoint_table(engine, checkpoints: Table):
+    """Cria a tabela de checkpoints; a versão antiga (last_pk BIGINT) ganha last_key."""
+    checkpoints.create(bind=engine, checkfirst=True)
+    existing = {c['name'] for c in inspect(engine).get_columns(CHECKPOINT_TABLE)}
+    if 'last_key' in existing:
+        return
+    with engine.begin() as conn:
+        conn.exec_driver_sql(f"ALTER TABLE {CHECKPOINT_TABLE} ADD COLUMN last_key TEXT")
+        if 'last_pk' in existing:
+            for table_name, last_pk in conn.exec_driver_sql(
+                    f"SELECT table_name, last_pk FROM {CHECKPOINT_TABLE} WHERE last_pk IS NOT NULL").fetchall():
+                conn.execute(checkpoints.update().where(checkpoints.c.table_name == table_name).values(
+                    last_key=json.dumps([last_pk])))
+
+
+def _single_pk(table: Table):
+    """Coluna que identifica a linha: a PK simples ou, numa PK composta só por
+    causa do particionamento (id, date), a coluna inteira dela.
+
+    Outras PKs compostas (user_id, intent...) não têm coluna única: None.
+    """
+    columns = list(table.primary_key.columns)
+    if len(columns) == 1:
+        return columns[0]
+    integers = [c for c in columns if isinstance(c.type, Integer)]
+    others = [c for c in columns if c not in integers]
+    if len(integers) == 1 and all(c.name == partitioning.PARTITION_COLUMN for c in others):
+        return integers[0]
+    return None
+
+
+def _key_columns(table: Table) -> list:
+    """Colunas da chave dos blocos: a coluna única (_single_pk) ou a PK inteira; [] sem PK."""
+    pk = _single_pk(table)
+    return [pk] if pk is not None else list(table.primary_key.columns)
+
+
+def encode_key(values) -> str:
+    return json.dumps([v.isoformat() if isinstance(v, (date, datetime)) else v for v in values])
+
+
+def decode_key(raw: str, key_columns: list) -> tuple:
+    """Checkpoint em JSON -> valores comparáveis com as colunas da chave."""
+    values = []
+    for column, value in zip(key_columns, json.loads(raw)):
+        if value is not None and isinstance(column.type, DateTime):
+            value = datetime.fromisoformat(value)
+        elif value is not None and isinstance(column.type, Date):
+            value = date.fromisoformat(value)
+        values.append(value)
+    return tuple(values)
+
+
+def plan_levels(tables: list) -> list:
+    """Agrupa as tabelas em níveis: cada uma só depende de níveis anteriores."""
+    names = {t.name for t in tables}
+    level_of = {}
+    remaining = list(tables)
+    while remaining:
+        progressed = False
+        for table in list(remaining):
+            deps = ({fk.column.table.name for fk in table.foreign_keys} & names) - {table.name}
+            if all(dep in level_of for dep in deps):
+                level_of[table.name] = 1 + max((level_of[dep] for dep in deps), default=-1)
+                remaining.remove(table)
+                progressed = True
+        if not progressed:
+            # Ciclo de FKs: o que sobrou vai num último nível, em série
+            for table in remaining:
+                level_of[table.name] = max(level_of.values(), default=-1) + 1
+            break
+    levels = {}
+    for table in tables:
+        levels.setdefault(level_of[table.name], []).append(table)
+    return [levels[level] for level in sorted(levels)]
+
+
+def iter_chunks(connection, table: Table, columns: list, chunk_size: int, after_key=None):
+    """Blocos de linhas em ordem de chave (_key_columns), continuando depois de `after_key` (tupla)."""
+    key = _key_columns(table)
+    selected = [table.c[name] for name in columns]
+    if not key:
+        result = connection.execution_options(stream_results=True).execute(select(*selected))
+        while True:
+            rows = result.fetchmany(chunk_size)
+            if not rows:
+                return
+            yield rows
+    key_expr = key[0] if len(key) == 1 else tuple_(*key)
+    key_index = [columns.index(c.name) for c in key]
+    last = after_key
+    while True:
+        query = select(*selected).order_by(*key).limit(chunk_size)
+        if last is not None:
+            query = query.where(key_expr > (last[0] if len(key) == 1 else tuple_(*last)))
+        rows = connection.execute(query).fetchall()
+        if not rows:
+            return
+        last = tuple(rows[-1][i] for i in key_index)
+        yield rows
+
+
+def _copy_value(value) -> str:
+    """Valor no formato texto do COPY (NULL = \\N, com escapes)."""
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, (bytes, memoryview)):
+        return '\\\\x' + bytes(value).hex()
+    text = str(value)
+    return text.replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+
+
+def copy_rows(connection, table: Table, columns: list, rows: list):
+    """Grava um bloco: COPY no PostgreSQL, INSERT em lote nos demais."""
+    dialect = connection.dialect
+    if dialect.name != 'postgresql' or dialect.driver not in ('pg8000', 'psycopg2'):
+        connection.execute(table.insert(), [dict(zip(columns, row)) for row in rows])
+        return
+    preparer = dialect.identifier_preparer
+    column_list = ', '.join(preparer.quote(name) for name in columns)
+    sql = f"COPY {preparer.format_table(table)} ({column_list}) FROM STDIN"
+    buffer = io.BytesIO('\n'.join('\t'.join(_copy_value(v) for v in row) for row in rows)
+                        .encode('utf-8') + b'\n')
+    cursor = connection.connection.cursor()
+    try:
+        if dialect.driver == 'pg8000':
+            cursor.execute(sql, stream=buffer)
+        else:
+            cursor.copy_expert(sql, buffer)
+    finally:
+        cursor.close()
+
+
+def migrate_table(source_engine, target_engine, source_table: Table, target_table: Table,
+                  checkpoints: Table, chunk_size: int, on_chunk=None) -> int:
+    """Copia uma tabela a partir do último checkpoint. Retorna linhas copiadas nesta execução."""
+    name = source_table.name
+    with target_engine.begin() as conn:
+        state = conn.execute(select(checkpoints).where(checkpoints.c.table_name == name)).first()
+        if state is None:
+            conn.execute(checkpoints.insert().values(table_name=name, rows_copied=0, done=False))
+    if state is not None and state.done:
+        log(f"⏭️  {name}: já migrada ({state.rows_copied} linhas)")
+        return 0
+
+    columns = [c.name for c in source_table.columns if c.name in target_table.c]
+    skipped = [c.name for c in source_table.columns if c.name not in target_table.c]
+    if skipped:
+        log(f"⚠️  {name}: colunas ausentes no destino, ignoradas: {', '.join(skipped)}")
+    key = _key_columns(source_table)
+    resumable = bool(key) and all(c.name in columns for c in key)
+    after_key = decode_key(state.last_key, key) if resumable and state is not None and state.last_key else None
+    copied_before = state.rows_copied if state is not None and resumable else 0
+    if after_key is not None:
+        log(f"🔁 {name}: retomando depois de {', '.join(c.name for c in key)}="
+            f"{after_key[0] if len(after_key) == 1 else after_key} "
+            f"({copied_before} linhas já copiadas)")
+
+    copied = 0
+    with source_engine.connect() as source:
+        if not resumable:
+            # Sem PK não há ponto de retomada: a tabela inteira vai numa transação
+            with target_engine.begin() as conn:
+                for rows in iter_chunks(source, source_table, columns, chunk_size):
+                    copy_rows(conn, target_table, columns, rows)
+                    copied += len(rows)
+                conn.execute(checkpoints.update().where(checkpoints.c.table_name == name).values(
+                    rows_copied=copied, done=True, updated_at=datetime.utcnow()))
+        else:
+            key_index = [columns.index(c.name) for c in key]
+            for rows in iter_chunks(source, source_table, columns, chunk_size, after_key):
+                with target_engine.begin() as conn:
+                    copy_rows(conn, target_table, columns, rows)
+                    copied += len(rows)
+                    conn.execute(checkpoints.update().where(checkpoints.c.table_name == name).values(
+                        last_key=encode_key(rows[-1][i] for i in key_index), rows_copied=copied_before + copied,
+                        updated_at=datetime.utcnow()))
+                if on_chunk:
+                    on_chunk(name, copied_before + copied)
+            with target_engine.begin() as conn:
+                conn.execute(checkpoints.update().where(checkpoints.c.table_name == name).values(
+                    done=True, updated_at=datetime.utcnow()))
+    log(f"✅ {name}: {copied_before + copied} linhas")
+    return copied
+
+
+def reset_sequences(target_engine, tables: list):
+    """Ajusta as sequences do PostgreSQL para continuar depois do maior id copiado."""
+    if target_engine.dialect.name != 'postgresql':
+        return
+    preparer = target_engine.dialect.identifier_preparer
+    with target_engine.begin() as conn:
+        for table in tables:
+            pk = _single_pk(table)
+            if pk is None or not isinstance(pk.type, Integer):
+                continue
+            table_sql = preparer.format_table(table)
+            column_sql = preparer.quote(pk.name)
+            conn.exec_driver_sql(
+                f"SELECT setval(pg_get_serial_sequence('{table_sql}', '{pk.name}'), "
+                f"COALESCE((SELECT MAX({column_sql}) FROM {table_sql}), 0) + 1, false)")
+    log("🔢 Sequences ajustadas")
+
+
+def prepare_partitions(source_engine, target_engine, tables: list) -> list:
+    """Cria no destino as partições mensais que cobrem as datas da origem."""
+    if target_engine.dialect.name != 'postgresql':
+        return []
+    created = []
+    with target_engine.begin() as conn:
+        for table in tables:
+            key = partitioning.partition_key_column(conn, table.name)
+            if key is None:
+                continue
+            if key != partitioning.PARTITION_COLUMN or key not in table.c:
+                log(f"⚠️  {table.name}: particionada por {key}, partições não criadas (vão para a DEFAULT)")
+                continue
+            with source_engine.connect() as source:
+                first, last = source.execute(select(func.min(table.c[key]), func.max(table.c[key]))).first()
+            if isinstance(first, str):
+                first, last = date.fromisoformat(first[:10]), date.fromisoformat(last[:10])
+            names = partitioning.ensure_monthly_partitions(conn, first or date.today(), last or date.today(),
+                                                           parent=table.name)
+            created.extend(names)
+            if names:
+                log(f"🗂️  {table.name}: {len(names)} partição(ões) criada(s)")
+    return created
+
+
+def _normalize(value):
+    """Representação estável entre SQLite e PostgreSQL para o checksum."""
+    if value is None:
+        return '\x00'
+    if isinstance(value, bool):
+        return str(int(value))
+    if isinstance(value, (float, Decimal)):
+        return repr(float(value))
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, memoryview):
+        return bytes(value).hex()
+    if isinstance(value, bytes):
+        return value.hex()
+    return str(value)
+
+
+def table_checksum(engine, table: Table, columns: list, chunk_size: int) -> tuple[int, str]:
+    """(linhas, md5) numa leitura única e ordenada da tabela inteira.
+
+    Não usa iter_chunks: a conferência não pode herdar um erro da chave de
+    blocos da cópia. Ordena pela PK completa (ou por todas as colunas).
+    """
+    digest = hashlib.md5()
+    count = 0
+    order = [table.c[c.name] for c in table.primary_key.columns if c.name in columns] \
+        or [table.c[n] for n in columns]
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True).execute(
+            select(*[table.c[n] for n in columns]).order_by(*order))
+        for rows in iter(lambda: result.fetchmany(chunk_size), []):
+            for row in rows:
+                digest.update('\x1f'.join(_normalize(v) for v in row).encode('utf-8'))
+                digest.update(b'\x1e')
+            count += len(rows)
+    return count, digest.hexdigest()
+
+
+def _reflect(engine) -> MetaData:
+    metadata = MetaData()
+    metadata.reflect(bind=engine)
+    return metadata
+
+
+def _tables_to_migrate(source_meta: MetaData, target_meta: MetaData) -> list:
+    tables = []
+    for table in source_meta.sorted_tables:
+        if table.name == CHECKPOINT_TABLE:
+            continue
+        if table.name not in target_meta.tables:
+            log(f"⚠️  {table.name}: não existe no destino, ignorada (rode flask db upgrade)")
+            continue
+        tables.append(table)
+    return tables
+
+
+def verify_migration(source_url: str, target_url: str, workers: int = WORKERS,
+                     chunk_size: int = CHUNK_SIZE) -> list:
+    """Compara contagem e checksum de cada tabela. Retorna a lista de resultados."""
+    source_engine = create_engine(normalize_database_url(source_url))
+    target_engine = create_engine(normalize_database_url(target_url))
+    source_meta, target_meta = _reflect(source_engine), _reflect(target_engine)
+    tables = _tables_to_migrate(source_meta, target_meta)
+
+    def check(table):
+        target_table = target_meta.tables[table.name]
+        columns = [c.name for c in table.columns if c.name in target_table.c]
+        source_count, source_sum = table_checksum(source_engine, table, columns, chunk_size)
+        target_count, target_sum = table_checksum(target_engine, target_table, columns, chunk_size)
+        ok = source_count == target_count and source_sum == target_sum
+        log(f"{'✅' if ok else '❌'} {table.name}: origem {source_count} / destino {target_count} linhas"
+            f"{'' if source_sum == target_sum else ' (checksum diferente)'}")
+        return {'table': table.name, 'source_rows': source_count, 'target_rows': target_count,
+                'source_checksum': source_sum, 'target_checksum': target_sum, 'ok': ok}
+
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+        return list(executor.map(check, tables))
+
 
-# Caminho do SQLite local
-sqlite_url = "sqlite:///finance.db"
+def migrate(source_url: str, target_url: str, chunk_size: int = CHUNK_SIZE, workers: int = WORKERS,
+            restart: bool = False, on_chunk=None) -> dict:
+    """Copia todas as tabelas do SQLite para o destino. Retorna {tabela: linhas copiadas}."""
+    source_engine = create_engine(normalize_database_url(source_url))
+    target_engine = create_engine(normalize_database_url(target_url))
+    source_meta, target_meta = _reflect(source_engine), _reflect(target_engine)
+    tables = _tables_to_migrate(source_meta, target_meta)
 
-# URL do Postgres no Render (pegar no dashboard → Environment → DATABASE_URL)
-postgres_url = os.environ.get("DATABASE_URL")
-if postgres_url.startswith("postgres://"):
-    postgres_url = postgres_url.replace("postgres://", "postgresql://", 1)
+    checkpoints = _checkpoint_table(MetaData())
+    _ensure_checkpoint_table(target_engine, checkpoints)
+    if restart:
+        with target_engine.begin() as conn:
+            for table in reversed(tables):
+                conn.execute(target_meta.tables[table.name].delete())
+            conn.execute(checkpoints.delete())
+        log("🧹 Destino limpo, migrando do zero")
 
-# Engines
-sqlite_engine = create_engine(sqlite_url)
-postgres_engine = create_engine(postgres_url)
+    prepare_partitions(source_engine, target_engine, tables)
 
-# Metadata
-sqlite_meta = MetaData(bind=sqlite_engine)
-postgres_meta = MetaData(bind=postgres_engine)
+    copied = {}
+    levels = plan_levels(tables)
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+        for level, level_tables in enumerate(levels):
+            log(f"📦 Nível {level}: {', '.join(t.name for t in level_tables)}")
+            results = executor.map(
+                lambda t: migrate_table(source_engine, target_engine, t, target_meta.tables[t.name],
+                                        checkpoints, chunk_size, on_chunk),
+                level_tables)
+            copied.update(zip((t.name for t in level_tables), results))
 
-sqlite_meta.reflect()
-postgres_meta.reflect()
+    reset_sequences(target_engine, [target_meta.tables[t.name] for t in tables])
+    return copied
 
-# Sessões
-SQLiteSession = sessionmaker(bind=sqlite_engine)
-PostgresSession = sessionmaker(bind=postgres_engine)
 
-sqlite_session = SQLiteSession()
-postgres_session = PostgresSession()
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Migra o banco SQLite do app para PostgreSQL.")
+    parser.add_argument('--sqlite', default=DEFAULT_SQLITE_URL, help=f"URL de origem (padrão: {DEFAULT_SQLITE_URL})")
+    parser.add_argument('--postgres', default=os.environ.get('DATABASE_URL'),
+                        help="URL de destino (padrão: variável DATABASE_URL)")
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help="Linhas por bloco")
+    parser.add_argument('--workers', type=int, default=WORKERS, help="Tabelas copiadas em paralelo")
+    parser.add_argument('--restart', action='store_true',
+                        help="Apaga os dados e checkpoints do destino e começa do zero")
+    parser.add_argument('--verify-only', action='store_true', help="Só confere contagens e checksums")
+    args = parser.parse_args(argv)
 
-for table_name, table in sqlite_meta.tables.items():
-    print(f"Migrando tabela: {table_name}")
-    rows = sqlite_session.query(table).all()
-    if not rows:
-        continue
+    if not args.postgres:
+        parser.error("Informe --postgres ou defina DATABASE_URL")
 
-    postgres_table = Table(table_name, postgres_meta, autoload_with=postgres_engine)
-    data = [dict(row._mapping) for row in rows]
+    if not args.verify_only:
+        migrate(args.sqlite, args.postgres, args.chunk_size, args.workers, args.restart)
+    results = verify_migration(args.sqlite, args.postgres, args.workers, args.chunk_size)
+    if all(r['ok'] for r in results):
+        print("✅ Migração concluída e conferida com sucesso.")
+        return 0
+    print("❌ Diferenças encontradas na conferência.")
+    return 1
 
-    postgres_session.execute(postgres_table.insert(), data)
-    postgres_session.commit()
 
-print("✅ Migração concluída com sucesso.")
+if __name__ == '__main__':
+    sys.exit(main())
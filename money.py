@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Valores monetários em centavos inteiros.
+
+O banco guarda `amount_cents` (BIGINT) e as agregações (saldo, rollups,
+resumos do arquivo) somam inteiros, sem o desvio de soma de floats
+(0.1 + 0.2 = 0.30000000000000004). A conversão para reais acontece só na
+borda: formulários e importação entram por `to_cents`, telas/JSON saem por
+`from_cents`.
+
+NumPy é opcional: se estiver instalado, `sum_cents` soma listas grandes com
+int64 (exato até ~9,2e16 centavos).
+"""
+
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+
+try:
+    import numpy as np
+except ImportError:  # NumPy não está no requirements: soma em Python puro
+    np = None
+
+CENTS_PER_UNIT = 100
+NUMPY_MIN_LENGTH = 1000  # abaixo disso criar o array custa mais que somar
+
+
+def to_cents(value) -> int | None:
+    """Reais (int, float, Decimal ou texto '12.34') -> centavos, arredondando meio para cima."""
+    if value is None or value == '':
+        return None
+    if isinstance(value, float):
+        value = repr(value)  # evita 0.29 virar 0.28999... no Decimal
+    try:
+        amount = Decimal(str(value).strip())
+    except InvalidOperation:
+        raise ValueError(f"valor inválido: {value!r}")
+    if not amount.is_finite():
+        raise ValueError(f"valor inválido: {value!r}")
+    return int((amount * CENTS_PER_UNIT).quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+
+
+def from_cents(cents) -> float | None:
+    """Centavos -> reais (float para exibição e cálculos de proporção)."""
+    if cents is None:
+        return None
+    return int(cents) / CENTS_PER_UNIT
+
+
+def sum_cents(values) -> int:
+    """Soma exata de centavos (None conta como zero)."""
+    values = [v for v in values if v is not None]
+    if np is not None and len(values) >= NUMPY_MIN_LENGTH:
+        return int(np.asarray(values, dtype=np.int64).sum())
+    return sum(int(v) for v in values)
+
+
+def format_currency(value):
+    """Formata valor monetário com vírgulas como separadores de milhares"""
+    if value is None:
+        return "R$ 0,00"
+    # Formata o número com vírgulas como separadores de milhares
+    formatted = f"{value:,.2f}"
+    # Substitui vírgulas por pontos e pontos por vírgulas (padrão brasileiro)
+    formatted = formatted.replace(",", "X").replace(".", ",").replace("X", ".")
+    return f"R$ {formatted}"
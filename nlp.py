@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Pré-processamento de perguntas do conselheiro financeiro.
+
+- Regexes compiladas uma vez no import.
+- Remoção de acentos por tabela de tradução (str.translate); só textos com
+  caracteres fora da tabela caem na decomposição Unicode (NFD).
+- `preprocess_question` normaliza e extrai entidades de uma pergunta com
+  cache LRU limitado, chaveado pelo texto original: a mesma pergunta
+  (sugestões prontas, repetições) não é processada de novo.
+- `TermIndex` é uma trie por tokens para achar termos (glossário) numa só
+  passada, com a mesma normalização nos termos e nas perguntas.
+
+Não depende de Flask.
+"""
+
+import re
+import unicodedata
+from functools import lru_cache
+from typing import NamedTuple
+
+QUESTION_CACHE_SIZE = 1024
+TEXT_CACHE_SIZE = 4096
+
+_ACCENTED = 'áàâãäåéèêëíìîïóòôõöúùûüçñýÿÁÀÂÃÄÅÉÈÊËÍÌÎÏÓÒÔÕÖÚÙÛÜÇÑÝ'
+_PLAIN = 'aaaaaaeeeeiiiiooooouuuucnyyAAAAAAEEEEIIIIOOOOOUUUUCNY'
+_ACCENT_TABLE = str.maketrans(_ACCENTED, _PLAIN)
+
+_SPACES_RE = re.compile(r'\s+')
+# Sufixos do mais longo para o mais curto, e só como palavra inteira:
+# "2 mil" é 2.000 (não 'mi') e "12 meses" não vira 12 milhões ('m')
+_AMOUNT_RE = re.compile(r'r?\$?\s*([0-9][0-9.,]*)(?:\s*(milhao|bilhao|mil|mi|m|bi|b|k)\b)?')
+_PERCENT_RE = re.compile(r'([0-9]+(?:[.,][0-9]+)?)\s*%')
+_PERIOD_RE = re.compile(r'(\d+)\s*(mes|meses|ano|anos|semana|semanas)')
+_NUMBER_TOKEN_RE = re.compile(r'(-?[0-9][0-9.,]*)(milhao|bilhao|mil|mi|m|bi|b|k)?')
+# Palavras e o '+' solto ('tesouro ipca+' -> tesouro, ipca, +)
+_TOKEN_RE = re.compile(r'\w+|\+')
+
+_MULTIPLIERS = {
+    None: 1.0, 'k': 1_000.0, 'mil': 1_000.0,
+    'm': 1_000_000.0, 'mi': 1_000_000.0, 'milhao': 1_000_000.0,
+    'b': 1_000_000_000.0, 'bi': 1_000_000_000.0, 'bilhao': 1_000_000_000.0,
+}
+
+
+def strip_accents(text: str) -> str:
+    if not text:
+        return ''
+    translated = text.translate(_ACCENT_TABLE)
+    if translated.isascii():
+        return translated
+    return ''.join(c for c in unicodedata.normalize('NFD', translated) if unicodedata.category(c) != 'Mn')
+
+
+@lru_cache(maxsize=TEXT_CACHE_SIZE)
+def normalize_text(text: str) -> str:
+    """Normaliza texto: minúsculas, sem acentos e com espaços colapsados."""
+    if not text:
+        return ''
+    return _SPACES_RE.sub(' ', strip_accents(text.lower().strip()))
+
+
+def parse_number_ptbr(token: str) -> float | None:
+    """Converte strings tipo '1.234,56', '3,5k', '2 mil', '1m' em float (R$)."""
+    if not token:
+        return None
+    t = token.strip().lower().replace('r$', '').replace(' ', '')
+    match = _NUMBER_TOKEN_RE.fullmatch(t)
+    if not match:
+        return None
+    # Padrão pt-BR 1.234,56 -> 1234.56
+    number = match.group(1).replace('.', '').replace(',', '.')
+    try:
+        return float(number) * _MULTIPLIERS[match.group(2)]
+    except ValueError:
+        return None
+
+
+def extract_entities(normalized: str) -> tuple:
+    """(valores, percentuais, prazos em meses) de um texto já normalizado."""
+    amounts = []
+    for number_token, suffix in _AMOUNT_RE.findall(normalized):
+        value = parse_number_ptbr(number_token + suffix)
+        if value is not None:
+            amounts.append(value)
+    percents = []
+    for match in _PERCENT_RE.findall(normalized):
+        value = float(match.replace(',', '.'))
+        if 0 <= value <= 100:
+            percents.append(value)
+    months = []
+    for quantity, unit in _PERIOD_RE.findall(normalized):
+        quantity = int(quantity)
+        if unit.startswith('ano'):
+            months.append(quantity * 12)
+        elif unit.startswith('semana'):
+            # aproximação: 1 mês ~ 4 semanas
+            months.append(max(1, quantity // 4))
+        else:
+            months.append(quantity)
+    return tuple(amounts), tuple(percents), tuple(months)
+
+
+class PreparedQuestion(NamedTuple):
+    """Pergunta normalizada e entidades (imutável: é compartilhada pelo cache)."""
+    raw: str
+    normalized: str
+    amounts: tuple
+    percents: tuple
+    months: tuple
+
+    def entities(self) -> dict:
+        return {'amounts': list(self.amounts), 'percents': list(self.percents), 'months': list(self.months)}
+
+
+@lru_cache(maxsize=QUESTION_CACHE_SIZE)
+def preprocess_question(raw: str) -> PreparedQuestion:
+    normalized = normalize_text(raw)
+    return PreparedQuestion(raw, normalized, *extract_entities(normalized))
+
+
+def tokenize(text: str) -> list:
+    """Tokens de busca de um texto (normalizado aqui, se ainda não estiver)."""
+    return _TOKEN_RE.findall(normalize_text(text))
+
+
+_TERM = ''  # chave do nó que encerra um termo (nenhum token é vazio)
+
+
+class TermIndex:
+    """Trie por tokens: todos os termos presentes num texto em uma passada.
+
+    Termos e textos passam pela mesma normalização, então 'Debêntures' e
+    'debentures' são o mesmo termo. Só casam sequências de tokens inteiros
+    ('lca' não casa dentro de 'alcance').
+    """
+
+    def __init__(self, terms=()):
+        self._root = {}
+        self._size = 0
+        for term in terms:
+            self.add(term)
+
+    def __len__(self):
+        return self._size
+
+    def add(self, term: str):
+        tokens = tokenize(term)
+        if not tokens:
+            return
+        node = self._root
+        for token in tokens:
+            node = node.setdefault(token, {})
+        if _TERM not in node:
+            self._size += 1
+        node[_TERM] = term
+
+    def find(self, text: str) -> list:
+        """Termos encontrados, o mais longo (em tokens) primeiro e sem repetição."""
+        tokens = tokenize(text)
+        matches = []
+        for start in range(len(tokens)):
+            node = self._root
+            for end in range(start, len(tokens)):
+                node = node.get(tokens[end])
+                if node is None:
+                    break
+                if _TERM in node:
+                    matches.append((start - end, start, node[_TERM]))
+        matches.sort()
+        return list(dict.fromkeys(term for _, _, term in matches))
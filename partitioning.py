@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Particionamento mensal da tabela `transactions` no PostgreSQL (opcional).
+
+Ativado com TRANSACTIONS_PARTITIONING=monthly quando o banco é PostgreSQL:
+a tabela vira `PARTITION BY RANGE (date)`, com uma partição por mês
+(`transactions_y2025m01`, ...) e uma partição DEFAULT para datas fora das
+faixas criadas. As consultas quentes filtram por janela de data (mês atual,
+180/365 dias), então o planner lê só as partições do período (pruning).
+
+O PostgreSQL exige que a chave de partição faça parte da PK e dos índices
+únicos: a PK física vira (id, date) e o índice de deduplicação inclui date.
+O ORM continua identificando transações só por id.
+
+Comandos (app.py): flask partitions ensure | convert | explain | detach
+"""
+
+import os
+from datetime import date, timedelta
+
+from sqlalchemy import text
+
+from periods import bucket_end, bucket_start
+
+PARENT_TABLE = 'transactions'
+PARTITION_COLUMN = 'date'
+DEFAULT_MONTHS_AHEAD = 3
+
+
+def partitioning_enabled(database_uri: str, env=None) -> bool:
+    env = os.environ if env is None else env
+    return (database_uri or '').startswith('postgresql') and \
+        (env.get('TRANSACTIONS_PARTITIONING') or '').lower() == 'monthly'
+
+
+def partition_table_kwargs() -> dict:
+    """Argumento de __table_args__ para o modelo particionado."""
+    return {'postgresql_partition_by': f'RANGE ({PARTITION_COLUMN})'}
+
+
+def partition_name(month: date, parent: str = PARENT_TABLE) -> str:
+    return f"{parent}_y{month.year:04d}m{month.month:02d}"
+
+
+def default_partition_name(parent: str = PARENT_TABLE) -> str:
+    return f"{parent}_default"
+
+
+def month_of_partition(name: str, parent: str = PARENT_TABLE) -> date | None:
+    """transactions_y2024m03 -> date(2024, 3, 1); None para a DEFAULT ou nomes estranhos."""
+    suffix = name[len(parent) + 1:] if name.startswith(parent + '_') else ''
+    if len(suffix) != 8 or suffix[0] != 'y' or suffix[5] != 'm':
+        return None
+    try:
+        return date(int(suffix[1:5]), int(suffix[6:8]), 1)
+    except ValueError:
+        return None
+
+
+def months_between(start: date, end: date) -> list:
+    """Inícios de mês de `start` até `end`, inclusive."""
+    months = []
+    month = bucket_start('month', start)
+    while month <= end:
+        months.append(month)
+        month = bucket_end('month', month)
+    return months
+
+
+def create_partition_sql(month: date, parent: str = PARENT_TABLE) -> str:
+    return (f"CREATE TABLE IF NOT EXISTS {partition_name(month, parent)} PARTITION OF {parent} "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{bucket_end('month', month).isoformat()}')")
+
+
+def create_default_partition_sql(parent: str = PARENT_TABLE) -> str:
+    return f"CREATE TABLE IF NOT EXISTS {default_partition_name(parent)} PARTITION OF {parent} DEFAULT"
+
+
+def detach_partition_sql(name: str, parent: str = PARENT_TABLE) -> str:
+    return f"ALTER TABLE {parent} DETACH PARTITION {name}"
+
+
+def is_partitioned(conn, table: str = PARENT_TABLE) -> bool:
+    if conn.dialect.name != 'postgresql':
+        return False
+    return conn.execute(text(
+        "SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid "
+        "WHERE c.relname = :table"), {'table': table}).first() is not None
+
+
+def partition_key_column(conn, table: str) -> str | None:
+    """Coluna da chave de partição (RANGE de uma coluna) ou None se não particionada."""
+    if conn.dialect.name != 'postgresql':
+        return None
+    return conn.execute(text(
+        "SELECT a.attname FROM pg_partitioned_table pt "
+        "JOIN pg_class c ON c.oid = pt.partrelid "
+        "JOIN pg_attribute a ON a.attrelid = c.oid AND a.attnum = pt.partattrs[0] "
+        "WHERE c.relname = :table"), {'table': table}).scalar()
+
+
+def list_partitions(conn, parent: str = PARENT_TABLE) -> list:
+    return [row[0] for row in conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = :parent ORDER BY c.relname"), {'parent': parent})]
+
+
+def ensure_monthly_partitions(conn, start: date, end: date, parent: str = PARENT_TABLE) -> list:
+    """Cria as partições mensais de `start` a `end` (e a DEFAULT) que faltam.
+
+    Se a DEFAULT já tiver linhas no mês novo, o PostgreSQL recusa criar a
+    partição; nesse caso a DEFAULT é desanexada, as linhas do mês são movidas
+    para a partição nova e ela é anexada de volta, na mesma transação.
+    Retorna os nomes criados.
+    """
+    existing = set(list_partitions(conn, parent))
+    default_name = default_partition_name(parent)
+    created = []
+    if default_name not in existing:
+        conn.execute(text(create_default_partition_sql(parent)))
+        created.append(default_name)
+    for month in months_between(start, end):
+        name = partition_name(month, parent)
+        if name in existing:
+            continue
+        next_month = bucket_end('month', month)
+        bounds = {'start': month, 'end': next_month}
+        stranded = conn.execute(text(
+            f"SELECT 1 FROM {default_name} WHERE {PARTITION_COLUMN} >= :start AND {PARTITION_COLUMN} < :end LIMIT 1"),
+            bounds).first()
+        if stranded is None:
+            conn.execute(text(create_partition_sql(month, parent)))
+        else:
+            conn.execute(text(detach_partition_sql(default_name, parent)))
+            conn.execute(text(create_partition_sql(month, parent)))
+            conn.execute(text(
+                f"INSERT INTO {name} SELECT * FROM {default_name} "
+                f"WHERE {PARTITION_COLUMN} >= :start AND {PARTITION_COLUMN} < :end"), bounds)
+            conn.execute(text(
+                f"DELETE FROM {default_name} WHERE {PARTITION_COLUMN} >= :start AND {PARTITION_COLUMN} < :end"),
+                bounds)
+            conn.execute(text(f"ALTER TABLE {parent} ATTACH PARTITION {default_name} DEFAULT"))
+        created.append(name)
+    return created
+
+
+def ensure_future_partitions(conn, months_ahead: int = DEFAULT_MONTHS_AHEAD, today: date | None = None,
+                             parent: str = PARENT_TABLE) -> list:
+    """Partições do mês atual até `months_ahead` meses à frente."""
+    today = today or date.today()
+    end = bucket_start('month', today)
+    for _ in range(months_ahead):
+        end = bucket_end('month', end)
+    return ensure_monthly_partitions(conn, today, end, parent)
+
+
+def detachable_partitions(conn, before: date, parent: str = PARENT_TABLE) -> list:
+    """Partições mensais que terminam até `before` (candidatas a arquivamento)."""
+    names = []
+    for name in list_partitions(conn, parent):
+        month = month_of_partition(name, parent)
+        if month is not None and bucket_end('month', month) <= before:
+            names.append(name)
+    return names
+
+
+def detach_partitions(conn, before: date, parent: str = PARENT_TABLE) -> list:
+    """Desanexa as partições anteriores a `before`.
+
+    As tabelas continuam existindo, fora da `transactions` (prontas para
+    pg_dump/arquivamento e DROP). Os rollups não mudam, então relatórios de
+    meses cobertos por buckets inteiros continuam certos; um rebuild de
+    rollups depois disso deixa de contar essas linhas.
+    """
+    names = detachable_partitions(conn, before, parent)
+    for name in names:
+        conn.execute(text(detach_partition_sql(name, parent)))
+    return names
+
+
+def _relation_names(plan) -> list:
+    names = []
+    if isinstance(plan, dict):
+        if 'Relation Name' in plan:
+            names.append(plan['Relation Name'])
+        for value in plan.values():
+            names.extend(_relation_names(value))
+    elif isinstance(plan, list):
+        for item in plan:
+            names.extend(_relation_names(item))
+    return names
+
+
+def scanned_partitions(explain_json, parent: str = PARENT_TABLE) -> list:
+    """Partições que aparecem num plano EXPLAIN (FORMAT JSON)."""
+    if isinstance(explain_json, str):
+        import json
+        explain_json = json.loads(explain_json)
+    return sorted({name for name in _relation_names(explain_json) if name.startswith(parent + '_')})
+
+
+def explain_date_window(conn, user_id: int, start: date, end: date, parent: str = PARENT_TABLE) -> dict:
+    """Roda EXPLAIN numa consulta típica de janela [start, end) e confere o pruning.
+
+    `pruned` é verdadeiro quando nenhuma partição fora da janela (além da
+    DEFAULT) aparece no plano.
+    """
+    plan = conn.execute(text(
+        f"EXPLAIN (FORMAT JSON) SELECT id, amount_cents FROM {parent} "
+        f"WHERE user_id = :user_id AND {PARTITION_COLUMN} >= :start AND {PARTITION_COLUMN} < :end"),
+        {'user_id': user_id, 'start': start, 'end': end}).scalar()
+    scanned = scanned_partitions(plan, parent)
+    expected = {partition_name(month, parent) for month in months_between(start, end - timedelta(days=1))}
+    unexpected = [name for name in scanned if name not in expected and name != default_partition_name(parent)]
+    return {'scanned': scanned, 'expected': sorted(expected), 'pruned': not unexpected}
+
+
+def convert_to_partitioned(conn, table, months_ahead: int = DEFAULT_MONTHS_AHEAD) -> dict:
+    """Converte uma `transactions` comum na versão particionada.
+
+    `table` é a Table do modelo já com `postgresql_partition_by`. A tabela
+    antiga é renomeada para `<nome>_unpartitioned` (com seus índices), a nova
+    é criada, recebe as partições do intervalo existente e os dados, e a
+    sequence é ajustada. A antiga fica para conferência e DROP manual.
+    """
+    parent = table.name
+    old = f"{parent}_unpartitioned"
+    if is_partitioned(conn, parent):
+        return {'converted': False, 'rows': 0}
+    nulls = conn.execute(text(f"SELECT COUNT(*) FROM {parent} WHERE {PARTITION_COLUMN} IS NULL")).scalar()
+    if nulls:
+        raise ValueError(f"{nulls} transação(ões) sem data: preencha a coluna antes de particionar")
+
+    conn.execute(text(f"ALTER TABLE {parent} RENAME TO {old}"))
+    for (index_name,) in conn.execute(text("SELECT indexname FROM pg_indexes WHERE tablename = :t"), {'t': old}).all():
+        conn.execute(text(f'ALTER INDEX "{index_name}" RENAME TO "{index_name[:50]}_unpartitioned"'))
+    table.create(bind=conn)
+
+    first, last = conn.execute(text(f"SELECT MIN({PARTITION_COLUMN}), MAX({PARTITION_COLUMN}) FROM {old}")).first()
+    today = date.today()
+    ensure_monthly_partitions(conn, first or today, max(last or today, today), parent)
+    ensure_future_partitions(conn, months_ahead, today, parent)
+
+    columns = ', '.join(c.name for c in table.columns)
+    rows = conn.execute(text(f"INSERT INTO {parent} ({columns}) SELECT {columns} FROM {old}")).rowcount
+    conn.execute(text(
+        f"SELECT setval(pg_get_serial_sequence('{parent}', 'id'), COALESCE((SELECT MAX(id) FROM {parent}), 0) + 1, false)"))
+    return {'converted': True, 'rows': rows, 'old_table': old}
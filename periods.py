@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Períodos de relatório (semanal, mensal, trimestral, anual e personalizado)
+e decomposição de intervalos em buckets de rollup.
+
+Não depende de Flask nem do banco: só aritmética de datas.
+"""
+
+from datetime import date, datetime, timedelta
+
+# Granularidades dos rollups, da maior para a menor
+GRANULARITIES = ('year', 'quarter', 'month', 'week')
+
+TIMEFRAMES = ('weekly', 'monthly', 'quarterly', 'yearly', 'custom')
+
+TIMEFRAME_GRANULARITY = {
+    'weekly': 'week',
+    'monthly': 'month',
+    'quarterly': 'quarter',
+    'yearly': 'year',
+}
+
+TIMEFRAME_LABELS = {
+    'weekly': 'Semanal',
+    'monthly': 'Mensal',
+    'quarterly': 'Trimestral',
+    'yearly': 'Anual',
+    'custom': 'Personalizado',
+}
+
+
+def bucket_start(granularity: str, d: date) -> date:
+    """Início do bucket (semana ISO, mês, trimestre ou ano) que contém a data."""
+    if granularity == 'week':
+        return d - timedelta(days=d.weekday())
+    if granularity == 'month':
+        return d.replace(day=1)
+    if granularity == 'quarter':
+        return date(d.year, 3 * ((d.month - 1) // 3) + 1, 1)
+    if granularity == 'year':
+        return date(d.year, 1, 1)
+    raise ValueError(f"Granularidade desconhecida: {granularity}")
+
+
+def bucket_end(granularity: str, start: date) -> date:
+    """Fim exclusivo do bucket que começa em `start`."""
+    if granularity == 'week':
+        return start + timedelta(days=7)
+    if granularity == 'month':
+        return _add_months(start, 1)
+    if granularity == 'quarter':
+        return _add_months(start, 3)
+    if granularity == 'year':
+        return date(start.year + 1, 1, 1)
+    raise ValueError(f"Granularidade desconhecida: {granularity}")
+
+
+def _add_months(d: date, months: int) -> date:
+    month_index = d.year * 12 + (d.month - 1) + months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def _parse_date(value) -> date | None:
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        return datetime.strptime(str(value).strip(), '%Y-%m-%d').date()
+    except ValueError:
+        return None
+
+
+def resolve_period(timeframe: str = 'monthly', start=None, end=None, today: date | None = None) -> dict:
+    """Resolve o período do relatório e o período anterior equivalente.
+
+    Datas de fim são exclusivas. No modo 'custom', `end` informado pelo
+    usuário é inclusivo (como no formulário) e vira exclusivo aqui.
+    Timeframes desconhecidos ou intervalos inválidos caem para 'monthly'.
+    """
+    today = today or date.today()
+    timeframe = (timeframe or 'monthly').lower().strip()
+
+    if timeframe == 'custom':
+        start_date = _parse_date(start)
+        end_date = _parse_date(end)
+        if start_date and end_date and start_date <= end_date:
+            end_exclusive = end_date + timedelta(days=1)
+            length = end_exclusive - start_date
+            return {
+                'timeframe': 'custom',
+                'label': TIMEFRAME_LABELS['custom'],
+                'start': start_date,
+                'end': end_exclusive,
+                'prev_start': start_date - length,
+                'prev_end': start_date,
+                'days': length.days,
+            }
+        timeframe = 'monthly'
+
+    granularity = TIMEFRAME_GRANULARITY.get(timeframe)
+    if granularity is None:
+        timeframe, granularity = 'monthly', 'month'
+
+    start_date = bucket_start(granularity, today)
+    end_exclusive = bucket_end(granularity, start_date)
+    prev_start = bucket_start(granularity, start_date - timedelta(days=1))
+    return {
+        'timeframe': timeframe,
+        'label': TIMEFRAME_LABELS[timeframe],
+        'start': start_date,
+        'end': end_exclusive,
+        'prev_start': prev_start,
+        'prev_end': start_date,
+        'days': (end_exclusive - start_date).days,
+    }
+
+
+def cover_range(start: date, end: date) -> tuple[list, list]:
+    """Decompõe [start, end) em buckets alinhados + sobras em dias.
+
+    Retorna (buckets, raw_ranges): `buckets` é uma lista de
+    (granularidade, início) sem sobreposição, usando sempre o maior bucket
+    que cabe no cursor; `raw_ranges` são intervalos [a, b) que não fecham
+    nenhum bucket (no máximo alguns dias em cada ponta) e devem ser lidos
+    direto da tabela de transações.
+    """
+    buckets: list[tuple[str, date]] = []
+    raw_ranges: list[tuple[date, date]] = []
+    cursor = start
+    while cursor < end:
+        for granularity in GRANULARITIES:
+            if bucket_start(granularity, cursor) == cursor and bucket_end(granularity, cursor) <= end:
+                buckets.append((granularity, cursor))
+                cursor = bucket_end(granularity, cursor)
+                break
+        else:
+            # Avança em dias até a próxima fronteira de semana ou mês
+            next_week = bucket_end('week', bucket_start('week', cursor))
+            next_month = bucket_end('month', bucket_start('month', cursor))
+            stop = min(next_week, next_month, end)
+            if raw_ranges and raw_ranges[-1][1] == cursor:
+                raw_ranges[-1] = (raw_ranges[-1][0], stop)
+            else:
+                raw_ranges.append((cursor, stop))
+            cursor = stop
+    return buckets, raw_ranges
+
+
+def describe_period(period: dict) -> str:
+    """Texto do período para relatórios, ex.: 'Mensal (01/10/2026 a 31/10/2026)'."""
+    last_day = period['end'] - timedelta(days=1)
+    return f"{period['label']} ({period['start'].strftime('%d/%m/%Y')} a {last_day.strftime('%d/%m/%Y')})"
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Roteamento de leituras analíticas para uma réplica de leitura.
+
+Consultas pesadas e só de leitura (relatórios, análises de IA, histórico do
+conselheiro) rodam dentro de `replica_reads()` ou de funções decoradas com
+`@analytics_read`; a `RoutingSession` manda essas consultas para o engine da
+réplica. Escritas (INSERT/UPDATE/DELETE e flush) vão sempre para o primário.
+
+Read-your-writes: durante `window_seconds` depois de uma escrita do próprio
+usuário, as leituras analíticas voltam para o primário, para que ele veja o
+que acabou de gravar mesmo com a réplica atrasada. Quem sabe se houve
+escrita recente é a função `recent_write` configurada pelo app.
+
+Sem réplica configurada (REPLICA_DATABASE_URL vazio) tudo vai para o primário.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from flask_sqlalchemy.session import Session as FlaskSession
+
+DEFAULT_WINDOW_SECONDS = 5.0
+
+# True: leitura analítica (réplica); False: forçar primário; None: padrão (primário)
+_use_replica: ContextVar = ContextVar('use_replica', default=None)
+
+
+@contextmanager
+def replica_reads():
+    """Consultas de leitura dentro do bloco podem ir para a réplica."""
+    token = _use_replica.set(True)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+@contextmanager
+def primary_reads():
+    """Força o primário dentro do bloco (ex.: leituras que alimentam escritas)."""
+    token = _use_replica.set(False)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+def analytics_read(fn):
+    """Decorador: a função inteira roda com leituras na réplica."""
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        with replica_reads():
+            return fn(*args, **kwargs)
+    return wrapper
+
+
+class ReplicaRouter:
+    def __init__(self):
+        self.replica_engine = None
+        self.window_seconds = DEFAULT_WINDOW_SECONDS
+        self.recent_write = lambda window_seconds: False
+        self.stats = {'replica': 0, 'primary_after_write': 0}
+
+    def configure(self, replica_engine, window_seconds: float = DEFAULT_WINDOW_SECONDS, recent_write=None):
+        self.replica_engine = replica_engine
+        self.window_seconds = window_seconds
+        if recent_write is not None:
+            self.recent_write = recent_write
+
+    def engine_for(self, clause, flushing: bool):
+        """Engine da réplica quando a consulta pode ir para ela; None = primário."""
+        if self.replica_engine is None or not _use_replica.get() or flushing:
+            return None
+        if clause is not None and getattr(clause, 'is_dml', False):
+            return None
+        if self.recent_write(self.window_seconds):
+            self.stats['primary_after_write'] += 1
+            return None
+        self.stats['replica'] += 1
+        return self.replica_engine
+
+
+ROUTER = ReplicaRouter()
+
+
+class RoutingSession(FlaskSession):
+    """Session do Flask-SQLAlchemy que consulta o ROUTER antes do bind padrão."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            engine = ROUTER.engine_for(clause, self._flushing)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Respostas do conselheiro guardadas por conteúdo, comprimidas.
+
+As respostas são longas (3-6 KB de Markdown) e quase sempre repetidas entre
+usuários. Cada seção distinta (TL;DR, núcleo, checklist...) vira um blob
+identificado pelo SHA-256 do conteúdo (`content_hash`); as interações
+guardam só a lista ordenada de hashes. As seções fixas são iguais para
+todos, só as que têm os números do usuário geram blobs novos.
+
+Compressão com zlib (padrão). zstd é opcional: usado quando
+AI_RESPONSE_CODEC=zstd e o pacote `zstandard` está instalado. O codec vai
+junto com o blob, então blobs antigos continuam legíveis se o padrão mudar.
+Não depende de Flask.
+"""
+
+import hashlib
+import os
+import zlib
+
+try:
+    import zstandard
+except ImportError:  # zstandard não está no requirements: só zlib
+    zstandard = None
+
+ZLIB = 'zlib'
+ZSTD = 'zstd'
+ZLIB_LEVEL = 9
+ZSTD_LEVEL = 19
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def default_codec(env=os.environ) -> str:
+    if env.get('AI_RESPONSE_CODEC', ZLIB).lower() == ZSTD and zstandard is not None:
+        return ZSTD
+    return ZLIB
+
+
+def compress(text: str, codec: str = ZLIB) -> bytes:
+    raw = text.encode('utf-8')
+    if codec == ZSTD:
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(raw)
+    if codec == ZLIB:
+        return zlib.compress(raw, ZLIB_LEVEL)
+    raise ValueError(f'codec desconhecido: {codec}')
+
+
+def decompress(data: bytes, codec: str = ZLIB) -> str:
+    if codec == ZSTD:
+        if zstandard is None:
+            raise RuntimeError('blob em zstd, mas o pacote zstandard não está instalado')
+        return zstandard.ZstdDecompressor().decompress(data).decode('utf-8')
+    if codec == ZLIB:
+        return zlib.decompress(data).decode('utf-8')
+    raise ValueError(f'codec desconhecido: {codec}')
+
+
+def blob_row(text: str, codec: str = ZLIB) -> dict:
+    """Colunas de ai_response_blobs para um texto."""
+    data = compress(text, codec)
+    return {
+        'hash': content_hash(text),
+        'codec': codec,
+        'data': data,
+        'size': len(text.encode('utf-8')),
+        'stored_size': len(data),
+    }
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Perfil de produção para SQLite: pragmas por conexão e escritor único.
+
+- `install_sqlite_pragmas` aplica WAL, synchronous=NORMAL, busy_timeout,
+  cache_size e mmap_size em cada conexão nova do engine. Com WAL leitores
+  não bloqueiam o escritor, e o busy_timeout faz escritores concorrentes
+  esperarem em vez de falhar com "database is locked".
+- `SerializedWriter` é uma fila opcional: várias threads enviam escritas e
+  uma única thread as executa, agrupando várias em um só commit.
+
+Os valores podem ser ajustados por variáveis de ambiente (veja
+`sqlite_pragmas_from_env`). Não depende de Flask.
+"""
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import nullcontext
+
+from sqlalchemy import event
+
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,          # ms esperando o lock antes de desistir
+    'cache_size': -20000,          # negativo = KiB (≈ 20 MB por conexão)
+    'mmap_size': 256 * 1024 * 1024,
+}
+
+
+def sqlite_pragmas_from_env(env=None) -> dict:
+    """Pragmas padrão com ajustes de SQLITE_JOURNAL_MODE, SQLITE_SYNCHRONOUS,
+    SQLITE_BUSY_TIMEOUT_MS, SQLITE_CACHE_SIZE_KB e SQLITE_MMAP_SIZE_MB."""
+    env = os.environ if env is None else env
+    pragmas = dict(DEFAULT_PRAGMAS)
+    if env.get('SQLITE_JOURNAL_MODE'):
+        pragmas['journal_mode'] = env['SQLITE_JOURNAL_MODE'].upper()
+    if env.get('SQLITE_SYNCHRONOUS'):
+        pragmas['synchronous'] = env['SQLITE_SYNCHRONOUS'].upper()
+    if env.get('SQLITE_BUSY_TIMEOUT_MS'):
+        pragmas['busy_timeout'] = int(env['SQLITE_BUSY_TIMEOUT_MS'])
+    if env.get('SQLITE_CACHE_SIZE_KB'):
+        pragmas['cache_size'] = -abs(int(env['SQLITE_CACHE_SIZE_KB']))
+    if env.get('SQLITE_MMAP_SIZE_MB'):
+        pragmas['mmap_size'] = int(env['SQLITE_MMAP_SIZE_MB']) * 1024 * 1024
+    return pragmas
+
+
+def install_sqlite_pragmas(engine, pragmas: dict | None = None) -> bool:
+    """Registra os pragmas no evento 'connect' do engine (só SQLite)."""
+    if engine.dialect.name != 'sqlite':
+        return False
+    pragmas = DEFAULT_PRAGMAS if pragmas is None else pragmas
+
+    def apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+    event.listen(engine, 'connect', apply_pragmas)
+    return True
+
+
+_STOP = object()
+
+
+class SerializedWriter:
+    """Fila de escritas executadas por uma única thread, com commit em lote.
+
+    `submit(fn)` enfileira `fn(session)` e devolve um Future, resolvido só
+    depois do commit. A thread junta até `max_batch` escritas (esperando no
+    máximo `max_wait` segundos pelas seguintes) e faz um commit só. Se uma
+    escrita do lote falhar, o lote volta e cada escrita é refeita com commit
+    próprio, então só a que falhou recebe o erro; por isso `fn` deve apenas
+    mexer no banco e pode ser executada mais de uma vez.
+    """
+
+    def __init__(self, session_factory, context_factory=None, max_batch: int = 200,
+                 max_wait: float = 0.002, name: str = 'sqlite-writer'):
+        self._session_factory = session_factory
+        self._context_factory = context_factory
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.name = name
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.stats = {'writes': 0, 'batches': 0, 'failed': 0}
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name=self.name, daemon=True)
+                self._thread.start()
+
+    def submit(self, fn) -> Future:
+        future = Future()
+        self.start()
+        self._queue.put((fn, future))
+        return future
+
+    def run(self, fn, timeout: float | None = 30):
+        """Enfileira e espera o commit; devolve o retorno de `fn`."""
+        return self.submit(fn).result(timeout)
+
+    def stop(self, timeout: float | None = 5):
+        """Processa o que já está na fila e encerra a thread."""
+        with self._lock:
+            thread = self._thread
+        if thread is None or not thread.is_alive():
+            return
+        self._queue.put(_STOP)
+        thread.join(timeout)
+
+    def _loop(self):
+        context = self._context_factory() if self._context_factory else nullcontext()
+        with context:
+            stopping = False
+            while not stopping:
+                item = self._queue.get()
+                if item is _STOP:
+                    break
+                batch = [item]
+                deadline = time.monotonic() + self.max_wait
+                while len(batch) < self.max_batch:
+                    try:
+                        item = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                    except queue.Empty:
+                        break
+                    if item is _STOP:
+                        stopping = True
+                        break
+                    batch.append(item)
+                self._write_batch(batch)
+
+    def _write_batch(self, batch: list):
+        batch = [(fn, future) for fn, future in batch if future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        session = self._session_factory()
+        try:
+            results = [(future, fn(session)) for fn, future in batch]
+            session.commit()
+        except Exception:
+            session.rollback()
+            self._write_one_by_one(session, batch)
+        else:
+            for future, value in results:
+                future.set_result(value)
+            self.stats['writes'] += len(batch)
+            self.stats['batches'] += 1
+        finally:
+            session.close()
+
+    def _write_one_by_one(self, session, batch: list):
+        for fn, future in batch:
+            try:
+                value = fn(session)
+                session.commit()
+            except Exception as e:
+                session.rollback()
+                self.stats['failed'] += 1
+                future.set_exception(e)
+            else:
+                self.stats['writes'] += 1
+                self.stats['batches'] += 1
+                future.set_result(value)
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Leitura de extratos bancários (CSV e OFX) em streaming.
+
+Os parsers recebem um arquivo binário e devolvem um gerador de
+`StatementRow`, linha a linha: um extrato de 100 mil linhas nunca fica
+inteiro na memória. A gravação no banco (lotes, deduplicação, rollups)
+fica no app.
+
+Não depende de Flask nem do banco.
+"""
+
+import codecs
+import csv
+import hashlib
+import io
+import re
+import unicodedata
+from dataclasses import dataclass
+from datetime import date, datetime
+from itertools import islice
+
+DEFAULT_CATEGORY = 'Importado'
+SNIFF_BYTES = 64 * 1024
+OFX_READ_CHUNK = 64 * 1024
+
+# Aliases de cabeçalho aceitos no CSV (comparados sem acento e em minúsculas)
+CSV_HEADER_ALIASES = {
+    'date': ('data', 'date', 'dt', 'data lancamento', 'data do lancamento', 'data movimento'),
+    'amount': ('valor', 'amount', 'value', 'valor (r$)', 'montante'),
+    'description': ('descricao', 'description', 'historico', 'lancamento', 'memo', 'detalhes'),
+    'type': ('tipo', 'type', 'natureza', 'c/d', 'd/c'),
+    'category': ('categoria', 'category'),
+}
+
+DATE_FORMATS = ('%Y-%m-%d', '%d/%m/%Y', '%d/%m/%y', '%d-%m-%Y', '%Y/%m/%d')
+
+INCOME_MARKERS = {'income', 'receita', 'credito', 'c', 'credit', 'entrada'}
+EXPENSE_MARKERS = {'expense', 'despesa', 'debito', 'd', 'debit', 'saida'}
+
+_AMOUNT_CLEAN_RE = re.compile(r'[^\d,.\-+]')
+_OFX_TOKEN_RE = re.compile(r'<(/?)([A-Za-z0-9._]+)>([^<]*)')
+
+
+class StatementError(ValueError):
+    """Arquivo de extrato que não dá para interpretar."""
+
+
+@dataclass
+class StatementRow:
+    date: date
+    type: str          # 'income' | 'expense'
+    amount: float      # sempre positivo
+    description: str
+    category: str = DEFAULT_CATEGORY
+
+
+def _fold(text: str) -> str:
+    text = unicodedata.normalize('NFKD', text or '')
+    return ''.join(ch for ch in text if not unicodedata.combining(ch)).strip().lower()
+
+
+def parse_amount(raw: str) -> float:
+    """'1.234,56', '-50,00', 'R$ 10,00' ou '1234.56' -> float (com sinal)."""
+    token = _AMOUNT_CLEAN_RE.sub('', raw or '')
+    if not token or token in '+-':
+        raise ValueError(f"Valor inválido: {raw!r}")
+    if ',' in token and '.' in token:
+        # O separador que aparece por último é o decimal
+        if token.rfind(',') > token.rfind('.'):
+            token = token.replace('.', '').replace(',', '.')
+        else:
+            token = token.replace(',', '')
+    elif ',' in token:
+        token = token.replace(',', '.')
+    return float(token)
+
+
+def parse_date(raw: str) -> date:
+    raw = (raw or '').strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(raw, fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f"Data inválida: {raw!r}")
+
+
+def _resolve_type(marker: str, amount: float) -> tuple[str, float]:
+    marker = _fold(marker)
+    if marker in INCOME_MARKERS:
+        return 'income', abs(amount)
+    if marker in EXPENSE_MARKERS:
+        return 'expense', abs(amount)
+    return ('expense' if amount < 0 else 'income'), abs(amount)
+
+
+def open_text(binary, encoding: str | None = None):
+    """Envolve um arquivo binário em texto, detectando UTF-8 x CP1252.
+
+    A detecção olha só os primeiros bytes (o arquivo precisa ser seekable),
+    então o restante continua sendo lido sob demanda.
+    """
+    if encoding is None:
+        sample = binary.read(SNIFF_BYTES)
+        binary.seek(0)
+        try:
+            codecs.getincrementaldecoder('utf-8')().decode(sample, final=False)
+            encoding = 'utf-8-sig'
+        except UnicodeDecodeError:
+            encoding = 'cp1252'
+    return io.TextIOWrapper(binary, encoding=encoding, errors='replace', newline='')
+
+
+def iter_csv_rows(binary, errors: list | None = None):
+    """Gera `StatementRow` de um CSV com cabeçalho (',', ';' ou tab).
+
+    Linhas inválidas são puladas e registradas em `errors` como
+    (número da linha, mensagem).
+    """
+    text = open_text(binary)
+    sample = text.read(SNIFF_BYTES)
+    if not sample.strip():
+        return
+    try:
+        dialect = csv.Sniffer().sniff(sample.split('\n', 1)[0], delimiters=',;\t|')
+    except csv.Error:
+        dialect = csv.excel
+    text.seek(0)
+    reader = csv.reader(text, dialect)
+
+    header = [_fold(h) for h in next(reader, [])]
+    positions = {}
+    for field, aliases in CSV_HEADER_ALIASES.items():
+        for index, name in enumerate(header):
+            if name in aliases:
+                positions[field] = index
+                break
+    missing = {'date', 'amount'} - positions.keys()
+    if missing:
+        raise StatementError(f"Colunas obrigatórias ausentes no CSV: {', '.join(sorted(missing))}")
+
+    def cell(row, field):
+        index = positions.get(field)
+        return row[index].strip() if index is not None and index < len(row) else ''
+
+    for line_number, row in enumerate(reader, start=2):
+        if not any(value.strip() for value in row):
+            continue
+        try:
+            tx_type, amount = _resolve_type(cell(row, 'type'), parse_amount(cell(row, 'amount')))
+            yield StatementRow(
+                date=parse_date(cell(row, 'date')),
+                type=tx_type,
+                amount=amount,
+                description=cell(row, 'description')[:200],
+                category=cell(row, 'category')[:50] or DEFAULT_CATEGORY,
+            )
+        except ValueError as e:
+            if errors is not None:
+                errors.append((line_number, str(e)))
+
+
+def _iter_ofx_tokens(text):
+    """(fechamento?, TAG, valor) lendo o OFX em blocos; aceita SGML e XML."""
+    pending = ''
+    while True:
+        chunk = text.read(OFX_READ_CHUNK)
+        data = pending + chunk
+        if not chunk:
+            for match in _OFX_TOKEN_RE.finditer(data):
+                yield match.group(1) == '/', match.group(2).upper(), match.group(3).strip()
+            return
+        # Só processa até a última tag completa; o resto espera o próximo bloco
+        cut = data.rfind('<')
+        if cut == -1:
+            pending = data
+            continue
+        pending = data[cut:]
+        for match in _OFX_TOKEN_RE.finditer(data[:cut]):
+            yield match.group(1) == '/', match.group(2).upper(), match.group(3).strip()
+
+
+def _ofx_row(fields: dict) -> StatementRow:
+    tx_type, amount = _resolve_type(fields.get('TRNTYPE', ''), parse_amount(fields.get('TRNAMT', '')))
+    posted = fields.get('DTPOSTED', '')[:8]
+    try:
+        posted_date = datetime.strptime(posted, '%Y%m%d').date()
+    except ValueError:
+        raise ValueError(f"Data inválida: {posted!r}")
+    return StatementRow(
+        date=posted_date,
+        type=tx_type,
+        amount=amount,
+        description=(fields.get('MEMO') or fields.get('NAME') or '')[:200],
+    )
+
+
+def iter_ofx_rows(binary, errors: list | None = None):
+    """Gera `StatementRow` de cada <STMTTRN> de um extrato OFX (1.x SGML ou 2.x XML).
+
+    No SGML só os campos-folha dispensam fechamento, mas há bancos que
+    também omitem </STMTTRN>: um novo <STMTTRN> ou o fim da lista fecham
+    o lançamento aberto.
+    """
+    text = open_text(binary)
+    current = None
+    index = 0
+    for closing, tag, value in _iter_ofx_tokens(text):
+        if current is not None and not closing and tag != 'STMTTRN':
+            current[tag] = value
+            continue
+        ends_transaction = (tag == 'STMTTRN') or (closing and tag == 'BANKTRANLIST')
+        if current is not None and ends_transaction:
+            index += 1
+            try:
+                yield _ofx_row(current)
+            except ValueError as e:
+                if errors is not None:
+                    errors.append((index, str(e)))
+            current = None
+        if tag == 'STMTTRN' and not closing:
+            current = {}
+
+
+PARSERS = {
+    'csv': iter_csv_rows,
+    'ofx': iter_ofx_rows,
+}
+
+
+def detect_format(filename: str) -> str:
+    extension = (filename or '').rsplit('.', 1)[-1].lower()
+    if extension in ('ofx', 'qfx'):
+        return 'ofx'
+    if extension in ('csv', 'txt'):
+        return 'csv'
+    raise StatementError(f"Formato de extrato não suportado: {filename!r} (use CSV ou OFX)")
+
+
+def content_hash(row: StatementRow, occurrence: int = 0) -> str:
+    """Hash de (data, valor, descrição) usado na deduplicação.
+
+    `occurrence` distingue lançamentos idênticos no mesmo arquivo (dois
+    cafés de mesmo valor no mesmo dia): o 2º igual recebe 1, o 3º 2 etc.
+    Reimportar o arquivo gera os mesmos hashes e nada é duplicado.
+    """
+    signed_cents = round(row.amount * 100) * (1 if row.type == 'income' else -1)
+    key = f"{row.date.isoformat()}|{signed_cents}|{_fold(row.description)}|{occurrence}"
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
+def with_content_hashes(rows):
+    """Acrescenta o hash de cada linha: gera (hash, StatementRow).
+
+    Contagem de ocorrências por chave (data, valor, descrição) no arquivo
+    inteiro: não supõe linhas em ordem de data. Guarda um inteiro por chave
+    distinta, então a memória continua pequena.
+    """
+    seen = {}
+    for row in rows:
+        base = content_hash(row)
+        occurrence = seen.get(base, 0)
+        seen[base] = occurrence + 1
+        yield (base if occurrence == 0 else content_hash(row, occurrence)), row
+
+
+def batched(iterable, size: int):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🧪 TESTE DO MOTOR DO CONSELHEIRO - FINANCE APP
+Engine criado uma vez por processo e usável sem contexto de requisição
+"""
+
+import json
+from types import SimpleNamespace
+
+from advisor import ADVISOR_MODES, AdvisorEngine
+from intent_model import load_intent_model
+
+SNAPSHOT = {
+    'income': 5000.0,
+    'expense': 2300.0,
+    'balance': 2700.0,
+    'savings_rate': 54.0,
+    'top_expenses': [('Cartão Nubank', 1200.0), ('Mercado', 800.0)],
+    'history': [SimpleNamespace(type='expense', category='Cartão Nubank', amount_cents=120000),
+                SimpleNamespace(type='expense', category='Mercado', amount_cents=80000)],
+}
+PROFILE = SimpleNamespace(risk_profile='conservador')
+
+
+def test_answer_without_request_context():
+    engine = AdvisorEngine(model=load_intent_model())
+    answer = engine.answer('tô endividado no cartão, me ajuda', SNAPSHOT, PROFILE, 'direto')
+    assert answer.intents[:2] == ['dívida', 'cartao']
+    assert 'R$ 1.200,00' in answer.response  # dívidas vindas do histórico do snapshot
+
+    glossary = engine.answer('O que é CDI?', SNAPSHOT, PROFILE, 'direto')
+    assert glossary.response.startswith('🧾 Conceitos financeiros importantes:')
+    for mode in ADVISOR_MODES:
+        assert engine.answer('onde investir 5 mil?', SNAPSHOT, PROFILE, mode).response
+
+
+def test_compiled_tables_keep_keyword_weights():
+    engine = AdvisorEngine(keywords={'poupança': ['guardar', 'guardar', 'como guardar']}, specific_patterns={
+        'quero comprar': (('carro', 'carro'), ('casa', 'casa'), 'imóvel')})
+    # 'guardar' repetido conta duas vezes; frase completa vale 1 + 3
+    assert engine.score_intents('como guardar dinheiro') == {'poupança': 1 + 1 + 4}
+    # Contexto emocional (+2) e urgência (+3) em cada palavra encontrada
+    assert engine.score_intents('quero guardar agora') == {'poupança': 2 * (1 + 5)}
+    assert engine.detect_intents('quero comprar uma casa')[0] == 'casa'
+    assert engine.detect_intents('quero comprar algo') == ['imóvel']
+
+
+def test_view_uses_process_wide_engine(client, monkeypatch):
+    import app as app_module
+    calls = []
+    original = app_module.ADVISOR.sections
+    monkeypatch.setattr(app_module.ADVISOR, 'sections', lambda *args: calls.append(args) or original(*args))
+    for _ in range(2):
+        response = client.get('/financial_advisor', query_string={'question': 'como economizar?', 'mode': 'compacto'})
+        assert response.status_code == 200
+    assert len(calls) == 2 and calls[0][3] == 'compacto'
+    snapshot = calls[0][1]
+    assert {'income', 'expense', 'balance', 'savings_rate'} <= set(snapshot)
+    assert snapshot['top_expenses'] == [] and snapshot['history'] == []
+
+
+def _events(body):
+    events = []
+    for block in body.strip().split('\n\n'):
+        event, data = block.split('\n')
+        events.append((event.removeprefix('event: '), json.loads(data.removeprefix('data: '))))
+    return events
+
+
+def test_sse_streams_tldr_before_history(client, monkeypatch):
+    import app as app_module
+    from app import AiInteraction
+    order = []
+    original_history = app_module._advisor_history
+    monkeypatch.setattr(app_module, '_advisor_history', lambda user_id: order.append('history') or original_history(user_id))
+    query = {'question': 'tô gastando muito', 'mode': 'especialista'}
+
+    response = client.get('/financial_advisor', query_string={**query, 'stream': 'sse'})
+    assert response.mimetype == 'text/event-stream' and response.is_streamed
+    chunks = response.response
+    first = next(iter(chunks))
+    assert first.startswith(b'event: section') and b'"tldr"' in first and order == []
+    events = _events((first + b''.join(chunks)).decode('utf-8'))
+    assert [data['name'] for kind, data in events if kind == 'section'] == [
+        'tldr', 'core', 'checklist', 'suggestions', 'expert']
+    assert events[-1][0] == 'done' and order == ['history']
+    streamed = '\n'.join(data['text'] for kind, data in events if kind == 'section')
+
+    assert client.get('/financial_advisor', query_string=query).get_json()['response'] == streamed
+    app_module.advisor_writes.flush()
+    assert [i.response_text for i in AiInteraction.query.order_by(AiInteraction.id)] == [streamed, streamed]
+
+
+def test_answer_cache_shares_static_sections_not_numbers():
+    engine = AdvisorEngine()
+    first = engine.answer('onde investir?', SNAPSHOT, PROFILE, 'didatico').response
+    again = engine.answer('Onde investir', SNAPSHOT, PROFILE, 'didatico').response
+    assert again == first
+    assert engine.cache_info()['analyses']['hits'] == 1 and engine.cache_info()['answers']['hits'] == 1
+
+    # O esqueleto não depende do snapshot: outro usuário (até com saldo negativo) reaproveita, com os próprios números
+    richer = {**SNAPSHOT, 'income': 9000.0, 'expense': 4000.0, 'balance': 5000.0, 'savings_rate': 55.6}
+    other = engine.answer('onde investir', richer, PROFILE, 'didatico').response
+    broke = {**SNAPSHOT, 'income': 1000.0, 'expense': 3000.0, 'balance': -2000.0, 'savings_rate': -200.0}
+    engine.answer('onde investir', broke, PROFILE, 'didatico')
+    assert engine.cache_info()['answers'] == {'hits': 3, 'misses': 1, 'size': 1, 'maxsize': engine.answers.maxsize}
+    assert 'R$ 9.000,00' in other and 'R$ 9.000,00' not in first
+    assert other == AdvisorEngine().answer('onde investir', richer, PROFILE, 'didatico').response
+
+    # Outro modo é outra chave; o perfil de risco só muda o núcleo, montado por usuário
+    engine.answer('onde investir', SNAPSHOT, SimpleNamespace(risk_profile='arrojado'), 'didatico')
+    engine.answer('onde investir', SNAPSHOT, PROFILE, 'direto')
+    assert engine.cache_info()['answers']['size'] == 2
+
+
+def test_batch_endpoint_reads_snapshot_once_and_writes_once(client, monkeypatch):
+    import app as app_module
+    from app import AiInteraction, AiProfile, get_intent_counters
+    calls = {'summary': 0, 'history': 0, 'writes': []}
+    original_summary, original_history = app_module.get_transactions_summary, app_module._advisor_history
+    original_writes = app_module.apply_advisor_writes
+    monkeypatch.setattr(app_module, 'get_transactions_summary', lambda *args, **kwargs: calls.__setitem__(
+        'summary', calls['summary'] + 1) or original_summary(*args, **kwargs))
+    monkeypatch.setattr(app_module, '_advisor_history', lambda user_id: calls.__setitem__(
+        'history', calls['history'] + 1) or original_history(user_id))
+    monkeypatch.setattr(app_module, 'apply_advisor_writes', lambda records: calls['writes'].append(
+        len(records)) or original_writes(records))
+
+    questions = ['como economizar?', 'onde investir?', 'tô gastando muito', 'como economizar?']
+    response = client.post('/api/advisor/batch', json={'questions': questions, 'mode': 'direto'})
+    assert response.status_code == 200
+    answers = response.get_json()['answers']
+    assert [a['question'] for a in answers] == questions
+    assert [a['intents'][0] for a in answers] == ['poupança', 'investimento', 'gasto', 'poupança']
+    assert calls['summary'] == 1 and calls['history'] == 1
+    app_module.advisor_writes.flush()
+    assert calls['writes'] == [4]
+    assert AiProfile.query.one().interaction_count == 4 and get_intent_counters(AiProfile.query.one().user_id)[
+        'poupança'] == 2
+    assert [i.response_text for i in AiInteraction.query.order_by(AiInteraction.id)] == [a['response'] for a in answers]
+
+    single = client.get('/financial_advisor', query_string={'question': 'onde investir?', 'mode': 'direto'})
+    assert single.get_json()['response'] == answers[1]['response']
+
+    for bad in ({}, {'questions': []}, {'questions': 'oi'}, {'questions': [1]}, {'questions': ['oi'] * 21}):
+        assert client.post('/api/advisor/batch', json=bad).status_code == 400
+
+
+def test_sections_render_only_what_the_mode_emits(monkeypatch):
+    import advisor
+    rendered = []
+    for name in ('checklist_lines', 'terms_lines'):
+        original = getattr(advisor, name)
+        monkeypatch.setattr(advisor, name, lambda *args, name=name, original=original: rendered.append(
+            name) or original(*args))
+    monkeypatch.setattr(advisor, 'COMPACT_MAX_LINES', 20)
+    engine = AdvisorEngine()
+    snapshot = {key: SNAPSHOT[key] for key in ('income', 'expense', 'balance', 'savings_rate')}
+
+    # Orçamento não usa histórico nem perfil: um snapshot sem eles basta
+    names = [name for name, _ in engine.sections(engine.prepare('como fazer orçamento?'), snapshot, None, 'compacto')]
+    assert names == ['tldr', 'core'] and rendered == []
+    assert [name for name, _ in engine.sections(engine.prepare('como fazer orçamento?'), snapshot, None, 'direto')] == [
+        'core']
+    full = list(engine.sections(engine.prepare('como fazer orçamento?'), snapshot, None, 'didatico'))
+    assert [name for name, _ in full] == ['tldr', 'core', 'checklist', 'suggestions']  # sem termos: seção omitida
+    assert rendered == ['checklist_lines', 'terms_lines']
+
+
+def test_view_skips_profile_and_history_when_unused(client, user, monkeypatch):
+    import app as app_module
+    from datetime import date
+    from app import db, Transaction
+    db.session.add(Transaction(user_id=user.id, type='income', category='Salário', amount=6000.0, date=date.today()))
+    db.session.commit()
+    loads = []
+    original_profile, original_history = app_module.get_or_create_ai_profile, app_module._advisor_history
+    monkeypatch.setattr(app_module, 'get_or_create_ai_profile', lambda user_id: loads.append(
+        'profile') or original_profile(user_id))
+    monkeypatch.setattr(app_module, '_advisor_history', lambda user_id: loads.append(
+        'history') or original_history(user_id))
+    for question, expected in (('como fazer orçamento?', []), ('onde investir 5 mil?', ['profile']),
+                               ('tô gastando muito', ['history'])):
+        loads.clear()
+        response = client.get('/financial_advisor', query_string={'question': question, 'mode': 'direto'})
+        assert response.status_code == 200 and loads == expected, question
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🧪 TESTE DO HISTÓRICO DO CONSELHEIRO - FINANCE APP
+Respostas deduplicadas por hash, comprimidas, e retenção com contagens
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+import response_store
+
+LONG_RESPONSE = '📌 Resumo rápido (TL;DR)\n' + '- Diversifique e aporte regularmente (DCA).\n' * 80
+
+
+def _record(user_id, response, intents=('poupança',), created_at=None):
+    return dict(user_id=user_id, question='como economizar?', intents=list(intents), sections=[response],
+                balance=100.0, created_at=created_at or datetime.utcnow())
+
+
+def test_codec_round_trip():
+    row = response_store.blob_row(LONG_RESPONSE)
+    assert row['hash'] == response_store.content_hash(LONG_RESPONSE) and row['codec'] == 'zlib'
+    assert row['stored_size'] < row['size'] / 10
+    assert response_store.decompress(row['data'], row['codec']) == LONG_RESPONSE
+    with pytest.raises(ValueError):
+        response_store.compress('x', 'lz4')
+    if response_store.zstandard is None:
+        assert response_store.default_codec({'AI_RESPONSE_CODEC': 'zstd'}) == 'zlib'
+
+
+def test_responses_deduplicated_and_compressed(app_ctx, user):
+    from app import db, AiInteraction, AiResponseBlob, ai_storage_report, apply_advisor_writes
+    apply_advisor_writes([_record(user.id, LONG_RESPONSE) for _ in range(3)] + [_record(user.id, 'curta')])
+    db.session.commit()
+    apply_advisor_writes([_record(user.id, LONG_RESPONSE)])
+    db.session.commit()
+
+    assert AiResponseBlob.query.count() == 2
+    interactions = AiInteraction.query.order_by(AiInteraction.id).all()
+    assert [i.response for i in interactions] == [''] * 5
+    assert [i.response_text for i in interactions] == [LONG_RESPONSE] * 3 + ['curta', LONG_RESPONSE]
+    report = ai_storage_report()
+    assert report['logical_bytes'] == 4 * len(LONG_RESPONSE.encode()) + 5
+    assert report['stored_bytes'] < len(LONG_RESPONSE.encode()) / 5 and report['saved_bytes'] > 0
+
+
+def test_legacy_text_moves_to_blobs(app_ctx, user):
+    from app import db, AiInteraction, AiResponseBlob, migrate_ai_responses
+    for _ in range(2):
+        db.session.add(AiInteraction(user_id=user.id, question='q', intents_json='[]', response=LONG_RESPONSE))
+    db.session.commit()
+    assert migrate_ai_responses(batch_size=1) == 2 and migrate_ai_responses() == 0
+    assert AiResponseBlob.query.count() == 1
+    assert {(i.response, i.response_text) for i in AiInteraction.query} == {('', LONG_RESPONSE)}
+
+
+def test_retention_compacts_old_interactions(app_ctx, user):
+    from app import app, db, AiInteraction, AiInteractionSummary, AiResponseBlob, apply_advisor_writes
+    old = datetime.utcnow() - timedelta(days=120)
+    apply_advisor_writes([
+        _record(user.id, 'antiga', ('poupança', 'gasto'), old),
+        _record(user.id, 'antiga', ('poupança',), old + timedelta(days=1)),
+        _record(user.id, LONG_RESPONSE, ('investimento',)),
+    ])
+    # O blob da resposta antiga foi gravado junto com ela
+    AiResponseBlob.query.filter_by(hash=response_store.content_hash('antiga')).update({'created_at': old})
+    db.session.commit()
+
+    result = app.test_cli_runner().invoke(args=['ai-retention', '--days', '90'])
+    assert result.exit_code == 0, result.output
+    assert '2 interação(ões) compactada(s); 1 blob(s) removido(s)' in result.output
+    db.session.expire_all()
+    assert [i.response_text for i in AiInteraction.query] == [LONG_RESPONSE]
+    assert [b.text for b in AiResponseBlob.query] == [LONG_RESPONSE]
+    summaries = {s.intent: (s.count, s.first_at, s.last_at) for s in AiInteractionSummary.query}
+    assert summaries == {'poupança': (2, old, old + timedelta(days=1)), 'gasto': (1, old, old)}
+
+
+def test_retention_keeps_recent_orphan_blobs(app_ctx, user):
+    from app import db, AiResponseBlob, compact_ai_interactions, store_response_blobs, apply_advisor_writes
+    old = datetime.utcnow() - timedelta(days=120)
+    apply_advisor_writes([_record(user.id, 'antiga', created_at=old), _record(user.id, 'reusada', created_at=old)])
+    AiResponseBlob.query.update({'created_at': old})
+    # Outro worker acabou de gravar um blob novo e reaproveitar um antigo, sem inserir as interações ainda
+    store_response_blobs(['em voo', 'reusada'])
+    db.session.commit()
+    result = compact_ai_interactions(datetime.utcnow() - timedelta(days=90))
+    assert result['compacted'] == 2 and result['blobs_deleted'] == 1
+    assert {b.text for b in AiResponseBlob.query} == {'reusada', 'em voo'}
+
+
+def test_sections_shared_between_users_with_different_numbers(client, user):
+    import json
+    from datetime import date
+    from werkzeug.security import generate_password_hash
+    from app import db, advisor_writes, AiInteraction, AiResponseBlob, User
+    db.session.add(User(username='outra', password_hash=generate_password_hash('Senha@123')))
+    db.session.commit()
+    other = client.application.test_client()
+    other.post('/login', data={'username': 'outra', 'password': 'Senha@123'})
+
+    responses = []
+    for test_client, income in ((client, '5000'), (other, '1234.56')):
+        test_client.post('/add_transaction', data={'type': 'income', 'category': 'Salário', 'amount': income,
+                                                   'description': '', 'date': date.today().isoformat()})
+        answer = test_client.get('/financial_advisor', query_string={'question': 'como economizar dinheiro?'})
+        responses.append(answer.get_json()['response'])
+    if advisor_writes is not None:
+        advisor_writes.flush()
+
+    assert responses[0] != responses[1]  # números de cada usuário
+    interactions = AiInteraction.query.order_by(AiInteraction.id).all()
+    assert [i.response_text for i in interactions] == responses
+    first, second = (json.loads(i.section_hashes_json) for i in interactions)
+    assert len(first) == len(second) > 2
+    # TL;DR tem os números; as seções fixas são o mesmo blob para os dois
+    assert first[0] != second[0] and set(first[1:]) & set(second[1:])
+    assert AiResponseBlob.query.count() < len(first) + len(second)
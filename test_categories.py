@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🧪 TESTE DAS CATEGORIAS NORMALIZADAS - FINANCE APP
+Nome canônico, atributos pré-calculados e ids internados nas transações
+"""
+
+from datetime import date, timedelta
+
+from sqlalchemy import text
+
+from categories import (NEEDS_KEYWORDS, TIP_FAMILIES, WANTS_KEYWORDS, category_attributes, classify_category,
+                        normalize_category_name)
+
+
+def test_normalized_attributes():
+    assert normalize_category_name('  Alimentação   Fora ') == 'alimentacao fora'
+    assert category_attributes('Água e Luz') == {
+        'name': 'Água e Luz', 'normalized_name': 'agua e luz', 'need_class': 'need', 'tip_family': None}
+    assert category_attributes('Lazer')['need_class'] == 'want'
+    assert category_attributes('Casa de praia')['tip_family'] == 'moradia'
+    assert category_attributes('Presentes')['need_class'] is None
+
+
+def test_compiled_classifier_matches_keyword_rules_and_memoizes():
+    names = ['Supermercado Extra', 'Cinema e Lazer', 'Cartão Nubank', 'Aluguel', 'Streaming', 'Doações',
+             'Comida japonesa', 'Financiamento Casa', 'Educação', 'Presentes']
+    for name in names:
+        normalized = normalize_category_name(name)
+        expected_need = ('need' if any(k in normalized for k in NEEDS_KEYWORDS)
+                         else 'want' if any(k in normalized for k in WANTS_KEYWORDS) else None)
+        expected_family = next((f for f, keywords in TIP_FAMILIES if any(k in normalized for k in keywords)), None)
+        assert classify_category(name)[:2] == (expected_need, expected_family)
+    assert classify_category('Cartão Nubank').debt and not classify_category('Aluguel').debt
+
+    classify_category.cache_clear()
+    for _ in range(500):
+        for name in names:
+            classify_category(name)
+    assert classify_category.cache_info().misses == len(names)
+
+
+def test_transactions_reference_global_or_user_categories(client, user):
+    from app import db, Category, Transaction, seed_global_categories
+    seed_global_categories()
+    for category in ('alimentacao', 'Alimentação', 'Pet Shop', 'pet  shop'):
+        client.post('/add_transaction', data={'type': 'expense', 'category': category, 'amount': '10',
+                                              'description': '', 'date': date.today().isoformat()})
+    ids = [t.category_id for t in Transaction.query.order_by(Transaction.id)]
+    assert ids[0] == ids[1] and ids[2] == ids[3]
+    assert db.session.get(Category, ids[0]).user_id is None
+    pet = db.session.get(Category, ids[2])
+    assert (pet.user_id, pet.name, pet.normalized_name) == (user.id, 'Pet Shop', 'pet shop')
+    # Texto original continua para exibição
+    assert [t.category for t in Transaction.query.order_by(Transaction.id)][:2] == ['alimentacao', 'Alimentação']
+
+
+def test_rolled_back_category_is_not_cached(app_ctx, user):
+    from app import db, Category, _CATEGORY_IDS, intern_category
+    intern_category(user.id, 'Temporária')
+    db.session.rollback()
+    assert (user.id, 'temporaria') not in _CATEGORY_IDS
+    new_id = intern_category(user.id, 'Temporária')
+    db.session.commit()
+    assert db.session.get(Category, new_id) is not None
+    assert _CATEGORY_IDS[(user.id, 'temporaria')] == new_id
+
+
+def test_upgrade_backfills_category_ids(app_ctx, user):
+    from app import db, Category, Transaction, upgrade_schema
+    db.session.execute(text(
+        "INSERT INTO transactions (user_id, type, category, amount_cents, date) VALUES "
+        "(:u, 'expense', 'Mercado', 1000, '2024-01-01'), (:u, 'expense', 'Cinema', 500, '2024-01-02')"),
+        {'u': user.id})
+    db.session.commit()
+    upgrade_schema()
+    rows = Transaction.query.order_by(Transaction.id).all()
+    assert all(t.category_id for t in rows)
+    categories = [db.session.get(Category, t.category_id) for t in rows]
+    assert categories[0].user_id is None and categories[0].need_class == 'need'
+    assert categories[1].user_id == user.id
+
+
+def test_rollups_group_by_category_id(client, user):
+    from app import TransactionRollup, category_lookup, describe_category, get_period_totals, seed_global_categories
+    seed_global_categories()
+    today = date.today()
+    for category in ('alimentacao', 'Alimentação', 'Pet Shop'):
+        client.post('/add_transaction', data={'type': 'expense', 'category': category, 'amount': '10',
+                                              'description': '', 'date': today.isoformat()})
+    month = TransactionRollup.query.filter_by(user_id=user.id, granularity='month').all()
+    assert len(month) == 2 and all(r.category_id for r in month)
+
+    totals = get_period_totals(user.id, today, today + timedelta(days=1))
+    # Grafias diferentes somam no mesmo id; o nome exibido vem de categories
+    assert totals['expense_by_category'] == {'Alimentação': 20.0, 'Pet Shop': 10.0}
+    lookup = category_lookup(user.id)
+    assert describe_category(lookup, totals['category_ids']['Alimentação']) == ('need', 'alimentacao')
+    assert describe_category(lookup, totals['category_ids']['Pet Shop']) == (None, None)
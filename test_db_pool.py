@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🧪 TESTE DO POOL DE CONEXÕES - FINANCE APP
+Configuração por variáveis de ambiente e métricas de espera no checkout
+"""
+
+import os
+import ssl
+import tempfile
+import threading
+import time
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from db_pool import (POOL_METRICS, TimedQueuePool, connection_budget_warning, install_statement_timeout,
+                     postgres_engine_options)
+
+
+def test_engine_options_from_env():
+    options = postgres_engine_options({'DB_POOL_SIZE': '8', 'DB_MAX_OVERFLOW': '2', 'DB_POOL_RECYCLE': '120',
+                                       'DB_POOL_PRE_PING': 'false', 'DB_CONNECT_TIMEOUT': '3'})
+    assert options['poolclass'] is TimedQueuePool
+    assert (options['pool_size'], options['max_overflow'], options['pool_recycle']) == (8, 2, 120)
+    assert options['pool_pre_ping'] is False
+    assert options['connect_args']['timeout'] == 3
+    # sslmode=require (padrão): criptografa sem validar certificado, como no libpq
+    context = options['connect_args']['ssl_context']
+    assert context.verify_mode == ssl.CERT_NONE
+
+    assert 'ssl_context' not in postgres_engine_options({'DB_SSLMODE': 'disable'})['connect_args']
+    assert postgres_engine_options({'DB_SSLMODE': 'verify-full'})['connect_args']['ssl_context'].check_hostname
+
+
+def test_connection_budget_warning():
+    env = {'DB_MAX_CONNECTIONS': '20', 'WEB_CONCURRENCY': '3', 'DB_POOL_SIZE': '5', 'DB_MAX_OVERFLOW': '5'}
+    assert '30' in connection_budget_warning(env)
+    env['DB_MAX_OVERFLOW'] = '1'
+    assert connection_budget_warning(env) is None
+
+
+def test_statement_timeout_only_for_postgres():
+    assert install_statement_timeout(create_engine('sqlite://'), 1000) is False
+
+
+def test_checkout_wait_and_timeouts_are_measured():
+    path = os.path.join(tempfile.mkdtemp(prefix='finance_pool_'), 'pool.db')
+    engine = create_engine(f'sqlite:///{path}', poolclass=TimedQueuePool, pool_size=1, max_overflow=0,
+                           pool_timeout=1, connect_args={'check_same_thread': False})
+    POOL_METRICS.reset()
+
+    held = engine.connect()
+    waited = threading.Event()
+
+    def second_checkout():
+        with engine.connect():
+            waited.set()
+
+    thread = threading.Thread(target=second_checkout)
+    thread.start()
+    time.sleep(0.2)
+    held.close()
+    thread.join()
+    assert waited.is_set()
+
+    snapshot = POOL_METRICS.snapshot(engine.pool)
+    assert snapshot['checkouts'] == 2
+    assert snapshot['max_wait_ms'] >= 150
+    assert sum(snapshot['wait_histogram'].values()) == 2
+    assert snapshot['pool']['size'] == 1
+
+    with engine.connect():
+        with pytest.raises(PoolTimeoutError):
+            engine.connect()
+    assert POOL_METRICS.snapshot()['timeouts'] == 1
+
+
+def test_pool_metrics_endpoint(client, app_ctx, monkeypatch):
+    # Usuário comum não vê métricas internas; sem admin configurado, ninguém vê
+    assert client.get('/admin/db-pool').status_code == 403
+    monkeypatch.setenv('ADMIN_TOKEN', 's3cr3t')
+    anonymous = app_ctx.test_client()
+    assert anonymous.get('/admin/db-pool', headers={'X-Admin-Token': 'errado'}).status_code == 403
+    assert anonymous.get('/admin/db-pool', headers={'Authorization': 'Bearer s3cr3t'}).status_code == 200
+    monkeypatch.setenv('ADMIN_USERS', 'chefe, teste')
+    data = client.get('/admin/db-pool').get_json()
+    assert {'checkouts', 'timeouts', 'avg_wait_ms', 'wait_histogram', 'settings'} <= set(data)
+    assert data['settings']['pool_size'] == 5
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🧪 TESTE DE EXPORTAÇÃO DE TRANSAÇÕES - FINANCE APP
+Exportação em CSV/JSONL via streaming, com filtros aplicados no SQL
+"""
+
+import csv
+import io
+import json
+from datetime import date, datetime, timedelta
+
+
+def _seed(user_id, n=1200):
+    from app import db, Transaction
+    categories = ['Alimentação', 'Transporte', 'Lazer']
+    db.session.bulk_save_objects([
+        Transaction(user_id=user_id, type='expense' if i % 4 else 'income',
+                    category=categories[i % 3], amount=i + 0.5, description=f'linha "{i}", teste',
+                    date=date(2024, 1, 1) + timedelta(days=i % 365))
+        for i in range(n)
+    ])
+    db.session.commit()
+
+
+def test_csv_export_streams_full_history(client, user):
+    """CSV em pedaços, com todas as linhas e ordenado por data"""
+    _seed(user.id)
+    response = client.get('/export/transactions.csv')
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert response.mimetype == 'text/csv'
+    assert 'attachment' in response.headers['Content-Disposition']
+
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert len(rows) == 1200
+    assert rows[0]['description'].startswith('linha "')
+    assert [r['date'] for r in rows] == sorted(r['date'] for r in rows)
+
+
+def test_jsonl_export_applies_filters(client, user):
+    """Filtros de data (inclusivos), categoria e tipo"""
+    from app import Transaction
+    _seed(user.id)
+    response = client.get('/export/transactions.jsonl?start=2024-03-01&end=2024-03-31'
+                          '&category=Lazer&category=Transporte&type=expense')
+    assert response.status_code == 200
+    records = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+    expected = Transaction.query.filter(
+        Transaction.user_id == user.id, Transaction.type == 'expense',
+        Transaction.category.in_(['Lazer', 'Transporte']),
+        Transaction.date >= date(2024, 3, 1), Transaction.date <= date(2024, 3, 31)).count()
+    assert len(records) == expected > 0
+    assert all('2024-03-01' <= r['date'] <= '2024-03-31' for r in records)
+    assert {r['category'] for r in records} <= {'Lazer', 'Transporte'}
+    assert isinstance(records[0]['amount'], float)
+
+
+def test_export_excludes_trash_and_other_users(client, user):
+    """Só exporta transações ativas do próprio usuário"""
+    from app import db, User, Transaction
+    other = User(username='outro', password_hash='x')
+    db.session.add(other)
+    db.session.commit()
+    db.session.add_all([
+        Transaction(user_id=user.id, type='expense', category='Lazer', amount=1.0, date=date(2024, 1, 1)),
+        Transaction(user_id=user.id, type='expense', category='Lazer', amount=2.0, date=date(2024, 1, 2),
+                    deleted_at=datetime(2024, 1, 3)),
+        Transaction(user_id=other.id, type='expense', category='Lazer', amount=3.0, date=date(2024, 1, 1)),
+    ])
+    db.session.commit()
+
+    records = client.get('/export/transactions.jsonl').get_data(as_text=True).splitlines()
+    assert [json.loads(r)['amount'] for r in records] == [1.0]
+    assert client.get('/export/transactions.xml').status_code == 404
+    assert client.get('/export/transactions.csv?start=ontem').status_code == 400
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🧪 TESTE DOS CONTADORES DE INTENÇÃO - FINANCE APP
+Incremento atômico no banco, lote num comando só e migração do JSON antigo
+"""
+
+from sqlalchemy import event
+
+
+def test_batched_increments_are_one_statement(app_ctx, user):
+    from app import db, get_intent_counters, increment_intent_counters, intent_counter_deltas
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        increment_intent_counters(intent_counter_deltas([
+            (user.id, ['poupança', 'gasto']), (user.id, ['poupança']), (user.id, ['investimento'])]))
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+    db.session.commit()
+    assert len([s for s in statements if 'ai_intent_counters' in s]) == 1
+    assert get_intent_counters(user.id) == {'poupança': 2, 'gasto': 1, 'investimento': 1}
+
+
+def test_increments_do_not_read_modify_write(app_ctx, user):
+    from app import db, get_intent_counters, increment_intent_counters
+    # Duas "requisições" com a mesma leitura antiga: nenhuma perde o incremento da outra
+    before = get_intent_counters(user.id)
+    for _ in range(2):
+        increment_intent_counters({(user.id, 'dívida'): 1})
+        db.session.commit()
+    assert before == {} and get_intent_counters(user.id) == {'dívida': 2}
+
+
+def test_upgrade_moves_json_counters(app_ctx, user):
+    from app import db, AiProfile, get_intent_counters, upgrade_schema
+    db.session.add(AiProfile(user_id=user.id, focus_counters_json='{"renda": 3, "ajuda": 1}'))
+    db.session.commit()
+    upgrade_schema()
+    upgrade_schema()  # idempotente
+    assert get_intent_counters(user.id) == {'renda': 3, 'ajuda': 1}
+    assert AiProfile.query.filter_by(user_id=user.id).one().focus_counters_json == '{}'
+
+
+def test_concurrent_migrations_count_once(app_ctx, user, monkeypatch):
+    import app as app_module
+    from app import db, AiProfile, get_intent_counters, increment_intent_counters, migrate_focus_counters
+    db.session.add(AiProfile(user_id=user.id, focus_counters_json='{"renda": 3}'))
+    db.session.commit()
+    claim = app_module._claim_focus_counters
+
+    def other_worker_first(profile_id, old_json):
+        # Outro worker leu o mesmo JSON e migrou entre a leitura e o UPDATE deste
+        if claim(profile_id, old_json):
+            increment_intent_counters({(user.id, 'renda'): 3})
+        return claim(profile_id, old_json)
+
+    monkeypatch.setattr(app_module, '_claim_focus_counters', other_worker_first)
+    migrate_focus_counters()
+    assert get_intent_counters(user.id) == {'renda': 3}
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🧪 TESTE DO CLASSIFICADOR DE INTENÇÕES - FINANCE APP
+TF-IDF de n-gramas + modelo linear esparso, com as regras como reserva
+"""
+
+from advisor import AdvisorEngine
+from intent_model import DEFAULT_MODEL_PATH, LOAD_BUDGET_MS, IntentModel, char_ngrams, load_intent_model, train
+from nlp import normalize_text
+
+EXAMPLES = [
+    ('como economizar dinheiro', ('poupança',)),
+    ('quero guardar mais', ('poupança',)),
+    ('onde investir meu dinheiro', ('investimento',)),
+    ('melhor aplicação em renda fixa', ('investimento',)),
+    ('como quitar a dívida', ('dívida',)),
+    ('estou devendo muito', ('dívida',)),
+]
+
+
+def test_accented_and_plain_text_share_ngrams():
+    assert char_ngrams(normalize_text('Dívida!')) == char_ngrams('divida')
+    assert ' di' in char_ngrams('divida') and 'da ' in char_ngrams('divida')
+
+
+def test_trained_model_round_trip(tmp_path):
+    model = train(EXAMPLES, epochs=20)
+    assert model.intents == ('dívida', 'investimento', 'poupança')
+    assert model.predict(normalize_text('Como quitar minha dívida?'))[0] == 'dívida'
+    assert model.predict('xyz') == []  # nenhum n-grama conhecido: sem confiança
+    questions = ['onde investir', 'xyz', 'quero guardar dinheiro', 'onde investir']
+    assert model.predict_many(questions) == [model.predict(q) for q in questions]
+
+    path = tmp_path / 'modelo.json'
+    model.save(str(path))
+    loaded = IntentModel.load(str(path))
+    question = 'onde investir'
+    assert loaded.predict(question) == model.predict(question)
+    assert [round(s, 4) for s in loaded.decision_function(question)] == [
+        round(s, 4) for s in model.decision_function(question)]
+    assert len(loaded.indptr) == len(loaded) + 1 and len(loaded.indices) == len(loaded.data)
+
+
+def test_rules_fallback_and_normalized_keywords(tmp_path):
+    engine = AdvisorEngine(model=train(EXAMPLES, epochs=20, threshold=0.9))
+    # Modelo sem confiança: as regras (agora sem acentos, como a pergunta) decidem
+    assert engine.model.predict('preciso de seguro de vida') == []
+    assert engine.detect_intents(normalize_text('Preciso de seguro de vida')) == ['seguro']
+    assert AdvisorEngine().detect_intents(normalize_text('e essa dívida?')) == ['dívida']
+    assert load_intent_model(str(tmp_path / 'inexistente.json')) is None
+
+
+def test_shipped_model_loads_within_budget():
+    model = min((IntentModel.load(DEFAULT_MODEL_PATH) for _ in range(3)), key=lambda m: m.load_ms)
+    assert model.load_ms < LOAD_BUDGET_MS
+    assert len(model.intents) >= 20
+    engine = AdvisorEngine(model=model)
+    for question, expected in (('tô gastando muito', 'gasto'), ('Tesouro Selic ou CDB?', 'investimento'),
+                               ('como montar minha reserva de emergência', 'emergência')):
+        assert engine.detect_intents(normalize_text(question))[0] == expected
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🧪 TESTE DA MIGRAÇÃO SQLITE → POSTGRESQL - FINANCE APP
+Cópia em blocos, ordem de FKs, retomada após falha e conferência final
+(o destino aqui é outro SQLite: o COPY só roda com PostgreSQL)
+"""
+
+import os
+import tempfile
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+
+import migrate_sqlite_to_postgres as migration
+
+
+def _make_databases(n_transactions=430):
+    from app import db, User, Transaction, AiInteraction
+    workdir = tempfile.mkdtemp(prefix='finance_migration_')
+    source_url = 'sqlite:///' + os.path.join(workdir, 'origem.db')
+    target_url = 'sqlite:///' + os.path.join(workdir, 'destino.db')
+    source, target = create_engine(source_url), create_engine(target_url)
+    db.metadata.create_all(source)
+    db.metadata.create_all(target)
+
+    with source.begin() as conn:
+        conn.execute(User.__table__.insert(), [
+            {'id': i, 'username': f'user{i}', 'password_hash': 'x', 'email': None} for i in range(1, 4)])
+        conn.execute(Transaction.__table__.insert(), [
+            {'id': i, 'user_id': i % 3 + 1, 'type': 'expense', 'category': 'Lazer',
+             'amount_cents': i * 110, 'description': 'tab\tquebra\nbarra\\' if i == 7 else None,
+             'date': date(2024, 1, 1) + timedelta(days=i % 90),
+             'deleted_at': datetime(2024, 5, 1, 12, 30) if i % 50 == 0 else None}
+            for i in range(1, n_transactions + 1)])
+        conn.execute(AiInteraction.__table__.insert(), [
+            {'id': i, 'user_id': 1, 'question': f'pergunta {i}', 'intents_json': '[]', 'response': 'ok',
+             'created_at': datetime(2024, 1, 1)} for i in range(1, 20)])
+    return source_url, target_url
+
+
+def test_plan_levels_follow_foreign_keys(app_ctx):
+    from app import db
+    levels = migration.plan_levels(db.metadata.sorted_tables)
+    level_of = {t.name: i for i, level in enumerate(levels) for t in level}
+    assert level_of['users'] < level_of['transactions']
+    assert level_of['users'] < level_of['ai_interactions']
+    assert level_of['categories'] < level_of['transactions']
+    assert level_of['categories'] == level_of['ai_interactions']  # independentes: mesmo nível
+
+
+def test_migration_resumes_after_crash_and_verifies(app_ctx):
+    source_url, target_url = _make_databases()
+
+    def crash(table_name, rows_copied):
+        if table_name == 'transactions' and rows_copied >= 150:
+            raise RuntimeError('queda simulada')
+
+    with pytest.raises(RuntimeError):
+        migration.migrate(source_url, target_url, chunk_size=50, workers=2, on_chunk=crash)
+
+    target = create_engine(target_url)
+    with target.connect() as conn:
+        assert conn.exec_driver_sql('SELECT COUNT(*) FROM transactions').scalar() == 150
+        state = conn.exec_driver_sql(
+            "SELECT last_key, done FROM migration_checkpoints WHERE table_name = 'transactions'").first()
+        assert tuple(state) == ('[150]', 0)
+
+    copied = migration.migrate(source_url, target_url, chunk_size=50, workers=2)
+    assert copied['transactions'] == 280  # só o que faltava
+    assert copied['users'] == 0           # já estava concluída
+
+    results = migration.verify_migration(source_url, target_url, chunk_size=64)
+    assert results and all(r['ok'] for r in results)
+    by_table = {r['table']: r for r in results}
+    assert by_table['transactions']['target_rows'] == 430
+
+
+def test_verify_detects_divergence(app_ctx):
+    source_url, target_url = _make_databases(n_transactions=40)
+    assert migration.main(['--sqlite', source_url, '--postgres', target_url, '--chunk-size', '16']) == 0
+
+    with create_engine(target_url).begin() as conn:
+        conn.exec_driver_sql('UPDATE transactions SET amount_cents = amount_cents + 1 WHERE id = 5')
+    results = {r['table']: r for r in migration.verify_migration(source_url, target_url)}
+    assert not results['transactions']['ok']
+    assert results['transactions']['source_rows'] == results['transactions']['target_rows']
+
+
+def test_composite_primary_keys_copy_every_row(app_ctx):
+    from app import AiIntentCounter
+    source_url, target_url = _make_databases(n_transactions=10)
+    with create_engine(source_url).begin() as conn:
+        conn.execute(AiIntentCounter.__table__.insert(), [
+            {'user_id': user_id, 'intent': intent, 'count': n}
+            for n, (user_id, intent) in enumerate(((u, i) for u in range(1, 4)
+                                                   for i in ('poupança', 'dívida', 'renda', 'gasto', 'ajuda')), 1)])
+    assert migration._single_pk(AiIntentCounter.__table__) is None
+
+    copied = migration.migrate(source_url, target_url, chunk_size=3, workers=1)
+    assert copied['ai_intent_counters'] == 15
+    results = {r['table']: r for r in migration.verify_migration(source_url, target_url, chunk_size=3)}
+    assert results['ai_intent_counters']['ok'] and results['ai_intent_counters']['target_rows'] == 15
+
+    # A conferência lê a tabela inteira: uma linha faltando no meio aparece
+    with create_engine(target_url).begin() as conn:
+        conn.exec_driver_sql("DELETE FROM ai_intent_counters WHERE user_id = 2 AND intent = 'renda'")
+    results = {r['table']: r for r in migration.verify_migration(source_url, target_url, chunk_size=3)}
+    assert not results['ai_intent_counters']['ok']
+
+
+def test_string_and_composite_keys_resume_after_crash(app_ctx):
+    from app import AiIntentCounter, AiResponseBlob
+    source_url, target_url = _make_databases(n_transactions=10)
+    with create_engine(source_url).begin() as conn:
+        conn.execute(AiResponseBlob.__table__.insert(), [
+            {'hash': f'{i:064x}', 'codec': 'zlib', 'data': bytes([i]), 'size': 1, 'stored_size': 1,
+             'created_at': datetime(2024, 1, 1)} for i in range(1, 12)])
+        conn.execute(AiIntentCounter.__table__.insert(), [
+            {'user_id': u, 'intent': intent, 'count': u} for u in range(1, 4) for intent in ('poupança', 'renda')])
+
+    crashed = []
+
+    def crash(table_name, rows_copied):
+        if table_name in ('ai_response_blobs', 'ai_intent_counters') and table_name not in crashed:
+            crashed.append(table_name)
+            raise RuntimeError('queda simulada')
+
+    expected = {'ai_response_blobs': f'["{4:064x}"]', 'ai_intent_counters': '[2, "renda"]'}
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            migration.migrate(source_url, target_url, chunk_size=4, workers=1, on_chunk=crash)
+        with create_engine(target_url).connect() as conn:
+            last_key = conn.exec_driver_sql('SELECT last_key FROM migration_checkpoints WHERE table_name = ?',
+                                            (crashed[-1],)).scalar()
+        assert last_key == expected[crashed[-1]]
+
+    copied = migration.migrate(source_url, target_url, chunk_size=4, workers=1)
+    assert copied['ai_response_blobs'] == 0 and copied['ai_intent_counters'] == 2  # só o que faltava
+    results = {r['table']: r for r in migration.verify_migration(source_url, target_url, chunk_size=4)}
+    assert results['ai_response_blobs']['ok'] and results['ai_response_blobs']['target_rows'] == 11
+    assert results['ai_intent_counters']['ok'] and results['ai_intent_counters']['target_rows'] == 6
+
+
+def test_copy_value_escaping():
+    assert migration._copy_value(None) == '\\N'
+    assert migration._copy_value(True) == 't'
+    assert migration._copy_value('a\tb\nc\\') == 'a\\tb\\nc\\\\'
+    assert migration._copy_value(date(2024, 1, 2)) == '2024-01-02'
+    assert migration.normalize_database_url('postgres://u:p@h/db') == 'postgresql+pg8000://u:p@h/db'
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🧪 TESTE DE VALORES EM CENTAVOS - FINANCE APP
+Conversão na borda, somas exatas e migração da coluna Float antiga
+"""
+
+from datetime import date
+
+import pytest
+from sqlalchemy import text
+
+from money import from_cents, sum_cents, to_cents
+
+
+def test_conversions_at_the_edge():
+    assert to_cents('120.50') == 12050
+    assert to_cents(0.29) == 29  # 0.29 * 100 = 28.999999999999996 em float
+    assert to_cents(1.005) == 101  # meio para cima
+    assert to_cents(-50) == -5000
+    assert to_cents('') is None and to_cents(None) is None
+    with pytest.raises(ValueError):
+        to_cents('abc')
+    assert from_cents(12050) == 120.5 and from_cents(None) is None
+    assert sum_cents([10, None, 20] * 1000) == 30000
+
+
+def test_sums_do_not_drift(client, user):
+    from app import get_balance, get_period_totals
+    for _ in range(10):
+        for amount in ('0.10', '0.20'):
+            client.post('/add_transaction', data={'type': 'income', 'category': 'Troco', 'amount': amount,
+                                                  'description': '', 'date': date.today().isoformat()})
+    assert get_balance(user.id) == 3.0
+    totals = get_period_totals(user.id, date(date.today().year, 1, 1), date(date.today().year + 1, 1, 1))
+    assert totals['income'] == 3.0 and totals['income_by_category'] == {'Troco': 3.0}
+
+
+def test_upgrade_converts_legacy_float_amounts(app_ctx, user):
+    from app import db, Transaction, TransactionRollup, get_balance, pending_schema_upgrades, upgrade_schema
+    Transaction.__table__.drop(db.engine)
+    TransactionRollup.__table__.drop(db.engine)
+    with db.engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE transactions (id INTEGER PRIMARY KEY, user_id INTEGER, type VARCHAR(10), "
+            "category VARCHAR(50), amount FLOAT, description VARCHAR(200), date DATE, due_date DATE, "
+            "image_path VARCHAR(200))"))
+        conn.execute(text(
+            "CREATE TABLE transaction_rollups (id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL, "
+            "granularity VARCHAR(10) NOT NULL, period_start DATE NOT NULL, type VARCHAR(10) NOT NULL, "
+            "category VARCHAR(50) NOT NULL, total FLOAT NOT NULL, count INTEGER NOT NULL)"))
+        conn.execute(text(
+            "INSERT INTO transactions (user_id, type, category, amount, date) VALUES "
+            "(:u, 'income', 'Salário', 0.29, '2024-01-05'), (:u, 'expense', 'Mercado', 19.99, '2024-01-06')"),
+            {'u': user.id})
+
+    pending = pending_schema_upgrades()
+    assert 'transactions.amount_cents' in pending and 'transaction_rollups.total_cents' in pending
+    upgrade_schema()
+    upgrade_schema()  # idempotente
+    assert pending_schema_upgrades() == []
+    assert [t.amount_cents for t in Transaction.query.order_by(Transaction.id)] == [29, 1999]
+    assert 'total_cents' in {row[1] for row in db.session.execute(text("PRAGMA table_info(transaction_rollups)"))}
+    assert get_balance(user.id) == -19.7
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🧪 TESTE DO PRÉ-PROCESSAMENTO DE PERGUNTAS - FINANCE APP
+Acentos por tabela, números pt-BR, entidades e cache por pergunta
+"""
+
+import unicodedata
+
+from nlp import TermIndex, normalize_text, parse_number_ptbr, preprocess_question, strip_accents
+
+
+def _nfd_strip(text):
+    return ''.join(c for c in unicodedata.normalize('NFD', text) if unicodedata.category(c) != 'Mn')
+
+
+def test_translate_table_matches_unicode_decomposition():
+    for text in ('Ação', 'você já poupou', 'ÁÉÍÓÚ çñ ÂÊÔ ãõ ü', 'Crème brûlée', 'Łódź', 'plain ascii'):
+        assert strip_accents(text) == _nfd_strip(text)
+    assert normalize_text('  Quanto   INVESTIR\tna Poupança? ') == 'quanto investir na poupanca?'
+
+
+def test_parse_number_ptbr():
+    assert parse_number_ptbr('1.234,56') == 1234.56
+    assert parse_number_ptbr('3,5k') == 3500.0
+    assert parse_number_ptbr('2 mil') == 2000.0
+    assert parse_number_ptbr('R$ 1m') == 1_000_000.0
+    assert parse_number_ptbr('2bi') == 2_000_000_000.0
+    assert parse_number_ptbr('abc') is None
+
+
+def test_entities_from_question():
+    prepared = preprocess_question('Quero investir R$ 2 mil por 2 anos rendendo 10,5% e mais 1.500 em 6 meses')
+    assert prepared.normalized.startswith('quero investir r$ 2 mil')
+    assert prepared.amounts[:2] == (2000.0, 2.0)
+    assert 1500.0 in prepared.amounts and 6_000_000.0 not in prepared.amounts
+    assert prepared.percents == (10.5,)
+    assert prepared.months == (24, 6)
+
+
+def test_question_is_processed_once():
+    preprocess_question.cache_clear()
+    first = preprocess_question('Como montar minha reserva de emergência?')
+    entities = first.entities()
+    entities['amounts'].append(99)  # cópia: não altera o que está no cache
+    again = preprocess_question('Como montar minha reserva de emergência?')
+    assert again is first and again.amounts == ()
+    assert preprocess_question.cache_info().hits == 1
+
+
+def test_term_index_longest_match_first():
+    index = TermIndex(['ipca', 'Tesouro IPCA+', 'tesouro selic', 'selic', 'lca', 'Debêntures incentivadas'])
+    assert len(index) == 6
+    hits = index.find('Tesouro IPCA+ ou debentures incentivadas? O alcance da LCA e do Tesouro Selic')
+    assert hits == ['Tesouro IPCA+', 'Debêntures incentivadas', 'tesouro selic', 'ipca', 'lca', 'selic']
+    assert index.find('tesouro ipca + tesouro ipca+') == ['Tesouro IPCA+', 'ipca']
+    assert index.find('nada a ver') == [] and TermIndex().find('cdi') == []
+
+
+def test_advisor_uses_prepared_question(client):
+    preprocess_question.cache_clear()
+    response = client.get('/financial_advisor', query_string={'question': 'O que é CDI?', 'mode': 'direto'})
+    assert response.status_code == 200
+    assert preprocess_question.cache_info().misses == 1
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🧪 TESTE DO PARTICIONAMENTO MENSAL - FINANCE APP
+Nomes e faixas das partições, leitura do EXPLAIN e a migração ciente de
+partições (as instruções só rodam de fato em PostgreSQL)
+"""
+
+import json
+from datetime import date
+
+from sqlalchemy import Column, Date, Integer, MetaData, Table, create_engine
+
+import partitioning
+from migrate_sqlite_to_postgres import _single_pk, prepare_partitions
+
+
+def test_enabled_only_for_postgres_with_flag():
+    assert partitioning.partitioning_enabled('postgresql+pg8000://x/db', {'TRANSACTIONS_PARTITIONING': 'monthly'})
+    assert not partitioning.partitioning_enabled('postgresql+pg8000://x/db', {})
+    assert not partitioning.partitioning_enabled('sqlite:///finance.db', {'TRANSACTIONS_PARTITIONING': 'monthly'})
+
+
+def test_partition_names_and_ranges():
+    assert partitioning.partition_name(date(2024, 3, 17)) == 'transactions_y2024m03'
+    assert partitioning.month_of_partition('transactions_y2024m03') == date(2024, 3, 1)
+    assert partitioning.month_of_partition('transactions_default') is None
+    assert partitioning.months_between(date(2023, 11, 20), date(2024, 2, 1)) == [
+        date(2023, 11, 1), date(2023, 12, 1), date(2024, 1, 1), date(2024, 2, 1)]
+    assert partitioning.create_partition_sql(date(2023, 12, 1)) == (
+        "CREATE TABLE IF NOT EXISTS transactions_y2023m12 PARTITION OF transactions "
+        "FOR VALUES FROM ('2023-12-01') TO ('2024-01-01')")
+    assert partitioning.create_default_partition_sql().endswith('PARTITION OF transactions DEFAULT')
+
+
+def test_scanned_partitions_from_explain_json():
+    plan = [{'Plan': {'Node Type': 'Append', 'Plans': [
+        {'Node Type': 'Index Scan', 'Relation Name': 'transactions_y2024m05'},
+        {'Node Type': 'Seq Scan', 'Relation Name': 'transactions_y2024m06'},
+        {'Node Type': 'Seq Scan', 'Relation Name': 'users'},
+    ]}}]
+    assert partitioning.scanned_partitions(plan) == ['transactions_y2024m05', 'transactions_y2024m06']
+    assert partitioning.scanned_partitions(json.dumps(plan)) == ['transactions_y2024m05', 'transactions_y2024m06']
+
+
+def test_row_key_of_partitioned_table():
+    table = Table('transactions', MetaData(), Column('id', Integer, primary_key=True),
+                  Column('date', Date, primary_key=True))
+    assert _single_pk(table).name == 'id'
+
+
+def test_prepare_partitions_is_noop_outside_postgres():
+    engine = create_engine('sqlite://')
+    assert prepare_partitions(engine, engine, []) == []
+
+
+def test_dedup_key_without_partitioning(app_ctx):
+    from app import CONTENT_HASH_KEY, TRANSACTIONS_PARTITIONED, Transaction
+    assert not TRANSACTIONS_PARTITIONED
+    assert CONTENT_HASH_KEY == ['user_id', 'content_hash']
+    assert [c.name for c in Transaction.__table__.primary_key.columns] == ['id']
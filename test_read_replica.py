@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🧪 TESTE DA RÉPLICA DE LEITURA - FINANCE APP
+Dois arquivos SQLite (primário e "réplica" com dados diferentes) mostram para
+onde cada consulta foi roteada
+"""
+
+import os
+import tempfile
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine
+
+from periods import GRANULARITIES, bucket_start
+
+
+@pytest.fixture
+def replica(app_ctx, user):
+    """Réplica com o mesmo schema e um dado que o primário não tem."""
+    from app import db, Category, Transaction, TransactionRollup, _user_wrote_recently
+    from read_replica import ROUTER
+
+    path = os.path.join(tempfile.mkdtemp(prefix='finance_replica_'), 'replica.db')
+    engine = create_engine(f'sqlite:///{path}')
+    db.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(db.metadata.tables['users'].insert().values(id=user.id, username='teste', password_hash='x'))
+        category_id = conn.execute(Category.__table__.insert().values(
+            user_id=user.id, name='SóNaRéplica', normalized_name='sonareplica')).inserted_primary_key[0]
+        conn.execute(Transaction.__table__.insert().values(
+            user_id=user.id, type='expense', category='SóNaRéplica', category_id=category_id, amount_cents=7700,
+            date=date.today()))
+        conn.execute(TransactionRollup.__table__.insert(), [
+            {'user_id': user.id, 'granularity': granularity, 'period_start': bucket_start(granularity, date.today()),
+             'type': 'expense', 'category_id': category_id, 'total_cents': 7700, 'count': 1}
+            for granularity in GRANULARITIES])
+    ROUTER.configure(engine, 5.0, _user_wrote_recently)
+    ROUTER.stats = {'replica': 0, 'primary_after_write': 0}
+    yield engine
+    ROUTER.configure(None)
+    engine.dispose()
+
+
+def test_reads_route_only_inside_analytics_block(replica, user):
+    from app import Transaction
+    from read_replica import replica_reads
+    assert Transaction.query.filter_by(category='SóNaRéplica').count() == 0
+    with replica_reads():
+        assert Transaction.query.filter_by(category='SóNaRéplica').count() == 1
+
+
+def test_writes_inside_analytics_block_go_to_primary(replica, user):
+    from app import db, Transaction
+    from read_replica import replica_reads
+    with replica_reads():
+        db.session.add(Transaction(user_id=user.id, type='income', category='Primário', amount=1.0,
+                                   date=date.today()))
+        db.session.commit()
+    assert Transaction.query.filter_by(category='Primário').count() == 1
+    with replica.connect() as conn:
+        assert conn.exec_driver_sql(
+            "SELECT COUNT(*) FROM transactions WHERE category = 'Primário'").scalar() == 0
+
+
+def test_analysis_reads_replica_until_user_writes(replica, client):
+    from read_replica import ROUTER
+    report = client.get('/ai_analysis?type=basic').get_data(as_text=True)
+    assert ROUTER.stats['replica'] > 0
+    assert 'SóNaRéplica' in report
+
+    # Escrita do próprio usuário: as análises seguintes leem do primário
+    client.post('/add_transaction', data={'type': 'expense', 'category': 'Mercado', 'amount': '10',
+                                          'description': '', 'date': date.today().isoformat()})
+    replica_hits = ROUTER.stats['replica']
+    report = client.get('/ai_analysis?type=basic').get_data(as_text=True)
+    assert ROUTER.stats['primary_after_write'] > 0
+    assert ROUTER.stats['replica'] == replica_hits
+    assert 'Mercado' in report
+
+    # Passada a janela, volta para a réplica
+    with client.session_transaction() as flask_session:
+        flask_session['_last_write_at'] -= 60
+    client.get('/ai_analysis?type=basic')
+    assert ROUTER.stats['replica'] > replica_hits
+
+
+def test_without_replica_everything_uses_primary(app_ctx, user):
+    from app import Transaction
+    from read_replica import ROUTER, replica_reads
+    assert ROUTER.replica_engine is None
+    with replica_reads():
+        assert Transaction.query.count() == 0
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🧪 TESTE DE RELATÓRIOS POR PERÍODO - FINANCE APP
+Verifica períodos (semanal, trimestral, anual, personalizado) e os rollups
+"""
+
+import random
+from datetime import date, timedelta
+
+from periods import resolve_period, cover_range, bucket_start, bucket_end
+
+
+def test_resolve_period_boundaries():
+    """Cada timeframe resolve para o bucket certo e para o período anterior"""
+    today = date(2026, 10, 19)  # segunda-feira
+
+    weekly = resolve_period('weekly', today=today)
+    assert (weekly['start'], weekly['end']) == (date(2026, 10, 19), date(2026, 10, 26))
+    assert weekly['prev_start'] == date(2026, 10, 12)
+
+    quarterly = resolve_period('quarterly', today=today)
+    assert (quarterly['start'], quarterly['end']) == (date(2026, 10, 1), date(2027, 1, 1))
+    assert quarterly['prev_start'] == date(2026, 7, 1)
+
+    yearly = resolve_period('yearly', today=today)
+    assert (yearly['start'], yearly['end']) == (date(2026, 1, 1), date(2027, 1, 1))
+
+    custom = resolve_period('custom', '2026-01-15', '2026-02-14', today=today)
+    assert (custom['start'], custom['end']) == (date(2026, 1, 15), date(2026, 2, 15))
+    assert custom['prev_end'] == date(2026, 1, 15) and custom['days'] == 31
+
+    # Intervalo inválido cai para mensal
+    assert resolve_period('custom', '2026-02-01', '2026-01-01', today=today)['timeframe'] == 'monthly'
+
+
+def test_cover_range_is_exact_partition():
+    """Buckets + sobras cobrem cada dia do intervalo exatamente uma vez"""
+    rng = random.Random(42)
+    for _ in range(50):
+        start = date(2020, 1, 1) + timedelta(days=rng.randint(0, 1500))
+        end = start + timedelta(days=rng.randint(1, 900))
+        buckets, raw_ranges = cover_range(start, end)
+        covered = []
+        for granularity, period_start in buckets:
+            assert bucket_start(granularity, period_start) == period_start
+            day = period_start
+            while day < bucket_end(granularity, period_start):
+                covered.append(day)
+                day += timedelta(days=1)
+        # Sobras: no máximo duas semanas parciais em cada ponta
+        assert sum((b - a).days for a, b in raw_ranges) <= 24
+        for a, b in raw_ranges:
+            day = a
+            while day < b:
+                covered.append(day)
+                day += timedelta(days=1)
+        expected = [start + timedelta(days=i) for i in range((end - start).days)]
+        assert sorted(covered) == expected
+
+    # Cinco anos alinhados viram cinco buckets anuais
+    buckets, raw_ranges = cover_range(date(2020, 1, 1), date(2025, 1, 1))
+    assert buckets == [('year', date(y, 1, 1)) for y in range(2020, 2025)] and not raw_ranges
+
+
+def test_period_totals_match_raw_sums(app_ctx, user):
+    """Totais lidos dos rollups batem com a soma direta das transações"""
+    from app import db, Transaction, record_transaction_rollup, get_period_totals
+
+    rng = random.Random(7)
+    categories = ['Alimentação', 'Transporte', 'Salário', 'Lazer']
+    for _ in range(300):
+        tx_type = rng.choice(['income', 'expense'])
+        trans = Transaction(user_id=user.id, type=tx_type, category=rng.choice(categories),
+                            amount=rng.randint(1, 50000) / 100, description='x',
+                            date=date(2023, 1, 1) + timedelta(days=rng.randint(0, 1000)))
+        db.session.add(trans)
+        record_transaction_rollup(trans)
+    db.session.commit()
+
+    for start, end in [(date(2023, 1, 1), date(2026, 1, 1)), (date(2023, 3, 15), date(2024, 8, 9)),
+                       (date(2024, 2, 5), date(2024, 2, 12)), (date(2025, 4, 1), date(2025, 7, 1))]:
+        totals = get_period_totals(user.id, start, end)
+        rows = Transaction.query.filter(Transaction.user_id == user.id,
+                                        Transaction.date >= start, Transaction.date < end).all()
+        assert abs(totals['income'] - sum(t.amount for t in rows if t.type == 'income')) < 1e-6
+        assert abs(totals['expense'] - sum(t.amount for t in rows if t.type == 'expense')) < 1e-6
+        assert totals['count'] == len(rows)
+        for category in categories:
+            expected = sum(t.amount for t in rows if t.type == 'expense' and t.category == category)
+            assert abs(totals['expense_by_category'].get(category, 0) - expected) < 1e-6
+
+
+def test_legacy_transactions_are_backfilled(app_ctx, user):
+    """Usuários com transações sem rollups recebem backfill na primeira leitura"""
+    from app import db, Transaction, TransactionRollup, get_period_totals
+
+    db.session.add(Transaction(user_id=user.id, type='expense', category='Lazer', amount=10.0,
+                               description='antiga', date=date(2024, 5, 10)))
+    db.session.commit()
+    assert TransactionRollup.query.count() == 0
+
+    totals = get_period_totals(user.id, date(2024, 1, 1), date(2025, 1, 1))
+    assert totals['expense'] == 10.0
+    assert TransactionRollup.query.filter_by(user_id=user.id, granularity='year').count() == 1
+
+
+def test_report_routes_accept_timeframes(client):
+    """/reports, /ai_analysis e /export_analysis aceitam todos os períodos"""
+    client.post('/add_transaction', data={'type': 'expense', 'category': 'Alimentação', 'amount': '120.50',
+                                          'description': 'mercado', 'date': date.today().isoformat()})
+    for timeframe in ['weekly', 'monthly', 'quarterly', 'yearly']:
+        assert client.get(f'/reports?timeframe={timeframe}').status_code == 200
+        assert client.get(f'/ai_analysis?timeframe={timeframe}&type=basic').status_code == 200
+        assert client.get(f'/ai_analysis?timeframe={timeframe}').status_code == 200
+    response = client.get('/export_analysis?timeframe=custom&start=2020-01-01&end=2030-12-31')
+    assert response.status_code == 200
+    assert 'Personalizado' in response.get_data(as_text=True)
+    assert 'R$ 120.50' in response.get_data(as_text=True)
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🧪 TESTE DO PERFIL SQLITE DE PRODUÇÃO - FINANCE APP
+Pragmas por conexão (WAL etc.) e fila de escritor único com commit em lote
+"""
+
+import threading
+from datetime import date
+
+import pytest
+from sqlalchemy import text
+
+from sqlite_tuning import SerializedWriter, sqlite_pragmas_from_env
+
+
+def test_app_connections_use_production_pragmas(app_ctx):
+    from app import db
+    assert db.session.execute(text('PRAGMA journal_mode')).scalar().lower() == 'wal'
+    assert db.session.execute(text('PRAGMA synchronous')).scalar() == 1  # NORMAL
+    assert db.session.execute(text('PRAGMA busy_timeout')).scalar() == 5000
+    assert db.session.execute(text('PRAGMA cache_size')).scalar() == -20000
+
+
+def test_pragmas_from_env():
+    pragmas = sqlite_pragmas_from_env({'SQLITE_BUSY_TIMEOUT_MS': '15000', 'SQLITE_CACHE_SIZE_KB': '4096',
+                                       'SQLITE_MMAP_SIZE_MB': '64', 'SQLITE_SYNCHRONOUS': 'full'})
+    assert pragmas['busy_timeout'] == 15000
+    assert pragmas['cache_size'] == -4096
+    assert pragmas['mmap_size'] == 64 * 1024 * 1024
+    assert pragmas['synchronous'] == 'FULL'
+    assert pragmas['journal_mode'] == 'WAL'
+
+
+def test_writer_batches_commits_from_many_threads(app_ctx, user):
+    from app import app, db, Transaction
+    writer = SerializedWriter(lambda: db.session, app.app_context, max_wait=0.01)
+    user_id = user.id
+
+    def worker():
+        for i in range(25):
+            writer.run(lambda session, i=i: session.add(Transaction(
+                user_id=user_id, type='expense', category='Lazer', amount=float(i), date=date(2024, 1, 1))))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    writer.stop()
+
+    assert Transaction.query.count() == 200
+    assert writer.stats['writes'] == 200
+    assert writer.stats['batches'] < 200
+
+
+def test_failed_write_does_not_sink_its_batch(app_ctx, user):
+    from app import app, db, User
+    writer = SerializedWriter(lambda: db.session, app.app_context, max_wait=0.05)
+    futures = [writer.submit(lambda s, n=n: s.add(User(username=f'novo{n}', password_hash='x')))
+               for n in range(3)]
+    futures.append(writer.submit(lambda s: s.add(User(username='teste', password_hash='x'))))  # duplicado
+    futures.append(writer.submit(lambda s: s.add(User(username='novo9', password_hash='x'))))
+
+    with pytest.raises(Exception):
+        futures[3].result(5)
+    for i in (0, 1, 2, 4):
+        futures[i].result(5)
+    writer.stop()
+    assert User.query.count() == 5
+    assert writer.stats['failed'] == 1
+
+
+def test_add_transaction_through_write_queue(client, user, monkeypatch):
+    import app as app_module
+    from app import app, db, Transaction, get_balance
+    writer = SerializedWriter(lambda: db.session, app.app_context)
+    monkeypatch.setattr(app_module, 'write_queue', writer)
+
+    response = client.post('/add_transaction', data={'type': 'income', 'category': 'Salário', 'amount': '900',
+                                                      'description': '', 'date': date.today().isoformat()})
+    writer.stop()
+    assert response.status_code == 302
+    db.session.expire_all()
+    assert Transaction.query.filter_by(user_id=user.id).count() == 1
+    assert get_balance(user.id) == 900
+
+
+def test_corrections_and_import_through_write_queue(client, user, monkeypatch):
+    """Edição, lixeira, restauração e importação também passam pelo escritor único"""
+    import io
+    import app as app_module
+    from app import app, db, Transaction, TransactionRollup, get_balance, rebuild_rollups
+    writer = SerializedWriter(lambda: db.session, app.app_context)
+    monkeypatch.setattr(app_module, 'write_queue', writer)
+
+    content = 'data,descricao,valor,categoria\n2024-04-01,Aluguel,-1500.00,Moradia\n2024-04-05,Salário,4000.00,Salário\n'
+    upload = {'statement': (io.BytesIO(content.encode('utf-8')), 'extrato.csv')}
+    assert client.post('/import', data=upload, content_type='multipart/form-data').status_code == 302
+    rent = Transaction.query.filter_by(user_id=user.id, category='Moradia').one()
+    client.post(f'/transaction/{rent.id}/edit', data={'type': 'expense', 'category': 'Moradia', 'amount': '1600',
+                                                      'description': 'Aluguel', 'date': '2024-04-01'})
+    client.post(f'/transaction/{rent.id}/delete')
+    client.post(f'/transaction/{rent.id}/restore')
+    writes = writer.stats['writes']
+    writer.stop()
+    assert writes == 4
+
+    db.session.expire_all()
+    assert Transaction.query.filter_by(id=rent.id).one().amount_cents == 160000
+    assert get_balance(user.id) == 2400
+    incremental = sorted((r.granularity, r.period_start, r.type, r.category_id, r.total_cents, r.count)
+                         for r in TransactionRollup.query.filter_by(user_id=user.id))
+    rebuild_rollups(user.id)
+    assert incremental == sorted((r.granularity, r.period_start, r.type, r.category_id, r.total_cents, r.count)
+                                 for r in TransactionRollup.query.filter_by(user_id=user.id))
+
+def test_benchmark_runs():
+    from benchmark_sqlite_writes import run
+    for mode in ('wal', 'wal+fila'):
+        result = run(mode, threads=2, writes=5)
+        assert result['stored'] == 10 and result['errors'] == 0
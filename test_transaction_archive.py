@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🧪 TESTE DO ARQUIVAMENTO DE TRANSAÇÕES - FINANCE APP
+Depois de arquivar, a tabela quente encolhe e saldo/relatórios não mudam
+"""
+
+import gzip
+import json
+import os
+import tempfile
+from datetime import date, datetime
+
+import pytest
+
+
+@pytest.fixture
+def history(app_ctx, user):
+    """Três anos de transações (uma na lixeira) com rollups em dia."""
+    from app import db, Transaction, record_transaction_rollup
+    day = date(2023, 1, 3)
+    while day < date(2026, 1, 1):
+        for tx_type, category, amount in (('income', 'Salário', 3000.0), ('expense', 'Mercado', 812.5)):
+            trans = Transaction(user_id=user.id, type=tx_type, category=category, amount=amount, date=day)
+            db.session.add(trans)
+            record_transaction_rollup(trans)
+        day = date(day.year + (day.month == 12), day.month % 12 + 1, min(day.day + 5, 28))
+    db.session.add(Transaction(user_id=user.id, type='expense', category='Lixo', amount=99.0,
+                               date=date(2023, 5, 5), deleted_at=datetime.utcnow()))
+    db.session.commit()
+    return user
+
+
+def _snapshot(user_id):
+    from app import get_balance, get_period_totals, get_monthly_series
+    totals = get_period_totals(user_id, date(2023, 2, 17), date(2025, 9, 9))
+    return (round(get_balance(user_id), 2), round(totals['income'], 2), round(totals['expense'], 2),
+            totals['count'], get_monthly_series(user_id, date(2023, 1, 1), date(2026, 1, 1)))
+
+
+def test_archive_keeps_balance_and_reports(history):
+    from app import ArchivedMonthSummary, ArchivedTransaction, Transaction, archive_user_transactions, rebuild_rollups
+    before = _snapshot(history.id)
+    hot_before = Transaction.query.count()
+
+    result = archive_user_transactions(history.id, date(2025, 1, 20))
+    assert result['archived'] == 48 and result['months'] == 24
+    assert Transaction.query.count() == hot_before - 48
+    # Só a transação da lixeira fica para trás
+    assert [t.category for t in Transaction.query.filter(Transaction.date < date(2025, 1, 1))] == ['Lixo']
+    assert ArchivedTransaction.query.count() == 48
+    assert ArchivedTransaction.query.filter(ArchivedTransaction.deleted_at.isnot(None)).count() == 0
+    # Resumo por category_id: só Mercado, nada da lixeira
+    mercado_id = Transaction.query.filter_by(category='Mercado').first().category_id
+    assert {s.category_id for s in ArchivedMonthSummary.query.filter_by(type='expense')} == {mercado_id}
+
+    assert _snapshot(history.id) == before
+    # Recalcular os rollups do zero também enxerga o arquivo
+    rebuild_rollups(history.id)
+    assert _snapshot(history.id) == before
+
+
+def test_archive_again_adds_to_existing_month(history):
+    from app import db, ArchivedMonthSummary, Transaction, archive_user_transactions
+    archive_user_transactions(history.id, date(2024, 1, 1))
+    before = _snapshot(history.id)
+    # Lançamento retroativo num mês já arquivado
+    db.session.add(Transaction(user_id=history.id, type='expense', category='Mercado', amount=10.0,
+                               date=date(2023, 6, 30)))
+    db.session.commit()
+    archive_user_transactions(history.id, date(2024, 1, 1))
+    summary = ArchivedMonthSummary.query.filter_by(month=date(2023, 6, 1), type='expense').one()
+    assert summary.count == 2 and summary.total_cents == 82250
+    assert _snapshot(history.id)[0] == before[0] - 10.0
+
+
+def test_reimporting_archived_statement_does_not_duplicate(history):
+    """Extrato de um mês já arquivado: os lançamentos estão no arquivo, não na tabela quente"""
+    import io
+    from app import ArchivedTransaction, Transaction, archive_user_transactions, import_statement
+    content = 'data,descricao,valor,categoria\n2023-03-10,Farmácia,-40.00,Saúde\n2023-03-11,Freela,700.00,Extra\n'
+    assert import_statement(history.id, io.BytesIO(content.encode('utf-8')), 'csv')['inserted'] == 2
+    archive_user_transactions(history.id, date(2024, 1, 1))
+    assert ArchivedTransaction.query.filter(ArchivedTransaction.content_hash.isnot(None)).count() == 2
+    before = _snapshot(history.id)
+
+    result = import_statement(history.id, io.BytesIO(content.encode('utf-8')), 'csv')
+    assert result['inserted'] == 0 and result['duplicates'] == 2
+    assert Transaction.query.filter(Transaction.content_hash.isnot(None)).count() == 0
+    assert _snapshot(history.id) == before
+
+def test_archive_exports_compressed_jsonl(history):
+    from app import archive_user_transactions
+    export_dir = tempfile.mkdtemp(prefix='finance_archive_')
+    result = archive_user_transactions(history.id, date(2024, 3, 1), export_dir)
+    assert result['exported'] == result['archived'] == 28
+    with gzip.open(os.path.join(export_dir, str(history.id), '2023.jsonl.gz'), 'rt', encoding='utf-8') as handle:
+        records = [json.loads(line) for line in handle]
+    assert len(records) == 24
+    assert records[0]['date'] == '2023-01-03'
+    assert sorted(os.listdir(os.path.join(export_dir, str(history.id)))) == ['2023.jsonl.gz', '2024.jsonl.gz']
+
+
+def test_export_includes_archived_transactions(history, client):
+    from app import archive_user_transactions
+    before = client.get('/export/transactions.jsonl').get_data(as_text=True).splitlines()
+    archive_user_transactions(history.id, date(2025, 1, 1))
+    after = client.get('/export/transactions.jsonl').get_data(as_text=True).splitlines()
+    assert after == before
+    filtered = client.get('/export/transactions.jsonl?start=2023-01-01&end=2023-12-31&type=expense')
+    records = [json.loads(line) for line in filtered.get_data(as_text=True).splitlines()]
+    assert len(records) == 12 and {r['category'] for r in records} == {'Mercado'}
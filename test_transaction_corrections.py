@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🧪 TESTE DE EDIÇÃO/EXCLUSÃO DE TRANSAÇÕES - FINANCE APP
+Correções incrementais nos rollups devem bater com um recálculo completo
+"""
+
+import random
+from datetime import date, timedelta
+
+
+def _rollup_state(user_id):
+    """Estado atual dos rollups, ignorando buckets zerados."""
+    from app import TransactionRollup
+    state = {}
+    for r in TransactionRollup.query.filter_by(user_id=user_id).all():
+        if r.count or r.total_cents:
+            state[(r.granularity, r.period_start, r.type, r.category_id)] = (r.total_cents, r.count)
+    return state
+
+
+def test_incremental_corrections_match_full_rebuild(client, user):
+    """Sequência aleatória de inserções, edições, exclusões e restaurações"""
+    from app import db, Transaction, rebuild_rollups
+
+    rng = random.Random(2026)
+    categories = ['Alimentação', 'Transporte', 'Salário', 'Lazer', 'Moradia']
+
+    def random_form():
+        return {
+            'type': rng.choice(['income', 'expense']),
+            'category': rng.choice(categories),
+            'amount': f"{rng.randint(1, 200000) / 100:.2f}",
+            'description': 'teste',
+            'date': (date(2024, 1, 1) + timedelta(days=rng.randint(0, 700))).isoformat(),
+        }
+
+    for _ in range(60):
+        assert client.post('/add_transaction', data=random_form()).status_code == 302
+
+    for _ in range(150):
+        ids = [t.id for t in Transaction.query.filter_by(user_id=user.id).all()]
+        transaction_id = rng.choice(ids)
+        action = rng.choice(['edit', 'edit', 'delete', 'restore', 'purge', 'add'])
+        if action == 'edit':
+            client.post(f'/transaction/{transaction_id}/edit', data=random_form())
+        elif action == 'delete':
+            client.post(f'/transaction/{transaction_id}/delete')
+        elif action == 'restore':
+            client.post(f'/transaction/{transaction_id}/restore')
+        elif action == 'purge':
+            client.post(f'/transaction/{transaction_id}/delete', data={'permanent': '1'})
+        else:
+            client.post('/add_transaction', data=random_form())
+        db.session.expire_all()
+
+    incremental = _rollup_state(user.id)
+    rebuild_rollups(user.id)
+    assert incremental == _rollup_state(user.id)
+
+
+def test_soft_deleted_transactions_leave_reports(client, user):
+    """Transação na lixeira some do saldo e dos relatórios, e volta ao restaurar"""
+    from app import db, Transaction, get_balance, get_transactions_summary
+
+    today = date.today().isoformat()
+    client.post('/add_transaction', data={'type': 'income', 'category': 'Salário', 'amount': '1000',
+                                          'description': '', 'date': today})
+    client.post('/add_transaction', data={'type': 'expense', 'category': 'Lazer', 'amount': '250',
+                                          'description': '', 'date': today})
+    expense = Transaction.query.filter_by(user_id=user.id, type='expense').one()
+    assert get_balance(user.id) == 750
+
+    client.post(f'/transaction/{expense.id}/delete')
+    db.session.expire_all()
+    assert get_balance(user.id) == 1000
+    assert get_transactions_summary(user.id)['total_expense'] == 0
+    assert Transaction.query.get(expense.id).deleted_at is not None
+
+    client.post(f'/transaction/{expense.id}/restore')
+    db.session.expire_all()
+    assert get_balance(user.id) == 750
+    assert get_transactions_summary(user.id)['total_expense'] == 250
+
+
+def test_cannot_touch_other_users_transactions(client, user):
+    """Edição/exclusão de transação de outro usuário responde 404"""
+    from app import db, User, Transaction
+    other = User(username='outro', password_hash='x')
+    db.session.add(other)
+    db.session.commit()
+    trans = Transaction(user_id=other.id, type='expense', category='Lazer', amount=10.0, date=date.today())
+    db.session.add(trans)
+    db.session.commit()
+
+    assert client.post(f'/transaction/{trans.id}/delete').status_code == 404
+    assert client.get(f'/transaction/{trans.id}/edit').status_code == 404
+
+
+def test_invalid_edit_keeps_transaction_and_rollups(client, user):
+    """Valor, data ou tipo inválidos: mensagem no formulário, nada muda"""
+    from app import db, Transaction
+
+    today = date.today().isoformat()
+    client.post('/add_transaction', data={'type': 'expense', 'category': 'Lazer', 'amount': '250',
+                                          'description': 'cinema', 'date': today})
+    trans = Transaction.query.filter_by(user_id=user.id).one()
+    before = _rollup_state(user.id)
+    valid = {'type': 'expense', 'category': 'Mercado', 'amount': '99.90', 'description': 'x', 'date': today}
+    for field, value, message in (('amount', 'abc', 'Valor inválido'), ('date', '31/12/2024', 'Data inválida'),
+                                  ('due_date', 'amanhã', 'Data inválida'), ('type', 'transfer', 'Tipo inválido')):
+        response = client.post(f'/transaction/{trans.id}/edit', data={**valid, field: value})
+        assert response.status_code == 200 and message in response.get_data(as_text=True)
+        db.session.expire_all()
+        current = Transaction.query.get(trans.id)
+        assert (current.category, current.amount_cents, current.description) == ('Lazer', 25000, 'cinema')
+        assert _rollup_state(user.id) == before
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🧪 TESTE DA API DE TRANSAÇÕES - FINANCE APP
+Paginação por keyset em (date, id), projeção de colunas, filtros e ETag
+"""
+
+from datetime import date, timedelta
+
+
+def _seed(user_id, n=230):
+    from app import db, Transaction
+    db.session.bulk_save_objects([
+        Transaction(user_id=user_id, type='expense' if i % 3 else 'income',
+                    category='Lazer' if i % 2 else 'Mercado', amount=float(i), description=f'item {i}',
+                    # várias transações no mesmo dia para exercitar o desempate por id
+                    date=date(2024, 1, 1) + timedelta(days=i // 4))
+        for i in range(n)
+    ])
+    db.session.commit()
+
+
+def _walk(client, query=''):
+    items, cursor, pages = [], None, 0
+    while True:
+        url = f'/api/transactions?limit=37{query}' + (f'&cursor={cursor}' if cursor else '')
+        page = client.get(url).get_json()
+        items.extend(page['items'])
+        pages += 1
+        cursor = page['next_cursor']
+        if not cursor:
+            return items, pages
+
+
+def test_keyset_pages_cover_everything_once(client, user):
+    """Percorrer todas as páginas devolve cada transação uma vez, em ordem"""
+    from app import Transaction
+    _seed(user.id)
+    items, pages = _walk(client)
+    assert pages == 7
+    expected = Transaction.query.filter_by(user_id=user.id).order_by(
+        Transaction.date.desc(), Transaction.id.desc()).all()
+    assert [i['id'] for i in items] == [t.id for t in expected]
+
+
+def test_rows_without_date_do_not_break_pagination(client, user):
+    """Transação sem data na fronteira da página não derruba o cursor (antes: 500)"""
+    from app import db, Transaction
+    _seed(user.id, n=10)
+    db.session.add(Transaction(user_id=user.id, type='expense', category='Lazer', amount=1.0, date=None))
+    db.session.commit()
+    for limit in (10, 11):
+        response = client.get(f'/api/transactions?limit={limit}')
+        assert response.status_code == 200
+        page = response.get_json()
+        assert len(page['items']) == 10 and page['next_cursor'] is None
+
+
+def test_filters_and_projection(client, user):
+    _seed(user.id)
+    items, _ = _walk(client, '&type=expense&category=Lazer&start=2024-01-10&end=2024-01-31'
+                             '&fields=amount')
+    assert items and all(set(i) == {'id', 'date', 'amount'} for i in items)
+    assert all('2024-01-10' <= i['date'] <= '2024-01-31' for i in items)
+
+    from app import Transaction
+    expected = Transaction.query.filter(
+        Transaction.user_id == user.id, Transaction.type == 'expense', Transaction.category == 'Lazer',
+        Transaction.date >= date(2024, 1, 10), Transaction.date <= date(2024, 1, 31)).count()
+    assert len(items) == expected
+
+    assert client.get('/api/transactions?fields=password').status_code == 400
+    assert client.get('/api/transactions?cursor=%%%').status_code == 400
+    assert client.get('/api/transactions?limit=abc').status_code == 400
+
+
+def test_etag_revalidation(client, user):
+    """Mesma página sem mudanças responde 304; depois de editar, 200"""
+    _seed(user.id, n=5)
+    first = client.get('/api/transactions')
+    etag = first.headers['ETag']
+    assert client.get('/api/transactions', headers={'If-None-Match': etag}).status_code == 304
+
+    transaction_id = first.get_json()['items'][0]['id']
+    client.post(f'/transaction/{transaction_id}/delete')
+    assert client.get('/api/transactions', headers={'If-None-Match': etag}).status_code == 200
+
+
+def test_all_transactions_page(client):
+    response = client.get('/transactions')
+    assert response.status_code == 200
+    assert '/api/transactions' in response.get_data(as_text=True)
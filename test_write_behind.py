@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🧪 TESTE DAS GRAVAÇÕES ADIADAS (WRITE-BEHIND) - FINANCE APP
+Fila limitada, lotes, gancho de desligamento e perfil do conselheiro
+"""
+
+import threading
+import time
+
+from write_behind import WriteBehindQueue
+
+
+def test_queue_batches_rejects_and_flushes_on_stop():
+    batches = []
+    writer = WriteBehindQueue(batches.append, maxsize=3, max_batch=2, flush_interval=60)
+    assert [writer.submit(i) for i in range(4)] == [True, True, True, False]  # cheia: chamador grava na hora
+    assert writer.flush() == 3 and batches == [[0, 1], [2]]
+    writer.submit(3)
+    writer.stop()
+    assert batches[-1] == [3] and not writer.metrics()['running']
+    metrics = writer.metrics()
+    assert (metrics['enqueued'], metrics['written'], metrics['rejected'], metrics['depth']) == (4, 4, 1, 0)
+    assert metrics['max_depth'] == 3 and metrics['capacity'] == 3
+
+
+def test_failed_batch_only_drops_bad_item():
+    written = []
+
+    def flush(items):
+        if 'ruim' in items:
+            raise ValueError('item inválido')
+        written.extend(items)
+
+    writer = WriteBehindQueue(flush, flush_interval=60)
+    for item in ('a', 'ruim', 'b'):
+        writer.submit(item)
+    writer.flush()
+    assert written == ['a', 'b'] and writer.metrics()['failed'] == 1
+    writer.stop()
+
+
+def test_background_thread_drains_queue():
+    done = threading.Event()
+    writer = WriteBehindQueue(lambda items: done.set(), flush_interval=0.01)
+    writer.submit('x')
+    assert done.wait(2)
+    deadline = time.monotonic() + 2
+    while writer.metrics()['written'] < 1 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert writer.metrics()['written'] == 1
+    writer.stop()
+
+
+def test_profile_updates_merged_per_user(client, user, monkeypatch):
+    from app import AiInteraction, AiProfile, advisor_writes, apply_profile_interactions, get_intent_counters
+    for question in ('como economizar?', 'como economizar?', 'onde investir?'):
+        assert client.get('/financial_advisor', query_string={'question': question, 'mode': 'direto'}).status_code == 200
+    advisor_writes.flush()
+
+    profile = AiProfile.query.filter_by(user_id=user.id).one()
+    assert profile.interaction_count == 3 and get_intent_counters(user.id)['investimento'] == 1
+    assert [i.question for i in AiInteraction.query.order_by(AiInteraction.id)] == [
+        'como economizar?', 'como economizar?', 'onde investir?']
+
+    # Em lote é o mesmo que uma interação por vez
+    merged = AiProfile(savings_target_pct=24, emergency_months_target=3)
+    apply_profile_interactions(merged, [(['poupança'], 10.0), (['poupança', 'renda'], -5.0)])
+    assert (merged.savings_target_pct, merged.emergency_months_target, merged.interaction_count) == (25, 6, 2)
+
+    monkeypatch.setenv('ADMIN_USERS', 'teste')
+    metrics = client.get('/admin/advisor-writes').get_json()
+    assert metrics['written'] >= 3 and metrics['depth'] == 0
+
+
+def test_sync_fallback_logs_failed_advisor_write(client, user, monkeypatch, capsys):
+    """Fila desligada e gravação com erro: a resposta sai e a falha fica no log"""
+    import app as app_module
+
+    def failing(records):
+        raise RuntimeError('banco fora')
+    monkeypatch.setattr(app_module, 'advisor_writes', None)
+    monkeypatch.setattr(app_module, 'apply_advisor_writes', failing)
+    response = client.get('/financial_advisor', query_string={'question': 'como economizar?', 'mode': 'direto'})
+    assert response.status_code == 200 and response.get_json()['response']
+    assert 'não gravada(s): banco fora' in capsys.readouterr().out
+
+def test_advisor_writes_update_profiles_in_sql(app_ctx, user):
+    from datetime import datetime
+    from sqlalchemy import text
+    from app import db, AiProfile, User, apply_advisor_writes, ensure_ai_profiles, get_or_create_ai_profile
+    stale = get_or_create_ai_profile(user.id)
+    # Outro worker gravou depois que este leu o perfil
+    db.session.execute(text("UPDATE ai_profiles SET interaction_count = 10, savings_target_pct = 24 "
+                            "WHERE user_id = :u"), {'u': user.id})
+    other = User(username='outro', password_hash='x')
+    db.session.add(other)
+    db.session.commit()
+    # Perfil criado pela requisição antes da fila: o upsert não duplica nem falha
+    ensure_ai_profiles([other.id])
+    ensure_ai_profiles([other.id])
+
+    now = datetime.utcnow()
+    apply_advisor_writes([
+        dict(user_id=uid, question='q', intents=intents, sections=['r'], balance=balance, created_at=now)
+        for uid, intents, balance in ((user.id, ['poupança'], 10.0), (user.id, ['poupança'], -5.0),
+                                      (other.id, ['renda'], 1.0))])
+    db.session.commit()
+    db.session.expire_all()
+
+    profile = AiProfile.query.filter_by(user_id=user.id).one()
+    assert profile is stale
+    assert (profile.interaction_count, profile.savings_target_pct, profile.emergency_months_target) == (12, 25, 6)
+    created = AiProfile.query.filter_by(user_id=other.id).all()
+    assert len(created) == 1
+    assert (created[0].interaction_count, created[0].savings_target_pct, created[0].emergency_months_target) == (1, 20, 3)
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Gravações adiadas (write-behind) fora do caminho da resposta.
+
+`WriteBehindQueue` guarda itens numa fila limitada; uma thread acorda a cada
+`flush_interval` segundos (ou antes, quando a fila junta `max_batch` itens)
+e entrega o que houver, em lotes, para `flush_fn(items)`, que grava tudo com
+um commit só. `submit` nunca bloqueia: com a fila cheia devolve False e o
+chamador grava na hora (sem perder nada).
+
+Se um lote falhar, cada item é refeito sozinho, então só o item com
+problema é descartado (e contado em `failed`). `stop()` (gancho de
+desligamento) grava o que estiver pendente antes de encerrar a thread.
+
+Não depende de Flask: o contexto da aplicação vem de `context_factory`.
+"""
+
+import queue
+import threading
+import time
+from contextlib import nullcontext
+
+
+class WriteBehindQueue:
+    """Fila limitada de escritas gravadas em lote por uma thread."""
+
+    def __init__(self, flush_fn, context_factory=None, maxsize: int = 1000, max_batch: int = 200,
+                 flush_interval: float = 0.5, name: str = 'write-behind'):
+        self._flush_fn = flush_fn
+        self._context_factory = context_factory
+        self.maxsize = maxsize
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.name = name
+        self._queue = queue.Queue(maxsize)
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._flush_lock = threading.Lock()  # um lote por vez, na ordem da fila
+        self._thread_lock = threading.Lock()
+        self._thread = None
+        self._stats_lock = threading.Lock()
+        self.stats = {'enqueued': 0, 'written': 0, 'batches': 0, 'rejected': 0, 'failed': 0,
+                      'max_depth': 0, 'last_batch_size': 0, 'last_flush_ms': 0.0}
+
+    def start(self):
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping.clear()
+                self._thread = threading.Thread(target=self._loop, name=self.name, daemon=True)
+                self._thread.start()
+
+    def submit(self, item) -> bool:
+        """Enfileira sem bloquear; False se a fila estiver cheia."""
+        self.start()
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self._count(rejected=1)
+            return False
+        depth = self._queue.qsize()
+        with self._stats_lock:
+            self.stats['enqueued'] += 1
+            self.stats['max_depth'] = max(self.stats['max_depth'], depth)
+        if depth >= self.max_batch:
+            self._wake.set()
+        return True
+
+    def flush(self) -> int:
+        """Grava tudo o que está na fila, na thread atual; devolve quantos itens saíram."""
+        with self._flush_lock:
+            total = 0
+            while True:
+                batch = self._take(self.max_batch)
+                if not batch:
+                    return total
+                self._write(batch)
+                total += len(batch)
+
+    def stop(self, timeout: float | None = 5):
+        """Gancho de desligamento: grava o pendente e encerra a thread."""
+        with self._thread_lock:
+            thread = self._thread
+        self._stopping.set()
+        self._wake.set()
+        if thread is not None and thread.is_alive():
+            thread.join(timeout)
+        self.flush()
+
+    def metrics(self) -> dict:
+        with self._stats_lock:
+            data = dict(self.stats)
+        data.update(depth=self._queue.qsize(), capacity=self.maxsize,
+                    running=bool(self._thread and self._thread.is_alive()))
+        return data
+
+    def _count(self, **increments):
+        with self._stats_lock:
+            for key, value in increments.items():
+                self.stats[key] += value
+
+    def _take(self, limit: int) -> list:
+        items = []
+        while len(items) < limit:
+            try:
+                items.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return items
+
+    def _loop(self):
+        while not self._stopping.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:  # a thread não pode morrer: o próximo ciclo tenta de novo
+                print(f"❌ {self.name}: falha ao gravar lote: {e}")
+
+    def _write(self, batch: list):
+        started = time.perf_counter()
+        context = self._context_factory() if self._context_factory else nullcontext()
+        with context:
+            try:
+                self._flush_fn(batch)
+            except Exception as e:
+                print(f"⚠️ {self.name}: lote de {len(batch)} itens falhou ({e}); gravando um a um")
+                self._write_one_by_one(batch)
+            else:
+                self._count(written=len(batch), batches=1)
+        with self._stats_lock:
+            self.stats['last_batch_size'] = len(batch)
+            self.stats['last_flush_ms'] = round((time.perf_counter() - started) * 1000, 3)
+
+    def _write_one_by_one(self, batch: list):
+        for item in batch:
+            try:
+                self._flush_fn([item])
+            except Exception as e:
+                print(f"❌ {self.name}: item descartado: {e}")
+                self._count(failed=1)
+            else:
+                self._count(written=1, batches=1)